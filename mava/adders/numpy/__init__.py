@@ -0,0 +1,34 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process NumPy replay tables which can be used in place of Reverb.
+
+The tables, client and dataset let the Reverb adders and the trainers run
+without a Reverb server when the executors and the trainer share a process,
+e.g. in tests or hand written single-process loops. They are not a replay
+backend option of the builders, and they only store fixed shape items, so the
+truncated sequences of `EndBehavior.TRUNCATE` are not supported.
+"""
+
+from mava.adders.numpy.client import NumpyReplayClient, NumpyTrajectoryWriter
+from mava.adders.numpy.dataset import make_numpy_dataset
+from mava.adders.numpy.tables import (
+    MinSize,
+    NumpyReplayTable,
+    Queue,
+    RateLimiter,
+    SampleToInsertRatio,
+    TableSample,
+)
@@ -0,0 +1,289 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process replay client that mimics the Reverb client and trajectory writer.
+
+The Reverb adders only use a small part of the Reverb client API: they create a
+trajectory writer, append steps to it, create items from slices of its history
+and flush it. This module implements that API on top of `NumpyReplayTable`s, so
+the existing adders can write to in-process tables without a Reverb server.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import tree
+
+from mava.adders.numpy.tables import NumpyReplayTable, TableSample
+
+
+class _ColumnView:
+    """A view of the history of a single column of a trajectory writer.
+
+    Mimics `reverb.TrajectoryColumn`: it can be indexed like the history (an
+    integer index selects a single step, a slice selects a sequence of steps) and
+    converted to a numpy array. Like the Reverb history, indices count the steps
+    from the start of the episode, including the steps that are no longer kept.
+    """
+
+    def __init__(self, values: List[Any], squeeze: bool = False, offset: int = 0):
+        """Initialise the column view.
+
+        Args:
+            values: values of the column, one per kept step. Steps in which the
+                column was not written hold None.
+            squeeze: whether the view refers to a single step.
+            offset: number of steps of the episode before the first kept step.
+        """
+        self._values = values
+        self._squeeze = squeeze
+        self._offset = offset
+
+    def __len__(self) -> int:
+        """Number of steps in the view."""
+        return self._offset + len(self._values)
+
+    def __getitem__(self, index: Union[int, slice]) -> "_ColumnView":
+        """Select a single step or a sequence of steps."""
+        if self._squeeze:
+            raise IndexError("A single step column can not be indexed.")
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise IndexError("Only contiguous steps can be selected.")
+            if stop > start and start < self._offset:
+                raise IndexError("The selected steps are no longer kept.")
+            return _ColumnView(
+                self._values[max(start - self._offset, 0) : stop - self._offset]
+            )
+        if index < 0:
+            index += len(self)
+        if not self._offset <= index < len(self):
+            raise IndexError(f"Step {index} is not kept in the history.")
+        return _ColumnView([self._values[index - self._offset]], squeeze=True)
+
+    def numpy(self) -> np.ndarray:
+        """Values of the column, stacked along a leading time axis."""
+        if not self._values:
+            raise ValueError("Can not create an item from an empty column.")
+        if any(value is None for value in self._values):
+            raise ValueError("Can not create an item from a column with missing steps.")
+        if self._squeeze:
+            return np.asarray(self._values[0])
+        return np.stack(self._values)
+
+
+class NumpyTrajectoryWriter:
+    """Trajectory writer which inserts items into in-process tables.
+
+    Steps are buffered as one list per column (leaf of the appended data),
+    aligned by step. Only the last `num_keep_alive_refs` steps are kept, which
+    is all the adders ever reference.
+    """
+
+    def __init__(self, tables: Dict[str, NumpyReplayTable], num_keep_alive_refs: int):
+        """Initialise the trajectory writer.
+
+        Args:
+            tables: tables, by name, that items can be created in.
+            num_keep_alive_refs: number of steps to keep in the history.
+        """
+        self._tables = tables
+        self._num_keep_alive_refs = num_keep_alive_refs
+
+        # For every top level key of the appended steps, its structure and the
+        # values of each of its leaves.
+        self._columns: Dict[str, Tuple[Any, List[List[Any]]]] = {}
+        self._num_rows = 0
+        self._num_dropped_rows = 0
+        self._partial_step_open = False
+        self._episode_steps = 0
+
+    @property
+    def episode_steps(self) -> int:
+        """Number of completed steps appended in the current episode."""
+        return self._episode_steps
+
+    @property
+    def history(self) -> Dict[str, Any]:
+        """Columns of the buffered steps, including the open partial step."""
+        return {
+            key: tree.unflatten_as(
+                structure,
+                [
+                    _ColumnView(values, offset=self._num_dropped_rows)
+                    for values in leaf_values
+                ],
+            )
+            for key, (structure, leaf_values) in self._columns.items()
+        }
+
+    def append(self, data: Dict[str, Any], partial_step: bool = False) -> None:
+        """Append data to the current step.
+
+        Args:
+            data: mapping from column names to (nested) values.
+            partial_step: whether the step is left open, so that more columns
+                can be added to it by the next append.
+        """
+        if not self._partial_step_open:
+            # Start a new step.
+            for _, leaf_values in self._columns.values():
+                for values in leaf_values:
+                    values.append(None)
+            self._num_rows += 1
+
+        for key, value in data.items():
+            leaves = tree.flatten(value)
+            if key not in self._columns:
+                self._columns[key] = (
+                    value,
+                    [[None] * self._num_rows for _ in leaves],
+                )
+            _, leaf_values = self._columns[key]
+            for values, leaf in zip(leaf_values, leaves):
+                if values[-1] is not None:
+                    raise ValueError(
+                        f"Column {key} has already been written in this step."
+                    )
+                values[-1] = leaf
+
+        self._partial_step_open = partial_step
+        if not partial_step:
+            self._episode_steps += 1
+
+        if self._num_rows > self._num_keep_alive_refs:
+            num_dropped = self._num_rows - self._num_keep_alive_refs
+            for _, leaf_values in self._columns.values():
+                for values in leaf_values:
+                    del values[:num_dropped]
+            self._num_rows = self._num_keep_alive_refs
+            self._num_dropped_rows += num_dropped
+
+    def create_item(self, table: str, priority: float, trajectory: Any) -> None:
+        """Insert an item, built from columns of the history, into a table.
+
+        Args:
+            table: name of the table.
+            priority: priority of the item.
+            trajectory: nested structure of columns taken from `history`.
+        """
+        self._tables[table].insert(
+            tree.map_structure(lambda column: column.numpy(), trajectory), priority
+        )
+
+    def configure(
+        self,
+        path: Tuple[Union[int, str], ...],
+        *,
+        num_keep_alive_refs: int,
+        max_chunk_length: Optional[int],
+    ) -> None:
+        """Steps are not chunked, only the referenced steps are ever stored."""
+
+    def flush(
+        self, block_until_num_items: int = 0, timeout_ms: Optional[int] = None
+    ) -> None:
+        """Items are inserted when created, so there is nothing to flush."""
+
+    def end_episode(
+        self, clear_buffers: bool = True, timeout_ms: Optional[int] = None
+    ) -> None:
+        """End the current episode and clear the history.
+
+        Args:
+            clear_buffers: kept for compatibility with the Reverb writer, the
+                history is always cleared.
+            timeout_ms: kept for compatibility with the Reverb writer.
+        """
+        self._columns = {}
+        self._num_rows = 0
+        self._num_dropped_rows = 0
+        self._partial_step_open = False
+        self._episode_steps = 0
+
+    def close(self) -> None:
+        """Close the writer."""
+        self.end_episode()
+
+
+class NumpyReplayClient:
+    """Client for in-process `NumpyReplayTable`s.
+
+    It can be passed to the Reverb adders in place of a `reverb.Client`.
+    """
+
+    def __init__(self, tables: Sequence[NumpyReplayTable]):
+        """Initialise the client.
+
+        Args:
+            tables: tables served by the client.
+        """
+        self._tables = {table.name: table for table in tables}
+
+    @property
+    def tables(self) -> Dict[str, NumpyReplayTable]:
+        """Tables served by the client, by name."""
+        return self._tables
+
+    def trajectory_writer(
+        self,
+        num_keep_alive_refs: int,
+        get_signature_timeout_ms: Optional[int] = None,
+    ) -> NumpyTrajectoryWriter:
+        """Create a trajectory writer for the tables of this client.
+
+        Args:
+            num_keep_alive_refs: number of steps the writer keeps in its history.
+            get_signature_timeout_ms: kept for compatibility with the Reverb
+                client.
+
+        Returns:
+            trajectory writer.
+        """
+        return NumpyTrajectoryWriter(self._tables, num_keep_alive_refs)
+
+    def sample(
+        self, table: str, num_samples: int = 1, timeout: Optional[float] = None
+    ) -> TableSample:
+        """Sample a batch of items from a table.
+
+        Args:
+            table: name of the table.
+            num_samples: number of items to sample.
+            timeout: maximum number of seconds to wait for the rate limiter.
+
+        Returns:
+            the sampled items, stacked along a leading batch axis.
+        """
+        return self._tables[table].sample(num_samples, timeout=timeout)
+
+    def mutate_priorities(
+        self,
+        table: str,
+        updates: Optional[Dict[int, float]] = None,
+        deletes: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Update the priorities of items in a table.
+
+        Args:
+            table: name of the table.
+            updates: mapping from item keys to their new priority.
+            deletes: not supported, items are only removed by the tables.
+        """
+        if deletes:
+            raise NotImplementedError("Deleting items is not supported.")
+        if updates:
+            self._tables[table].mutate_priorities(updates)
@@ -0,0 +1,94 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Datasets that sample from in-process NumPy replay tables."""
+
+from typing import Iterator, Optional
+
+import numpy as np
+import reverb
+import tensorflow as tf
+import tree
+
+from mava.adders.numpy.tables import NumpyReplayTable, TableSample
+
+# Map from the fields of reverb.SampleInfo to the fields of a table sample.
+_INFO_FIELDS = {
+    "key": "keys",
+    "probability": "probabilities",
+    "priority": "priorities",
+}
+
+
+def _make_info(sample: TableSample, batch_size: int) -> reverb.SampleInfo:
+    """Convert the sample metadata to a batched reverb.SampleInfo."""
+    info = {}
+    for field, dtype in zip(reverb.SampleInfo._fields, reverb.SampleInfo.tf_dtypes()):
+        if field in _INFO_FIELDS:
+            value = getattr(sample, _INFO_FIELDS[field])
+        elif field == "table_size":
+            value = np.full(batch_size, sample.table_size)
+        else:
+            # E.g. the number of times an item was sampled, which is not tracked.
+            value = np.zeros(batch_size)
+        info[field] = np.asarray(value, dtype=dtype.as_numpy_dtype)
+    return reverb.SampleInfo(**info)
+
+
+def make_numpy_dataset(
+    table: NumpyReplayTable,
+    batch_size: int,
+    prefetch_size: Optional[int] = None,
+) -> tf.data.Dataset:
+    """Create a dataset of batches sampled from a NumPy replay table.
+
+    Batches are `reverb.ReplaySample`s with the same structure as the batches of
+    a batched `reverb.TrajectoryDataset`, so the trainers can consume them
+    unchanged.
+
+    Args:
+        table: table to sample from. Its signature must be set.
+        batch_size: number of items per batch.
+        prefetch_size: number of batches to prefetch. Nothing is prefetched by
+            default, since the table is usually filled by the same process.
+
+    Returns:
+        dataset of batched replay samples.
+    """
+    if table.signature is None:
+        raise ValueError(f"Table {table.name} needs a signature to create a dataset.")
+
+    info_spec = reverb.SampleInfo(
+        *[tf.TensorSpec([batch_size], dtype) for dtype in reverb.SampleInfo.tf_dtypes()]
+    )
+    data_spec = tree.map_structure(
+        lambda spec: tf.TensorSpec([batch_size, *spec.shape], spec.dtype),
+        table.signature,
+    )
+
+    def generator() -> Iterator[reverb.ReplaySample]:
+        while True:
+            sample = table.sample(batch_size)
+            yield reverb.ReplaySample(
+                info=_make_info(sample, batch_size), data=sample.data
+            )
+
+    dataset = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=reverb.ReplaySample(info=info_spec, data=data_spec),
+    )
+    if prefetch_size:
+        dataset = dataset.prefetch(prefetch_size)
+    return dataset
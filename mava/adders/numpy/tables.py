@@ -0,0 +1,388 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process NumPy replay tables with rate limiting."""
+
+import abc
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import tree
+
+
+class RateLimiter(abc.ABC):
+    """Controls when items can be inserted into and sampled from a table."""
+
+    @abc.abstractmethod
+    def can_insert(self, size: int, num_inserts: int, num_samples: int) -> bool:
+        """Whether an item can be inserted.
+
+        Args:
+            size: current number of items in the table.
+            num_inserts: total number of inserts into the table.
+            num_samples: total number of items sampled from the table.
+
+        Returns:
+            True if an item can be inserted.
+        """
+
+    @abc.abstractmethod
+    def can_sample(
+        self, size: int, num_inserts: int, num_samples: int, num_items: int
+    ) -> bool:
+        """Whether a number of items can be sampled.
+
+        Args:
+            size: current number of items in the table.
+            num_inserts: total number of inserts into the table.
+            num_samples: total number of items sampled from the table.
+            num_items: number of items that will be sampled.
+
+        Returns:
+            True if the items can be sampled.
+        """
+
+
+class MinSize(RateLimiter):
+    """Block sampling until the table holds a minimum number of items."""
+
+    def __init__(self, min_size_to_sample: int):
+        """Initialise the rate limiter.
+
+        Args:
+            min_size_to_sample: minimum number of items in the table before
+                sampling is allowed.
+        """
+        self._min_size_to_sample = min_size_to_sample
+
+    def can_insert(self, size: int, num_inserts: int, num_samples: int) -> bool:
+        """Inserts are never blocked."""
+        return True
+
+    def can_sample(
+        self, size: int, num_inserts: int, num_samples: int, num_items: int
+    ) -> bool:
+        """Sample once the minimum size is reached."""
+        return size >= self._min_size_to_sample
+
+
+class SampleToInsertRatio(RateLimiter):
+    """Keep the ratio of samples to inserts close to a target.
+
+    Mirrors `reverb.rate_limiters.SampleToInsertRatio`: once the table holds
+    `min_size_to_sample` items, `num_inserts * samples_per_insert - num_samples`
+    is kept within `error_buffer` of `min_size_to_sample * samples_per_insert`.
+    """
+
+    def __init__(
+        self, samples_per_insert: float, min_size_to_sample: int, error_buffer: float
+    ):
+        """Initialise the rate limiter.
+
+        Args:
+            samples_per_insert: target number of times each item is sampled.
+            min_size_to_sample: minimum number of items in the table before
+                sampling is allowed.
+            error_buffer: allowed deviation from the target ratio, in samples.
+        """
+        self._samples_per_insert = samples_per_insert
+        self._min_size_to_sample = min_size_to_sample
+        offset = samples_per_insert * min_size_to_sample
+        self._min_diff = offset - error_buffer
+        self._max_diff = offset + error_buffer
+
+    def _diff(self, num_inserts: int, num_samples: int) -> float:
+        return num_inserts * self._samples_per_insert - num_samples
+
+    def can_insert(self, size: int, num_inserts: int, num_samples: int) -> bool:
+        """Insert while the trainer keeps up with the target ratio."""
+        if num_inserts < self._min_size_to_sample:
+            return True
+        return (
+            self._diff(num_inserts, num_samples) + self._samples_per_insert
+            <= self._max_diff
+        )
+
+    def can_sample(
+        self, size: int, num_inserts: int, num_samples: int, num_items: int
+    ) -> bool:
+        """Sample while the executors keep up with the target ratio."""
+        if size < self._min_size_to_sample:
+            return False
+        return self._diff(num_inserts, num_samples) - num_items >= self._min_diff
+
+
+class Queue(RateLimiter):
+    """Block inserts when the queue is full and samples when it is empty."""
+
+    def __init__(self, size: int):
+        """Initialise the rate limiter.
+
+        Args:
+            size: maximum number of items in the queue.
+        """
+        self._size = size
+
+    def can_insert(self, size: int, num_inserts: int, num_samples: int) -> bool:
+        """Insert while the queue is not full."""
+        return size < self._size
+
+    def can_sample(
+        self, size: int, num_inserts: int, num_samples: int, num_items: int
+    ) -> bool:
+        """Sample when enough items are queued."""
+        return size >= num_items
+
+
+class TableSample(NamedTuple):
+    """A batch of items sampled from a table."""
+
+    keys: np.ndarray
+    probabilities: np.ndarray
+    table_size: int
+    priorities: np.ndarray
+    data: Any
+
+
+class NumpyReplayTable:
+    """A replay table that stores items in preallocated NumPy ring buffers.
+
+    Every leaf of the item structure is stored in its own array with a leading
+    item axis. Once the table is full the oldest items are overwritten (FIFO
+    removal). Items are sampled uniformly, in proportion to their priority or in
+    FIFO order, in which case they are removed from the table once sampled (like
+    `reverb.Table.queue`).
+    Every item must have the shapes of the signature, or of the first item, so
+    variable length items, e.g. the truncated sequences of
+    `EndBehavior.TRUNCATE`, can not be stored.
+    Inserts and samples block until the rate limiter allows them, the
+    non-blocking `can_insert` and `can_sample` checks can be used to interleave
+    acting and training in a single process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        sampler: str = "uniform",
+        rate_limiter: Optional[RateLimiter] = None,
+        signature: Any = None,
+        seed: Optional[int] = None,
+        priority_exponent: float = 1.0,
+    ):
+        """Initialise the table.
+
+        Args:
+            name: name of the table.
+            max_size: maximum number of items in the table.
+            sampler: either "uniform", "prioritized" or "fifo".
+            rate_limiter: rate limiter of the table. Defaults to MinSize(1).
+            signature: optional nested structure of tf.TensorSpec describing an
+                item. If not given, the structure of the first item is used.
+            seed: seed for uniform and prioritized sampling.
+            priority_exponent: exponent applied to the priorities by the
+                prioritized sampler, see `reverb.selectors.Prioritized`.
+        """
+        if sampler not in ("uniform", "prioritized", "fifo"):
+            raise ValueError(
+                f"Sampler {sampler} not recognised. Should be 'uniform', "
+                "'prioritized' or 'fifo'."
+            )
+        self.name = name
+        self.signature = signature
+        self._max_size = max_size
+        self._sampler = sampler
+        self._priority_exponent = priority_exponent
+        self._rate_limiter = rate_limiter if rate_limiter else MinSize(1)
+        self._rng = np.random.default_rng(seed)
+
+        self._structure: Any = signature
+        self._storage: Optional[List[np.ndarray]] = None
+        self._keys = np.zeros(max_size, dtype=np.uint64)
+        self._priorities = np.zeros(max_size, dtype=np.float64)
+        self._insert_index = 0
+        self._size = 0
+        self._num_inserts = 0
+        self._num_samples = 0
+        self._next_key = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def queue(
+        cls, name: str, max_size: int, signature: Any = None
+    ) -> "NumpyReplayTable":
+        """Create a FIFO queue, see `reverb.Table.queue`.
+
+        Args:
+            name: name of the table.
+            max_size: maximum number of items in the queue.
+            signature: optional nested structure of tf.TensorSpec describing an
+                item.
+
+        Returns:
+            table which samples every item exactly once, in insertion order.
+        """
+        return cls(
+            name=name,
+            max_size=max_size,
+            sampler="fifo",
+            rate_limiter=Queue(max_size),
+            signature=signature,
+        )
+
+    def size(self) -> int:
+        """Current number of items in the table."""
+        return self._size
+
+    def can_insert(self) -> bool:
+        """Whether an item can be inserted without blocking."""
+        return self._rate_limiter.can_insert(
+            self._size, self._num_inserts, self._num_samples
+        )
+
+    def can_sample(self, num_items: int = 1) -> bool:
+        """Whether a number of items can be sampled without blocking."""
+        if self._size == 0 or (self._sampler == "fifo" and self._size < num_items):
+            return False
+        return self._rate_limiter.can_sample(
+            self._size, self._num_inserts, self._num_samples, num_items
+        )
+
+    def _allocate(self, item: Any) -> None:
+        """Allocate the ring buffers from the signature or the first item."""
+        if self._structure is None:
+            self._structure = item
+        if self.signature is not None:
+            leaves = [
+                (tuple(spec.shape), spec.dtype.as_numpy_dtype)
+                for spec in tree.flatten(self.signature)
+            ]
+        else:
+            leaves = [
+                (np.shape(leaf), np.asarray(leaf).dtype) for leaf in tree.flatten(item)
+            ]
+        self._storage = [
+            np.zeros((self._max_size, *shape), dtype=dtype) for shape, dtype in leaves
+        ]
+
+    def insert(
+        self, item: Any, priority: float = 1.0, timeout: Optional[float] = None
+    ) -> None:
+        """Insert an item, blocking until the rate limiter allows it.
+
+        Args:
+            item: nested structure of arrays.
+            priority: priority of the item.
+            timeout: maximum number of seconds to wait.
+
+        Raises:
+            TimeoutError: if the item could not be inserted in time.
+            ValueError: if the item does not have the shapes of the table items.
+        """
+        with self._condition:
+            if not self._condition.wait_for(self.can_insert, timeout):
+                raise TimeoutError(f"Timed out inserting into table {self.name}.")
+
+            if self._storage is None:
+                self._allocate(item)
+
+            leaves = tree.flatten(item)
+            for buffer, leaf in zip(self._storage, leaves):  # type: ignore
+                if np.shape(leaf) != buffer.shape[1:]:
+                    raise ValueError(
+                        f"Table {self.name} stores items of shape {buffer.shape[1:]}, "
+                        f"got {np.shape(leaf)}. Variable length items are not "
+                        "supported."
+                    )
+
+            index = self._insert_index
+            for buffer, leaf in zip(self._storage, leaves):  # type: ignore
+                buffer[index] = leaf
+            self._keys[index] = self._next_key
+            self._priorities[index] = priority
+
+            self._next_key += 1
+            self._insert_index = (index + 1) % self._max_size
+            self._size = min(self._size + 1, self._max_size)
+            self._num_inserts += 1
+            self._condition.notify_all()
+
+    def sample(self, num_items: int, timeout: Optional[float] = None) -> TableSample:
+        """Sample a batch of items, blocking until the rate limiter allows it.
+
+        Args:
+            num_items: number of items to sample.
+            timeout: maximum number of seconds to wait.
+
+        Raises:
+            TimeoutError: if no items could be sampled in time.
+
+        Returns:
+            the sampled items, stacked along a leading batch axis.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.can_sample(num_items), timeout
+            ):
+                raise TimeoutError(f"Timed out sampling from table {self.name}.")
+
+            size = self._size
+            oldest = (self._insert_index - size) % self._max_size
+            if self._sampler == "uniform":
+                offsets = self._rng.integers(0, size, size=num_items)
+                probabilities = np.full(num_items, 1.0 / size)
+            elif self._sampler == "prioritized":
+                weights = (
+                    self._priorities[(oldest + np.arange(size)) % self._max_size]
+                    ** self._priority_exponent
+                )
+                weights = weights / np.sum(weights)
+                offsets = self._rng.choice(size, size=num_items, p=weights)
+                probabilities = weights[offsets]
+            else:
+                offsets = np.arange(num_items)
+                probabilities = np.ones(num_items)
+                # Sampled items are removed from the queue.
+                self._size -= num_items
+            indices = (oldest + offsets) % self._max_size
+
+            data = [buffer[indices] for buffer in self._storage]  # type: ignore
+            sample = TableSample(
+                keys=self._keys[indices],
+                probabilities=probabilities,
+                table_size=size,
+                priorities=self._priorities[indices],
+                data=tree.unflatten_as(self._structure, data),
+            )
+            self._num_samples += num_items
+            self._condition.notify_all()
+            return sample
+
+    def mutate_priorities(self, updates: Dict[int, float]) -> None:
+        """Update the priorities of items, see `reverb.Client.mutate_priorities`.
+
+        Keys of items which are no longer in the table are ignored.
+
+        Args:
+            updates: mapping from item keys to their new priority.
+        """
+        with self._condition:
+            for key, priority in updates.items():
+                # Keys are assigned in insertion order, so an item is stored at
+                # its key modulo the size of the ring buffer.
+                index = key % self._max_size
+                if self._keys[index] == key and self._num_inserts > key:
+                    self._priorities[index] = priority
@@ -17,12 +17,21 @@
 
 
 from mava.adders.reverb.base import (
+    ColumnCompression,
+    DEFAULT_EXTRAS_STORAGE_POLICIES,
     DEFAULT_PRIORITY_TABLE,
+    ExtrasStoragePolicy,
+    FlushPolicy,
     PriorityFn,
     PriorityFnInput,
     ReverbParallelAdder,
     Step,
 )
+from mava.adders.reverb.dataset import ReverbDatasetConfig, make_reverb_dataset
 from mava.adders.reverb.episode import ParallelEpisodeAdder
-from mava.adders.reverb.sequence import ParallelSequenceAdder
+from mava.adders.reverb.sequence import (
+    ParallelNStepSequenceAdder,
+    ParallelSequenceAdder,
+)
+from mava.adders.reverb.stacked import StackedAgentsAdder
 from mava.adders.reverb.transition import ParallelNStepTransitionAdder
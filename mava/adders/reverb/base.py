@@ -15,7 +15,9 @@
 
 """Adders that use Reverb (github.com/deepmind/reverb) as a backend."""
 
-import copy
+import dataclasses
+import time
+from enum import Enum
 from typing import (
     Any,
     Callable,
@@ -25,6 +27,7 @@ from typing import (
     Mapping,
     NamedTuple,
     Optional,
+    Set,
     Tuple,
     Union,
 )
@@ -70,6 +73,78 @@ class PriorityFnInput(NamedTuple):
     extras: Dict[str, types.NestedArray]
 
 
+@dataclasses.dataclass
+class FlushPolicy:
+    """Determines how often an adder waits for its items to reach the replay tables.
+
+    Items are streamed to the replay server in the background as soon as they
+    are created and the trajectory writer keeps track of which of them have
+    been acknowledged. Flushing blocks until at most `max_in_flight_items`
+    items are still waiting for an acknowledgement. Flushing less often lets
+    the executor run ahead of the replay server, at the cost of more data in
+    flight. A flush happens as soon as any of the set conditions is met and
+    always at the end of an episode. The default flushes after every item.
+
+    Args:
+        every_n_items: flush after this many items were created.
+        max_bytes: flush once this many bytes were appended to the writer since
+            the last flush.
+        max_seconds: flush once this many seconds passed since the last flush.
+    """
+
+    every_n_items: Optional[int] = 1
+    max_bytes: Optional[int] = None
+    max_seconds: Optional[float] = None
+
+
+class ExtrasStoragePolicy(Enum):
+    """Determines how an extras field is stored in the items written to replay.
+
+    per_step: the field is stored for every step of an item.
+    first_of_item: only the value at the first step of an item is stored, with
+        a time dimension of length one. The trainers only read the recurrent
+        states at the start of a sequence, so this is used for core_states.
+    per_episode: the field is constant within an episode. The value passed to
+        `add_first` is used for the whole episode and is stored like a
+        first_of_item field. This is used for network_int_keys.
+    """
+
+    per_step = "per_step"
+    first_of_item = "first_of_item"
+    per_episode = "per_episode"
+
+
+DEFAULT_EXTRAS_STORAGE_POLICIES = {
+    "core_states": ExtrasStoragePolicy.first_of_item,
+    "network_int_keys": ExtrasStoragePolicy.per_episode,
+}
+
+
+@dataclasses.dataclass
+class ColumnCompression:
+    """Determines how a column of the trajectory writer is stored in replay.
+
+    The columns are the fields appended to the writer, e.g. observations,
+    actions or extras. Reverb compresses the steps of a column in chunks, and
+    a chunk is kept in memory as long as an item references any of its steps.
+
+    Args:
+        max_chunk_length: number of steps compressed together. Longer chunks
+            compress correlated steps, e.g. consecutive frames, better, but more
+            steps are sent and kept for items that only reference a part of a
+            chunk. It is capped to the number of steps kept by the writer.
+            Defaults to None, which lets Reverb tune the chunk length.
+        uint8: store the values as uint8. This is meant for images that were
+            converted to floats by preprocessing, e.g. supersuit.dtype_v0, and
+            takes a quarter of the memory of float32 values. The values must be
+            integers between 0 and 255. The sampled values are cast back to
+            float32 by `utils.restore_uint8_columns`.
+    """
+
+    max_chunk_length: Optional[int] = None
+    uint8: bool = False
+
+
 # Define the type of a priority function and the mapping from table to function.
 PriorityFn = Callable[["PriorityFnInput"], float]
 PriorityFnMapping = Mapping[str, Optional[PriorityFn]]
@@ -90,28 +165,106 @@ def spec_like_to_tensor_spec(
     return tf.TensorSpec.from_spec(spec, name="/".join(str(p) for p in paths))
 
 
-def get_trajectory_net_agents(
-    trajectory: Union[Trajectory, mava_types.Transition],
+# A routing plan maps each table to the items that are written to it for a
+# given network assignment. Each item is a list of (agent slot, source agent)
+# pairs, i.e. the source agent's experience is written to that agent slot.
+RoutingPlan = Dict[str, List[List[Tuple[str, str]]]]
+
+
+def make_table_routing_plan(
     trajectory_net_keys: Dict[str, str],
-) -> Tuple[List, Dict[str, List]]:
-    """Maps network_keys to a list of agents using that specific network.
+    table_network_config: Dict[str, List],
+) -> RoutingPlan:
+    """Compute which agents are written to which table and in which slots.
+
+    Each table represents experience used by each of the trainers. For every
+    table we look for groups of agents that use exactly the networks in the
+    table's specification (in order). Every group that is found becomes one
+    item, with the group's agents mapped to the first (sorted) agent slots.
 
     Args:
-        trajectory: Episode experience recorded by
-        the adders.
-        trajectory_net_keys: The network_keys used by each agent in the trajectory.
+        trajectory_net_keys: The network_keys used by each agent in the episode.
+        table_network_config: A dictionary mapping table names to lists of
+            network names.
 
     Returns:
-        agents: A sorted list of all the agent_keys.
-        agents_per_network: A dictionary that maps network_keys to
-        a list of agents using that specific network.
+        routing plan for every table in table_network_config.
     """
-    agents = sort_str_num(trajectory.actions.keys())
+    agents = sort_str_num(trajectory_net_keys.keys())
     unique_nets = sort_str_num(set(trajectory_net_keys.values()))
     agents_per_network: Dict[str, List] = {key: [] for key in unique_nets}
     for agent in agents:
         agents_per_network[trajectory_net_keys[agent]].append(agent)
-    return agents, agents_per_network
+
+    plan: RoutingPlan = {}
+    for table, table_net_keys in table_network_config.items():
+        # Each table starts with a fresh copy of all the agents and removes
+        # agents as it finds matches for its network specification.
+        remaining_agents = {
+            net_key: list(net_agents)
+            for net_key, net_agents in agents_per_network.items()
+        }
+        plan[table] = []
+        while table_net_keys:
+            item_agents = []
+            for net_key in table_net_keys:
+                if not remaining_agents.get(net_key):
+                    break
+                item_agents.append(remaining_agents[net_key].pop())
+            if len(item_agents) < len(table_net_keys):
+                break
+            plan[table].append(list(zip(agents, item_agents)))
+    return plan
+
+
+def route_trajectory(
+    trajectory: Union[Trajectory, mava_types.Transition],
+    item_plan: List[Tuple[str, str]],
+) -> Union[Trajectory, mava_types.Transition]:
+    """Create a Step/Transition with only the agents of one item of a plan.
+
+    The trajectory holds references to the columns that were appended to the
+    Reverb trajectory writer. Routing only moves these references to other
+    agent slots, so every agent's data is sent to the replay server once, no
+    matter how many tables (or items of one table) reference it.
+
+    Args:
+        trajectory: experience of all the agents.
+        item_plan: (agent slot, source agent) pairs of the item.
+
+    Returns:
+        the experience of the item's agents, stored in their agent slots.
+    """
+
+    def route_agents(values: Dict[str, Any]) -> Dict[str, Any]:
+        return {slot: values[agent] for slot, agent in item_plan}
+
+    def route_extras(extras: Any) -> Any:
+        # Agent-keyed extras are routed, the rest (e.g. environment states)
+        # are shared by all the agents.
+        if type(extras) is not dict:
+            return extras
+        routed = {}
+        for key, value in extras.items():
+            if type(value) is dict and item_plan[0][1] in value:
+                routed[key] = route_agents(value)
+            else:
+                routed[key] = value
+        return routed
+
+    fields = dict(
+        observations=route_agents(trajectory.observations),
+        actions=route_agents(trajectory.actions),
+        rewards=route_agents(trajectory.rewards),
+        discounts=route_agents(trajectory.discounts),
+        extras=route_extras(trajectory.extras),
+    )
+    if type(trajectory) == mava_types.Transition:
+        fields["next_observations"] = route_agents(
+            trajectory.next_observations  # type: ignore
+        )
+        fields["next_extras"] = route_extras(trajectory.next_extras)  # type: ignore
+    return trajectory._replace(**fields)
 
 
 class ReverbParallelAdder(ReverbAdder, ParallelAdder):
@@ -126,6 +279,9 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
         priority_fns: Optional[PriorityFnMapping] = None,
         get_signature_timeout_ms: int = 300_000,
         use_next_extras: bool = True,
+        flush_policy: Optional[FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, ExtrasStoragePolicy]] = None,
+        column_compression: Optional[Dict[str, ColumnCompression]] = None,
     ):
         """Reverb Base Adder.
 
@@ -144,7 +300,26 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
                 signature. Defaults to 300_000.
             use_next_extras (bool, optional): Whether to use extras or not. Defaults to
                 True.
+            flush_policy (Optional[FlushPolicy], optional): When to wait for the
+                created items to be written. Defaults to flushing after every item.
+            extras_storage_policies (Optional[Dict[str, ExtrasStoragePolicy]],
+                optional): How each extras field is stored in the items. Fields
+                that are not listed are stored for every step. Defaults to None.
+            column_compression (Optional[Dict[str, ColumnCompression]], optional):
+                How each column of the writer, e.g. observations, is stored.
+                Defaults to None.
         """
+        # Set before initialising the ReverbAdder, which might reset the adder.
+        self._flush_policy = flush_policy if flush_policy else FlushPolicy()
+        self._items_since_flush = 0
+        self._bytes_since_flush = 0
+        self._last_flush_time = time.time()
+        self._flush_stats = {
+            "adder_items_created": 0,
+            "adder_flushes": 0,
+            "adder_flush_blocked_time": 0.0,
+        }
+
         super().__init__(
             client=client,
             max_sequence_length=max_sequence_length,
@@ -154,6 +329,219 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
             get_signature_timeout_ms=get_signature_timeout_ms,
         )
         self._use_next_extras = use_next_extras
+        self._routing_plan: Optional[RoutingPlan] = None
+
+        self._extras_storage_policies = (
+            extras_storage_policies if extras_storage_policies else {}
+        )
+        # Extras fields of which only the first step of an item is stored.
+        self._sparse_extras_keys = [
+            key
+            for key, policy in self._extras_storage_policies.items()
+            if policy is not ExtrasStoragePolicy.per_step
+        ]
+        self._episode_extras: Dict[str, types.NestedArray] = {}
+        self._sparse_columns_configured = False
+
+        self._column_compression = column_compression if column_compression else {}
+        self._uint8_columns = [
+            key
+            for key, compression in self._column_compression.items()
+            if compression.uint8
+        ]
+        self._configured_columns: Set[str] = set()
+
+    def _count_bytes(self, data: Any) -> None:
+        """Track the number of bytes appended to the writer since the last flush.
+
+        Args:
+            data: data appended to the trajectory writer.
+        """
+        if self._flush_policy.max_bytes is not None:
+            self._bytes_since_flush += sum(
+                np.asarray(leaf).nbytes for leaf in tree.flatten(data)
+            )
+
+    def _flush(self) -> None:
+        """Wait until at most max_in_flight_items items are not acknowledged."""
+        start_time = time.time()
+        self._writer.flush(self._max_in_flight_items)
+        self._last_flush_time = time.time()
+        self._flush_stats["adder_flushes"] += 1
+        self._flush_stats["adder_flush_blocked_time"] += (
+            self._last_flush_time - start_time
+        )
+        self._items_since_flush = 0
+        self._bytes_since_flush = 0
+
+    def _maybe_flush(self, num_items: int) -> None:
+        """Flush the writer if the flush policy requires it.
+
+        Args:
+            num_items: number of items that were just created.
+        """
+        self._items_since_flush += num_items
+        self._flush_stats["adder_items_created"] += num_items
+
+        policy = self._flush_policy
+        if (
+            (
+                policy.every_n_items is not None
+                and self._items_since_flush >= policy.every_n_items
+            )
+            or (
+                policy.max_bytes is not None
+                and self._bytes_since_flush >= policy.max_bytes
+            )
+            or (
+                policy.max_seconds is not None
+                and time.time() - self._last_flush_time >= policy.max_seconds
+            )
+        ):
+            self._flush()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return statistics about the items written by this adder.
+
+        Returns:
+            number of created items, number of flushes and the total time (in
+            seconds) spent blocked waiting for the replay server.
+        """
+        return dict(self._flush_stats)
+
+    def reset(self, timeout_ms: Optional[int] = None) -> None:
+        """Resets the adder's buffer, waiting for all items to be written."""
+        start_time = time.time()
+        super().reset(timeout_ms=timeout_ms)
+        self._last_flush_time = time.time()
+        self._flush_stats["adder_flush_blocked_time"] += (
+            self._last_flush_time - start_time
+        )
+        self._items_since_flush = 0
+        self._bytes_since_flush = 0
+
+    def _compress_columns(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the column compression to a step before it is appended.
+
+        The chunk lengths are configured the first time a column is appended
+        in an episode, as the writer might be replaced between episodes.
+
+        Args:
+            step: columns that are about to be appended to the writer.
+
+        Returns:
+            the step, with the uint8 columns cast.
+        """
+        if not self._column_compression:
+            return step
+        for key, value in step.items():
+            compression = self._column_compression.get(key)
+            if (
+                compression is None
+                or compression.max_chunk_length is None
+                or key in self._configured_columns
+            ):
+                continue
+            for path, _ in tree.flatten_with_path(value):
+                self._writer.configure(
+                    (key, *path),
+                    num_keep_alive_refs=self._max_sequence_length,
+                    max_chunk_length=min(
+                        compression.max_chunk_length, self._max_sequence_length
+                    ),
+                )
+            self._configured_columns.add(key)
+        return {
+            key: tree.map_structure(lambda x: np.asarray(x).astype(np.uint8), value)
+            if key in self._uint8_columns
+            else value
+            for key, value in step.items()
+        }
+
+    def _prepare_extras(
+        self, extras: Dict[str, types.NestedArray]
+    ) -> Dict[str, types.NestedArray]:
+        """Replace the per-episode extras by the values recorded in add_first.
+
+        Args:
+            extras: extras passed to the adder.
+
+        Returns:
+            extras to append to the writer.
+        """
+        if not self._episode_extras or not isinstance(extras, dict):
+            return extras
+        return {**extras, **self._episode_extras}
+
+    def _configure_sparse_columns(self, extras: Dict[str, types.NestedArray]) -> None:
+        """Write the sparse extras in chunks of a single step.
+
+        Only the chunks referenced by an item are sent to the replay server, so
+        this way only the steps stored in the items are sent. The writer might
+        be replaced between episodes, so this is done once per episode.
+
+        Args:
+            extras: extras that were just appended to the writer.
+        """
+        if self._sparse_columns_configured or not isinstance(extras, dict):
+            return
+        for key in self._sparse_extras_keys:
+            if key not in extras:
+                continue
+            for path, _ in tree.flatten_with_path(extras[key]):
+                self._writer.configure(
+                    ("extras", key, *path),
+                    num_keep_alive_refs=self._max_sequence_length,
+                    max_chunk_length=1,
+                )
+        self._sparse_columns_configured = True
+
+    def _store_sparse_extras(self, trajectory: Trajectory, start: int) -> Trajectory:
+        """Only keep the first step of the sparse extras of an item.
+
+        Args:
+            trajectory: item whose extras are columns of the writer history.
+            start: index in the writer history of the first step of the item.
+
+        Returns:
+            item in which the sparse extras have a time dimension of length one.
+        """
+        if not isinstance(trajectory.extras, dict):
+            return trajectory
+        keys = [key for key in self._sparse_extras_keys if key in trajectory.extras]
+        if not keys:
+            return trajectory
+        first_step = slice(start, start + 1 if start != -1 else None)
+        history_extras = self._writer.history["extras"]
+        extras = dict(trajectory.extras)
+        for key in keys:
+            extras[key] = tree.map_structure(
+                lambda column: column[first_step], history_extras[key]
+            )
+        return trajectory._replace(extras=extras)
+
+    def _routing_plan_from_trajectory(
+        self, trajectory: Union[Trajectory, mava_types.Transition]
+    ) -> RoutingPlan:
+        """Compute the routing plan from the network_int_keys of a trajectory.
+
+        Args:
+            trajectory: Trajectory to be written to the reverb tables.
+
+        Returns:
+            routing plan for the networks used in the trajectory.
+        """
+        traj_extras = trajectory.extras["network_int_keys"]
+        trajectory_net_keys = {}
+        for agent in trajectory.actions.keys():
+            arr = traj_extras[agent].numpy()
+            if type(trajectory) == Step:
+                # Sequential adder case.
+                trajectory_net_keys[agent] = self._net_ids_to_keys[arr[0]]
+            else:
+                # Transition adder case.
+                trajectory_net_keys[agent] = self._net_ids_to_keys[arr]
+        return make_table_routing_plan(trajectory_net_keys, self._table_network_config)
 
     def write_experience_to_tables(  # noqa
         self,
@@ -179,175 +567,29 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
             # function defaults back to just writing the entire
             # trajectory to one default table.
 
-            # Get the networks use by each agent by
-            # converting the network_int_keys to strings.
-            traj_extras = trajectory.extras["network_int_keys"]
-            trajectory_net_keys = {}
-            agents = sort_str_num(trajectory.actions.keys())
-            for agent in agents:
-                arr = traj_extras[agent].numpy()
-                if type(trajectory) == Step:
-                    # Sequential adder case.
-                    trajectory_net_keys[agent] = self._net_ids_to_keys[arr[0]]
-                else:
-                    # Transition adder case.
-                    trajectory_net_keys[agent] = self._net_ids_to_keys[arr]
-
-            # Get a list of the agents and mapping from net_keys to all
-            # agents using that network.
-            agents, trajectory_nets_agent = get_trajectory_net_agents(
-                trajectory=trajectory, trajectory_net_keys=trajectory_net_keys
-            )
+            # The network assignment is fixed for a whole episode, so the
+            # routing plan is normally computed once in add_first. Fall back
+            # to computing it from the trajectory if that was not possible.
+            if self._routing_plan is None:
+                self._routing_plan = self._routing_plan_from_trajectory(trajectory)
 
-            # Flag to check if all experience was used
-            created_item = False
-
-            # In this loop we go through every table one by one.
-            # We check for each table if the experience contains
-            # the correct networks for that trainer. If it does
-            # we add to the table a subset of the trajectory's agents
-            # which only contains the networks combination that the
-            # trainer is interested in. Note that a table might
-            # find multiple copies of the correct network combination
-            # and therefore might write more than once to a table
-            # for a given experience. The table might also not
-            # write at all for a given trajectory. The created_item
-            # flag checks that at least one table used some of the
-            # experience in the trajectory.
+            # Number of items created for this experience
+            num_items = 0
+
+            # A table might find multiple copies of the correct network
+            # combination and therefore might write more than once for a given
+            # experience. The table might also not write at all for a given
+            # trajectory. At least one table must use some of the experience
+            # in the trajectory.
             for table, priority in table_priorities.items():
-                # Copy the original trajectory_nets_agent as we are going to pop
-                # form it for each table. Therefore each table starts with
-                # a fresh copy of all the agents and removes agents as it
-                # pushes the experience to its table.
-                trajectory_dict_copy = copy.deepcopy(trajectory_nets_agent)
-
-                # While the networks are in the data keep creating tables
-                # Each training example can therefore create multiple items
-                is_in_entry = True
-                while is_in_entry:
-                    # Go through all the networks in the table specification.
-                    # Now check if every network in this table specification is used
-                    # atleast once by the remaining agents in the trajectory.
-                    # Pop the agents from the trajectory, that uses the required
-                    # networks and add them to item_agents. If all the
-                    # networks was found item_agents will be written
-                    # to the table. So basically we try to find a group of
-                    # agents that matches the network specification of the table.
-                    # We do this until the table cannot find a match in the remaining
-                    # agents and therefore exists the and gives another table a chance
-                    # to find a matches.
-                    item_agents = []
-                    for net_key in self._table_network_config[table]:
-                        if (
-                            net_key in trajectory_dict_copy
-                            and len(trajectory_dict_copy[net_key]) > 0
-                        ):
-                            item_agents.append(trajectory_dict_copy[net_key].pop())
-                        else:
-                            is_in_entry = False
-                            break
-
-                    if is_in_entry:
-                        # Write the subset of the trajectory experience to
-                        # the table. The below code creates a new Step/Transition
-                        # with only the agents with the correct network combination
-                        # in order. This new Step/Transition is then written to
-                        # the table.
-                        created_item = True
-
-                        # Create new empty transition
-                        if type(trajectory) == Step:
-                            # Create a new sequence trajectory
-                            soe = trajectory.start_of_episode  # type: ignore
-                            new_trajectory = Step(  # type: ignore
-                                {},
-                                {},
-                                {},
-                                {},
-                                start_of_episode=soe,
-                                extras={},
-                            )
-                        else:
-                            # Create a new transition trajectory
-                            new_trajectory = mava_types.Transition(  # type: ignore
-                                {}, {}, {}, {}, {}, {}, {}
-                            )
-
-                        # Initialise empty extras
-                        for key in trajectory.extras.keys():
-                            new_trajectory.extras[key] = {}
-
-                            if type(trajectory) == mava_types.Transition:
-                                new_trajectory.next_extras[key] = {}  # type: ignore
-
-                        # Go through each of the agents in item_agents and add them
-                        # to the new trajectory in the correct spot based on their
-                        # networks.
-                        for a_i in range(len(item_agents)):
-                            # Write the agent to the new trajectory.
-                            cur_agent = item_agents[a_i]
-                            want_agent = agents[a_i]
-                            new_trajectory.observations[
-                                want_agent
-                            ] = trajectory.observations[cur_agent]
-                            new_trajectory.actions[want_agent] = trajectory.actions[
-                                cur_agent
-                            ]
-                            new_trajectory.rewards[want_agent] = trajectory.rewards[
-                                cur_agent
-                            ]
-                            new_trajectory.discounts[want_agent] = trajectory.discounts[
-                                cur_agent
-                            ]
-
-                            if type(trajectory) == mava_types.Transition:
-                                new_trajectory.next_observations[  # type: ignore
-                                    want_agent
-                                ] = trajectory.next_observations[  # type: ignore
-                                    cur_agent
-                                ]  # type: ignore
-
-                            # Write this agent to the extras of the new trajectory.
-                            for key in trajectory.extras.keys():
-                                if (
-                                    type(trajectory.extras[key]) is dict
-                                    and cur_agent in trajectory.extras[key]
-                                ):
-                                    new_trajectory.extras[key][
-                                        want_agent
-                                    ] = trajectory.extras[key][cur_agent]
-                                else:
-                                    # TODO: (dries) Only actually need to do this once
-                                    # and not per agent. Maybe fix this in the future.
-                                    new_trajectory.extras[key] = trajectory.extras[key]
-                                if type(trajectory) == mava_types.Transition:
-                                    ext = trajectory.next_extras[key]  # type: ignore
-                                    if (
-                                        type(ext) is dict  # type: ignore
-                                        and cur_agent in ext  # type: ignore
-                                    ):
-                                        new_trajectory.next_extras[key][  # type: ignore
-                                            want_agent
-                                        ] = trajectory.next_extras[  # type: ignore
-                                            key
-                                        ][  # type: ignore
-                                            cur_agent
-                                        ]  # type: ignore
-                                    else:
-                                        # TODO: (dries) Only actually need to
-                                        # do this once and not per agent. Maybe
-                                        # fix this in the future.
-                                        new_trajectory.next_extras[  # type: ignore
-                                            key
-                                        ] = trajectory.next_extras[  # type: ignore
-                                            key
-                                        ]  # type: ignore
-
-                        # Write the new_trajectory to the table.
-                        self._writer.create_item(
-                            table=table, priority=priority, trajectory=new_trajectory
-                        )
-            if not created_item:
+                for item_plan in self._routing_plan[table]:
+                    num_items += 1
+                    self._writer.create_item(
+                        table=table,
+                        priority=priority,
+                        trajectory=route_trajectory(trajectory, item_plan),
+                    )
+            if num_items == 0:
                 raise EOFError(
                     "This experience was not used by any trainer: ",
                     trajectory.actions.keys(),
@@ -355,13 +597,14 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
         else:
             # Default setting (deprecate this) with only one table. In this setting
             # we write the entire trajectory to that table.
+            num_items = len(table_priorities)
             for table_name, priority in table_priorities.items():
                 self._writer.create_item(
                     table=table_name, priority=priority, trajectory=trajectory
                 )
 
-        # Flush the writer.
-        self._writer.flush(self._max_in_flight_items)
+        # Flush the writer, depending on the flush policy.
+        self._maybe_flush(num_items)
 
     def add_first(
         self, timestep: dm_env.TimeStep, extras: Dict[str, types.NestedArray] = {}
@@ -373,6 +616,16 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
                 "which timestep.first() is True"
             )
 
+        # Record the values of the per-episode extras.
+        self._sparse_columns_configured = False
+        self._configured_columns = set()
+        self._episode_extras = {
+            key: extras[key]
+            for key, policy in self._extras_storage_policies.items()
+            if policy is ExtrasStoragePolicy.per_episode and key in extras
+        }
+        extras = self._prepare_extras(extras)
+
         # Record the next observation but leave the history buffer row open by
         # passing `partial_step=True`.
         add_dict = dict(
@@ -382,12 +635,31 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
 
         if self._use_next_extras:
             add_dict["extras"] = extras
+        add_dict = self._compress_columns(add_dict)
         self._writer.append(
             add_dict,
             partial_step=True,
         )
+        self._count_bytes(add_dict)
+        if self._use_next_extras:
+            self._configure_sparse_columns(extras)
         self._add_first_called = True
 
+        # The networks used by the agents are fixed for the whole episode,
+        # therefore the table routing is only computed once per episode.
+        self._routing_plan = None
+        if (
+            getattr(self, "_table_network_config", None)
+            and "network_int_keys" in extras
+        ):
+            trajectory_net_keys = {
+                agent: self._net_ids_to_keys[int(net_id)]
+                for agent, net_id in extras["network_int_keys"].items()
+            }
+            self._routing_plan = make_table_routing_plan(
+                trajectory_net_keys, self._table_network_config
+            )
+
     def add(
         self,
         actions: Dict[str, types.NestedArray],
@@ -398,6 +670,8 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
         if not self._add_first_called:
             raise ValueError("adder.add_first must be called before adder.add.")
 
+        next_extras = self._prepare_extras(next_extras)
+
         # Add the timestep to the buffer.
         current_step = dict(
             # Observations was passed at the previous add call.
@@ -409,8 +683,12 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
 
         if not self._use_next_extras:
             current_step["extras"] = next_extras
+        current_step = self._compress_columns(current_step)
 
         self._writer.append(current_step)
+        self._count_bytes(current_step)
+        if not self._use_next_extras:
+            self._configure_sparse_columns(next_extras)
 
         # Record the next observation and write.
         next_step = dict(
@@ -420,10 +698,12 @@ class ReverbParallelAdder(ReverbAdder, ParallelAdder):
 
         if self._use_next_extras:
             next_step["extras"] = next_extras
+        next_step = self._compress_columns(next_step)
         self._writer.append(
             next_step,
             partial_step=True,
         )
+        self._count_bytes(next_step)
         self._write()
 
         if next_timestep.last():
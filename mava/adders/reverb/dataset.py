@@ -0,0 +1,135 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Datasets that sample from Reverb replay tables."""
+
+import dataclasses
+from typing import Dict, Optional
+
+import reverb
+import tensorflow as tf
+
+from mava.adders.reverb import base
+from mava.adders.reverb import utils as reverb_utils
+
+
+@dataclasses.dataclass
+class ReverbDatasetConfig:
+    """Configuration of the pipeline that samples the trainer batches.
+
+    Every reader is a `reverb.TrajectoryDataset` with its own connection to the
+    replay server, and the batches of the readers are interleaved in parallel.
+    With autotune, tf.data tunes the parallelism of the interleave and of the
+    uint8 casts and the number of prefetched batches at runtime. The chunks
+    of the items are decompressed by Reverb in the readers.
+
+    Args:
+        num_readers: number of readers sampling from the table in parallel. A
+            single reader does not interleave, so the batches are sampled in
+            order.
+        max_in_flight_samples_per_worker: number of samples each reader
+            requests ahead of time. Defaults to twice the batch size.
+        cycle_length: number of readers the batches are interleaved from at a
+            time. Defaults to num_readers.
+        num_cast_calls: number of batches whose uint8 columns, see
+            ColumnCompression, are cast back to float32 in parallel on the
+            tf.data thread pool. Defaults to None, which casts the batches one
+            at a time.
+        autotune: if True, the interleave of the readers, the uint8 casts and
+            the prefetch all use `tf.data.AUTOTUNE`, instead of num_readers
+            parallel calls, num_cast_calls and the prefetch size of the system.
+            The number of readers is still num_readers. Defaults to False.
+    """
+
+    num_readers: int = 12
+    max_in_flight_samples_per_worker: Optional[int] = None
+    cycle_length: Optional[int] = None
+    num_cast_calls: Optional[int] = None
+    autotune: bool = False
+
+
+def make_reverb_dataset(
+    server_address: str,
+    table: str,
+    batch_size: int,
+    num_readers: int = 12,
+    max_in_flight_samples_per_worker: Optional[int] = None,
+    cycle_length: Optional[int] = None,
+    prefetch_size: Optional[int] = None,
+    column_compression: Optional[Dict[str, base.ColumnCompression]] = None,
+    num_cast_calls: Optional[int] = None,
+    autotune: bool = False,
+) -> tf.data.Dataset:
+    """Create a dataset of batches sampled from a Reverb table.
+
+    See ReverbDatasetConfig for the parallel readers, casts and autotuning.
+
+    Args:
+        server_address: address of the replay server.
+        table: table to sample from.
+        batch_size: number of items per batch.
+        num_readers: see ReverbDatasetConfig.
+        max_in_flight_samples_per_worker: see ReverbDatasetConfig.
+        cycle_length: see ReverbDatasetConfig.
+        prefetch_size: number of batches to prefetch on the host, or
+            `tf.data.AUTOTUNE`. Nothing is prefetched by default. Ignored with
+            autotune.
+        column_compression: compression of each column of the writers. The
+            columns stored as uint8 are cast back to float32.
+        num_cast_calls: see ReverbDatasetConfig.
+        autotune: see ReverbDatasetConfig.
+
+    Returns:
+        dataset of batched replay samples.
+    """
+    if num_readers < 1:
+        raise ValueError(f"num_readers should be positive, got {num_readers}.")
+    if max_in_flight_samples_per_worker is None:
+        max_in_flight_samples_per_worker = 2 * batch_size
+
+    def make_reader(_: tf.Tensor) -> tf.data.Dataset:
+        dataset = reverb.TrajectoryDataset.from_table_signature(
+            server_address=server_address,
+            table=table,
+            max_in_flight_samples_per_worker=max_in_flight_samples_per_worker,
+        )
+        return dataset.batch(batch_size, drop_remainder=True)
+
+    if num_readers == 1:
+        dataset = make_reader(tf.constant(0, tf.int64))
+    else:
+        dataset = tf.data.Dataset.range(num_readers).interleave(
+            map_func=make_reader,
+            cycle_length=cycle_length or num_readers,
+            num_parallel_calls=tf.data.AUTOTUNE if autotune else num_readers,
+            deterministic=False,
+        )
+
+    if autotune:
+        num_cast_calls = prefetch_size = tf.data.AUTOTUNE
+
+    # Cast the columns stored as uint8 back to floats.
+    if column_compression:
+        dataset = dataset.map(
+            lambda sample: sample._replace(
+                data=reverb_utils.restore_uint8_columns(sample.data, column_compression)
+            ),
+            num_parallel_calls=num_cast_calls,
+            deterministic=False if num_cast_calls else None,
+        )
+
+    if prefetch_size:
+        dataset = dataset.prefetch(prefetch_size)
+    return dataset
@@ -21,7 +21,7 @@
 This implements full episode adders, potentially with padding.
 """
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 import dm_env
 import reverb
@@ -47,6 +47,11 @@ class ParallelEpisodeAdder(EpisodeAdder, ReverbParallelAdder):
         priority_fns: Optional[base.PriorityFnMapping] = None,
         max_in_flight_items: int = 1,
         padding_fn: Optional[_PaddingFn] = None,
+        net_ids_to_keys: List[str] = None,
+        table_network_config: Dict[str, List] = None,
+        flush_policy: Optional[base.FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
+        column_compression: Optional[Dict[str, base.ColumnCompression]] = None,
     ):
         """Makes a SequenceAdder instance.
 
@@ -69,6 +74,17 @@ class ParallelEpisodeAdder(EpisodeAdder, ReverbParallelAdder):
             sequences on env reset. In this case 'pad_end_of_episode' is not used.
           max_in_flight_items: The maximum number of items allowed to be "in flight"
             at the same time. See `reverb.Writer.writer` for more info.
+          padding_fn: function used to create the padding of short episodes.
+          net_ids_to_keys: A list of network names to convert from integers to
+            strings.
+          table_network_config: A dictionary mapping table names to lists of
+            network names.
+          flush_policy: When to wait for the created items to be written. See
+            `FlushPolicy` for more info.
+          extras_storage_policies: How each extras field is stored in the items.
+            See `ExtrasStoragePolicy` for more info.
+          column_compression: How each column of the writer, e.g. observations,
+            is stored. See `ColumnCompression` for more info.
         """
 
         ReverbParallelAdder.__init__(
@@ -78,8 +94,13 @@ class ParallelEpisodeAdder(EpisodeAdder, ReverbParallelAdder):
             delta_encoded=delta_encoded,
             priority_fns=priority_fns,
             max_in_flight_items=max_in_flight_items,
+            flush_policy=flush_policy,
+            extras_storage_policies=extras_storage_policies,
+            column_compression=column_compression,
         )
         self._padding_fn = padding_fn
+        self._net_ids_to_keys = net_ids_to_keys
+        self._table_network_config = table_network_config
 
     def add(
         self,
@@ -121,17 +142,16 @@ class ParallelEpisodeAdder(EpisodeAdder, ReverbParallelAdder):
         # Pack the history into a base.Step structure and get numpy converted
         # variant for priotiy computation.
         trajectory = base.Trajectory(**trajectory)
+        trajectory = self._store_sparse_extras(trajectory, 0)
 
         # Calculate the priority for this episode.
         table_priorities = acme_utils.calculate_priorities(
             self._priority_fns, trajectory
         )
 
-        # Create a prioritized item for each table.
-        for table_name, priority in table_priorities.items():
-            self._writer.create_item(table_name, priority, trajectory)
-        # Flush the writer.
-        self._writer.flush(self._max_in_flight_items)
+        # Create a prioritized item for each table. The episode is appended to
+        # the writer once and every item references the same columns.
+        self.write_experience_to_tables(trajectory, table_priorities)
 
     @classmethod
     def signature(
@@ -139,9 +159,11 @@ class ParallelEpisodeAdder(EpisodeAdder, ReverbParallelAdder):
         environment_spec: specs.EnvironmentSpec,
         sequence_length: Optional[int] = None,
         extras_spec: types.NestedSpec = (),
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
     ) -> tf.TypeSpec:
         return mava_utils.trajectory_signature(
             environment_spec=environment_spec,
             sequence_length=sequence_length,
             extras_spec=extras_spec,
+            extras_storage_policies=extras_storage_policies,
         )
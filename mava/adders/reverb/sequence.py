@@ -23,10 +23,11 @@ This implements adders which add sequences or partial trajectories.
 import operator
 from typing import Dict, List, Optional
 
+import numpy as np
 import reverb
 import tensorflow as tf
 import tree
-from acme import specs
+from acme import specs, types
 from acme.adders.reverb import utils as acme_utils
 from acme.adders.reverb.sequence import EndBehavior, SequenceAdder
 from acme.types import NestedSpec
@@ -52,6 +53,9 @@ class ParallelSequenceAdder(SequenceAdder, ReverbParallelAdder):
         max_in_flight_items: int = 2,
         end_of_episode_behavior: Optional[EndBehavior] = EndBehavior.ZERO_PAD,
         use_next_extras: bool = True,
+        flush_policy: Optional[base.FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
+        column_compression: Optional[Dict[str, base.ColumnCompression]] = None,
     ):
         """Makes a SequenceAdder instance.
 
@@ -83,6 +87,12 @@ class ParallelSequenceAdder(SequenceAdder, ReverbParallelAdder):
             sequences on env reset. In this case 'pad_end_of_episode' is not used.
           use_next_extras: If true extras will be processed the same way observations
           are processed. If false extras will be processed as actions are processed.
+          flush_policy: When to wait for the created items to be written. See
+            `FlushPolicy` for more info.
+          extras_storage_policies: How each extras field is stored in the items.
+            See `ExtrasStoragePolicy` for more info.
+          column_compression: How each column of the writer, e.g. observations,
+            is stored. See `ColumnCompression` for more info.
         """
         ReverbParallelAdder.__init__(
             self,
@@ -94,6 +104,9 @@ class ParallelSequenceAdder(SequenceAdder, ReverbParallelAdder):
             priority_fns=priority_fns,
             max_in_flight_items=max_in_flight_items,
             use_next_extras=use_next_extras,
+            flush_policy=flush_policy,
+            extras_storage_policies=extras_storage_policies,
+            column_compression=column_compression,
         )
 
         self._period = period
@@ -119,12 +132,15 @@ class ParallelSequenceAdder(SequenceAdder, ReverbParallelAdder):
             return
 
         if not end_of_episode:
-            get_traj = operator.itemgetter(slice(-sequence_length - 1, -1))
+            start = -sequence_length - 1
+            get_traj = operator.itemgetter(slice(start, -1))
         else:
-            get_traj = operator.itemgetter(slice(-sequence_length, None))
+            start = -sequence_length
+            get_traj = operator.itemgetter(slice(start, None))
 
         history = self._writer.history
         trajectory = base.Trajectory(**tree.map_structure(get_traj, history))
+        trajectory = self._store_sparse_extras(trajectory, start)
 
         # Compute priorities for the buffer.
         table_priorities = acme_utils.calculate_priorities(
@@ -140,6 +156,7 @@ class ParallelSequenceAdder(SequenceAdder, ReverbParallelAdder):
         environment_spec: specs.EnvironmentSpec,
         sequence_length: Optional[int] = None,
         extras_spec: NestedSpec = (),
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
     ) -> tf.TypeSpec:
         """Returns adder signature.
 
@@ -148,6 +165,8 @@ class ParallelSequenceAdder(SequenceAdder, ReverbParallelAdder):
             sequence_length (Optional[int], optional): Length of sequence.
                 Defaults to None.
             extras_spec (NestedSpec, optional): Spec for extra data. Defaults to ().
+            extras_storage_policies (Optional[Dict[str, ExtrasStoragePolicy]],
+                optional): How each extras field is stored. Defaults to None.
 
         Returns:
             tf.TypeSpec: Signature for sequence adder.
@@ -156,4 +175,132 @@ class ParallelSequenceAdder(SequenceAdder, ReverbParallelAdder):
             environment_spec=environment_spec,
             sequence_length=sequence_length,
             extras_spec=extras_spec,
+            extras_storage_policies=extras_storage_policies,
+        )
+
+
+class ParallelNStepSequenceAdder(ParallelSequenceAdder):
+    """An adder which adds the (n + 1)-step windows of every step of an episode.
+
+    The windows start at every step of the episode and hold the single step
+    rewards and discounts, the trainers compute the n-step returns from them
+    (see `mava.utils.training_utils.n_step_transition_from_sequence`). With
+    Reverb, overlapping windows reference the same chunks, so each step is only
+    sent and stored once, and the number of steps of the returns can be changed
+    in the trainer up to `n_step`.
+
+    The windows at the end of an episode are padded with zeros. A
+    `zero_padding_mask` extra, which is one for every step of the episode
+    (including the final observation), is added to tell the steps apart from
+    the padding.
+    """
+
+    def __init__(
+        self,
+        client: reverb.Client,
+        n_step: int,
+        net_ids_to_keys: List[str] = None,
+        table_network_config: Dict[str, List] = None,
+        *,
+        priority_fns: Optional[base.PriorityFnMapping] = None,
+        max_in_flight_items: int = 2,
+        flush_policy: Optional[base.FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
+        column_compression: Optional[Dict[str, base.ColumnCompression]] = None,
+    ):
+        """Makes a ParallelNStepSequenceAdder instance.
+
+        Args:
+          client: See docstring for BaseAdder.
+          n_step: The maximum number of steps of the returns, windows of
+            `n_step + 1` steps are added.
+          net_ids_to_keys: A list of network names to convert from integers to
+            strings.
+          table_network_config: A dictionary mapping table names to lists of
+            network names.
+          priority_fns: See docstring for BaseAdder.
+          max_in_flight_items: The maximum number of items allowed to be "in flight"
+            at the same time. See `block_until_num_items` in
+            `reverb.TrajectoryWriter.flush` for more info.
+          flush_policy: When to wait for the created items to be written. See
+            `FlushPolicy` for more info.
+          extras_storage_policies: How each extras field is stored in the items.
+            See `ExtrasStoragePolicy` for more info.
+          column_compression: How each column of the writer, e.g. observations,
+            is stored. See `ColumnCompression` for more info.
+        """
+        super().__init__(
+            client=client,
+            sequence_length=n_step + 1,
+            period=1,
+            net_ids_to_keys=net_ids_to_keys,
+            table_network_config=table_network_config,
+            priority_fns=priority_fns,
+            max_in_flight_items=max_in_flight_items,
+            end_of_episode_behavior=EndBehavior.ZERO_PAD,
+            flush_policy=flush_policy,
+            extras_storage_policies=extras_storage_policies,
+            column_compression=column_compression,
+        )
+        self._n_step = n_step
+
+    def _prepare_extras(
+        self, extras: Dict[str, types.NestedArray]
+    ) -> Dict[str, types.NestedArray]:
+        """Add the zero padding mask to the extras."""
+        extras = super()._prepare_extras(extras)
+        return {**extras, "zero_padding_mask": np.array(1)}
+
+    def _write_last(self) -> None:
+        """Add the windows of the last steps of the episode, padded with zeros."""
+        # The last step of the episode only holds the final observation.
+        last_step = self._writer.episode_steps - 1
+        zero_step = tree.map_structure(
+            lambda x: np.zeros_like(x[-2].numpy()), self._writer.history
+        )
+        num_steps = last_step + 1
+
+        # The windows ending before the last step were added by `_write`.
+        for start in range(max(0, last_step - self._n_step), last_step):
+            while num_steps < start + self._sequence_length:
+                self._writer.append(zero_step)
+                num_steps += 1
+            self._maybe_create_item(
+                self._sequence_length, end_of_episode=True, force=True
+            )
+
+    @classmethod
+    def signature(
+        cls,
+        environment_spec: specs.EnvironmentSpec,
+        sequence_length: Optional[int] = None,
+        extras_spec: NestedSpec = (),
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
+        *,
+        n_step: Optional[int] = None,
+    ) -> tf.TypeSpec:
+        """Returns adder signature.
+
+        Args:
+            environment_spec (specs.EnvironmentSpec): Spec of MA environment.
+            sequence_length (Optional[int], optional): Length of the windows, which
+                is n_step + 1. Defaults to None.
+            extras_spec (NestedSpec, optional): Spec for extra data. Defaults to ().
+            extras_storage_policies (Optional[Dict[str, ExtrasStoragePolicy]],
+                optional): How each extras field is stored. Defaults to None.
+            n_step (Optional[int], optional): Maximum number of steps of the
+                returns, which sets the length of the windows instead of
+                sequence_length. Defaults to None.
+
+        Returns:
+            tf.TypeSpec: Signature for n-step sequence adder.
+        """
+        if n_step is not None:
+            sequence_length = n_step + 1
+        extras_spec = {**(extras_spec or {}), "zero_padding_mask": np.array(1)}
+        return super().signature(
+            environment_spec=environment_spec,
+            sequence_length=sequence_length,
+            extras_spec=extras_spec,
+            extras_storage_policies=extras_storage_policies,
         )
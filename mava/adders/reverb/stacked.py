@@ -0,0 +1,92 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Adder that writes the experience of the agents in the stacked layout."""
+
+from typing import Dict, Optional
+
+import dm_env
+from acme import types
+
+from mava.adders.base import ParallelAdder
+from mava.adders.reverb.base import ReverbParallelAdder
+from mava.utils import stacking_utils
+
+
+class StackedAgentsAdder(ParallelAdder):
+    """Adder that stacks the experience of the agents that share a network.
+
+    The executors pass their experience keyed by agent. This adder stacks the
+    observations, actions, rewards, discounts and agent keyed extras of the
+    agents of each network, see `mava.utils.stacking_utils`, and passes them
+    to the wrapped adder. The items then hold one array per network with a
+    leading agent dimension, so the replay signature and the number of columns
+    of the items do not grow with the number of agents.
+
+    The wrapped adder must be created without a table_network_config, as the
+    agents can no longer be routed to the tables separately. Its signature is
+    computed from `stacking_utils.stack_environment_spec`.
+    """
+
+    def __init__(
+        self, adder: ReverbParallelAdder, agent_groups: stacking_utils.AgentGroups
+    ):
+        """Initialise the adder.
+
+        Args:
+            adder: adder that writes the stacked experience to the tables.
+            agent_groups: agents of each network key, see
+                `stacking_utils.make_agent_groups`.
+
+        Raises:
+            ValueError: if the wrapped adder routes the agents to the tables.
+        """
+        if getattr(adder, "_table_network_config", None):
+            raise ValueError(
+                "The adder of the stacked layout writes all the agents to every "
+                "table, it can not be used with a table_network_config."
+            )
+        self._adder = adder
+        self._agent_groups = agent_groups
+
+    def add_first(
+        self, timestep: dm_env.TimeStep, extras: Dict[str, types.NestedArray] = {}
+    ) -> None:
+        """Record the first observation of a trajectory."""
+        self._adder.add_first(
+            stacking_utils.stack_timestep(timestep, self._agent_groups),
+            stacking_utils.stack_extras(extras, self._agent_groups),
+        )
+
+    def add(
+        self,
+        actions: Dict[str, types.NestedArray],
+        next_timestep: dm_env.TimeStep,
+        next_extras: Dict[str, types.NestedArray] = {},
+    ) -> None:
+        """Record an action and the following timestep."""
+        self._adder.add(
+            stacking_utils.stack_agents(actions, self._agent_groups),
+            stacking_utils.stack_timestep(next_timestep, self._agent_groups),
+            stacking_utils.stack_extras(next_extras, self._agent_groups),
+        )
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return the statistics of the wrapped adder."""
+        return self._adder.get_stats()
+
+    def reset(self, timeout_ms: Optional[int] = None) -> None:
+        """Resets the wrapped adder."""
+        self._adder.reset(timeout_ms=timeout_ms)
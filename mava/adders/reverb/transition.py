@@ -91,6 +91,9 @@ class ParallelNStepTransitionAdder(NStepTransitionAdder, ReverbParallelAdder):
         *,
         priority_fns: Optional[base.PriorityFnMapping] = None,
         max_in_flight_items: int = 5,
+        flush_policy: Optional[base.FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
+        column_compression: Optional[Dict[str, base.ColumnCompression]] = None,
     ) -> None:
         """Creates an N-step transition adder.
 
@@ -107,6 +110,15 @@ class ParallelNStepTransitionAdder(NStepTransitionAdder, ReverbParallelAdder):
           table_network_config: A dictionary mapping table names to lists of
             network names.
           priority_fns: See docstring for BaseAdder.
+          max_in_flight_items: The maximum number of items allowed to be "in flight"
+            at the same time. See `block_until_num_items` in
+            `reverb.TrajectoryWriter.flush` for more info.
+          flush_policy: When to wait for the created items to be written. See
+            `FlushPolicy` for more info.
+          extras_storage_policies: How each extras field is stored in the items.
+            Fields that are not stored per step are left out of next_extras.
+          column_compression: How each column of the writer, e.g. observations,
+            is stored. See `ColumnCompression` for more info.
 
         Raises:
           ValueError: If n_step is less than 1.
@@ -127,6 +139,9 @@ class ParallelNStepTransitionAdder(NStepTransitionAdder, ReverbParallelAdder):
             priority_fns=priority_fns,
             max_in_flight_items=max_in_flight_items,
             use_next_extras=True,
+            flush_policy=flush_policy,
+            extras_storage_policies=extras_storage_policies,
+            column_compression=column_compression,
         )
 
     def _write(self) -> None:
@@ -152,6 +167,13 @@ class ParallelNStepTransitionAdder(NStepTransitionAdder, ReverbParallelAdder):
         s_, e_ = tree.map_structure(
             get_last, (history["observations"], history["extras"])
         )
+        # Only the first step of the sparse extras is stored.
+        if self._sparse_extras_keys and isinstance(e_, dict):
+            e_ = {
+                key: value
+                for key, value in e_.items()
+                if key not in self._sparse_extras_keys
+            }
 
         # # Maybe get extras to add to the transition later.
         # if 'extras' in history:
@@ -211,12 +233,15 @@ class ParallelNStepTransitionAdder(NStepTransitionAdder, ReverbParallelAdder):
         cls,
         environment_spec: mava_specs.EnvironmentSpec,
         extras_spec: tf.TypeSpec = {},
+        extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
     ) -> tf.TypeSpec:
         """Signature for adder.
 
         Args:
             environment_spec (mava_specs.EnvironmentSpec): MA environment spec.
             extras_spec (tf.TypeSpec, optional): Spec for extras data. Defaults to {}.
+            extras_storage_policies (Optional[Dict[str, ExtrasStoragePolicy]],
+                optional): How each extras field is stored. Defaults to None.
 
         Returns:
             tf.TypeSpec: Signature for transition adder.
@@ -257,6 +282,16 @@ class ParallelNStepTransitionAdder(NStepTransitionAdder, ReverbParallelAdder):
             reward_specs[agent] = rewards_spec
             step_discount_specs[agent] = step_discounts_spec
 
+        # Only the first step of the sparse extras is stored.
+        next_extras_spec = extras_spec
+        if extras_storage_policies:
+            next_extras_spec = {
+                key: spec
+                for key, spec in extras_spec.items()
+                if extras_storage_policies.get(key, base.ExtrasStoragePolicy.per_step)
+                is base.ExtrasStoragePolicy.per_step
+            }
+
         transition_spec = types.Transition(
             observations=obs_specs,
             next_observations=obs_specs,
@@ -264,7 +299,7 @@ class ParallelNStepTransitionAdder(NStepTransitionAdder, ReverbParallelAdder):
             rewards=reward_specs,
             discounts=step_discount_specs,
             extras=extras_spec,
-            next_extras=extras_spec,
+            next_extras=next_extras_spec,
         )
 
         return tree.map_structure_with_path(
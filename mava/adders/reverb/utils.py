@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Iterable, Optional
+from typing import Any, Dict, Iterable, Optional
 
 import tensorflow as tf
 import tree
@@ -20,6 +20,7 @@ from acme import specs, types
 from acme.adders.reverb import utils as acme_utils
 from acme.utils import tree_utils
 
+from mava import types as mava_types
 from mava.adders.reverb import base
 
 
@@ -48,6 +49,7 @@ def trajectory_signature(
     environment_spec: specs.EnvironmentSpec,
     sequence_length: Optional[int] = None,
     extras_spec: types.NestedSpec = (),
+    extras_storage_policies: Optional[Dict[str, base.ExtrasStoragePolicy]] = None,
 ) -> tf.TypeSpec:
     """This is a helper method for generating signatures for Reverb tables.
 
@@ -64,6 +66,8 @@ def trajectory_signature(
         be the same as the `extras` passed into `ReverbAdder.add`.
         sequence_length: An optional integer representing the expected length of
         sequences that will be added to replay.
+        extras_storage_policies: How each extras field is stored. Fields that
+        are not stored per step only have the first step of each sequence.
 
     Returns:
         A `Trajectory` whose leaf nodes are `tf.TensorSpec` objects.
@@ -114,6 +118,17 @@ def trajectory_signature(
         ),
     )
 
+    # Only the first step of the sparse extras is stored.
+    if extras_storage_policies:
+        for key, policy in extras_storage_policies.items():
+            if key in extras_spec and policy is not base.ExtrasStoragePolicy.per_step:
+                extras_spec[key] = tree.map_structure(
+                    lambda spec: tf.TensorSpec(
+                        shape=(1, *spec.shape[1:]), dtype=spec.dtype, name=spec.name
+                    ),
+                    extras_spec[key],
+                )
+
     spec_step = base.Trajectory(
         observations=obs_specs,
         actions=act_specs,
@@ -124,3 +139,74 @@ def trajectory_signature(
     )
 
     return spec_step
+
+
+def _item_field_columns(item: Any) -> Dict[str, str]:
+    """Map the fields of an item to the columns of the writer they reference.
+
+    Args:
+        item: a Step or Transition, e.g. a table signature.
+
+    Returns:
+        the column of the writer of each field.
+    """
+    columns = {field: field for field in item._fields}
+    if isinstance(item, mava_types.Transition):
+        columns.update(next_observations="observations", next_extras="extras")
+        # The n-step returns and discounts are computed by the adder.
+        columns.update(rewards="n_step_return", discounts="total_discount")
+    return columns
+
+
+def _map_uint8_fields(
+    item: Any,
+    column_compression: Optional[Dict[str, base.ColumnCompression]],
+    map_fn: Any,
+) -> Any:
+    """Apply a function to the leaves of the fields stored as uint8."""
+    if not column_compression:
+        return item
+    fields = {
+        field: tree.map_structure(map_fn, getattr(item, field))
+        for field, column in _item_field_columns(item).items()
+        if column in column_compression and column_compression[column].uint8
+    }
+    return item._replace(**fields)
+
+
+def uint8_signature(
+    signature: Any,
+    column_compression: Optional[Dict[str, base.ColumnCompression]],
+) -> Any:
+    """Change the dtype of the columns stored as uint8 in a table signature.
+
+    Args:
+        signature: signature of the items, as returned by the adders.
+        column_compression: compression of each column of the writer.
+
+    Returns:
+        signature of the items written with the column compression.
+    """
+    return _map_uint8_fields(
+        signature,
+        column_compression,
+        lambda spec: tf.TensorSpec(shape=spec.shape, dtype=tf.uint8, name=spec.name),
+    )
+
+
+def restore_uint8_columns(
+    data: Any,
+    column_compression: Optional[Dict[str, base.ColumnCompression]],
+    dtype: tf.DType = tf.float32,
+) -> Any:
+    """Cast the columns stored as uint8 back to floats after sampling.
+
+    Args:
+        data: sampled items.
+        column_compression: compression of each column of the writer.
+        dtype: dtype the values are cast to.
+
+    Returns:
+        the items with the uint8 columns cast to dtype.
+    """
+    return _map_uint8_fields(data, column_compression, lambda x: tf.cast(x, dtype))
@@ -43,6 +43,17 @@ class BaseExplorationScheduler:
     def decrement_epsilon(self) -> float:
         """Decrement epsilon and return updated epsilon."""
 
+    @abc.abstractmethod
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Compute epsilon in-graph after a number of decrements.
+
+        Args:
+            step : number of times epsilon was decremented.
+
+        Returns:
+            epsilon after step decrements.
+        """
+
     def get_epsilon(self) -> float:
         """Get epsilon value.
 
@@ -79,6 +90,20 @@ class LinearExplorationScheduler(BaseExplorationScheduler):
         self._epsilon = max(self._epsilon_min, self._epsilon - self._epsilon_decay)
         return self._epsilon
 
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Compute epsilon in-graph after a number of decrements.
+
+        Args:
+            step : number of times epsilon was decremented.
+
+        Returns:
+            epsilon after step decrements.
+        """
+        step = tf.cast(step, tf.float32)
+        return tf.maximum(
+            self._epsilon_min, self._epsilon_start - self._epsilon_decay * step
+        )
+
 
 class ExponentialExplorationScheduler(BaseExplorationScheduler):
     def __init__(
@@ -105,6 +130,21 @@ class ExponentialExplorationScheduler(BaseExplorationScheduler):
         )
         return self._epsilon
 
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Compute epsilon in-graph after a number of decrements.
+
+        Args:
+            step : number of times epsilon was decremented.
+
+        Returns:
+            epsilon after step decrements.
+        """
+        step = tf.cast(step, tf.float32)
+        return tf.maximum(
+            self._epsilon_min,
+            self._epsilon_start * tf.pow(1 - self._epsilon_decay, step),
+        )
+
 
 class BaseExplorationTimestepScheduler:
     @abc.abstractmethod
@@ -131,6 +171,17 @@ class BaseExplorationTimestepScheduler:
     def decrement_epsilon(self, time_t: int) -> float:
         """Decrement epsilon and return updated epsilon."""
 
+    @abc.abstractmethod
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Compute epsilon in-graph at an executor timestep.
+
+        Args:
+            step : executor timestep.
+
+        Returns:
+            epsilon at the timestep.
+        """
+
     def get_epsilon(self) -> float:
         """Get epsilon value.
 
@@ -173,6 +224,18 @@ class LinearExplorationTimestepScheduler(BaseExplorationTimestepScheduler):
         )
         return self._epsilon
 
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Compute epsilon in-graph at an executor timestep.
+
+        Args:
+            step : executor timestep.
+
+        Returns:
+            epsilon at the timestep.
+        """
+        step = tf.cast(step, tf.float32)
+        return tf.maximum(self._epsilon_min, self._epsilon_start - self._delta * step)
+
 
 # Adapted from
 # https://github.com/oxwhirl/pymarl/blob/master/src/components/epsilon_schedules.py
@@ -208,6 +271,21 @@ class ExponentialExplorationTimestepScheduler(BaseExplorationTimestepScheduler):
         )
         return self._epsilon
 
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Compute epsilon in-graph at an executor timestep.
+
+        Args:
+            step : executor timestep.
+
+        Returns:
+            epsilon at the timestep.
+        """
+        step = tf.cast(step, tf.float32)
+        return tf.minimum(
+            self._epsilon_start,
+            tf.maximum(self._epsilon_min, tf.exp(-step / self._exp_scaling)),
+        )
+
 
 class ConstantScheduler:
     """Simple scheduler that returns a constant value."""
@@ -235,3 +313,14 @@ class ConstantScheduler:
             constant epsilon.
         """
         return self._epsilon
+
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Return constant epsilon.
+
+        Args:
+            step : step count of the schedule, unused.
+
+        Returns:
+            constant epsilon.
+        """
+        return self._epsilon
@@ -32,3 +32,4 @@ from mava.components.tf.networks.mad4pg import (
     DiscreteValuedDistribution,
     DiscreteValuedHead,
 )
+from mava.components.tf.networks.mixed_precision import MixedPrecisionNetwork
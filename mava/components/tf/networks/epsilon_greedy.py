@@ -68,6 +68,7 @@ class EpsilonGreedy(snt.Module):
         self,
         action_values: tf.Tensor,
         legal_actions_mask: Optional[tf.Tensor],
+        step: Optional[tf.Tensor] = None,
     ) -> tfp.distributions.Categorical:
         """Forward pass of action selector.
 
@@ -80,10 +81,15 @@ class EpsilonGreedy(snt.Module):
                 legal_actions_mask[..., a] = 1 if a is legal, 0 otherwise.
                 If not provided, all actions will be considered legal and
                 `tf.ones_like(action_values)`.
+            step: optional step count of the exploration schedule. If given, epsilon
+                is computed in-graph from the schedule, see epsilon_at, instead of
+                read from the epsilon variable.
 
         Returns:
             a sampled action from tf distribution representing the policy.
         """
+        epsilon = self._epsilon if step is None else self.epsilon_at(step)
+
         if legal_actions_mask is None:
             # We compute the action space dynamically.
             num_actions = tf.cast(tf.shape(action_values)[-1], action_values.dtype)
@@ -116,7 +122,7 @@ class EpsilonGreedy(snt.Module):
         greedy_probs /= tf.reduce_sum(greedy_probs, axis=-1, keepdims=True)
 
         # Epsilon-greedy action distribution.
-        probs = self._epsilon * dither_probs + (1 - self._epsilon) * greedy_probs
+        probs = epsilon * dither_probs + (1 - epsilon) * greedy_probs
 
         # Make the policy object.
         policy = tfp.distributions.Categorical(probs=probs)
@@ -136,6 +142,19 @@ class EpsilonGreedy(snt.Module):
         """
         return self._epsilon
 
+    def epsilon_at(self, step: tf.Tensor) -> tf.Tensor:
+        """Compute epsilon in-graph from the exploration schedule.
+
+        Args:
+            step: step count of the schedule, i.e. the number of decrements for
+                step-based schedulers and the executor timestep for timestep-based
+                schedulers.
+
+        Returns:
+            epsilon at the step.
+        """
+        return self._exploration_scheduler.epsilon_at(step)
+
     # mypy doesn't handle vars with multiple possible types well.
     @typing.no_type_check
     def decrement_epsilon(self) -> None:
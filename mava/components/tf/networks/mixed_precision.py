@@ -0,0 +1,81 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Mixed precision wrapper for sonnet networks."""
+
+from typing import Any
+
+import sonnet as snt
+import tensorflow as tf
+import tree
+
+
+def _cast_floats(value: Any, dtype: tf.DType) -> Any:
+    """Cast the floating point tensors of a nest to dtype."""
+
+    def cast(x: Any) -> Any:
+        if isinstance(x, (tf.Tensor, tf.Variable)) and x.dtype.is_floating:
+            return tf.cast(x, dtype)
+        return x
+
+    return tree.map_structure(cast, value)
+
+
+class MixedPrecisionNetwork(snt.Module):
+    """Runs a network in a lower precision, e.g. bfloat16.
+
+    The variables of the network stay in float32 and are cast to the compute
+    dtype when they are read, so the gradients and optimizer updates are
+    applied to the float32 variables. The inputs are cast to the compute dtype
+    and the outputs back to float32. The variables of the network must be
+    created before it is wrapped, e.g. with `tf2_utils.create_variables`.
+    """
+
+    def __init__(
+        self,
+        network: snt.Module,
+        compute_dtype: tf.DType = tf.bfloat16,
+        name: str = "mixed_precision_network",
+    ):
+        """Initialise the wrapper.
+
+        Args:
+            network: network to run in the compute dtype.
+            compute_dtype: dtype of the computations. bfloat16 has the range of
+                float32, so no loss scaling is needed.
+            name: name of the module.
+        """
+        super().__init__(name=name)
+        self._network = network
+        self._compute_dtype = compute_dtype
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Run the network in the compute dtype.
+
+        Args:
+            *args: inputs of the network.
+            **kwargs: keyword inputs of the network.
+
+        Returns:
+            outputs of the network, in float32.
+        """
+        modules = [self._network, *self._network.submodules]
+        with snt.custom_variable_getter(
+            lambda v: _cast_floats(v, self._compute_dtype), instances=modules
+        ):
+            outputs = self._network(
+                *_cast_floats(args, self._compute_dtype),
+                **_cast_floats(kwargs, self._compute_dtype),
+            )
+        return _cast_floats(outputs, tf.float32)
@@ -14,7 +14,7 @@
 # limitations under the License.
 """MAD4PG system implementation."""
 
-from typing import Callable, Dict, List, Optional, Type, Union
+from typing import Any, Callable, Dict, List, Optional, Type, Union
 
 import dm_env
 import sonnet as snt
@@ -22,13 +22,21 @@ from acme import specs as acme_specs
 
 from mava import core
 from mava import specs as mava_specs
+from mava.adders.reverb import (
+    ColumnCompression,
+    ExtrasStoragePolicy,
+    FlushPolicy,
+    ReverbDatasetConfig,
+)
 from mava.components.tf.architectures import DecentralisedQValueActorCritic
 from mava.environment_loop import ParallelEnvironmentLoop
 from mava.systems.tf.mad4pg import training
 from mava.systems.tf.maddpg.execution import MADDPGFeedForwardExecutor
 from mava.systems.tf.maddpg.system import MADDPG
+from mava.systems.tf.priority_utils import PrioritizedReplay
 from mava.utils import enums
 from mava.utils.loggers import MavaLogger
+from mava.utils.profiling_utils import ProfilingConfig
 
 
 class MAD4PG(MADDPG):
@@ -78,8 +86,16 @@ class MAD4PG(MADDPG):
         n_step: int = 5,
         sequence_length: int = 20,
         period: int = 20,
+        burn_in_length: int = 0,
         bootstrap_n: int = 10,
         max_gradient_norm: float = None,
+        steps_per_call: int = 1,
+        mixed_precision: bool = False,
+        num_trainer_replicas: int = 1,
+        trainers_per_node: int = 1,
+        replay_dataset: Optional[ReverbDatasetConfig] = None,
+        accumulation_steps: int = 1,
+        profiling: Optional[ProfilingConfig] = None,
         checkpoint: bool = True,
         checkpoint_minute_interval: int = 5,
         checkpoint_subpath: str = "~/mava/",
@@ -91,6 +107,17 @@ class MAD4PG(MADDPG):
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
         termination_condition: Optional[Dict[str, int]] = None,
         evaluator_interval: Optional[dict] = None,
+        shared_memory_variables: bool = False,
+        adder_flush_policy: Optional[FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, ExtrasStoragePolicy]] = None,
+        max_replay_bytes: Optional[int] = None,
+        column_compression: Optional[Dict[str, ColumnCompression]] = None,
+        prioritized_replay: Optional[PrioritizedReplay] = None,
+        replay_sampler_fn: Optional[Callable[[], Any]] = None,
+        replay_remover_fn: Optional[Callable[[], Any]] = None,
+        trainer_n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        stacked_agents: bool = False,
     ):
         """Initialise the system
 
@@ -153,11 +180,45 @@ class MAD4PG(MADDPG):
             sequence_length: recurrent sequence rollout length.
             period: Consecutive starting points for overlapping
                 rollouts across a sequence.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                the recurrent trainers only use to refresh the stored core states,
+                without gradients, as in R2D2. This allows shorter sequence_length and
+                period. Defaults to 0.
             bootstrap_n: Used to determine the spacing between
                 q_value/value estimation for bootstrapping. Should be less
                 than sequence_length.
             max_gradient_norm: maximum allowed norm for gradients
                 before clipping is applied.
+            steps_per_call: number of trainer steps run inside a single compiled call.
+                The losses are averaged over these steps, and the counts and variables
+                are synced with the variable source once per call, which lowers the
+                overhead of every step for small networks. Defaults to 1.
+            mixed_precision: if True, the trainers compute the online observation
+                networks in bfloat16 with float32 variables, which speeds up large
+                observation networks on accelerators with bfloat16 support. Only
+                the observation networks with variables are converted, so the
+                option has no effect with observation networks such as
+                batch_concat. The policy, critic and value networks stay in
+                float32. Defaults to False.
+            num_trainer_replicas: number of replicas of every trainer. Each replica
+                samples its own batch and the replicas apply the same averaged
+                gradients, so the trainers can use several GPUs or CPU cores.
+                Defaults to 1.
+            trainers_per_node: number of trainers co-hosted in each trainer node. The
+                trainers of a node share one process and TensorFlow runtime, and a
+                scheduler steps the trainer whose table has the most samples
+                available. Defaults to 1, one process per trainer.
+            replay_dataset: parallel readers, in-flight samples, interleave cycle
+                and autotuning of the pipeline that samples the trainer batches,
+                see ReverbDatasetConfig. Defaults to None, which uses 12 parallel
+                readers.
+            accumulation_steps: number of micro-batches every sampled batch is
+                split into. Their gradients are accumulated and applied in a single
+                optimizer step, which bounds the memory of the trainers for large
+                batch sizes. batch_size must be divisible by it. Defaults to 1.
+            profiling: trace windows and signal file that capture `tf.profiler`
+                traces of the trainers, and log the time per step of their phases,
+                see ProfilingConfig. Defaults to None, which does not profile.
             checkpoint: whether to checkpoint models.
             checkpoint_minute_interval: The number of minutes to wait between
                 checkpoints.
@@ -192,6 +253,56 @@ class MAD4PG(MADDPG):
                 happen at every timestep.
                 E.g. to evaluate a system after every 100 executor episodes,
                 evaluator_interval = {"executor_episodes": 100}.
+            shared_memory_variables: whether the variable source also publishes its
+                variables into shared memory, so that executors and trainers on the same
+                host read them without an RPC. Nodes on other hosts fall back to RPC.
+                Requires Python 3.8+.
+            adder_flush_policy: determines how often the adders wait for their items to
+                be written to the replay tables, e.g. every K items, after a byte budget
+                or after a time interval. Defaults to flushing after every item.
+            extras_storage_policies: how each extras field (e.g. core_states,
+                network_int_keys) is stored in the replay items, see
+                ExtrasStoragePolicy. Fields that are not listed are stored for every
+                step. Defaults to None, which stores every field for every step.
+                DEFAULT_EXTRAS_STORAGE_POLICIES stores the recurrent states only at the
+                start of each sequence and the network keys once per item.
+            max_replay_bytes: optional memory budget of the replay tables in bytes. The
+                size of an item is estimated from the table signature and the budget is
+                shared equally by the tables, so each table holds at most
+                max_replay_size items and at most as many as fit in its share of the
+                budget. Defaults to None, which only limits the number of items.
+            column_compression: how each column of the adders, e.g. observations, is
+                stored in replay, see ColumnCompression. This sets the chunk length of
+                each column and can store image observations as uint8, they are cast
+                back to float32 when sampled. Defaults to None.
+            prioritized_replay: configuration of prioritized experience replay, see
+                PrioritizedReplay. The executors insert items with an initial priority,
+                the trainers replace it by the TD errors of the sampled items and weight
+                their losses with importance sampling weights. Defaults to None, which
+                samples uniformly.
+            replay_sampler_fn: function that creates the selector used to sample items
+                from each replay table, e.g. `lambda: reverb.selectors.Lifo()`. Defaults
+                to uniform sampling, or prioritized sampling if prioritized_replay is
+                set.
+            replay_remover_fn: function that creates the selector used to remove items
+                from each replay table once it is full. Defaults to removing the oldest
+                items first.
+            trainer_n_step: if set, the feedforward executors store the single steps in
+                windows of length n_step + 1 and the trainers compute
+                trainer_n_step-step returns from them, so trainer_n_step can be changed
+                without collecting new data. It must be at most n_step. Defaults to
+                None, which stores n-step transitions.
+            vectorize_agents: if True, the trainers concatenate the agents that share a
+                network along the batch dimension and run each network once per network
+                key instead of once per agent, which is faster with many agents per
+                network. Each network is then updated once per step with the sum of
+                the mean losses of its agents, which matches the per-agent updates for
+                SGD without gradient clipping. Adaptive optimizers and gradient
+                clipping see one update per network instead of one per agent. Only
+                supported by the feedforward trainers. Defaults to False.
+            stacked_agents: the stacked agent layout, see the MADQN system, is not
+                supported by MAD4PG yet, so this must be False. It is only implemented
+                by MADQNStackedTrainer.
         """
 
         super().__init__(
@@ -222,7 +333,15 @@ class MAD4PG(MADDPG):
             sequence_length=sequence_length,
             bootstrap_n=bootstrap_n,
             period=period,
+            burn_in_length=burn_in_length,
             max_gradient_norm=max_gradient_norm,
+            steps_per_call=steps_per_call,
+            mixed_precision=mixed_precision,
+            num_trainer_replicas=num_trainer_replicas,
+            trainers_per_node=trainers_per_node,
+            replay_dataset=replay_dataset,
+            accumulation_steps=accumulation_steps,
+            profiling=profiling,
             checkpoint=checkpoint,
             checkpoint_subpath=checkpoint_subpath,
             checkpoint_minute_interval=checkpoint_minute_interval,
@@ -234,6 +353,17 @@ class MAD4PG(MADDPG):
             target_averaging=target_averaging,
             target_update_rate=target_update_rate,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            trainer_n_step=trainer_n_step,
+            vectorize_agents=vectorize_agents,
+            stacked_agents=stacked_agents,
+            replay_remover_fn=replay_remover_fn,
+            replay_sampler_fn=replay_sampler_fn,
+            prioritized_replay=prioritized_replay,
+            extras_storage_policies=extras_storage_policies,
+            max_replay_bytes=max_replay_bytes,
+            column_compression=column_compression,
+            adder_flush_policy=adder_flush_policy,
+            shared_memory_variables=shared_memory_variables,
             termination_condition=termination_condition,
             evaluator_interval=evaluator_interval,
         )
@@ -14,17 +14,15 @@
 # limitations under the License.
 """MAD4PG system trainer implementation."""
 
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import reverb
 import sonnet as snt
 import tensorflow as tf
-import tree
 from acme.tf import losses
 from acme.tf import utils as tf2_utils
 from acme.utils import loggers
 
-from mava import types as mava_types
 from mava.adders.reverb.base import Trajectory
 from mava.components.tf.losses.sequence import recurrent_n_step_critic_loss
 from mava.systems.tf.maddpg.training import (
@@ -38,6 +36,7 @@ from mava.systems.tf.maddpg.training import (
     MADDPGStateBasedSingleActionCriticRecurrentTrainer,
     MADDPGStateBasedTrainer,
 )
+from mava.systems.tf.priority_utils import PriorityClient
 from mava.systems.tf.variable_utils import VariableClient
 from mava.utils import training_utils as train_utils
 
@@ -73,6 +72,11 @@ class MAD4PGBaseTrainer(MADDPGBaseTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise MAD4PG trainer
 
@@ -107,6 +111,29 @@ class MAD4PGBaseTrainer(MADDPGBaseTrainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            n_step: if set, the sampled items are windows of single steps added by
+                ParallelNStepSequenceAdder, and the trainer computes the n-step returns
+                over n_step steps. Defaults to None, for items that are n-step
+                transitions.
+            vectorize_agents: if True, the agents that share a network are concatenated
+                along the batch dimension, so the observation, policy and critic
+                networks run once per network key instead of once per agent. Each
+                network is then updated once per step with the sum of the mean losses
+                of its agents. This matches the per-agent updates for SGD without
+                gradient clipping, but adaptive optimizers and gradient clipping see
+                one update per network instead of one per agent. Defaults to False.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -130,8 +157,37 @@ class MAD4PGBaseTrainer(MADDPGBaseTrainer):
             max_gradient_norm=max_gradient_norm,
             logger=logger,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
+    def _critic_loss(
+        self, q_tm1: Any, r_t: tf.Tensor, d_t: tf.Tensor, q_t: Any
+    ) -> Tuple[tf.Tensor, tf.Tensor]:
+        """Distributional critic loss of a batch of transitions.
+
+        Args:
+            q_tm1: value distribution of the critic network at timestep t-1.
+            r_t: rewards.
+            d_t: environment discounts.
+            q_t: value distribution of the target critic network at timestep t.
+
+        Returns:
+            the critic loss and the priority of each transition.
+        """
+        # Cast the additional discount to match the environment discount dtype.
+        discount = tf.cast(self._discount, dtype=d_t.dtype)
+        critic_loss = losses.categorical(q_tm1, r_t, discount * d_t, q_t)
+        # The distributional loss is used as the priority.
+        return critic_loss, critic_loss
+
+    def _critic_values(self, q: Any) -> tf.Tensor:
+        """Mean of the value distribution of a critic network."""
+        return q.mean()
+
     # Forward pass that calculates loss.
     def _forward(self, inputs: reverb.ReplaySample) -> None:
         """Trainer forward pass
@@ -151,7 +207,7 @@ class MAD4PGBaseTrainer(MADDPGBaseTrainer):
         #   This discount is applied to future rewards after r_t.
         # o_t = dictionary of next observations or next observation sequences
         # e_t [Optional] = extra data for timestep t that the agents persist in replay.
-        trans = mava_types.Transition(*inputs.data)
+        trans = self._get_transitions(inputs.data)
         o_tm1, o_t, a_tm1, r_t, d_t, e_tm1, e_t = (
             trans.observations,
             trans.next_observations,
@@ -162,30 +218,49 @@ class MAD4PGBaseTrainer(MADDPGBaseTrainer):
             trans.next_extras,
         )
 
+        # Importance sampling weights that correct for prioritized sampling, see
+        # _accumulate.
+        importance_weights = self._importance_weights
+
         # Do forward passes through the networks and calculate the losses
         self.policy_losses = {}
         self.critic_losses = {}
+        priorities: List[tf.Tensor] = []
         with tf.GradientTape(persistent=True) as tape:
             o_tm1_trans, o_t_trans = self._transform_observations(o_tm1, o_t)
             a_t = self._target_policy_actions(o_t_trans)
+            joint_feed = self._get_joint_critic_feed(
+                o_tm1_trans, o_t_trans, a_tm1, a_t, e_tm1, e_t
+            )
+            q_values: Dict[str, Tuple[Any, Any]] = {}
 
             for agent in self._agents:
                 agent_key = self._agent_net_keys[agent]
 
                 # Get critic feed
-                o_tm1_feed, o_t_feed, a_tm1_feed, a_t_feed = self._get_critic_feed(
-                    o_tm1_trans=o_tm1_trans,
-                    o_t_trans=o_t_trans,
-                    a_tm1=a_tm1,
-                    a_t=a_t,
-                    e_tm1=e_tm1,
-                    e_t=e_t,
-                    agent=agent,
-                )
-
-                # Critic learning.
-                q_tm1 = self._critic_networks[agent_key](o_tm1_feed, a_tm1_feed)
-                q_t = self._target_critic_networks[agent_key](o_t_feed, a_t_feed)
+                if joint_feed is None:
+                    critic_feed = self._get_critic_feed(
+                        o_tm1_trans=o_tm1_trans,
+                        o_t_trans=o_t_trans,
+                        a_tm1=a_tm1,
+                        a_t=a_t,
+                        e_tm1=e_tm1,
+                        e_t=e_t,
+                        agent=agent,
+                    )
+                else:
+                    critic_feed = joint_feed
+                o_tm1_feed, o_t_feed, a_tm1_feed, a_t_feed = critic_feed
+
+                # Critic learning. The agents that share a network and a joint
+                # feed share the Q-value distributions.
+                q_key = agent if joint_feed is None else agent_key
+                if q_key not in q_values:
+                    q_values[q_key] = (
+                        self._critic_networks[agent_key](o_tm1_feed, a_tm1_feed),
+                        self._target_critic_networks[agent_key](o_t_feed, a_t_feed),
+                    )
+                q_tm1, q_t = q_values[q_key]
 
                 # Cast the additional discount to match the environment discount dtype.
                 discount = tf.cast(self._discount, dtype=d_t[agent].dtype)
@@ -194,13 +269,20 @@ class MAD4PGBaseTrainer(MADDPGBaseTrainer):
                 critic_loss = losses.categorical(
                     q_tm1, r_t[agent], discount * d_t[agent], q_t
                 )
-                self.critic_losses[agent] = tf.reduce_mean(critic_loss)
+                # The distributional loss is used as the priority.
+                priorities.append(critic_loss)
+                self.critic_losses[agent] = tf.reduce_mean(
+                    critic_loss * importance_weights
+                )
                 # Actor learning.
                 o_t_agent_feed = o_t_trans[agent]
                 dpg_a_t = self._policy_networks[agent_key](o_t_agent_feed)
 
                 # Get dpg actions
-                dpg_a_t_feed = self._get_dpg_feed(a_t, dpg_a_t, agent)
+                if joint_feed is None:
+                    dpg_a_t_feed = self._get_dpg_feed(a_t, dpg_a_t, agent)
+                else:
+                    dpg_a_t_feed = self._get_joint_dpg_feed(a_t_feed, dpg_a_t, agent)
 
                 # Get dpg Q values.
                 dpg_z_t = self._critic_networks[agent_key](o_t_feed, dpg_a_t_feed)
@@ -218,6 +300,9 @@ class MAD4PGBaseTrainer(MADDPGBaseTrainer):
                     clip_norm=clip_norm,
                 )
                 self.policy_losses[agent] = tf.reduce_mean(policy_loss)
+
+        # The priority of a transition is the largest priority of the agents.
+        self.priorities = tf.stop_gradient(tf.reduce_max(tf.stack(priorities), axis=0))
         self.tape = tape
 
 
@@ -246,6 +331,11 @@ class MAD4PGDecentralisedTrainer(MAD4PGBaseTrainer, MADDPGDecentralisedTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise decentralised MAD4PG trainer
 
@@ -281,6 +371,29 @@ class MAD4PGDecentralisedTrainer(MAD4PGBaseTrainer, MADDPGDecentralisedTrainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            n_step: if set, the sampled items are windows of single steps added by
+                ParallelNStepSequenceAdder, and the trainer computes the n-step returns
+                over n_step steps. Defaults to None, for items that are n-step
+                transitions.
+            vectorize_agents: if True, the agents that share a network are concatenated
+                along the batch dimension, so the observation, policy and critic
+                networks run once per network key instead of once per agent. Each
+                network is then updated once per step with the sum of the mean losses
+                of its agents. This matches the per-agent updates for SGD without
+                gradient clipping, but adaptive optimizers and gradient clipping see
+                one update per network instead of one per agent. Defaults to False.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -304,6 +417,11 @@ class MAD4PGDecentralisedTrainer(MAD4PGBaseTrainer, MADDPGDecentralisedTrainer):
             variable_client=variable_client,
             counts=counts,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -332,6 +450,11 @@ class MAD4PGCentralisedTrainer(MAD4PGBaseTrainer, MADDPGCentralisedTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise centralised MAD4PG trainer
 
@@ -367,6 +490,29 @@ class MAD4PGCentralisedTrainer(MAD4PGBaseTrainer, MADDPGCentralisedTrainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            n_step: if set, the sampled items are windows of single steps added by
+                ParallelNStepSequenceAdder, and the trainer computes the n-step returns
+                over n_step steps. Defaults to None, for items that are n-step
+                transitions.
+            vectorize_agents: if True, the agents that share a network are concatenated
+                along the batch dimension, so the observation, policy and critic
+                networks run once per network key instead of once per agent. Each
+                network is then updated once per step with the sum of the mean losses
+                of its agents. This matches the per-agent updates for SGD without
+                gradient clipping, but adaptive optimizers and gradient clipping see
+                one update per network instead of one per agent. Defaults to False.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -390,6 +536,11 @@ class MAD4PGCentralisedTrainer(MAD4PGBaseTrainer, MADDPGCentralisedTrainer):
             variable_client=variable_client,
             counts=counts,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -418,6 +569,11 @@ class MAD4PGStateBasedTrainer(MAD4PGBaseTrainer, MADDPGStateBasedTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise state-based MAD4PG trainer
 
@@ -453,6 +609,29 @@ class MAD4PGStateBasedTrainer(MAD4PGBaseTrainer, MADDPGStateBasedTrainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            n_step: if set, the sampled items are windows of single steps added by
+                ParallelNStepSequenceAdder, and the trainer computes the n-step returns
+                over n_step steps. Defaults to None, for items that are n-step
+                transitions.
+            vectorize_agents: if True, the agents that share a network are concatenated
+                along the batch dimension, so the observation, policy and critic
+                networks run once per network key instead of once per agent. Each
+                network is then updated once per step with the sum of the mean losses
+                of its agents. This matches the per-agent updates for SGD without
+                gradient clipping, but adaptive optimizers and gradient clipping see
+                one update per network instead of one per agent. Defaults to False.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -476,6 +655,11 @@ class MAD4PGStateBasedTrainer(MAD4PGBaseTrainer, MADDPGStateBasedTrainer):
             variable_client=variable_client,
             counts=counts,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -509,6 +693,10 @@ class MAD4PGBaseRecurrentTrainer(MADDPGBaseRecurrentTrainer):
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise Recurrent MAD4PG trainer
 
@@ -544,6 +732,21 @@ class MAD4PGBaseRecurrentTrainer(MADDPGBaseRecurrentTrainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states of the policies, without gradients,
+                as in R2D2. The losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -568,6 +771,10 @@ class MAD4PGBaseRecurrentTrainer(MADDPGBaseRecurrentTrainer):
             counts=counts,
             bootstrap_n=bootstrap_n,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
     # Forward pass that calculates loss.
@@ -581,6 +788,9 @@ class MAD4PGBaseRecurrentTrainer(MADDPGBaseRecurrentTrainer):
         # TODO: Update this forward function to work like MAD4PG
         data: Trajectory = inputs.data
 
+        # Refresh the core states over the burn in steps, if any.
+        data, core_state, target_core_state = self._burn_in(data)
+
         # Note (dries): The unused variable is start_of_episodes.
         observations, actions, rewards, end_of_episode, _, extras = (
             data.observations,
@@ -591,17 +801,17 @@ class MAD4PGBaseRecurrentTrainer(MADDPGBaseRecurrentTrainer):
             data.extras,
         )
 
-        # Get initial state for the LSTM from replay and
-        # extract the first state in the sequence..
-        core_state = tree.map_structure(lambda s: s[:, 0, :], extras["core_states"])
-        target_core_state = tree.map_structure(tf.identity, core_state)
-
         # TODO (dries): Take out all the data_points that does not need
         #  to be processed here at the start. Therefore it does not have
         #  to be done later on and saves processing time.
 
+        # Importance sampling weights that correct for prioritized sampling, see
+        # _accumulate.
+        importance_weights = self._importance_weights
+
         self.policy_losses: Dict[str, tf.Tensor] = {}
         self.critic_losses: Dict[str, tf.Tensor] = {}
+        priorities: List[tf.Tensor] = []
 
         # Do forward passes through the networks and calculate the losses
         with tf.GradientTape(persistent=True) as tape:
@@ -665,12 +875,22 @@ class MAD4PGBaseRecurrentTrainer(MADDPGBaseRecurrentTrainer):
                     bootstrap_n=self._bootstrap_n,
                     loss_fn=losses.categorical,
                 )
-                self.critic_losses[agent] = tf.reduce_mean(critic_loss)
+
+                # The distributional loss of every step, batch major, is used as
+                # the priority.
+                critic_loss = tf.reshape(
+                    critic_loss, [tf.shape(importance_weights)[0], -1]
+                )
+                priorities.append(
+                    train_utils.sequence_priorities(critic_loss, time_axis=1)
+                )
+                self.critic_losses[agent] = tf.reduce_mean(
+                    critic_loss * tf.expand_dims(importance_weights, axis=1)
+                )
 
                 # Actor learning.
                 obs_agent_feed = target_obs_trans[agent]
-                # TODO (dries): Why is there an extra tuple?
-                agent_core_state = core_state[agent][0]
+                agent_core_state = core_state[agent]
                 transposed_obs = tf2_utils.batch_to_sequence(obs_agent_feed)
                 outputs, updated_states = snt.static_unroll(
                     self._policy_networks[agent_key],
@@ -716,6 +936,9 @@ class MAD4PGBaseRecurrentTrainer(MADDPGBaseRecurrentTrainer):
                 self.policy_losses[agent] = tf.reduce_sum(policy_loss) / tf.reduce_sum(
                     policy_mask
                 )
+
+        # The priority of a sequence is the largest priority of the agents.
+        self.priorities = tf.reduce_max(tf.stack(priorities), axis=0)
         self.tape = tape
 
 
@@ -747,6 +970,10 @@ class MAD4PGDecentralisedRecurrentTrainer(
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise Recurrent MAD4PG trainer
 
@@ -783,6 +1010,21 @@ class MAD4PGDecentralisedRecurrentTrainer(
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states of the policies, without gradients,
+                as in R2D2. The losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -807,6 +1049,10 @@ class MAD4PGDecentralisedRecurrentTrainer(
             counts=counts,
             bootstrap_n=bootstrap_n,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -838,6 +1084,10 @@ class MAD4PGCentralisedRecurrentTrainer(
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise Recurrent MAD4PG trainer
 
@@ -874,6 +1124,21 @@ class MAD4PGCentralisedRecurrentTrainer(
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states of the policies, without gradients,
+                as in R2D2. The losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -898,6 +1163,10 @@ class MAD4PGCentralisedRecurrentTrainer(
             counts=counts,
             bootstrap_n=bootstrap_n,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -929,6 +1198,10 @@ class MAD4PGStateBasedRecurrentTrainer(
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise Recurrent MAD4PG trainer
 
@@ -965,6 +1238,21 @@ class MAD4PGStateBasedRecurrentTrainer(
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states of the policies, without gradients,
+                as in R2D2. The losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -989,6 +1277,10 @@ class MAD4PGStateBasedRecurrentTrainer(
             counts=counts,
             bootstrap_n=bootstrap_n,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -1019,6 +1311,10 @@ class MAD4PGStateBasedSingleActionCriticRecurrentTrainer(
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise State-Based Recurrent MAD4PG trainer
 
@@ -1055,6 +1351,21 @@ class MAD4PGStateBasedSingleActionCriticRecurrentTrainer(
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states of the policies, without gradients,
+                as in R2D2. The losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         super().__init__(
@@ -1078,4 +1389,8 @@ class MAD4PGStateBasedSingleActionCriticRecurrentTrainer(
             variable_client=variable_client,
             counts=counts,
             bootstrap_n=bootstrap_n,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
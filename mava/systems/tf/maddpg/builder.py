@@ -17,12 +17,12 @@
 
 import copy
 import dataclasses
-from typing import Any, Dict, Iterator, List, Optional, Type, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
 
 import reverb
 import sonnet as snt
 import tensorflow as tf
-from acme import datasets
+from absl import logging
 from acme.specs import EnvironmentSpec
 from acme.tf import utils as tf2_utils
 from acme.utils import counting, loggers
@@ -30,10 +30,15 @@ from dm_env import specs as dm_specs
 
 from mava import adders, core, specs, types
 from mava.adders import reverb as reverb_adders
+from mava.adders.reverb import utils as reverb_utils
 from mava.systems.tf import executors, variable_utils
 from mava.systems.tf.maddpg import training
 from mava.systems.tf.maddpg.execution import MADDPGFeedForwardExecutor
+from mava.systems.tf.priority_utils import PrioritizedReplay, PriorityClient
+from mava.systems.tf.shared_memory import make_shared_memory_prefix
 from mava.systems.tf.variable_sources import VariableSource as MavaVariableSource
+from mava.utils import builder_utils, profiling_utils
+from mava.utils import training_utils as train_utils
 from mava.utils.sort_utils import sort_str_num
 from mava.wrappers import NetworkStatisticsActorCritic, ScaledDetailedTrainerStatistics
 
@@ -66,7 +71,7 @@ class MADDPGConfig:
             checkpoints.
         discount: discount to use for TD updates.
         batch_size: batch size for updates.
-        prefetch_size: size to prefetch from replay.
+        prefetch_size: size to prefetch from replay, or tf.data.AUTOTUNE.
         target_averaging: whether to use polyak averaging for target network updates.
         target_update_period: number of steps before target networks are updated.
         target_update_rate: update rate when using averaging.
@@ -99,6 +104,82 @@ class MADDPGConfig:
         evaluator_interval: An optional condition that is used to
             evaluate/test system performance after [evaluator_interval]
             condition has been met.
+        shared_memory_variables: whether the variable source also publishes its
+            variables into shared memory, so that executors and trainers on the same
+            host read them without an RPC. Nodes on other hosts fall back to RPC.
+            Requires Python 3.8+.
+        adder_flush_policy: determines how often the adders wait for their items to be
+            written to the replay tables, e.g. every K items, after a byte budget or
+            after a time interval. Defaults to flushing after every item.
+        extras_storage_policies: how each extras field (e.g. core_states,
+            network_int_keys) is stored in the replay items, see ExtrasStoragePolicy.
+            Fields that are not listed are stored for every step. Defaults to None,
+            which stores every field for every step. DEFAULT_EXTRAS_STORAGE_POLICIES
+            stores the recurrent states only at the start of each sequence and the
+            network keys once per item.
+        prioritized_replay: configuration of prioritized experience replay, see
+            PrioritizedReplay. The executors insert items with an initial priority, the
+            trainers replace it by the TD errors of the sampled items and weight their
+            losses with importance sampling weights. Defaults to None, which samples
+            uniformly.
+        replay_sampler_fn: function that creates the selector used to sample items from
+            each replay table, e.g. `lambda: reverb.selectors.Lifo()`. Defaults to
+            uniform sampling, or prioritized sampling if prioritized_replay is set.
+        replay_remover_fn: function that creates the selector used to remove items from
+            each replay table once it is full. Defaults to removing the oldest items
+            first.
+        trainer_n_step: if set, the feedforward executors store the single steps in
+            windows of length n_step + 1 and the trainers compute trainer_n_step-step
+            returns from them, so trainer_n_step can be changed without collecting new
+            data. It must be at most n_step. Defaults to None, which stores n-step
+            transitions.
+        vectorize_agents: if True, the trainers concatenate the agents that share a
+            network along the batch dimension and run each network once per network key
+            instead of once per agent, which is faster with many agents per network.
+            Each network is then updated once per step with the sum of the mean losses
+            of its agents, which matches the per-agent updates for SGD without gradient
+            clipping. Adaptive optimizers and gradient clipping see one update per
+            network instead of one per agent. Only supported by the feedforward
+            trainers. Defaults to False.
+        stacked_agents: the stacked agent layout, see MADQNConfig, is not supported by
+            MADDPG and MAD4PG yet, so this must be False. It is only implemented by
+            MADQNStackedTrainer.
+        burn_in_length: number of steps at the start of every sampled sequence that the
+            recurrent trainers only use to refresh the stored core states, without
+            gradients, as in R2D2. This allows shorter sequence_length and period. It
+            must be smaller than sequence_length and is only supported by the recurrent
+            trainers. Defaults to 0.
+        max_replay_bytes: optional memory budget of the replay tables in bytes. The size
+            of an item is estimated from the table signature and the budget is shared
+            equally by the tables, so each table holds at most max_replay_size items and
+            at most as many as fit in its share of the budget. Defaults to None, which
+            only limits the number of items.
+        column_compression: how each column of the adders, e.g. observations, is stored
+            in replay, see ColumnCompression. This sets the chunk length of each column
+            and can store image observations as uint8, they are cast back to float32
+            when sampled. Defaults to None.
+        steps_per_call: number of trainer steps run inside a single compiled call. The
+            losses are averaged over these steps, and the counts and variables are
+            synced with the variable source once per call. Defaults to 1.
+        mixed_precision: if True, the trainer computes the online observation networks
+            that have variables in bfloat16, while the variables, the other networks
+            and the target networks stay in float32. It has no effect with
+            observation networks without variables, e.g. batch_concat. Defaults to
+            False.
+        num_trainer_replicas: number of replicas of every trainer. Each replica
+            samples its own batch from the trainer table and the replicas apply the
+            same averaged gradients, so a trainer step trains on num_trainer_replicas
+            batches. The replicas are placed on the GPUs, or on logical CPU devices.
+            Defaults to 1.
+        replay_dataset: parallel readers, in-flight samples, interleave cycle and
+            autotuning of the pipeline that samples the trainer batches, see
+            ReverbDatasetConfig. Defaults to None, which uses 12 parallel readers.
+        accumulation_steps: number of micro-batches every sampled batch is split into.
+            Their gradients are accumulated and applied in a single optimizer step, so
+            only the activations of one micro-batch are kept at a time. Defaults to 1.
+        profiling: trace windows and signal file that capture `tf.profiler` traces of
+            the trainers, see ProfilingConfig. The time per step of the trainer phases
+            is logged with the losses. Defaults to None, which does not profile.
     """
 
     environment_spec: specs.MAEnvironmentSpec
@@ -136,6 +217,26 @@ class MADDPGConfig:
     termination_condition: Optional[Dict[str, int]] = None
     evaluator_interval: Optional[dict] = None
     learning_rate_scheduler_fn: Optional[Any] = None
+    shared_memory_variables: bool = False
+    adder_flush_policy: Optional[reverb_adders.FlushPolicy] = None
+    extras_storage_policies: Optional[
+        Dict[str, reverb_adders.ExtrasStoragePolicy]
+    ] = None
+    prioritized_replay: Optional[PrioritizedReplay] = None
+    replay_sampler_fn: Optional[Callable[[], Any]] = None
+    replay_remover_fn: Optional[Callable[[], Any]] = None
+    trainer_n_step: Optional[int] = None
+    vectorize_agents: bool = False
+    stacked_agents: bool = False
+    burn_in_length: int = 0
+    max_replay_bytes: Optional[int] = None
+    column_compression: Optional[Dict[str, reverb_adders.ColumnCompression]] = None
+    steps_per_call: int = 1
+    mixed_precision: bool = False
+    num_trainer_replicas: int = 1
+    replay_dataset: Optional[reverb_adders.ReverbDatasetConfig] = None
+    accumulation_steps: int = 1
+    profiling: Optional[profiling_utils.ProfilingConfig] = None
 
 
 class MADDPGBuilder:
@@ -170,6 +271,55 @@ class MADDPGBuilder:
         self._trainer_fn = trainer_fn
         self._executor_fn = executor_fn
 
+        # The builder is shared by all nodes of the program, so the shared-memory
+        # segments of the variable source can be found under the same prefix.
+        self._shared_memory_prefix = (
+            make_shared_memory_prefix()
+            if self._config.shared_memory_variables
+            else None
+        )
+
+        self._extras_storage_policies = self._config.extras_storage_policies or {}
+
+        # Distribution strategy of the trainers, see make_trainer_replicator.
+        self._trainer_replicator: Optional[tf.distribute.Strategy] = None
+
+        if (
+            self._config.trainer_n_step is not None
+            and not 0 < self._config.trainer_n_step <= self._config.n_step
+        ):
+            raise ValueError(
+                "trainer_n_step should be between 1 and n_step, got "
+                f"{self._config.trainer_n_step} with n_step={self._config.n_step}."
+            )
+
+        if self._config.vectorize_agents and not issubclass(
+            self._trainer_fn, training.MADDPGBaseTrainer
+        ):
+            raise ValueError(
+                "vectorize_agents is only supported by the feedforward trainers, "
+                f"got {self._trainer_fn.__name__}."
+            )
+
+        if self._config.stacked_agents:
+            raise ValueError(
+                "The stacked agent layout is only supported by MADQN, see "
+                "MADQNStackedTrainer."
+            )
+
+        if self._config.burn_in_length:
+            if not issubclass(self._trainer_fn, training.MADDPGBaseRecurrentTrainer):
+                raise ValueError(
+                    "burn_in_length is only supported by the recurrent trainers, "
+                    f"got {self._trainer_fn.__name__}."
+                )
+            if not 0 < self._config.burn_in_length < self._config.sequence_length:
+                raise ValueError(
+                    "burn_in_length should be between 0 and sequence_length, got "
+                    f"{self._config.burn_in_length} with "
+                    f"sequence_length={self._config.sequence_length}."
+                )
+
     def convert_discrete_to_bounded(
         self, environment_spec: specs.MAEnvironmentSpec
     ) -> specs.MAEnvironmentSpec:
@@ -251,8 +401,15 @@ class MADDPGBuilder:
             def adder_sig_fn(
                 env_spec: specs.MAEnvironmentSpec, extra_specs: Dict[str, Any]
             ) -> Any:
+                if self._config.trainer_n_step:
+                    return reverb_adders.ParallelNStepSequenceAdder.signature(
+                        env_spec,
+                        extras_spec=extra_specs,
+                        extras_storage_policies=self._extras_storage_policies,
+                        n_step=self._config.n_step,
+                    )
                 return reverb_adders.ParallelNStepTransitionAdder.signature(
-                    env_spec, extra_specs
+                    env_spec, extra_specs, self._extras_storage_policies
                 )
 
         elif issubclass(self._executor_fn, executors.RecurrentExecutor):
@@ -261,7 +418,10 @@ class MADDPGBuilder:
                 env_spec: specs.MAEnvironmentSpec, extra_specs: Dict[str, Any]
             ) -> Any:
                 return reverb_adders.ParallelSequenceAdder.signature(
-                    env_spec, self._config.sequence_length, extra_specs
+                    env_spec,
+                    self._config.sequence_length,
+                    extra_specs,
+                    self._extras_storage_policies,
                 )
 
         else:
@@ -287,6 +447,7 @@ class MADDPGBuilder:
 
         # Create table per trainer
         replay_tables = []
+        table_sizes: Dict[str, Tuple[int, int]] = {}
 
         for table_key in self._config.table_network_config.keys():
 
@@ -307,19 +468,53 @@ class MADDPGBuilder:
                 trainer_network_names,
             )
 
+            signature = reverb_utils.uint8_signature(
+                adder_sig_fn(env_spec, extra_specs), self._config.column_compression
+            )
+            max_size = builder_utils.replay_table_max_size(
+                signature,
+                self._config.max_replay_size,
+                self._config.max_replay_bytes,
+                num_tables=len(self._config.table_network_config),
+            )
+            table_sizes[table_key] = (
+                builder_utils.estimate_item_nbytes(signature),
+                max_size,
+            )
             replay_tables.append(
                 reverb.Table(
                     name=table_key,
-                    sampler=reverb.selectors.Uniform(),
-                    remover=reverb.selectors.Fifo(),
-                    max_size=self._config.max_replay_size,
+                    sampler=self._make_replay_sampler(),
+                    remover=(
+                        self._config.replay_remover_fn()
+                        if self._config.replay_remover_fn
+                        else reverb.selectors.Fifo()
+                    ),
+                    max_size=max_size,
                     rate_limiter=limiter_fn(),
-                    signature=adder_sig_fn(env_spec, extra_specs),
+                    signature=signature,
                 )
             )
+        logging.info(builder_utils.replay_memory_report(table_sizes))
 
         return replay_tables
 
+    def _make_replay_sampler(self) -> Any:
+        """Create the selector used to sample items from the replay tables.
+
+        Returns:
+            the selector created by `replay_sampler_fn` if set, otherwise a
+                prioritized selector if prioritized replay is enabled, or a
+                uniform selector.
+        """
+        if self._config.replay_sampler_fn:
+            return self._config.replay_sampler_fn()
+        if self._config.prioritized_replay:
+            return reverb.selectors.Prioritized(
+                self._config.prioritized_replay.priority_exponent
+            )
+        return reverb.selectors.Uniform()
+
     def make_dataset_iterator(
         self,
         replay_client: reverb.Client,
@@ -335,19 +530,22 @@ class MADDPGBuilder:
             data samples from the dataset.
         """
 
-        sequence_length = (
-            self._config.sequence_length
-            if issubclass(self._executor_fn, executors.RecurrentExecutor)
-            else None
+        dataset_config = (
+            self._config.replay_dataset or reverb_adders.ReverbDatasetConfig()
         )
-
-        """Create a dataset iterator to use for learning/updating the system."""
-        dataset = datasets.make_reverb_dataset(
-            table=table_name,
+        dataset = reverb_adders.make_reverb_dataset(
             server_address=replay_client.server_address,
+            table=table_name,
             batch_size=self._config.batch_size,
+            num_readers=dataset_config.num_readers,
+            max_in_flight_samples_per_worker=(
+                dataset_config.max_in_flight_samples_per_worker
+            ),
+            cycle_length=dataset_config.cycle_length,
             prefetch_size=self._config.prefetch_size,
-            sequence_length=sequence_length,
+            column_compression=self._config.column_compression,
+            num_cast_calls=dataset_config.num_cast_calls,
+            autotune=dataset_config.autotune,
         )
         return iter(dataset)
 
@@ -365,13 +563,34 @@ class MADDPGBuilder:
             adder which sends data to a replay buffer.
         """
         # Create custom priority functons for the adder
+        priority_fn: reverb_adders.PriorityFn = lambda x: 1.0
+        prioritized_replay = self._config.prioritized_replay
+        if prioritized_replay:
+            initial_priority = prioritized_replay.initial_priority
+            priority_fn = prioritized_replay.initial_priority_fn or (
+                lambda x: initial_priority
+            )
         priority_fns = {
-            table_key: lambda x: 1.0
+            table_key: priority_fn
             for table_key in self._config.table_network_config.keys()
         }
 
         # Select adder
-        if issubclass(self._executor_fn, executors.FeedForwardExecutor):
+        if (
+            issubclass(self._executor_fn, executors.FeedForwardExecutor)
+            and self._config.trainer_n_step
+        ):
+            adder = reverb_adders.ParallelNStepSequenceAdder(
+                priority_fns=priority_fns,
+                client=replay_client,
+                net_ids_to_keys=self._config.unique_net_keys,
+                n_step=self._config.n_step,
+                table_network_config=self._config.table_network_config,
+                flush_policy=self._config.adder_flush_policy,
+                extras_storage_policies=self._extras_storage_policies,
+                column_compression=self._config.column_compression,
+            )
+        elif issubclass(self._executor_fn, executors.FeedForwardExecutor):
             adder = reverb_adders.ParallelNStepTransitionAdder(
                 priority_fns=priority_fns,
                 client=replay_client,
@@ -379,6 +598,9 @@ class MADDPGBuilder:
                 n_step=self._config.n_step,
                 table_network_config=self._config.table_network_config,
                 discount=self._config.discount,
+                flush_policy=self._config.adder_flush_policy,
+                extras_storage_policies=self._extras_storage_policies,
+                column_compression=self._config.column_compression,
             )
         elif issubclass(self._executor_fn, executors.RecurrentExecutor):
             adder = reverb_adders.ParallelSequenceAdder(
@@ -388,6 +610,9 @@ class MADDPGBuilder:
                 sequence_length=self._config.sequence_length,
                 table_network_config=self._config.table_network_config,
                 period=self._config.period,
+                flush_policy=self._config.adder_flush_policy,
+                extras_storage_policies=self._extras_storage_policies,
+                column_compression=self._config.column_compression,
             )
         else:
             raise NotImplementedError("Unknown executor type: ", self._executor_fn)
@@ -442,6 +667,7 @@ class MADDPGBuilder:
             self._config.checkpoint_subpath,
             self._config.checkpoint_minute_interval,
             self._config.termination_condition,
+            shared_memory_prefix=self._shared_memory_prefix,
         )
         return variable_source
 
@@ -502,6 +728,7 @@ class MADDPGBuilder:
                 update_period=0
                 if evaluator_interval
                 else self._config.executor_variable_update_period,
+                shared_memory_prefix=self._shared_memory_prefix,
             )
 
             # Make sure not to use a random policy after checkpoint restoration by
@@ -523,6 +750,44 @@ class MADDPGBuilder:
             interval=evaluator_interval,
         )
 
+    def make_priority_client(
+        self,
+        replay_client: reverb.Client,
+        table_name: str,
+    ) -> Optional[PriorityClient]:
+        """Create a client that updates the priorities of a replay table.
+
+        Args:
+            replay_client: Reverb Client which points to the
+                replay server.
+            table_name: name of the table the trainer samples from.
+
+        Returns:
+            priority client, or None if prioritized replay is not enabled.
+        """
+        if not self._config.prioritized_replay:
+            return None
+        return PriorityClient.from_config(
+            replay_client, table_name, self._config.prioritized_replay
+        )
+
+    def make_trainer_replicator(self) -> tf.distribute.Strategy:
+        """Create the distribution strategy of the trainers.
+
+        The networks and the trainer are created in the scope of the strategy,
+        so they are replicated over num_trainer_replicas devices. The strategy is
+        created once per process, so the trainers co-hosted in a process share it
+        with their networks.
+
+        Returns:
+            distribution strategy of the trainers.
+        """
+        if self._trainer_replicator is None:
+            self._trainer_replicator = train_utils.make_trainer_replicator(
+                self._config.num_trainer_replicas
+            )
+        return self._trainer_replicator
+
     def make_trainer(
         self,
         networks: Dict[str, Dict[str, snt.Module]],
@@ -532,6 +797,7 @@ class MADDPGBuilder:
         trainer_table_entry: List[Any],
         logger: Optional[types.NestedLogger] = None,
         connection_spec: Dict[str, List[str]] = None,
+        priority_client: Optional[PriorityClient] = None,
     ) -> core.Trainer:
         """Create a trainer instance.
         Args:
@@ -544,6 +810,8 @@ class MADDPGBuilder:
             logger: Logger object for logging  metadata.
             connection_spec: connection topology used
                 for networked system architectures. Defaults to None.
+            priority_client: client that updates the priorities of the sampled
+                items, if prioritized replay is enabled.
         Returns:
             system trainer, that uses the collected data from the
                 executors to update the parameters of the agent networks in the system.
@@ -589,6 +857,7 @@ class MADDPGBuilder:
             get_keys=get_keys,
             set_keys=set_keys,
             update_period=10,
+            shared_memory_prefix=self._shared_memory_prefix,
         )
 
         # Get all the initial variables
@@ -625,8 +894,26 @@ class MADDPGBuilder:
         if connection_spec:
             trainer_config["connection_spec"] = connection_spec
 
+        if priority_client:
+            trainer_config["priority_client"] = priority_client
+
+        if self._config.trainer_n_step and issubclass(
+            self._trainer_fn, training.MADDPGBaseTrainer
+        ):
+            trainer_config["n_step"] = self._config.trainer_n_step
+
+        if self._config.vectorize_agents:
+            trainer_config["vectorize_agents"] = True
+
         if issubclass(self._trainer_fn, training.MADDPGBaseRecurrentTrainer):
             trainer_config["bootstrap_n"] = self._config.bootstrap_n
+            trainer_config["burn_in_length"] = self._config.burn_in_length
+
+        if self._config.mixed_precision:
+            trainer_config["mixed_precision"] = True
+
+        if self._config.accumulation_steps > 1:
+            trainer_config["accumulation_steps"] = self._config.accumulation_steps
 
         # The learner updates the parameters (and initializes them).
         trainer = self._trainer_fn(**trainer_config)
@@ -637,7 +924,10 @@ class MADDPGBuilder:
         trainer = NetworkStatisticsActorCritic(trainer)  # type: ignore
 
         trainer = ScaledDetailedTrainerStatistics(  # type: ignore
-            trainer, metrics=["policy_loss", "critic_loss"]
+            trainer,
+            metrics=["policy_loss", "critic_loss"],
+            steps_per_call=self._config.steps_per_call,
+            profiling=self._config.profiling,
         )
 
         return trainer
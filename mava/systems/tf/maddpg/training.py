@@ -17,6 +17,7 @@
 """MADDPG trainer implementation."""
 
 import copy
+import functools
 import time
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
@@ -34,7 +35,10 @@ import mava
 from mava import types as mava_types
 from mava.adders.reverb.base import Trajectory
 from mava.components.tf.losses.sequence import recurrent_n_step_critic_loss
+from mava.components.tf.networks import MixedPrecisionNetwork
+from mava.systems.tf.priority_utils import PriorityClient
 from mava.systems.tf.variable_utils import VariableClient
+from mava.utils import profiling_utils, stacking_utils
 from mava.utils import training_utils as train_utils
 from mava.utils.sort_utils import sort_str_num
 
@@ -70,6 +74,11 @@ class MADDPGBaseTrainer(mava.Trainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise MADDPG trainer
 
@@ -106,6 +115,30 @@ class MADDPGBaseTrainer(mava.Trainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            n_step: if set, the sampled items are windows of single steps added by
+                ParallelNStepSequenceAdder, and the trainer computes the n-step returns
+                over n_step steps. Defaults to None, for items that are n-step
+                transitions.
+            vectorize_agents: if True, the agents that share a network are
+                concatenated along the batch dimension, so the observation, policy
+                and critic networks run once per network key instead of once per
+                agent. Each network is then updated once per step with the sum of
+                the mean losses of its agents. This matches the per-agent updates
+                for SGD without gradient clipping, but adaptive optimizers and
+                gradient clipping see one update per network instead of one per
+                agent. Defaults to False.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
 
         self._agents = agents
@@ -113,6 +146,25 @@ class MADDPGBaseTrainer(mava.Trainer):
         self._variable_client = variable_client
         self._learning_rate_scheduler_fn = learning_rate_scheduler_fn
 
+        # Prioritized replay. Without it the importance sampling weights are ones.
+        self._priority_client = priority_client
+        self._importance_sampling_exponent = (
+            priority_client.importance_sampling_exponent if priority_client else 0.0
+        )
+
+        # If set, the n-step returns are computed from windows of single steps.
+        self._n_step = n_step
+
+        # If set, the agents that share a network are processed as one batch.
+        self._vectorize_agents = vectorize_agents
+
+        # Number of micro-batches whose gradients are accumulated every step.
+        if accumulation_steps < 1:
+            raise ValueError(
+                f"accumulation_steps should be positive, got {accumulation_steps}."
+            )
+        self._accumulation_steps = accumulation_steps
+
         # Setup counts
         self._counts = counts
 
@@ -131,6 +183,15 @@ class MADDPGBaseTrainer(mava.Trainer):
             for k, v in target_observation_networks.items()
         }
 
+        # Compute the online observation networks in bfloat16. Networks without
+        # variables, e.g. batch_concat, are left as is to keep the observations
+        # in float32.
+        if mixed_precision:
+            self._observation_networks = {
+                k: MixedPrecisionNetwork(v) if v.variables else v
+                for k, v in self._observation_networks.items()
+            }
+
         # General learner book-keeping and loggers.
         self._logger = logger or loggers.make_default_logger("trainer")
 
@@ -151,6 +212,18 @@ class MADDPGBaseTrainer(mava.Trainer):
 
         # Create an iterator to go through the dataset.
         self._iterator = iter(dataset)  # pytype: disable=wrong-arg-types
+        # Seconds spent waiting for the dataset, see train_utils.timed_next.
+        self._input_stall_time = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+        # Phases of the steps, see profiling_utils.PhaseTimer.
+        self._phase_timer = profiling_utils.PhaseTimer(
+            [
+                "update_target_networks",
+                "sample",
+                "forward",
+                "backward",
+                "apply_gradients",
+            ]
+        )
 
         # Dictionary with unique network keys.
         self.unique_net_keys = sort_str_num(self._policy_networks.keys())
@@ -158,6 +231,11 @@ class MADDPGBaseTrainer(mava.Trainer):
         # Get the agents which shoud be updated and ran
         self._trainer_agent_list = self._agents
 
+        # Agents of each network key, for the vectorized forward pass.
+        self._agent_groups = stacking_utils.make_agent_groups(
+            {agent: self._agent_net_keys[agent] for agent in self._trainer_agent_list}
+        )
+
         # Create optimizers for different agent types.
         if not isinstance(policy_optimizer, dict):
             self._policy_optimizers: Dict[str, snt.Optimizer] = {}
@@ -200,29 +278,28 @@ class MADDPGBaseTrainer(mava.Trainer):
         """Update the target networks using either target averaging or
 
         by directy copying the weights of the online networks every few steps."""
+        online_variables: List[tf.Variable] = []
+        target_variables: List[tf.Variable] = []
         for key in self.unique_net_keys:
-            # Update target network.
-            online_variables = (
+            online_variables += [
                 *self._observation_networks[key].variables,
                 *self._critic_networks[key].variables,
                 *self._policy_networks[key].variables,
-            )
-            target_variables = (
+            ]
+            target_variables += [
                 *self._target_observation_networks[key].variables,
                 *self._target_critic_networks[key].variables,
                 *self._target_policy_networks[key].variables,
-            )
-
-            if self._target_averaging:
-                assert 0.0 < self._target_update_rate < 1.0
-                tau = self._target_update_rate
-                for src, dest in zip(online_variables, target_variables):
-                    dest.assign(dest * (1.0 - tau) + src * tau)
-            else:
-                # Make online -> target network update ops.
-                if tf.math.mod(self._num_steps, self._target_update_period) == 0:
-                    for src, dest in zip(online_variables, target_variables):
-                        dest.assign(src)
+            ]
+
+        train_utils.update_target_networks(
+            online_variables,
+            target_variables,
+            self._num_steps,
+            self._target_averaging,
+            self._target_update_period,
+            self._target_update_rate,
+        )
         self._num_steps.assign_add(1)
 
     def get_variables(self, names: Sequence[str]) -> Dict[str, Dict[str, np.ndarray]]:
@@ -309,6 +386,61 @@ class MADDPGBaseTrainer(mava.Trainer):
         dpg_a_t_feed = dpg_a_t
         return dpg_a_t_feed
 
+    def _get_joint_critic_feed(
+        self,
+        o_tm1_trans: Dict[str, np.ndarray],
+        o_t_trans: Dict[str, np.ndarray],
+        a_tm1: Dict[str, np.ndarray],
+        a_t: Dict[str, np.ndarray],
+        e_tm1: Dict[str, np.ndarray],
+        e_t: Dict[str, np.ndarray],
+    ) -> Optional[Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]]:
+        """Get the critic feed shared by all the agents, if any.
+
+        Centralised and state-based critics are fed the joint observations or
+        the environment state and the joint actions, which are the same for
+        every agent. The feed is then built once per batch, and the agents that
+        share a critic network share its Q-values.
+
+        Args:
+            o_tm1_trans: transformed (e.g. using observation
+                network) observation at timestep t-1
+            o_t_trans: transformed observation at timestep t
+            a_tm1: action at timestep t-1
+            a_t: action at timestep t
+            e_tm1: extras at timestep t-1
+            e_t: extras at timestep t
+
+        Returns:
+            the shared critic network feeds, or None if the feeds depend on the
+                agent, see _get_critic_feed.
+        """
+        # Decentralised critic
+        return None
+
+    def _get_joint_dpg_feed(
+        self,
+        a_t_feed: tf.Tensor,
+        dpg_a_t: np.ndarray,
+        agent: str,
+    ) -> tf.Tensor:
+        """Get the DPG feed of an agent from the shared critic feed.
+
+        Only the action of the agent is replaced in the joint target actions,
+        see _get_joint_critic_feed.
+
+        Args:
+            a_t_feed: joint actions at timestep t of the shared critic feed
+            dpg_a_t: predicted action at timestep t
+            agent: agent id
+
+        Returns:
+            agent policy network feed
+        """
+        return tf.squeeze(
+            train_utils.replace_agent(a_t_feed, dpg_a_t, self._agents.index(agent))
+        )
+
     def _target_policy_actions(self, next_obs: Dict[str, np.ndarray]) -> Any:
         """Select actions using target policy networks
 
@@ -326,31 +458,68 @@ class MADDPGBaseTrainer(mava.Trainer):
         return actions
 
     @tf.function
-    def _step(
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        """Compiled trainer step, see _step_fn.
+
+        Returns:
+            losses
+        """
+        return self._step_fn()
+
+    def _step_fn(
         self,
     ) -> Dict[str, Dict[str, Any]]:
         """Trainer forward and backward passes.
 
+        Not compiled, so that it can also run inside the replicas of a
+        replicated trainer.
+
         Returns:
             losses
         """
 
         # Update the target networks
-        self._update_target_networks()
+        with self._phase_timer.phase("update_target_networks"):
+            self._update_target_networks()
 
         # Draw a batch of data from replay.
-        sample: reverb.ReplaySample = next(self._iterator)
+        with self._phase_timer.phase("sample"):
+            sample: reverb.ReplaySample = train_utils.timed_next(
+                self._iterator, self._input_stall_time
+            )
+
+        forward = self._vectorized_forward if self._vectorize_agents else self._forward
+        critic_losses, policy_losses, priorities, gradients = self._accumulate(
+            sample, forward
+        )
 
-        self._forward(sample)
+        # Send the new priorities of the sampled items to replay.
+        if self._priority_client is not None:
+            self._priority_client.update(sample.info.key, priorities)
 
-        self._backward()
+        with self._phase_timer.phase("apply_gradients"):
+            self._apply_gradients(gradients)
 
         # Log losses per agent
-        return train_utils.map_losses_per_agent_ac(
-            self.critic_losses, self.policy_losses
-        )
+        return train_utils.map_losses_per_agent_ac(critic_losses, policy_losses)
 
     # Forward pass that calculates loss.
+    def _get_transitions(self, data: Any) -> mava_types.Transition:
+        """Get the transitions of the sampled items.
+
+        Args:
+            data: sampled items, either n-step transitions or windows of single
+                steps if the trainer computes the n-step returns.
+
+        Returns:
+            n-step transitions.
+        """
+        if self._n_step:
+            return train_utils.n_step_transition_from_sequence(
+                data, self._n_step, self._discount
+            )
+        return mava_types.Transition(*data)
+
     def _forward(self, inputs: reverb.ReplaySample) -> None:
         """Trainer forward pass
 
@@ -369,7 +538,7 @@ class MADDPGBaseTrainer(mava.Trainer):
         #   This discount is applied to future rewards after r_t.
         # o_t = dictionary of next observations or next observation sequences
         # e_t [Optional] = extra data for timestep t that the agents persist in replay.
-        trans = mava_types.Transition(*inputs.data)
+        trans = self._get_transitions(inputs.data)
         o_tm1, o_t, a_tm1, r_t, d_t, e_tm1, e_t = (
             trans.observations,
             trans.next_observations,
@@ -380,30 +549,49 @@ class MADDPGBaseTrainer(mava.Trainer):
             trans.next_extras,
         )
 
+        # Importance sampling weights that correct for prioritized sampling, see
+        # _accumulate.
+        importance_weights = self._importance_weights
+
         self.policy_losses = {}
         self.critic_losses = {}
+        td_errors = []
         # Do forward passes through the networks and calculate the losses
         with tf.GradientTape(persistent=True) as tape:
 
             o_tm1_trans, o_t_trans = self._transform_observations(o_tm1, o_t)
             a_t = self._target_policy_actions(o_t_trans)
+            joint_feed = self._get_joint_critic_feed(
+                o_tm1_trans, o_t_trans, a_tm1, a_t, e_tm1, e_t
+            )
+            q_values: Dict[str, Tuple[Any, Any]] = {}
             for agent in self._trainer_agent_list:
                 agent_key = self._agent_net_keys[agent]
 
                 # Get critic feed
-                o_tm1_feed, o_t_feed, a_tm1_feed, a_t_feed = self._get_critic_feed(
-                    o_tm1_trans=o_tm1_trans,
-                    o_t_trans=o_t_trans,
-                    a_tm1=a_tm1,
-                    a_t=a_t,
-                    e_tm1=e_tm1,
-                    e_t=e_t,
-                    agent=agent,
-                )
-
-                # Critic learning.
-                q_tm1 = self._critic_networks[agent_key](o_tm1_feed, a_tm1_feed)
-                q_t = self._target_critic_networks[agent_key](o_t_feed, a_t_feed)
+                if joint_feed is None:
+                    critic_feed = self._get_critic_feed(
+                        o_tm1_trans=o_tm1_trans,
+                        o_t_trans=o_t_trans,
+                        a_tm1=a_tm1,
+                        a_t=a_t,
+                        e_tm1=e_tm1,
+                        e_t=e_t,
+                        agent=agent,
+                    )
+                else:
+                    critic_feed = joint_feed
+                o_tm1_feed, o_t_feed, a_tm1_feed, a_t_feed = critic_feed
+
+                # Critic learning. The agents that share a network and a joint
+                # feed share the Q-values.
+                q_key = agent if joint_feed is None else agent_key
+                if q_key not in q_values:
+                    q_values[q_key] = (
+                        self._critic_networks[agent_key](o_tm1_feed, a_tm1_feed),
+                        self._target_critic_networks[agent_key](o_t_feed, a_t_feed),
+                    )
+                q_tm1, q_t = q_values[q_key]
 
                 # Squeeze into the shape expected by the td_learning implementation.
                 q_tm1 = tf.squeeze(q_tm1, axis=-1)  # [B]
@@ -413,17 +601,23 @@ class MADDPGBaseTrainer(mava.Trainer):
                 discount = tf.cast(self._discount, dtype=d_t[agent].dtype)
 
                 # Critic loss.
-                critic_loss = trfl.td_learning(
+                critic_loss, extra = trfl.td_learning(
                     q_tm1, r_t[agent], discount * d_t[agent], q_t
-                ).loss
-                self.critic_losses[agent] = tf.reduce_mean(critic_loss)
+                )
+                td_errors.append(extra.td_error)
+                self.critic_losses[agent] = tf.reduce_mean(
+                    critic_loss * importance_weights
+                )
 
                 # Actor learning.
                 o_t_agent_feed = o_t_trans[agent]
                 dpg_a_t = self._policy_networks[agent_key](o_t_agent_feed)
 
                 # Get dpg actions
-                dpg_a_t_feed = self._get_dpg_feed(a_t, dpg_a_t, agent)
+                if joint_feed is None:
+                    dpg_a_t_feed = self._get_dpg_feed(a_t, dpg_a_t, agent)
+                else:
+                    dpg_a_t_feed = self._get_joint_dpg_feed(a_t_feed, dpg_a_t, agent)
 
                 # Get dpg Q values.
                 dpg_q_t = self._critic_networks[agent_key](o_t_feed, dpg_a_t_feed)
@@ -441,35 +635,374 @@ class MADDPGBaseTrainer(mava.Trainer):
                 )
 
                 self.policy_losses[agent] = tf.reduce_mean(policy_loss)
+
+        # The priority of a transition is the largest absolute TD error of the
+        # agents.
+        self.priorities = tf.stop_gradient(
+            tf.reduce_max(tf.abs(tf.stack(td_errors)), axis=0)
+        )
+        self.tape = tape
+
+    def _critic_loss(
+        self, q_tm1: Any, r_t: tf.Tensor, d_t: tf.Tensor, q_t: Any
+    ) -> Tuple[tf.Tensor, tf.Tensor]:
+        """Critic loss of a batch of transitions.
+
+        Args:
+            q_tm1: output of the critic network at timestep t-1.
+            r_t: rewards.
+            d_t: environment discounts.
+            q_t: output of the target critic network at timestep t.
+
+        Returns:
+            the critic loss and the priority of each transition.
+        """
+        # Squeeze into the shape expected by the td_learning implementation.
+        q_tm1 = tf.squeeze(q_tm1, axis=-1)  # [B]
+        q_t = tf.squeeze(q_t, axis=-1)  # [B]
+
+        # Cast the additional discount to match the environment discount dtype.
+        discount = tf.cast(self._discount, dtype=d_t.dtype)
+        critic_loss, extra = trfl.td_learning(q_tm1, r_t, discount * d_t, q_t)
+        return critic_loss, tf.abs(extra.td_error)
+
+    def _critic_values(self, q: Any) -> tf.Tensor:
+        """Q-values of the output of a critic network, used by the DPG loss."""
+        return q
+
+    def _vectorized_forward(self, inputs: reverb.ReplaySample) -> None:
+        """Trainer forward pass that processes the agents of each network at once.
+
+        The inputs of the agents that share a network are concatenated along the
+        batch dimension, so every network runs once per network key. The losses
+        are split back per agent for logging.
+
+        Args:
+            inputs: input data from the data table (transitions)
+        """
+        trans = self._get_transitions(inputs.data)
+        o_tm1, o_t, a_tm1, r_t, d_t, e_tm1, e_t = (
+            trans.observations,
+            trans.next_observations,
+            trans.actions,
+            trans.rewards,
+            trans.discounts,
+            trans.extras,
+            trans.next_extras,
+        )
+
+        # Importance sampling weights that correct for prioritized sampling, see
+        # _accumulate.
+        importance_weights = self._importance_weights
+
+        self.policy_losses = {}
+        self.critic_losses = {}
+        self.network_policy_losses = {}
+        self.network_critic_losses = {}
+        priorities: List[tf.Tensor] = []
+        with tf.GradientTape(persistent=True) as tape:
+            # Transform the observations and select the target actions of all the
+            # agents, as centralised critics need them for every agent.
+            o_tm1_trans: Dict[str, Any] = {}
+            o_t_trans: Dict[str, Any] = {}
+            a_t: Dict[str, Any] = {}
+            for agent_key, agents in self._agent_groups.items():
+                o_tm1_trans.update(
+                    train_utils.split_agents(
+                        self._observation_networks[agent_key](
+                            train_utils.concat_agents(
+                                [o_tm1[agent].observation for agent in agents]
+                            )
+                        ),
+                        agents,
+                    )
+                )
+                # The stop_gradient prevents gradients to propagate into the target
+                # observation network, see _transform_observations.
+                next_observations = tree.map_structure(
+                    tf.stop_gradient,
+                    self._target_observation_networks[agent_key](
+                        train_utils.concat_agents(
+                            [o_t[agent].observation for agent in agents]
+                        )
+                    ),
+                )
+                o_t_trans.update(train_utils.split_agents(next_observations, agents))
+                a_t.update(
+                    train_utils.split_agents(
+                        self._target_policy_networks[agent_key](next_observations),
+                        agents,
+                    )
+                )
+
+            joint_feed = self._get_joint_critic_feed(
+                o_tm1_trans, o_t_trans, a_tm1, a_t, e_tm1, e_t
+            )
+            for agent_key, agents in self._agent_groups.items():
+                if joint_feed is None:
+                    # Get the critic feeds of the agents and concatenate them.
+                    feeds = [
+                        self._get_critic_feed(
+                            o_tm1_trans=o_tm1_trans,
+                            o_t_trans=o_t_trans,
+                            a_tm1=a_tm1,
+                            a_t=a_t,
+                            e_tm1=e_tm1,
+                            e_t=e_t,
+                            agent=agent,
+                        )
+                        for agent in agents
+                    ]
+                    o_tm1_feed, o_t_feed, a_tm1_feed, a_t_feed = [
+                        train_utils.concat_agents(agent_feeds)
+                        for agent_feeds in zip(*feeds)
+                    ]
+
+                    # Critic learning.
+                    q_tm1 = self._critic_networks[agent_key](o_tm1_feed, a_tm1_feed)
+                    q_t = self._target_critic_networks[agent_key](o_t_feed, a_t_feed)
+                    critic_loss, priority = self._critic_loss(
+                        q_tm1,
+                        train_utils.concat_agents([r_t[agent] for agent in agents]),
+                        train_utils.concat_agents([d_t[agent] for agent in agents]),
+                        q_t,
+                    )
+                    dpg_o_t_feed = o_t_feed
+                    get_dpg_feed = functools.partial(self._get_dpg_feed, a_t)
+                else:
+                    # The agents share the feed, so the critic networks run once
+                    # and only the losses are computed per agent.
+                    o_tm1_feed, o_t_feed, a_tm1_feed, a_t_feed = joint_feed
+                    q_tm1 = self._critic_networks[agent_key](o_tm1_feed, a_tm1_feed)
+                    q_t = self._target_critic_networks[agent_key](o_t_feed, a_t_feed)
+                    critic_loss, priority = [
+                        train_utils.concat_agents(agent_values)
+                        for agent_values in zip(
+                            *[
+                                self._critic_loss(q_tm1, r_t[agent], d_t[agent], q_t)
+                                for agent in agents
+                            ]
+                        )
+                    ]
+                    dpg_o_t_feed = train_utils.concat_agents([o_t_feed] * len(agents))
+                    get_dpg_feed = functools.partial(self._get_joint_dpg_feed, a_t_feed)
+                critic_loss = critic_loss * tf.tile(importance_weights, [len(agents)])
+                priorities.extend(train_utils.split_agents(priority, agents).values())
+
+                # Actor learning.
+                dpg_a_t = self._policy_networks[agent_key](
+                    train_utils.concat_agents([o_t_trans[agent] for agent in agents])
+                )
+                dpg_actions = train_utils.split_agents(dpg_a_t, agents)
+                dpg_a_t_feed = train_utils.concat_agents(
+                    [get_dpg_feed(dpg_actions[agent], agent) for agent in agents]
+                )
+                dpg_q_t = self._critic_values(
+                    self._critic_networks[agent_key](dpg_o_t_feed, dpg_a_t_feed)
+                )
+
+                # Actor loss. If clipping is true use dqda clipping and clip the norm.
+                dqda_clipping = 1.0 if self._max_gradient_norm is not None else None
+                clip_norm = self._max_gradient_norm is not None
+
+                policy_loss = losses.dpg(
+                    dpg_q_t,
+                    dpg_a_t,
+                    tape=tape,
+                    dqda_clipping=dqda_clipping,
+                    clip_norm=clip_norm,
+                )
+
+                # The networks are trained on the sum of the mean losses of their
+                # agents. As the per-agent path computes every gradient before
+                # applying any, this gives the same update for SGD without
+                # gradient clipping.
+                num_agents = len(agents)
+                self.network_critic_losses[agent_key] = (
+                    tf.reduce_mean(critic_loss) * num_agents
+                )
+                self.network_policy_losses[agent_key] = (
+                    tf.reduce_mean(policy_loss) * num_agents
+                )
+
+                # Split the losses per agent for logging.
+                for agent, loss in train_utils.split_agents(
+                    critic_loss, agents
+                ).items():
+                    self.critic_losses[agent] = tf.reduce_mean(loss)
+                for agent, loss in train_utils.split_agents(
+                    policy_loss, agents
+                ).items():
+                    self.policy_losses[agent] = tf.reduce_mean(loss)
+
+        # The priority of a transition is the largest priority of the agents.
+        self.priorities = tf.stop_gradient(tf.reduce_max(tf.stack(priorities), axis=0))
         self.tape = tape
 
     # Backward pass that calculates gradients and updates network.
     def _backward(self) -> None:
         """Trainer backward pass updating network parameters"""
+        self._apply_gradients(self._compute_gradients())
+
+    def _accumulate(
+        self, sample: reverb.ReplaySample, forward: Callable[[Any], None]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], tf.Tensor, List]:
+        """Run the forward pass and compute the gradients over micro-batches.
+
+        The sample is split into accumulation_steps micro-batches, which are run
+        one after the other, so only the activations of one micro-batch are
+        kept at a time. The losses and gradients are averaged over them.
 
-        # Calculate the gradients and update the networks
+        Args:
+            sample: sampled batch.
+            forward: forward pass that sets the losses, priorities and tape. It
+                reads the importance sampling weights of the micro-batch from
+                _importance_weights.
+
+        Returns:
+            the critic and policy losses of the agents, the priorities of the
+                sampled items and the gradients of every update.
+        """
+        micro_batches = train_utils.split_batch(sample, self._accumulation_steps)
+        scale = 1.0 / len(micro_batches)
+        # The importance sampling weights are normalised over the whole batch, so
+        # that the micro-batches are weighted like the batch.
+        micro_batch_weights = train_utils.split_batch(
+            train_utils.importance_sampling_weights(
+                sample.info.probability,
+                sample.info.table_size,
+                self._importance_sampling_exponent,
+            ),
+            self._accumulation_steps,
+        )
+        critic_losses: List[Dict[str, Any]] = []
+        policy_losses: List[Dict[str, Any]] = []
+        priorities: List[tf.Tensor] = []
+        gradients: List = []
+        for micro_batch, importance_weights in zip(micro_batches, micro_batch_weights):
+            self._importance_weights = importance_weights
+            # Wait for the gradients of the previous micro-batch.
+            dependencies = [
+                g
+                for _, policy_grads, critic_grads in gradients
+                for g in policy_grads + critic_grads
+                if g is not None
+            ]
+            with tf.control_dependencies(dependencies):
+                with self._phase_timer.phase("forward"):
+                    forward(micro_batch)
+
+            # Keep the losses before the gradients are applied, where the
+            # replicas of a replicated trainer take turns.
+            critic_losses.append(self.critic_losses)
+            policy_losses.append(self.policy_losses)
+            priorities.append(self.priorities)
+            with self._phase_timer.phase("backward"):
+                micro_gradients = self._compute_gradients()
+            gradients = [
+                (
+                    agent_key,
+                    train_utils.accumulate_gradients(
+                        gradients[i][1] if gradients else None, policy_grads, scale
+                    ),
+                    train_utils.accumulate_gradients(
+                        gradients[i][2] if gradients else None, critic_grads, scale
+                    ),
+                )
+                for i, (agent_key, policy_grads, critic_grads) in enumerate(
+                    micro_gradients
+                )
+            ]
+
+        def mean(*values: tf.Tensor) -> tf.Tensor:
+            return tf.add_n(values) * scale
+
+        return (
+            tree.map_structure(mean, *critic_losses),
+            tree.map_structure(mean, *policy_losses),
+            tf.concat(priorities, axis=0),
+            gradients,
+        )
+
+    def _update_variables(self, agent_key: str) -> Tuple[List, List]:
+        """Variables trained by the policy and critic losses of a network.
+
+        Args:
+            agent_key: network key.
+
+        Returns:
+            the policy and critic variables.
+        """
+        # Note: policy does not update the shared obs network
+        policy_variables = self._policy_networks[agent_key].trainable_variables
+        critic_variables = (
+            # In this agent, the critic loss trains the observation network.
+            self._observation_networks[agent_key].trainable_variables
+            + self._critic_networks[agent_key].trainable_variables
+        )
+        return policy_variables, critic_variables
+
+    def _compute_gradients(self) -> List[Tuple[str, List, List]]:
+        """Compute the gradients of the losses of the forward pass.
+
+        Returns:
+            the network key, policy gradients and critic gradients of every
+                update, in the order they are applied.
+        """
         policy_losses = self.policy_losses
         critic_losses = self.critic_losses
         tape = self.tape
-        for agent in self._trainer_agent_list:
-            agent_key = self._agent_net_keys[agent]
-
-            # Get trainable variables.
-            # Note: policy does not update the shared obs network
-            policy_variables = self._policy_networks[agent_key].trainable_variables
-            critic_variables = (
-                # In this agent, the critic loss trains the observation network.
-                self._observation_networks[agent_key].trainable_variables
-                + self._critic_networks[agent_key].trainable_variables
-            )
+        if self._vectorize_agents:
+            # Each network is updated once, with the summed loss of its agents.
+            updates = [
+                (
+                    agent_key,
+                    self.network_policy_losses[agent_key],
+                    self.network_critic_losses[agent_key],
+                )
+                for agent_key in self._agent_groups.keys()
+            ]
+        else:
+            updates = [
+                (
+                    self._agent_net_keys[agent],
+                    policy_losses[agent],
+                    critic_losses[agent],
+                )
+                for agent in self._trainer_agent_list
+            ]
+        gradients = []
+        for agent_key, policy_loss, critic_loss in updates:
+            policy_variables, critic_variables = self._update_variables(agent_key)
 
             # Compute gradients.
             # Note: Warning "WARNING:tensorflow:Calling GradientTape.gradient
             #  on a persistent tape inside its context is significantly less efficient
             #  than calling it outside the context." caused by losses.dpg, which calls
             #  tape.gradient.
-            policy_gradients = tape.gradient(policy_losses[agent], policy_variables)
-            critic_gradients = tape.gradient(critic_losses[agent], critic_variables)
+            gradients.append(
+                (
+                    agent_key,
+                    tape.gradient(policy_loss, policy_variables),
+                    tape.gradient(critic_loss, critic_variables),
+                )
+            )
+        train_utils.safe_del(self, "tape")
+        return gradients
+
+    def _apply_gradients(self, gradients: List[Tuple[str, List, List]]) -> None:
+        """Apply the gradients of every update.
+
+        Args:
+            gradients: network key, policy gradients and critic gradients of
+                every update, see _compute_gradients.
+        """
+        for agent_key, policy_gradients, critic_gradients in gradients:
+            policy_variables, critic_variables = self._update_variables(agent_key)
+
+            # Average the gradients over the trainer replicas.
+            policy_gradients = train_utils.all_reduce_gradients(policy_gradients)
+            critic_gradients = train_utils.all_reduce_gradients(critic_gradients)
 
             # Maybe clip gradients.
             policy_gradients = tf.clip_by_global_norm(
@@ -482,7 +1015,6 @@ class MADDPGBaseTrainer(mava.Trainer):
             # Apply gradients.
             self._policy_optimizers[agent_key].apply(policy_gradients, policy_variables)
             self._critic_optimizers[agent_key].apply(critic_gradients, critic_variables)
-        train_utils.safe_del(self, "tape")
 
     def step(self) -> None:
         """Trainer step to update the parameters of the agents in the system"""
@@ -570,6 +1102,11 @@ class MADDPGDecentralisedTrainer(MADDPGBaseTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise the decentralised MADDPG trainer."""
         super().__init__(
@@ -593,6 +1130,11 @@ class MADDPGDecentralisedTrainer(MADDPGBaseTrainer):
             variable_client=variable_client,
             counts=counts,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -621,6 +1163,11 @@ class MADDPGCentralisedTrainer(MADDPGBaseTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise the centralised MADDPG trainer."""
 
@@ -645,6 +1192,11 @@ class MADDPGCentralisedTrainer(MADDPGBaseTrainer):
             variable_client=variable_client,
             counts=counts,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
     def _get_critic_feed(
@@ -659,6 +1211,22 @@ class MADDPGCentralisedTrainer(MADDPGBaseTrainer):
     ) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
         """Get critic feed."""
 
+        # The feed is the same for every agent.
+        return self._get_joint_critic_feed(
+            o_tm1_trans, o_t_trans, a_tm1, a_t, e_tm1, e_t
+        )
+
+    def _get_joint_critic_feed(
+        self,
+        o_tm1_trans: Dict[str, np.ndarray],
+        o_t_trans: Dict[str, np.ndarray],
+        a_tm1: Dict[str, np.ndarray],
+        a_t: Dict[str, np.ndarray],
+        e_tm1: Dict[str, np.ndarray],
+        e_t: Dict[str, np.ndarray],
+    ) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+        """Get the critic feed shared by all the agents."""
+
         # Centralised based
         o_tm1_feed = tf.stack([o_tm1_trans[agent] for agent in self._agents], 1)
         o_t_feed = tf.stack([o_t_trans[agent] for agent in self._agents], 1)
@@ -715,6 +1283,11 @@ class MADDPGNetworkedTrainer(MADDPGBaseTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise the networked MADDPG trainer."""
 
@@ -739,6 +1312,11 @@ class MADDPGNetworkedTrainer(MADDPGBaseTrainer):
             variable_client=variable_client,
             counts=counts,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
         self._connection_spec = connection_spec
 
@@ -826,6 +1404,11 @@ class MADDPGStateBasedTrainer(MADDPGBaseTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        vectorize_agents: bool = False,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise the decentralised MADDPG trainer."""
         super().__init__(
@@ -849,6 +1432,11 @@ class MADDPGStateBasedTrainer(MADDPGBaseTrainer):
             variable_client=variable_client,
             counts=counts,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            vectorize_agents=vectorize_agents,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
     def _get_critic_feed(
@@ -863,6 +1451,22 @@ class MADDPGStateBasedTrainer(MADDPGBaseTrainer):
     ) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
         """Get critic feed."""
 
+        # The feed is the same for every agent.
+        return self._get_joint_critic_feed(
+            o_tm1_trans, o_t_trans, a_tm1, a_t, e_tm1, e_t
+        )
+
+    def _get_joint_critic_feed(
+        self,
+        o_tm1_trans: Dict[str, np.ndarray],
+        o_t_trans: Dict[str, np.ndarray],
+        a_tm1: Dict[str, np.ndarray],
+        a_t: Dict[str, np.ndarray],
+        e_tm1: Dict[str, np.ndarray],
+        e_t: Dict[str, np.ndarray],
+    ) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+        """Get the critic feed shared by all the agents."""
+
         # State based
         o_tm1_feed = e_tm1["env_states"]
         o_t_feed = e_t["env_states"]
@@ -923,6 +1527,10 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
         """Initialise Recurrent MADDPG trainer
 
@@ -959,14 +1567,43 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states of the policies, without gradients,
+                as in R2D2. The losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+            accumulation_steps: number of micro-batches the sampled batch is split
+                into. Their gradients are accumulated and applied in a single
+                optimizer step, so only the activations of one micro-batch are kept
+                at a time. The batch size must be divisible by it.
         """
         self._bootstrap_n = bootstrap_n
+        self._burn_in_length = burn_in_length
+
+        # Number of micro-batches whose gradients are accumulated every step.
+        if accumulation_steps < 1:
+            raise ValueError(
+                f"accumulation_steps should be positive, got {accumulation_steps}."
+            )
+        self._accumulation_steps = accumulation_steps
 
         self._agents = agents
         self._agent_net_keys = agent_net_keys
         self._variable_client = variable_client
         self._learning_rate_scheduler_fn = learning_rate_scheduler_fn
 
+        # Prioritized replay. Without it the importance sampling weights are ones.
+        self._priority_client = priority_client
+        self._importance_sampling_exponent = (
+            priority_client.importance_sampling_exponent if priority_client else 0.0
+        )
+
         # Setup counts
         self._counts = counts
 
@@ -985,6 +1622,15 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
             for k, v in target_observation_networks.items()
         }
 
+        # Compute the online observation networks in bfloat16. Networks without
+        # variables, e.g. batch_concat, are left as is to keep the observations
+        # in float32.
+        if mixed_precision:
+            self._observation_networks = {
+                k: MixedPrecisionNetwork(v) if v.variables else v
+                for k, v in self._observation_networks.items()
+            }
+
         # General learner book-keeping and loggers.
         self._logger = logger or loggers.make_default_logger("trainer")
 
@@ -1005,6 +1651,18 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
 
         # Create an iterator to go through the dataset.
         self._iterator = iter(dataset)  # pytype: disable=wrong-arg-types
+        # Seconds spent waiting for the dataset, see train_utils.timed_next.
+        self._input_stall_time = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+        # Phases of the steps, see profiling_utils.PhaseTimer.
+        self._phase_timer = profiling_utils.PhaseTimer(
+            [
+                "update_target_networks",
+                "sample",
+                "forward",
+                "backward",
+                "apply_gradients",
+            ]
+        )
 
         # Dictionary with unique network keys.
         self.unique_net_keys = sort_str_num(self._policy_networks.keys())
@@ -1055,29 +1713,28 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
 
         parameters for all networks"""
 
+        online_variables: List[tf.Variable] = []
+        target_variables: List[tf.Variable] = []
         for key in self.unique_net_keys:
-            # Update target network.
-            online_variables = (
+            online_variables += [
                 *self._observation_networks[key].variables,
                 *self._critic_networks[key].variables,
                 *self._policy_networks[key].variables,
-            )
-            target_variables = (
+            ]
+            target_variables += [
                 *self._target_observation_networks[key].variables,
                 *self._target_critic_networks[key].variables,
                 *self._target_policy_networks[key].variables,
-            )
-
-            if self._target_averaging:
-                assert 0.0 < self._target_update_rate < 1.0
-                tau = self._target_update_rate
-                for src, dest in zip(online_variables, target_variables):
-                    dest.assign(dest * (1.0 - tau) + src * tau)
-            else:
-                # Make online -> target network update ops.
-                if tf.math.mod(self._num_steps, self._target_update_period) == 0:
-                    for src, dest in zip(online_variables, target_variables):
-                        dest.assign(src)
+            ]
+
+        train_utils.update_target_networks(
+            online_variables,
+            target_variables,
+            self._num_steps,
+            self._target_averaging,
+            self._target_update_period,
+            self._target_update_rate,
+        )
         self._num_steps.assign_add(1)
 
     def _transform_observations(
@@ -1122,6 +1779,48 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
             )
         return obs_trans, obs_target_trans
 
+    def _burn_in(self, data: Trajectory) -> Tuple[Trajectory, Dict, Dict]:
+        """Refresh the stored policy core states over the burn in steps.
+
+        Args:
+            data: batch major sequences sampled from the data table.
+
+        Returns:
+            the sequences without the burn in steps, and the initial core states
+            of the policy and target policy networks for the remaining steps.
+        """
+        # Get initial state for the LSTM from replay and
+        # extract the first state in the sequence.
+        # TODO (dries): Why is there an extra tuple wrapping?
+        core_state = {
+            agent: tree.map_structure(
+                lambda s: s[:, 0, :], data.extras["core_states"][agent][0]
+            )
+            for agent in self._agents
+        }
+        if not self._burn_in_length:
+            return data, core_state, core_state
+
+        burn_in_data, data = train_utils.split_burn_in(
+            data, self._burn_in_length, time_axis=1
+        )
+        # The policies are unrolled over the target observations.
+        _, target_obs_trans = self._transform_observations(burn_in_data.observations)
+        target_obs_trans = {
+            agent: tf2_utils.batch_to_sequence(obs)
+            for agent, obs in target_obs_trans.items()
+        }
+        target_core_state = train_utils.burn_in_core_states(
+            self._target_policy_networks,
+            self._agent_net_keys,
+            target_obs_trans,
+            core_state,
+        )
+        core_state = train_utils.burn_in_core_states(
+            self._policy_networks, self._agent_net_keys, target_obs_trans, core_state
+        )
+        return data, core_state, target_core_state
+
     def _get_critic_feed(
         self,
         obs_trans: Dict[str, np.ndarray],
@@ -1198,9 +1897,7 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
             time.time()
             agent_key = self._agent_net_keys[agent]
             target_trans_obs = target_obs_trans[agent]
-            # TODO (dries): Why is there an extra tuple
-            #  wrapping that needs to be removed?
-            agent_core_state = target_core_state[agent][0]
+            agent_core_state = target_core_state[agent]
 
             transposed_obs = tf2_utils.batch_to_sequence(target_trans_obs)
 
@@ -1213,29 +1910,49 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
         return actions
 
     @tf.function
-    def _step(
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        """Compiled trainer step, see _step_fn.
+
+        Returns:
+            losses
+        """
+        return self._step_fn()
+
+    def _step_fn(
         self,
     ) -> Dict[str, Dict[str, Any]]:
-        """Trainer forward and backward passes.'
+        """Trainer forward and backward passes.
+
+        Not compiled, so that it can also run inside the replicas of a
+        replicated trainer.
 
         Returns:
             losses
         """
         # Update the target networks
-        self._update_target_networks()
+        with self._phase_timer.phase("update_target_networks"):
+            self._update_target_networks()
 
         # Get data from replay (dropping extras if any). Note there is no
         # extra data here because we do not insert any into Reverb.
-        inputs: reverb.ReplaySample = next(self._iterator)
+        with self._phase_timer.phase("sample"):
+            inputs: reverb.ReplaySample = train_utils.timed_next(
+                self._iterator, self._input_stall_time
+            )
+
+        critic_losses, policy_losses, priorities, gradients = self._accumulate(
+            inputs, self._forward
+        )
 
-        self._forward(inputs)
+        # Send the new priorities of the sampled items to replay.
+        if self._priority_client is not None:
+            self._priority_client.update(inputs.info.key, priorities)
 
-        self._backward()
+        with self._phase_timer.phase("apply_gradients"):
+            self._apply_gradients(gradients)
 
         # Log losses per agent
-        return train_utils.map_losses_per_agent_ac(
-            self.critic_losses, self.policy_losses
-        )
+        return train_utils.map_losses_per_agent_ac(critic_losses, policy_losses)
 
     # Forward pass that calculates loss.
     def _forward(self, inputs: reverb.ReplaySample) -> None:
@@ -1247,6 +1964,9 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
 
         data: Trajectory = inputs.data
 
+        # Refresh the core states over the burn in steps, if any.
+        data, core_state, target_core_state = self._burn_in(data)
+
         # Note (dries): The unused variable is start_of_episodes.
         observations, actions, rewards, end_of_episode, _, extras = (
             data.observations,
@@ -1257,17 +1977,17 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
             data.extras,
         )
 
-        # Get initial state for the LSTM from replay and
-        # extract the first state in the sequence..
-        core_state = tree.map_structure(lambda s: s[:, 0, :], extras["core_states"])
-        target_core_state = tree.map_structure(tf.identity, core_state)
-
         # TODO (dries): Take out all the data_points that does not need
         #  to be processed here at the start. Therefore it does not have
         #  to be done later on and saves processing time.
 
+        # Importance sampling weights that correct for prioritized sampling, see
+        # _accumulate.
+        importance_weights = self._importance_weights
+
         self.policy_losses: Dict[str, tf.Tensor] = {}
         self.critic_losses: Dict[str, tf.Tensor] = {}
+        priorities: List[tf.Tensor] = []
 
         # Do forward passes through the networks and calculate the losses
         with tf.GradientTape(persistent=True) as tape:
@@ -1337,12 +2057,22 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
                     loss_fn=trfl.td_learning,
                 )
 
-                self.critic_losses[agent] = tf.reduce_mean(critic_loss)
+                # The loss is half the squared TD error of every step, batch major.
+                critic_loss = tf.reshape(
+                    critic_loss, [tf.shape(importance_weights)[0], -1]
+                )
+                priorities.append(
+                    train_utils.sequence_priorities(
+                        tf.sqrt(2.0 * critic_loss), time_axis=1
+                    )
+                )
+                self.critic_losses[agent] = tf.reduce_mean(
+                    critic_loss * tf.expand_dims(importance_weights, axis=1)
+                )
 
                 # Actor learning.
                 obs_agent_feed = target_obs_trans[agent]
-                # TODO (dries): Why is there an extra tuple?
-                agent_core_state = core_state[agent][0]
+                agent_core_state = core_state[agent]
                 transposed_obs = tf2_utils.batch_to_sequence(obs_agent_feed)
                 outputs, updated_states = snt.static_unroll(
                     self._policy_networks[agent_key], transposed_obs, agent_core_state
@@ -1390,36 +2120,157 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
                 self.policy_losses[agent] = tf.reduce_sum(policy_loss) / tf.reduce_sum(
                     policy_mask
                 )
+
+        # The priority of a sequence is the largest priority of the agents.
+        self.priorities = tf.reduce_max(tf.stack(priorities), axis=0)
         self.tape = tape
 
     # Backward pass that calculates gradients and updates network.
     def _backward(self) -> None:
         """Trainer backward pass updating network parameters"""
+        self._apply_gradients(self._compute_gradients())
+
+    def _accumulate(
+        self, sample: reverb.ReplaySample, forward: Callable[[Any], None]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], tf.Tensor, List]:
+        """Run the forward pass and compute the gradients over micro-batches.
 
-        # Calculate the gradients and update the networks
+        The sample is split into accumulation_steps micro-batches, which are run
+        one after the other, so only the activations of one micro-batch are
+        kept at a time. The losses and gradients are averaged over them.
+
+        Args:
+            sample: sampled batch.
+            forward: forward pass that sets the losses, priorities and tape. It
+                reads the importance sampling weights of the micro-batch from
+                _importance_weights.
+
+        Returns:
+            the critic and policy losses of the agents, the priorities of the
+                sampled items and the gradients of every update.
+        """
+        micro_batches = train_utils.split_batch(sample, self._accumulation_steps)
+        scale = 1.0 / len(micro_batches)
+        # The importance sampling weights are normalised over the whole batch, so
+        # that the micro-batches are weighted like the batch.
+        micro_batch_weights = train_utils.split_batch(
+            train_utils.importance_sampling_weights(
+                sample.info.probability,
+                sample.info.table_size,
+                self._importance_sampling_exponent,
+            ),
+            self._accumulation_steps,
+        )
+        critic_losses: List[Dict[str, Any]] = []
+        policy_losses: List[Dict[str, Any]] = []
+        priorities: List[tf.Tensor] = []
+        gradients: List = []
+        for micro_batch, importance_weights in zip(micro_batches, micro_batch_weights):
+            self._importance_weights = importance_weights
+            # Wait for the gradients of the previous micro-batch.
+            dependencies = [
+                g
+                for _, policy_grads, critic_grads in gradients
+                for g in policy_grads + critic_grads
+                if g is not None
+            ]
+            with tf.control_dependencies(dependencies):
+                with self._phase_timer.phase("forward"):
+                    forward(micro_batch)
+
+            # Keep the losses before the gradients are applied, where the
+            # replicas of a replicated trainer take turns.
+            critic_losses.append(self.critic_losses)
+            policy_losses.append(self.policy_losses)
+            priorities.append(self.priorities)
+            with self._phase_timer.phase("backward"):
+                micro_gradients = self._compute_gradients()
+            gradients = [
+                (
+                    agent_key,
+                    train_utils.accumulate_gradients(
+                        gradients[i][1] if gradients else None, policy_grads, scale
+                    ),
+                    train_utils.accumulate_gradients(
+                        gradients[i][2] if gradients else None, critic_grads, scale
+                    ),
+                )
+                for i, (agent_key, policy_grads, critic_grads) in enumerate(
+                    micro_gradients
+                )
+            ]
+
+        def mean(*values: tf.Tensor) -> tf.Tensor:
+            return tf.add_n(values) * scale
+
+        return (
+            tree.map_structure(mean, *critic_losses),
+            tree.map_structure(mean, *policy_losses),
+            tf.concat(priorities, axis=0),
+            gradients,
+        )
+
+    def _update_variables(self, agent_key: str) -> Tuple[List, List]:
+        """Variables trained by the policy and critic losses of a network.
+
+        Args:
+            agent_key: network key.
+
+        Returns:
+            the policy and critic variables.
+        """
+        # Note: policy does not update the shared obs network
+        policy_variables = self._policy_networks[agent_key].trainable_variables
+        critic_variables = (
+            # In this agent, the critic loss trains the observation network.
+            self._observation_networks[agent_key].trainable_variables
+            + self._critic_networks[agent_key].trainable_variables
+        )
+        return policy_variables, critic_variables
+
+    def _compute_gradients(self) -> List[Tuple[str, List, List]]:
+        """Compute the gradients of the losses of the forward pass.
+
+        Returns:
+            the network key, policy gradients and critic gradients of every
+                agent, in the order they are applied.
+        """
         policy_losses = self.policy_losses
         critic_losses = self.critic_losses
         tape = self.tape
+        gradients = []
         for agent in self._agents:
             agent_key = self._agent_net_keys[agent]
-
-            # Get trainable variables.
-            # Note: policy does not update the shared obs network
-            policy_variables = self._policy_networks[agent_key].trainable_variables
-
-            critic_variables = (
-                # In this agent, the critic loss trains the observation network.
-                self._observation_networks[agent_key].trainable_variables
-                + self._critic_networks[agent_key].trainable_variables
-            )
+            policy_variables, critic_variables = self._update_variables(agent_key)
 
             # Compute gradients.
             # Note: Warning "WARNING:tensorflow:Calling GradientTape.gradient
             #  on a persistent tape inside its context is significantly less efficient
             #  than calling it outside the context." caused by losses.dpg, which calls
             #  tape.gradient.
-            policy_gradients = tape.gradient(policy_losses[agent], policy_variables)
-            critic_gradients = tape.gradient(critic_losses[agent], critic_variables)
+            gradients.append(
+                (
+                    agent_key,
+                    tape.gradient(policy_losses[agent], policy_variables),
+                    tape.gradient(critic_losses[agent], critic_variables),
+                )
+            )
+        train_utils.safe_del(self, "tape")
+        return gradients
+
+    def _apply_gradients(self, gradients: List[Tuple[str, List, List]]) -> None:
+        """Apply the gradients of every agent.
+
+        Args:
+            gradients: network key, policy gradients and critic gradients of
+                every agent, see _compute_gradients.
+        """
+        for agent_key, policy_gradients, critic_gradients in gradients:
+            policy_variables, critic_variables = self._update_variables(agent_key)
+
+            # Average the gradients over the trainer replicas.
+            policy_gradients = train_utils.all_reduce_gradients(policy_gradients)
+            critic_gradients = train_utils.all_reduce_gradients(critic_gradients)
 
             # Maybe clip gradients.
             policy_gradients = tf.clip_by_global_norm(
@@ -1432,7 +2283,6 @@ class MADDPGBaseRecurrentTrainer(mava.Trainer):
             # Apply gradients.
             self._policy_optimizers[agent_key].apply(policy_gradients, policy_variables)
             self._critic_optimizers[agent_key].apply(critic_gradients, critic_variables)
-        train_utils.safe_del(self, "tape")
 
     def step(self) -> None:
         """Trainer step to update the parameters of the agents in the system"""
@@ -1543,6 +2393,10 @@ class MADDPGDecentralisedRecurrentTrainer(MADDPGBaseRecurrentTrainer):
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
 
         super().__init__(
@@ -1567,6 +2421,10 @@ class MADDPGDecentralisedRecurrentTrainer(MADDPGBaseRecurrentTrainer):
             counts=counts,
             bootstrap_n=bootstrap_n,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
 
@@ -1600,6 +2458,10 @@ class MADDPGCentralisedRecurrentTrainer(MADDPGBaseRecurrentTrainer):
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
 
         super().__init__(
@@ -1624,6 +2486,10 @@ class MADDPGCentralisedRecurrentTrainer(MADDPGBaseRecurrentTrainer):
             counts=counts,
             bootstrap_n=bootstrap_n,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
     def _get_critic_feed(
@@ -1696,6 +2562,10 @@ class MADDPGStateBasedRecurrentTrainer(MADDPGBaseRecurrentTrainer):
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
 
         super().__init__(
@@ -1720,6 +2590,10 @@ class MADDPGStateBasedRecurrentTrainer(MADDPGBaseRecurrentTrainer):
             counts=counts,
             bootstrap_n=bootstrap_n,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
     def _get_critic_feed(
@@ -1793,6 +2667,10 @@ class MADDPGStateBasedSingleActionCriticRecurrentTrainer(MADDPGBaseRecurrentTrai
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         bootstrap_n: int = 10,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
+        accumulation_steps: int = 1,
     ):
 
         super().__init__(
@@ -1816,6 +2694,10 @@ class MADDPGStateBasedSingleActionCriticRecurrentTrainer(MADDPGBaseRecurrentTrai
             variable_client=variable_client,
             counts=counts,
             bootstrap_n=bootstrap_n,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+            accumulation_steps=accumulation_steps,
         )
 
     def _get_critic_feed(
@@ -17,18 +17,19 @@
 
 import copy
 import dataclasses
-from typing import Any, Dict, Iterator, List, Optional, Type, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
 
 import reverb
 import sonnet as snt
 import tensorflow as tf
-from acme import datasets
+from absl import logging
 from acme.tf import utils as tf2_utils
 from acme.utils import counting, loggers
 from dm_env import specs as dm_specs
 
 from mava import Trainer, adders, core, specs, types
 from mava.adders import reverb as reverb_adders
+from mava.adders.reverb import utils as reverb_utils
 from mava.components.tf.modules.exploration.exploration_scheduling import (
     BaseExplorationScheduler,
     BaseExplorationTimestepScheduler,
@@ -37,7 +38,11 @@ from mava.components.tf.modules.exploration.exploration_scheduling import (
 from mava.systems.tf import executors, variable_utils
 from mava.systems.tf.madqn import training
 from mava.systems.tf.madqn.execution import MADQNFeedForwardExecutor
+from mava.systems.tf.priority_utils import PrioritizedReplay, PriorityClient
+from mava.systems.tf.shared_memory import make_shared_memory_prefix
 from mava.systems.tf.variable_sources import VariableSource as MavaVariableSource
+from mava.utils import builder_utils, profiling_utils, stacking_utils
+from mava.utils import training_utils as train_utils
 from mava.utils.builder_utils import initialize_epsilon_schedulers
 from mava.utils.sort_utils import sort_str_num
 from mava.wrappers import ScaledDetailedTrainerStatistics
@@ -70,7 +75,7 @@ class MADQNConfig:
             checkpoints.
         discount: discount to use for TD updates.
         batch_size: batch size for updates.
-        prefetch_size: size to prefetch from replay.
+        prefetch_size: size to prefetch from replay, or tf.data.AUTOTUNE.
         target_averaging: whether to use polyak averaging for target network updates.
         target_update_period: number of steps before target networks are updated.
         target_update_rate: update rate when using averaging.
@@ -103,6 +108,75 @@ class MADQNConfig:
         evaluator_interval: An optional condition that is used to
             evaluate/test system performance after [evaluator_interval]
             condition has been met.
+        shared_memory_variables: whether the variable source also publishes its
+            variables into shared memory, so that executors and trainers on the same
+            host read them without an RPC. Nodes on other hosts fall back to RPC.
+            Requires Python 3.8+.
+        adder_flush_policy: determines how often the adders wait for their items to be
+            written to the replay tables, e.g. every K items, after a byte budget or
+            after a time interval. Defaults to flushing after every item.
+        extras_storage_policies: how each extras field (e.g. core_states,
+            network_int_keys) is stored in the replay items, see ExtrasStoragePolicy.
+            Fields that are not listed are stored for every step. Defaults to None,
+            which stores every field for every step. DEFAULT_EXTRAS_STORAGE_POLICIES
+            stores the recurrent states only at the start of each sequence and the
+            network keys once per item.
+        prioritized_replay: configuration of prioritized experience replay, see
+            PrioritizedReplay. The executors insert items with an initial priority, the
+            trainers replace it by the TD errors of the sampled items and weight their
+            losses with importance sampling weights. Defaults to None, which samples
+            uniformly.
+        replay_sampler_fn: function that creates the selector used to sample items from
+            each replay table, e.g. `lambda: reverb.selectors.Lifo()`. Defaults to
+            uniform sampling, or prioritized sampling if prioritized_replay is set.
+        replay_remover_fn: function that creates the selector used to remove items from
+            each replay table once it is full. Defaults to removing the oldest items
+            first.
+        trainer_n_step: if set, the feedforward executors store the single steps in
+            windows of length n_step + 1 and the trainers compute trainer_n_step-step
+            returns from them, so trainer_n_step can be changed without collecting new
+            data. It must be at most n_step. Defaults to None, which stores n-step
+            transitions.
+        stacked_agents: if True, the experience of the agents that use the same network
+            is stored in arrays with a leading agent dimension, keyed by network, and
+            trained on by MADQNStackedTrainer. This requires a feedforward executor, a
+            single trainer and a fixed network of each agent.
+        burn_in_length: number of steps at the start of every sampled sequence that the
+            recurrent trainers only use to refresh the stored core states, without
+            gradients, as in R2D2. This allows shorter sequence_length and period. It
+            must be smaller than sequence_length and is only supported by the recurrent
+            trainers. Defaults to 0.
+        max_replay_bytes: optional memory budget of the replay tables in bytes. The size
+            of an item is estimated from the table signature and the budget is shared
+            equally by the tables, so each table holds at most max_replay_size items and
+            at most as many as fit in its share of the budget. Defaults to None, which
+            only limits the number of items.
+        column_compression: how each column of the adders, e.g. observations, is stored
+            in replay, see ColumnCompression. This sets the chunk length of each column
+            and can store image observations as uint8, they are cast back to float32
+            when sampled. Defaults to None.
+        steps_per_call: number of trainer steps run inside a single compiled call. The
+            losses are averaged over these steps, and the counts and variables are
+            synced with the variable source once per call. Defaults to 1.
+        mixed_precision: if True, the trainer computes the online observation networks
+            that have variables in bfloat16, while the variables, the other networks
+            and the target networks stay in float32. It has no effect with
+            observation networks without variables, e.g. batch_concat. Defaults to
+            False.
+        num_trainer_replicas: number of replicas of every trainer. Each replica
+            samples its own batch from the trainer table and the replicas apply the
+            same averaged gradients, so a trainer step trains on num_trainer_replicas
+            batches. The replicas are placed on the GPUs, or on logical CPU devices.
+            Defaults to 1.
+        replay_dataset: parallel readers, in-flight samples, interleave cycle and
+            autotuning of the pipeline that samples the trainer batches, see
+            ReverbDatasetConfig. Defaults to None, which uses 12 parallel readers.
+        profiling: trace windows and signal file that capture `tf.profiler` traces of
+            the trainers, see ProfilingConfig. The time per step of the trainer phases
+            is logged with the losses. Defaults to None, which does not profile.
+        compiled_exploration: if True, the executors compute the epsilon of every agent
+            inside their compiled action selection, from a single step count, instead
+            of decrementing it in Python after every step. Defaults to False.
     """
 
     environment_spec: specs.MAEnvironmentSpec
@@ -139,6 +213,25 @@ class MADQNConfig:
     termination_condition: Optional[Dict[str, int]] = None
     evaluator_interval: Optional[dict] = None
     learning_rate_scheduler_fn: Optional[Any] = None
+    shared_memory_variables: bool = False
+    adder_flush_policy: Optional[reverb_adders.FlushPolicy] = None
+    extras_storage_policies: Optional[
+        Dict[str, reverb_adders.ExtrasStoragePolicy]
+    ] = None
+    prioritized_replay: Optional[PrioritizedReplay] = None
+    replay_sampler_fn: Optional[Callable[[], Any]] = None
+    replay_remover_fn: Optional[Callable[[], Any]] = None
+    trainer_n_step: Optional[int] = None
+    stacked_agents: bool = False
+    burn_in_length: int = 0
+    max_replay_bytes: Optional[int] = None
+    column_compression: Optional[Dict[str, reverb_adders.ColumnCompression]] = None
+    steps_per_call: int = 1
+    mixed_precision: bool = False
+    num_trainer_replicas: int = 1
+    replay_dataset: Optional[reverb_adders.ReverbDatasetConfig] = None
+    profiling: Optional[profiling_utils.ProfilingConfig] = None
+    compiled_exploration: bool = False
 
 
 class MADQNBuilder:
@@ -171,6 +264,72 @@ class MADQNBuilder:
         self._trainer_fn = trainer_fn
         self._executor_fn = executor_fn
 
+        # The builder is shared by all nodes of the program, so the shared-memory
+        # segments of the variable source can be found under the same prefix.
+        self._shared_memory_prefix = (
+            make_shared_memory_prefix()
+            if self._config.shared_memory_variables
+            else None
+        )
+
+        self._extras_storage_policies = self._config.extras_storage_policies or {}
+
+        # Distribution strategy of the trainers, see make_trainer_replicator.
+        self._trainer_replicator: Optional[tf.distribute.Strategy] = None
+
+        if (
+            self._config.trainer_n_step is not None
+            and not 0 < self._config.trainer_n_step <= self._config.n_step
+        ):
+            raise ValueError(
+                "trainer_n_step should be between 1 and n_step, got "
+                f"{self._config.trainer_n_step} with n_step={self._config.n_step}."
+            )
+
+        if self._config.burn_in_length:
+            if not issubclass(self._trainer_fn, training.MADQNRecurrentTrainer):
+                raise ValueError(
+                    "burn_in_length is only supported by the recurrent trainers, "
+                    f"got {self._trainer_fn.__name__}."
+                )
+            if not 0 < self._config.burn_in_length < self._config.sequence_length:
+                raise ValueError(
+                    "burn_in_length should be between 0 and sequence_length, got "
+                    f"{self._config.burn_in_length} with "
+                    f"sequence_length={self._config.sequence_length}."
+                )
+
+        if self._config.stacked_agents:
+            self._check_stacked_agents_setup()
+            self._agent_groups = stacking_utils.make_agent_groups(
+                self._config.agent_net_keys
+            )
+
+    def _check_stacked_agents_setup(self) -> None:
+        """Check that the system can use the stacked agent layout.
+
+        Raises:
+            ValueError: if the executor, trainer or network setup do not support
+                the stacked agent layout.
+        """
+        if not issubclass(self._executor_fn, executors.FeedForwardExecutor):
+            raise ValueError(
+                "The stacked agent layout requires a feedforward executor."
+            )
+        if not issubclass(self._trainer_fn, training.MADQNStackedTrainer):
+            raise ValueError(
+                "The stacked agent layout requires a MADQNStackedTrainer, got "
+                f"{self._trainer_fn}."
+            )
+        if len(self._config.table_network_config) != 1:
+            raise ValueError("The stacked agent layout requires a single trainer.")
+        sampling_setup = self._config.network_sampling_setup
+        if len(sampling_setup) != 1 or len(sampling_setup[0]) != len(self._agents):
+            raise ValueError(
+                "The stacked agent layout requires a fixed network for every agent, "
+                f"got the network sampling setup {sampling_setup}."
+            )
+
     def convert_specs(
         self, spec: Dict[str, Any], trainer_network_names: List
     ) -> Dict[str, Any]:
@@ -225,8 +384,15 @@ class MADQNBuilder:
             def adder_sig_fn(
                 env_spec: specs.MAEnvironmentSpec, extra_specs: Dict[str, Any]
             ) -> Any:
+                if self._config.trainer_n_step:
+                    return reverb_adders.ParallelNStepSequenceAdder.signature(
+                        env_spec,
+                        extras_spec=extra_specs,
+                        extras_storage_policies=self._extras_storage_policies,
+                        n_step=self._config.n_step,
+                    )
                 return reverb_adders.ParallelNStepTransitionAdder.signature(
-                    env_spec, extra_specs
+                    env_spec, extra_specs, self._extras_storage_policies
                 )
 
         elif issubclass(self._executor_fn, executors.RecurrentExecutor):
@@ -235,7 +401,10 @@ class MADQNBuilder:
                 env_spec: specs.MAEnvironmentSpec, extra_specs: Dict[str, Any]
             ) -> Any:
                 return reverb_adders.ParallelSequenceAdder.signature(
-                    env_spec, self._config.sequence_length, extra_specs
+                    env_spec,
+                    self._config.sequence_length,
+                    extra_specs,
+                    self._extras_storage_policies,
                 )
 
         else:
@@ -261,6 +430,7 @@ class MADQNBuilder:
 
         # Create table per trainer
         replay_tables = []
+        table_sizes: Dict[str, Tuple[int, int]] = {}
         for table_key in self._config.table_network_config.keys():
             # TODO (dries): Clean the below coverter code up.
             # Convert a Mava spec
@@ -278,18 +448,61 @@ class MADQNBuilder:
                 trainer_network_names,
             )
 
+            if self._config.stacked_agents:
+                # The experience of the agents of each network is stacked.
+                env_spec = stacking_utils.stack_environment_spec(
+                    environment_spec, self._agent_groups
+                )
+                extra_specs = stacking_utils.stack_extras_spec(
+                    self._extra_specs, self._agent_groups
+                )
+
+            signature = reverb_utils.uint8_signature(
+                adder_sig_fn(env_spec, extra_specs), self._config.column_compression
+            )
+            max_size = builder_utils.replay_table_max_size(
+                signature,
+                self._config.max_replay_size,
+                self._config.max_replay_bytes,
+                num_tables=len(self._config.table_network_config),
+            )
+            table_sizes[table_key] = (
+                builder_utils.estimate_item_nbytes(signature),
+                max_size,
+            )
             replay_tables.append(
                 reverb.Table(
                     name=table_key,
-                    sampler=reverb.selectors.Uniform(),
-                    remover=reverb.selectors.Fifo(),
-                    max_size=self._config.max_replay_size,
+                    sampler=self._make_replay_sampler(),
+                    remover=(
+                        self._config.replay_remover_fn()
+                        if self._config.replay_remover_fn
+                        else reverb.selectors.Fifo()
+                    ),
+                    max_size=max_size,
                     rate_limiter=limiter_fn(),
-                    signature=adder_sig_fn(env_spec, extra_specs),
+                    signature=signature,
                 )
             )
+        logging.info(builder_utils.replay_memory_report(table_sizes))
         return replay_tables
 
+    def _make_replay_sampler(self) -> Any:
+        """Create the selector used to sample items from the replay tables.
+
+        Returns:
+            the selector created by `replay_sampler_fn` if set, otherwise a
+                prioritized selector if prioritized replay is enabled, or a
+                uniform selector.
+        """
+        if self._config.replay_sampler_fn:
+            return self._config.replay_sampler_fn()
+        if self._config.prioritized_replay:
+            return reverb.selectors.Prioritized(
+                self._config.prioritized_replay.priority_exponent
+            )
+        return reverb.selectors.Uniform()
+
     def make_dataset_iterator(
         self,
         replay_client: reverb.Client,
@@ -308,19 +521,22 @@ class MADQNBuilder:
             data samples from the dataset.
         """
 
-        sequence_length = (
-            self._config.sequence_length
-            if issubclass(self._executor_fn, executors.RecurrentExecutor)
-            else None
+        dataset_config = (
+            self._config.replay_dataset or reverb_adders.ReverbDatasetConfig()
         )
-
-        """Create a dataset iterator to use for learning/updating the system."""
-        dataset = datasets.make_reverb_dataset(
-            table=table_name,
+        dataset = reverb_adders.make_reverb_dataset(
             server_address=replay_client.server_address,
+            table=table_name,
             batch_size=self._config.batch_size,
+            num_readers=dataset_config.num_readers,
+            max_in_flight_samples_per_worker=(
+                dataset_config.max_in_flight_samples_per_worker
+            ),
+            cycle_length=dataset_config.cycle_length,
             prefetch_size=self._config.prefetch_size,
-            sequence_length=sequence_length,
+            column_compression=self._config.column_compression,
+            num_cast_calls=dataset_config.num_cast_calls,
+            autotune=dataset_config.autotune,
         )
         return iter(dataset)
 
@@ -341,20 +557,49 @@ class MADQNBuilder:
             adder which sends data to a replay buffer.
         """
         # Create custom priority functons for the adder
+        priority_fn: reverb_adders.PriorityFn = lambda x: 1.0
+        prioritized_replay = self._config.prioritized_replay
+        if prioritized_replay:
+            initial_priority = prioritized_replay.initial_priority
+            priority_fn = prioritized_replay.initial_priority_fn or (
+                lambda x: initial_priority
+            )
         priority_fns = {
-            table_key: lambda x: 1.0
+            table_key: priority_fn
             for table_key in self._config.table_network_config.keys()
         }
 
+        # The stacked layout writes all the agents to every table.
+        table_network_config = (
+            None if self._config.stacked_agents else self._config.table_network_config
+        )
+
         # Select adder
-        if issubclass(self._executor_fn, executors.FeedForwardExecutor):
+        if (
+            issubclass(self._executor_fn, executors.FeedForwardExecutor)
+            and self._config.trainer_n_step
+        ):
+            adder = reverb_adders.ParallelNStepSequenceAdder(
+                priority_fns=priority_fns,
+                client=replay_client,
+                net_ids_to_keys=self._config.unique_net_keys,
+                n_step=self._config.n_step,
+                table_network_config=table_network_config,
+                flush_policy=self._config.adder_flush_policy,
+                extras_storage_policies=self._extras_storage_policies,
+                column_compression=self._config.column_compression,
+            )
+        elif issubclass(self._executor_fn, executors.FeedForwardExecutor):
             adder = reverb_adders.ParallelNStepTransitionAdder(
                 priority_fns=priority_fns,
                 client=replay_client,
                 net_ids_to_keys=self._config.unique_net_keys,
                 n_step=self._config.n_step,
-                table_network_config=self._config.table_network_config,
+                table_network_config=table_network_config,
                 discount=self._config.discount,
+                flush_policy=self._config.adder_flush_policy,
+                extras_storage_policies=self._extras_storage_policies,
+                column_compression=self._config.column_compression,
             )
         elif issubclass(self._executor_fn, executors.RecurrentExecutor):
             adder = reverb_adders.ParallelSequenceAdder(
@@ -362,12 +607,20 @@ class MADQNBuilder:
                 client=replay_client,
                 net_ids_to_keys=self._config.unique_net_keys,
                 sequence_length=self._config.sequence_length,
-                table_network_config=self._config.table_network_config,
+                table_network_config=table_network_config,
                 period=self._config.period,
+                flush_policy=self._config.adder_flush_policy,
+                extras_storage_policies=self._extras_storage_policies,
+                column_compression=self._config.column_compression,
             )
         else:
             raise NotImplementedError("Unknown executor type: ", self._executor_fn)
 
+        if self._config.stacked_agents:
+            return reverb_adders.StackedAgentsAdder(  # type: ignore
+                adder, self._agent_groups
+            )
+
         return adder
 
     def create_counter_variables(
@@ -423,6 +676,7 @@ class MADQNBuilder:
             self._config.checkpoint_subpath,
             self._config.checkpoint_minute_interval,
             self._config.termination_condition,
+            shared_memory_prefix=self._shared_memory_prefix,
         )
         return variable_source
 
@@ -494,6 +748,7 @@ class MADQNBuilder:
                 update_period=0
                 if evaluator_interval
                 else self._config.executor_variable_update_period,
+                shared_memory_prefix=self._shared_memory_prefix,
             )
 
             # Make sure not to use a random policy after checkpoint restoration by
@@ -508,6 +763,11 @@ class MADQNBuilder:
             seed=seed,
         )
 
+        # Only executors that support it are passed the compiled exploration.
+        executor_kwargs: Dict[str, Any] = {}
+        if self._config.compiled_exploration:
+            executor_kwargs["compiled_exploration"] = True
+
         # Create the actor which defines how we take actions.
         return self._executor_fn(
             observation_networks=networks["observations"],
@@ -523,8 +783,47 @@ class MADQNBuilder:
             adder=adder,
             evaluator=evaluator,
             interval=evaluator_interval,
+            **executor_kwargs,
         )
 
+    def make_priority_client(
+        self,
+        replay_client: reverb.Client,
+        table_name: str,
+    ) -> Optional[PriorityClient]:
+        """Create a client that updates the priorities of a replay table.
+
+        Args:
+            replay_client: Reverb Client which points to the
+                replay server.
+            table_name: name of the table the trainer samples from.
+
+        Returns:
+            priority client, or None if prioritized replay is not enabled.
+        """
+        if not self._config.prioritized_replay:
+            return None
+        return PriorityClient.from_config(
+            replay_client, table_name, self._config.prioritized_replay
+        )
+
+    def make_trainer_replicator(self) -> tf.distribute.Strategy:
+        """Create the distribution strategy of the trainers.
+
+        The networks and the trainer are created in the scope of the strategy,
+        so they are replicated over num_trainer_replicas devices. The strategy is
+        created once per process, so the trainers co-hosted in a process share it
+        with their networks.
+
+        Returns:
+            distribution strategy of the trainers.
+        """
+        if self._trainer_replicator is None:
+            self._trainer_replicator = train_utils.make_trainer_replicator(
+                self._config.num_trainer_replicas
+            )
+        return self._trainer_replicator
+
     def make_trainer(
         self,
         networks: Dict[str, Dict[str, snt.Module]],
@@ -533,6 +832,7 @@ class MADQNBuilder:
         trainer_networks: List[Any],
         trainer_table_entry: List[Any],
         logger: Optional[types.NestedLogger] = None,
+        priority_client: Optional[PriorityClient] = None,
     ) -> core.Trainer:
         """Create a trainer instance.
 
@@ -544,6 +844,8 @@ class MADQNBuilder:
             trainer_networks: Set of unique network keys to train on..
             trainer_table_entry: List of networks per agent to train on.
             logger: Logger object for logging  metadata.
+            priority_client: client that updates the priorities of the sampled
+                items, if prioritized replay is enabled.
 
         Returns:
             system trainer, that uses the collected data from the
@@ -592,6 +894,7 @@ class MADQNBuilder:
             get_keys=get_keys,
             set_keys=set_keys,
             update_period=10,
+            shared_memory_prefix=self._shared_memory_prefix,
         )
 
         # Get all the initial variables
@@ -622,12 +925,28 @@ class MADQNBuilder:
             "logger": logger,
             "learning_rate_scheduler_fn": self._config.learning_rate_scheduler_fn,
         }
+        if priority_client:
+            trainer_config["priority_client"] = priority_client
+
+        if self._config.trainer_n_step and issubclass(
+            self._trainer_fn, training.MADQNTrainer
+        ):
+            trainer_config["n_step"] = self._config.trainer_n_step
+
+        if issubclass(self._trainer_fn, training.MADQNRecurrentTrainer):
+            trainer_config["burn_in_length"] = self._config.burn_in_length
+
+        if self._config.mixed_precision:
+            trainer_config["mixed_precision"] = True
 
         # The learner updates the parameters (and initializes them).
         trainer = self._trainer_fn(**trainer_config)  # type: ignore
 
         trainer = ScaledDetailedTrainerStatistics(  # type: ignore
-            trainer, metrics=["value_loss"]
+            trainer,
+            metrics=["value_loss"],
+            steps_per_call=self._config.steps_per_call,
+            profiling=self._config.profiling,
         )
 
         return trainer
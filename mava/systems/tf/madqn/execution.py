@@ -44,10 +44,108 @@ tfd = tfp.distributions
 class DQNExecutor:
     """DQN executor."""
 
+    # Step counts of the step and timestep exploration schedules when they are
+    # compiled, else None.
+    _exploration_steps: Optional[tf.Variable] = None
+    _exploration_timesteps: Optional[tf.Variable] = None
+    # Whether select_action chose the actions of the current environment step,
+    # which then advances the compiled schedules once it is observed.
+    _exploration_step_pending: bool = False
+    # Set by the executors, see _sync_exploration_steps.
+    _counts: Optional[Dict[str, Any]] = None
+    _evaluator: bool = False
+
     def __init__(self, action_selectors: Dict) -> None:
         """Initialise DQN executor."""
         self._action_selectors = action_selectors
 
+    def _select_action(
+        self,
+        agent: str,
+        action_values: tf.Tensor,
+        legal_actions: tf.Tensor,
+    ) -> tf.Tensor:
+        """Pass the action values of an agent through its action selector.
+
+        Args:
+            agent: agent id.
+            action_values: batched action values of the agent.
+            legal_actions: batched one-hot vector of legal actions.
+
+        Returns:
+            agent action.
+        """
+        action_selector = self._action_selectors[agent]
+        if self._exploration_steps is None:
+            return action_selector(action_values, legal_actions)
+        return action_selector(
+            action_values,
+            legal_actions,
+            step=self._exploration_step(action_selector),
+        )
+
+    def _exploration_step(self, action_selector: snt.Module) -> Optional[tf.Variable]:
+        """Return the step count of the compiled schedule of an action selector.
+
+        Args:
+            action_selector: epsilon-greedy action selector.
+
+        Returns:
+            executor timestep for timestep schedules, else the step count of the
+                executor.
+        """
+        if isinstance(
+            action_selector._exploration_scheduler, BaseExplorationTimestepScheduler
+        ):
+            return self._exploration_timesteps
+        return self._exploration_steps
+
+    def _increment_exploration_steps(self) -> None:
+        """Advance the compiled exploration schedules by one step."""
+        for steps in (self._exploration_steps, self._exploration_timesteps):
+            if steps is not None:
+                steps.assign_add(1)
+
+    def _observe_exploration_step(self) -> None:
+        """Advance the compiled schedules once per step of select_action calls.
+
+        select_action chooses the action of a single agent, so the environment
+        step is only complete once it is observed.
+        """
+        if self._exploration_step_pending:
+            self._increment_exploration_steps()
+            self._exploration_step_pending = False
+
+    def _agent_epsilon(self, action_selector: snt.Module) -> float:
+        """Return the current epsilon of an action selector.
+
+        Args:
+            action_selector: epsilon-greedy action selector.
+
+        Returns:
+            epsilon value.
+        """
+        if self._exploration_steps is None:
+            return action_selector.get_epsilon()
+        return float(
+            action_selector.epsilon_at(self._exploration_step(action_selector))
+        )
+
+    def _sync_exploration_steps(self) -> None:
+        """Set the compiled timestep schedules to the executor timestep.
+
+        The timestep schedules follow the total steps of the executors, which are
+        only read from the counts once per episode. The steps of the episode are
+        then counted by the executor itself. The step schedules keep their own
+        count of the steps of this executor.
+        """
+        if self._exploration_timesteps is None or not self._counts:
+            return
+        loop_type = "evaluator" if self._evaluator else "executor"
+        self._exploration_timesteps.assign(
+            tf.cast(self._counts[f"{loop_type}_steps"], tf.int64)
+        )
+
     def _get_epsilon(self) -> Union[float, np.ndarray]:
         """Return epsilon.
 
@@ -56,7 +154,7 @@ class DQNExecutor:
         """
         data = list(
             {
-                action_selector.get_epsilon()
+                self._agent_epsilon(action_selector)
                 for action_selector in self._action_selectors.values()
             }
         )
@@ -86,6 +184,10 @@ class DQNExecutor:
         Args:
             time_t: timestep
         """
+        # Compiled schedules are advanced inside _select_actions, or once the
+        # actions chosen by select_action are observed.
+        if self._exploration_steps is not None:
+            return
         self._decrement_epsilon(time_t)
 
     def get_stats(self) -> Dict:
@@ -95,7 +197,7 @@ class DQNExecutor:
             epsilon information.
         """
         return {
-            f"{network}_epsilon": action_selector.get_epsilon()
+            f"{network}_epsilon": self._agent_epsilon(action_selector)
             for network, action_selector in self._action_selectors.items()
         }
 
@@ -122,6 +224,7 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
         counts: Optional[Dict[str, Any]] = None,
         variable_client: Optional[tf2_variable_utils.VariableClient] = None,
         interval: Optional[dict] = None,
+        compiled_exploration: bool = False,
     ):
         """Initialise the system executor
 
@@ -146,6 +249,9 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
             evaluator: whether the executor will be used for
                 evaluation.
             interval: interval that evaluations are run at.
+            compiled_exploration: if True, the epsilon of every agent is computed
+                inside _select_actions from a single step count of the executor,
+                instead of decremented in Python after every step.
         """
 
         # Store these for later use.
@@ -163,6 +269,11 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
         self._agent_net_keys = agent_net_keys
         self._adder = adder
         self._variable_client = variable_client
+        if compiled_exploration:
+            self._exploration_steps = tf.Variable(0, dtype=tf.int64, trainable=False)
+            self._exploration_timesteps = tf.Variable(
+                0, dtype=tf.int64, trainable=False
+            )
 
     def _policy(
         self,
@@ -196,7 +307,7 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
         action_values = self._value_networks[agent_key](embed)
 
         # Pass action values through action selector
-        action = self._action_selectors[agent](action_values, batched_legal_actions)
+        action = self._select_action(agent, action_values, batched_legal_actions)
 
         return action
 
@@ -210,6 +321,7 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
             actions[agent] = self._policy(
                 agent, observation.observation, observation.legal_actions
             )
+        self._increment_exploration_steps()
         return actions
 
     def select_action(
@@ -217,6 +329,7 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
     ) -> types.NestedArray:
         """Select action for single agent"""
         action = self._policy(agent, observation.observation, observation.legal_actions)
+        self._exploration_step_pending = True
 
         return tf2_utils.to_numpy_squeeze(action)
 
@@ -252,6 +365,9 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
             extras: possible extra information
                 to record during the first step. Defaults to {}.
         """
+        self._observe_exploration_step()
+        self._sync_exploration_steps()
+
         if not self._adder:
             return
 
@@ -285,6 +401,8 @@ class MADQNFeedForwardExecutor(executors.FeedForwardExecutor, DQNExecutor):
             next_extras: possible extra
                 information to record during the transition. Defaults to {}.
         """
+        self._observe_exploration_step()
+
         if not self._adder:
             return
 
@@ -321,6 +439,7 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
         variable_client: Optional[tf2_variable_utils.VariableClient] = None,
         store_recurrent_state: bool = True,
         interval: Optional[dict] = None,
+        compiled_exploration: bool = False,
     ):
         """Initialise the system executor.
 
@@ -349,6 +468,9 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
             evaluator: whether the executor will be used for
                 evaluation.
             interval: interval that evaluations are run at.
+            compiled_exploration: if True, the epsilon of every agent is computed
+                inside _select_actions from a single step count of the executor,
+                instead of decremented in Python after every step.
         """
 
         # Store these for later use.
@@ -368,6 +490,11 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
         self._observation_networks = observation_networks
         self._action_selectors = action_selectors
         self._states: Dict[str, Any] = {}
+        if compiled_exploration:
+            self._exploration_steps = tf.Variable(0, dtype=tf.int64, trainable=False)
+            self._exploration_timesteps = tf.Variable(
+                0, dtype=tf.int64, trainable=False
+            )
 
     def _policy(
         self,
@@ -403,7 +530,7 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
         action_values, new_state = self._value_networks[agent_key](embed, state)
 
         # Pass action values through action selector
-        action = self._action_selectors[agent](action_values, batched_legal_actions)
+        action = self._select_action(agent, action_values, batched_legal_actions)
 
         return action, new_state
 
@@ -423,6 +550,7 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
                 observation.legal_actions,
                 states[agent],
             )
+        self._increment_exploration_steps()
         return actions, new_states
 
     def select_action(
@@ -437,6 +565,7 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
         )
 
         self._states[agent] = new_state
+        self._exploration_step_pending = True
 
         return tf2_utils.to_numpy_squeeze(action)
 
@@ -477,6 +606,9 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
             extras: possible extra information
                 to record during the first step.
         """
+        self._observe_exploration_step()
+        self._sync_exploration_steps()
+
         # Re-initialize the RNN state.
         for agent, _ in timestep.observation.items():
             # index network either on agent type or on agent id
@@ -524,6 +656,8 @@ class MADQNRecurrentExecutor(executors.RecurrentExecutor, DQNExecutor):
             next_extras: possible extra
                 information to record during the transition.
         """
+        self._observe_exploration_step()
+
         if not self._adder:
             return
 
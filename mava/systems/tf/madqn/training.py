@@ -29,7 +29,10 @@ from acme.utils import loggers
 
 import mava
 from mava import types as mava_types
+from mava.components.tf.networks import MixedPrecisionNetwork
+from mava.systems.tf.priority_utils import PriorityClient
 from mava.systems.tf.variable_utils import VariableClient
+from mava.utils import profiling_utils, stacking_utils
 from mava.utils import training_utils as train_utils
 from mava.utils.sort_utils import sort_str_num
 
@@ -63,6 +66,9 @@ class MADQNTrainer(mava.Trainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        mixed_precision: bool = False,
     ):
         """Initialise MADQN trainer.
 
@@ -94,6 +100,18 @@ class MADQNTrainer(mava.Trainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            n_step: if set, the sampled items are windows of single steps added by
+                ParallelNStepSequenceAdder, and the trainer computes the n-step returns
+                over n_step steps. Defaults to None, for items that are n-step
+                transitions.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
         """
 
         self._agents = agents
@@ -102,6 +120,15 @@ class MADQNTrainer(mava.Trainer):
         self._variable_client = variable_client
         self._learning_rate_scheduler_fn = learning_rate_scheduler_fn
 
+        # Prioritized replay. Without it the importance sampling weights are ones.
+        self._priority_client = priority_client
+        self._importance_sampling_exponent = (
+            priority_client.importance_sampling_exponent if priority_client else 0.0
+        )
+
+        # If set, the n-step returns are computed from windows of single steps.
+        self._n_step = n_step
+
         # Setup counts
         self._counts = counts
 
@@ -118,6 +145,15 @@ class MADQNTrainer(mava.Trainer):
             for k, v in target_observation_networks.items()
         }
 
+        # Compute the online observation networks in bfloat16. Networks without
+        # variables, e.g. batch_concat, are left as is to keep the observations
+        # in float32.
+        if mixed_precision:
+            self._observation_networks = {
+                k: MixedPrecisionNetwork(v) if v.variables else v
+                for k, v in self._observation_networks.items()
+            }
+
         # General learner book-keeping and loggers.
         self._logger = logger or loggers.make_default_logger("trainer")
 
@@ -138,6 +174,12 @@ class MADQNTrainer(mava.Trainer):
 
         # Create an iterator to go through the dataset.
         self._iterator = iter(dataset)  # pytype: disable=wrong-arg-types
+        # Seconds spent waiting for the dataset, see train_utils.timed_next.
+        self._input_stall_time = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+        # Phases of the steps, see profiling_utils.PhaseTimer.
+        self._phase_timer = profiling_utils.PhaseTimer(
+            ["sample", "forward", "backward", "update_target_networks"]
+        )
 
         # Dictionary with unique network keys.
         self.unique_net_keys = sort_str_num(self._value_networks.keys())
@@ -178,27 +220,26 @@ class MADQNTrainer(mava.Trainer):
         by directy copying the weights of the online networks every few steps.
         """
 
+        online_variables: List[tf.Variable] = []
+        target_variables: List[tf.Variable] = []
         for key in self.unique_net_keys:
-            # Update target network.
-            online_variables = (
+            online_variables += [
                 *self._observation_networks[key].variables,
                 *self._value_networks[key].variables,
-            )
-            target_variables = (
+            ]
+            target_variables += [
                 *self._target_observation_networks[key].variables,
                 *self._target_value_networks[key].variables,
-            )
-
-            if self._target_averaging:
-                assert 0.0 < self._target_update_rate < 1.0
-                tau = self._target_update_rate
-                for src, dest in zip(online_variables, target_variables):
-                    dest.assign(dest * (1.0 - tau) + src * tau)
-            else:
-                # Make online -> target network update ops.
-                if tf.math.mod(self._num_steps, self._target_update_period) == 0:
-                    for src, dest in zip(online_variables, target_variables):
-                        dest.assign(src)
+            ]
+
+        train_utils.update_target_networks(
+            online_variables,
+            target_variables,
+            self._num_steps,
+            self._target_averaging,
+            self._target_update_period,
+            self._target_update_rate,
+        )
         self._num_steps.assign_add(1)
 
     def get_variables(self, names: Sequence[str]) -> Dict[str, Dict[str, np.ndarray]]:
@@ -236,29 +277,70 @@ class MADQNTrainer(mava.Trainer):
         return o_tm1, o_t
 
     @tf.function
-    def _step(
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        """Compiled trainer step, see _step_fn.
+
+        Returns:
+            losses
+        """
+        return self._step_fn()
+
+    def _step_fn(
         self,
     ) -> Dict[str, Dict[str, Any]]:
         """Trainer step.
 
+        Not compiled, so that it can also run inside the replicas of a
+        replicated trainer.
+
         Returns:
             losses
         """
 
         # Draw a batch of data from replay.
-        sample: reverb.ReplaySample = next(self._iterator)
+        with self._phase_timer.phase("sample"):
+            sample: reverb.ReplaySample = train_utils.timed_next(
+                self._iterator, self._input_stall_time
+            )
 
         # Compute loss
-        self._forward(sample)
+        with self._phase_timer.phase("forward"):
+            self._forward(sample)
+
+        # Keep the losses before the backward pass, where the replicas of a
+        # replicated trainer take turns.
+        value_losses = self.value_losses
+
+        # Send the new priorities of the sampled items to replay.
+        if self._priority_client is not None:
+            self._priority_client.update(sample.info.key, self.priorities)
 
         # Compute and apply gradients
-        self._backward()
+        with self._phase_timer.phase("backward"):
+            self._backward()
 
         # Update the target networks
-        self._update_target_networks()
+        with self._phase_timer.phase("update_target_networks"):
+            self._update_target_networks()
 
         # Log losses per agent
-        return train_utils.map_losses_per_agent_value(self.value_losses)
+        return train_utils.map_losses_per_agent_value(value_losses)
+
+    def _get_transitions(self, data: Any) -> mava_types.Transition:
+        """Get the transitions of the sampled items.
+
+        Args:
+            data: sampled items, either n-step transitions or windows of single
+                steps if the trainer computes the n-step returns.
+
+        Returns:
+            n-step transitions.
+        """
+        if self._n_step:
+            return train_utils.n_step_transition_from_sequence(
+                data, self._n_step, self._discount
+            )
+        return mava_types.Transition(*data)
 
     def _forward(self, inputs: reverb.ReplaySample) -> None:
         """Trainer forward pass.
@@ -278,7 +360,7 @@ class MADQNTrainer(mava.Trainer):
         #   This discount is applied to future rewards after r_t.
         # o_t = dictionary of next observations or next observation sequences
         # e_t [Optional] = extra data for timestep t that the agents persist in replay.
-        trans = mava_types.Transition(*inputs.data)
+        trans = self._get_transitions(inputs.data)
         o_tm1, o_t, a_tm1, r_t, d_t, _, _ = (
             trans.observations,
             trans.next_observations,
@@ -289,7 +371,15 @@ class MADQNTrainer(mava.Trainer):
             trans.next_extras,
         )
 
+        # Importance sampling weights that correct for prioritized sampling.
+        importance_weights = train_utils.importance_sampling_weights(
+            inputs.info.probability,
+            inputs.info.table_size,
+            self._importance_sampling_exponent,
+        )
+
         self.value_losses = {}
+        td_errors = []
         # Do forward passes through the networks and calculate the losses
         with tf.GradientTape(persistent=True) as tape:
 
@@ -311,7 +401,7 @@ class MADQNTrainer(mava.Trainer):
                 discount = tf.cast(self._discount, dtype=d_t[agent].dtype)
 
                 # Value loss.
-                value_loss, _ = trfl.double_qlearning(
+                value_loss, extra = trfl.double_qlearning(
                     q_tm1,
                     a_tm1[agent],
                     r_t[agent],
@@ -319,9 +409,17 @@ class MADQNTrainer(mava.Trainer):
                     q_t_value,
                     q_t_selector,
                 )
+                td_errors.append(extra.td_error)
 
-                self.value_losses[agent] = tf.reduce_mean(value_loss, axis=0)
+                self.value_losses[agent] = tf.reduce_mean(
+                    value_loss * importance_weights, axis=0
+                )
 
+        # The priority of a transition is the largest absolute TD error of the
+        # agents.
+        self.priorities = tf.stop_gradient(
+            tf.reduce_max(tf.abs(tf.stack(td_errors)), axis=0)
+        )
         self.tape = tape
 
     def _backward(self) -> None:
@@ -346,6 +444,9 @@ class MADQNTrainer(mava.Trainer):
             #  tape.gradient.
             gradients = tape.gradient(value_losses[agent], variables)
 
+            # Average the gradients over the trainer replicas.
+            gradients = train_utils.all_reduce_gradients(gradients)
+
             # Maybe clip gradients.
             gradients = tf.clip_by_global_norm(gradients, self._max_gradient_norm)[0]
 
@@ -385,6 +486,210 @@ class MADQNTrainer(mava.Trainer):
         )
 
 
+class MADQNStackedTrainer(MADQNTrainer):
+    """MADQN trainer for the stacked agent layout.
+
+    The sampled items hold the experience of the agents that share a network in
+    arrays with a leading agent dimension, keyed by network, see
+    `mava.utils.stacking_utils`. The batch and agent dimensions are merged, so
+    the networks are run and updated once per network instead of once per
+    agent, and the size of the graph does not grow with the number of agents.
+    The losses are averaged over the batch and the agents.
+    """
+
+    def __init__(
+        self,
+        agents: List[str],
+        agent_types: List[str],
+        value_networks: Dict[str, snt.Module],
+        target_value_networks: Dict[str, snt.Module],
+        optimizer: Union[snt.Optimizer, Dict[str, snt.Optimizer]],
+        discount: float,
+        target_averaging: bool,
+        target_update_period: int,
+        target_update_rate: float,
+        dataset: tf.data.Dataset,
+        observation_networks: Dict[str, snt.Module],
+        target_observation_networks: Dict[str, snt.Module],
+        variable_client: VariableClient,
+        counts: Dict[str, Any],
+        agent_net_keys: Dict[str, str],
+        max_gradient_norm: float = None,
+        logger: loggers.Logger = None,
+        learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        n_step: Optional[int] = None,
+        mixed_precision: bool = False,
+    ):
+        """Initialise the stacked MADQN trainer.
+
+        Args:
+            agents: agent ids, e.g. "agent_0".
+            agent_types: agent types, e.g. "speaker" or "listener".
+            value_networks: value networks for each agents in
+                the system.
+            target_value_networks: target value networks.
+            optimizer: optimizer(s) for updating policy networks.
+            discount: discount factor for TD updates.
+            target_averaging: whether to use polyak averaging for target network
+                updates.
+            target_update_period: number of steps before target networks are
+                updated.
+            target_update_rate: update rate when using averaging.
+            dataset: training dataset.
+            observation_networks: network for feature
+                extraction from raw observation.
+            target_observation_networks: target observation
+                network.
+            variable_client: The client used to manage the variables.
+            counts: step counter object.
+            agent_net_keys: specifies what network each agent uses.
+            max_gradient_norm: maximum allowed norm for gradients
+                before clipping is applied.
+            logger: logger object for logging trainer
+                statistics.
+            learning_rate_scheduler_fn: dict with two functions (one for the policy and
+                one for the critic optimizer), that takes in a trainer step t and
+                returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            n_step: if set, the sampled items are windows of single steps added by
+                ParallelNStepSequenceAdder, and the trainer computes the n-step returns
+                over n_step steps. Defaults to None, for items that are n-step
+                transitions.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
+        """
+        super().__init__(
+            agents=agents,
+            agent_types=agent_types,
+            value_networks=value_networks,
+            target_value_networks=target_value_networks,
+            optimizer=optimizer,
+            discount=discount,
+            target_averaging=target_averaging,
+            target_update_period=target_update_period,
+            target_update_rate=target_update_rate,
+            dataset=dataset,
+            observation_networks=observation_networks,
+            target_observation_networks=target_observation_networks,
+            variable_client=variable_client,
+            counts=counts,
+            agent_net_keys=agent_net_keys,
+            max_gradient_norm=max_gradient_norm,
+            logger=logger,
+            learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            n_step=n_step,
+            mixed_precision=mixed_precision,
+        )
+
+        # The agents of each network, in the order they are stacked in replay.
+        self._agent_groups = stacking_utils.make_agent_groups(agent_net_keys)
+
+    def _forward(self, inputs: reverb.ReplaySample) -> None:
+        """Trainer forward pass.
+
+        Args:
+            inputs: input data from the data table (stacked transitions)
+        """
+        trans = self._get_transitions(inputs.data)
+
+        # Importance sampling weights that correct for prioritized sampling.
+        importance_weights = train_utils.importance_sampling_weights(
+            inputs.info.probability,
+            inputs.info.table_size,
+            self._importance_sampling_exponent,
+        )
+
+        self.value_losses = {}
+        priorities = []
+        # Do forward passes through the networks and calculate the losses
+        with tf.GradientTape(persistent=True) as tape:
+            for net_key in self._agent_groups.keys():
+                # Merge the batch and agent dimensions, [B, N, ...] -> [B * N, ...].
+                merged_inputs, _ = train_utils.combine_dim(
+                    [
+                        trans.observations[net_key].observation,
+                        trans.next_observations[net_key].observation,
+                        trans.next_observations[net_key].legal_actions,
+                        trans.actions[net_key],
+                        trans.rewards[net_key],
+                        trans.discounts[net_key],
+                    ]
+                )
+                o_tm1, o_t, legal_actions, a_tm1, r_t, d_t = merged_inputs
+
+                o_tm1_trans = self._observation_networks[net_key](o_tm1)
+                o_t_trans = tree.map_structure(
+                    tf.stop_gradient, self._target_observation_networks[net_key](o_t)
+                )
+
+                # Double Q-learning
+                q_tm1 = self._value_networks[net_key](o_tm1_trans)
+                q_t_value = self._target_value_networks[net_key](o_t_trans)
+                q_t_selector = self._value_networks[net_key](o_t_trans)
+
+                # Legal action masking
+                q_t_selector = tf.where(
+                    tf.cast(legal_actions, "bool"), q_t_selector, -999999999
+                )
+
+                # pcont
+                discount = tf.cast(self._discount, dtype=d_t.dtype)
+
+                # Value loss.
+                value_loss, extra = trfl.double_qlearning(
+                    q_tm1, a_tm1, r_t, discount * d_t, q_t_value, q_t_selector
+                )
+
+                # Split the batch and agent dimensions again, [B * N] -> [B, N].
+                stacked_shape = tf.shape(trans.actions[net_key])
+                value_loss = tf.reshape(value_loss, stacked_shape)
+                td_error = tf.reshape(extra.td_error, stacked_shape)
+                priorities.append(tf.reduce_max(tf.abs(td_error), axis=1))
+
+                self.value_losses[net_key] = tf.reduce_mean(
+                    value_loss * tf.expand_dims(importance_weights, axis=1)
+                )
+
+        # The priority of a transition is the largest absolute TD error of the
+        # agents.
+        self.priorities = tf.stop_gradient(tf.reduce_max(tf.stack(priorities), axis=0))
+        self.tape = tape
+
+    def _backward(self) -> None:
+        """Trainer backward pass updating network parameters"""
+
+        # Calculate the gradients and update the networks
+        value_losses = self.value_losses
+        tape = self.tape
+        for net_key in self._agent_groups.keys():
+            # Get trainable variables.
+            variables = (
+                self._observation_networks[net_key].trainable_variables
+                + self._value_networks[net_key].trainable_variables
+            )
+
+            # Compute gradients.
+            gradients = tape.gradient(value_losses[net_key], variables)
+
+            # Average the gradients over the trainer replicas.
+            gradients = train_utils.all_reduce_gradients(gradients)
+
+            # Maybe clip gradients.
+            gradients = tf.clip_by_global_norm(gradients, self._max_gradient_norm)[0]
+
+            # Apply gradients.
+            self._optimizers[net_key].apply(gradients, variables)
+
+        train_utils.safe_del(self, "tape")
+
+
 class MADQNRecurrentTrainer(mava.Trainer):
     """Recurrent MADQN trainer.
 
@@ -412,6 +717,9 @@ class MADQNRecurrentTrainer(mava.Trainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
     ):
         """Initialise Recurrent MADQN trainer
 
@@ -443,12 +751,30 @@ class MADQNRecurrentTrainer(mava.Trainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states, without gradients, as in R2D2. The
+                losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
         """
         self._agents = agents
         self._agent_type = agent_types
         self._agent_net_keys = agent_net_keys
         self._variable_client = variable_client
         self._learning_rate_scheduler_fn = learning_rate_scheduler_fn
+        self._burn_in_length = burn_in_length
+
+        # Prioritized replay. Without it the importance sampling weights are ones.
+        self._priority_client = priority_client
+        self._importance_sampling_exponent = (
+            priority_client.importance_sampling_exponent if priority_client else 0.0
+        )
 
         # Setup counts
         self._counts = counts
@@ -466,6 +792,15 @@ class MADQNRecurrentTrainer(mava.Trainer):
             for k, v in target_observation_networks.items()
         }
 
+        # Compute the online observation networks in bfloat16. Networks without
+        # variables, e.g. batch_concat, are left as is to keep the observations
+        # in float32.
+        if mixed_precision:
+            self._observation_networks = {
+                k: MixedPrecisionNetwork(v) if v.variables else v
+                for k, v in self._observation_networks.items()
+            }
+
         # General learner book-keeping and loggers.
         self._logger = logger or loggers.make_default_logger("trainer")
 
@@ -486,6 +821,12 @@ class MADQNRecurrentTrainer(mava.Trainer):
 
         # Create an iterator to go through the dataset.
         self._iterator = iter(dataset)  # pytype: disable=wrong-arg-types
+        # Seconds spent waiting for the dataset, see train_utils.timed_next.
+        self._input_stall_time = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+        # Phases of the steps, see profiling_utils.PhaseTimer.
+        self._phase_timer = profiling_utils.PhaseTimer(
+            ["sample", "forward", "backward", "update_target_networks"]
+        )
 
         # Dictionary with unique network keys.
         self.unique_net_keys = sort_str_num(self._value_networks.keys())
@@ -566,33 +907,68 @@ class MADQNRecurrentTrainer(mava.Trainer):
             )
         return obs_trans, obs_target_trans
 
+    def _burn_in(self, data: Any) -> Tuple[Any, Dict[str, Any], Dict[str, Any]]:
+        """Refresh the stored core states over the burn in steps of the sequences.
+
+        Args:
+            data: time major sequences sampled from the data table.
+
+        Returns:
+            the sequences without the burn in steps, and the initial core states
+            of the value and target value networks for the remaining steps.
+        """
+        # Get initial state for the LSTM from replay and
+        # extract the first state in the sequence.
+        core_state = {
+            agent: tree.map_structure(
+                lambda s: s[0, :, :], data.extras["core_states"][agent][0]
+            )
+            for agent in self._agents
+        }
+        if not self._burn_in_length:
+            return data, core_state, core_state
+
+        burn_in_data, data = train_utils.split_burn_in(data, self._burn_in_length)
+        obs_trans, target_obs_trans = self._transform_observations(
+            burn_in_data.observations
+        )
+        target_core_state = train_utils.burn_in_core_states(
+            self._target_value_networks,
+            self._agent_net_keys,
+            target_obs_trans,
+            core_state,
+        )
+        core_state = train_utils.burn_in_core_states(
+            self._value_networks, self._agent_net_keys, obs_trans, core_state
+        )
+        return data, core_state, target_core_state
+
     def _update_target_networks(self) -> None:
         """Update the target networks.
 
         Using either target averaging or
         by directy copying the weights of the online networks every few steps.
         """
+        online_variables: List[tf.Variable] = []
+        target_variables: List[tf.Variable] = []
         for key in self.unique_net_keys:
-            # Update target network.
-            online_variables = (
+            online_variables += [
                 *self._observation_networks[key].variables,
                 *self._value_networks[key].variables,
-            )
-            target_variables = (
+            ]
+            target_variables += [
                 *self._target_observation_networks[key].variables,
                 *self._target_value_networks[key].variables,
-            )
-
-            if self._target_averaging:
-                assert 0.0 < self._target_update_rate < 1.0
-                tau = self._target_update_rate
-                for src, dest in zip(online_variables, target_variables):
-                    dest.assign(dest * (1.0 - tau) + src * tau)
-            else:
-                # Make online -> target network update ops.
-                if tf.math.mod(self._num_steps, self._target_update_period) == 0:
-                    for src, dest in zip(online_variables, target_variables):
-                        dest.assign(src)
+            ]
+
+        train_utils.update_target_networks(
+            online_variables,
+            target_variables,
+            self._num_steps,
+            self._target_averaging,
+            self._target_update_period,
+            self._target_update_rate,
+        )
         self._num_steps.assign_add(1)
 
     def get_variables(self, names: Sequence[str]) -> Dict[str, Dict[str, np.ndarray]]:
@@ -600,29 +976,54 @@ class MADQNRecurrentTrainer(mava.Trainer):
         pass
 
     @tf.function
-    def _step(
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        """Compiled trainer step, see _step_fn.
+
+        Returns:
+            losses
+        """
+        return self._step_fn()
+
+    def _step_fn(
         self,
     ) -> Dict[str, Dict[str, Any]]:
         """Trainer step.
 
+        Not compiled, so that it can also run inside the replicas of a
+        replicated trainer.
+
         Returns:
             losses
         """
 
         # Draw a batch of data from replay.
-        sample: reverb.ReplaySample = next(self._iterator)
+        with self._phase_timer.phase("sample"):
+            sample: reverb.ReplaySample = train_utils.timed_next(
+                self._iterator, self._input_stall_time
+            )
 
         # Compute loss
-        self._forward(sample)
+        with self._phase_timer.phase("forward"):
+            self._forward(sample)
+
+        # Keep the losses before the backward pass, where the replicas of a
+        # replicated trainer take turns.
+        value_losses = self.value_losses
+
+        # Send the new priorities of the sampled items to replay.
+        if self._priority_client is not None:
+            self._priority_client.update(sample.info.key, self.priorities)
 
         # Compute and apply gradients
-        self._backward()
+        with self._phase_timer.phase("backward"):
+            self._backward()
 
         # Update the target networks
-        self._update_target_networks()
+        with self._phase_timer.phase("update_target_networks"):
+            self._update_target_networks()
 
         # Log losses per agent
-        return train_utils.map_losses_per_agent_value(self.value_losses)
+        return train_utils.map_losses_per_agent_value(value_losses)
 
     def _forward(self, inputs: reverb.ReplaySample) -> None:
         """Trainer forward pass.
@@ -636,6 +1037,9 @@ class MADQNRecurrentTrainer(mava.Trainer):
         )
         data = tf2_utils.batch_to_sequence(data)
 
+        # Refresh the core states over the burn in steps, if any.
+        data, core_state, target_core_state = self._burn_in(data)
+
         # Note (dries): The unused variable is start_of_episodes.
         observations, actions, rewards, discounts, _, extras = (
             data.observations,
@@ -646,18 +1050,19 @@ class MADQNRecurrentTrainer(mava.Trainer):
             data.extras,
         )
 
-        # Get initial state for the LSTM from replay and
-        # extract the first state in the sequence.
-        core_state = tree.map_structure(lambda s: s[0, :, :], extras["core_states"])
-        target_core_state = tree.map_structure(
-            lambda s: s[0, :, :], extras["core_states"]
-        )
-
         # TODO (dries): Take out all the data_points that does not need
         #  to be processed here at the start. Therefore it does not have
         #  to be done later on and saves processing time.
 
+        # Importance sampling weights that correct for prioritized sampling.
+        importance_weights = train_utils.importance_sampling_weights(
+            inputs.info.probability,
+            inputs.info.table_size,
+            self._importance_sampling_exponent,
+        )
+
         self.value_losses: Dict[str, tf.Tensor] = {}
+        priorities = []
 
         # Do forward passes through the networks and calculate the losses
         with tf.GradientTape(persistent=True) as tape:
@@ -665,23 +1070,26 @@ class MADQNRecurrentTrainer(mava.Trainer):
             # is recurrent and not the observation network.
             obs_trans, target_obs_trans = self._transform_observations(observations)
 
-            for agent in self._trainer_agent_list:
-                agent_key = self._agent_net_keys[agent]
+            # Unroll the agents that share a network together.
+            q_values, _ = train_utils.unroll_agents(
+                self._value_networks,
+                self._agent_net_keys,
+                {agent: obs_trans[agent] for agent in self._trainer_agent_list},
+                {agent: core_state[agent] for agent in self._trainer_agent_list},
+            )
+            target_q_values, _ = train_utils.unroll_agents(
+                self._target_value_networks,
+                self._agent_net_keys,
+                {agent: target_obs_trans[agent] for agent in self._trainer_agent_list},
+                {agent: target_core_state[agent] for agent in self._trainer_agent_list},
+            )
 
+            for agent in self._trainer_agent_list:
                 # Double Q-learning
-                q, _ = snt.static_unroll(
-                    self._value_networks[agent_key],
-                    obs_trans[agent],
-                    core_state[agent][0],
-                )
+                q = q_values[agent]
                 q_tm1 = q[:-1]  # Chop off last timestep
                 q_t_selector = q[1:]  # Chop off first timestep
-                q_t_value, _ = snt.static_unroll(
-                    self._target_value_networks[agent_key],
-                    target_obs_trans[agent],
-                    target_core_state[agent][0],
-                )
-                q_t_value = q_t_value[1:]  # Chop off first timestep
+                q_t_value = target_q_values[agent][1:]  # Chop off first timestep
 
                 # Legal action masking
                 q_t_selector = tf.where(
@@ -691,7 +1099,7 @@ class MADQNRecurrentTrainer(mava.Trainer):
                 )
 
                 # Flatten out time and batch dim
-                q_tm1, _ = train_utils.combine_dim(q_tm1)
+                q_tm1, dims = train_utils.combine_dim(q_tm1)
                 q_t_selector, _ = train_utils.combine_dim(q_t_selector)
                 q_t_value, _ = train_utils.combine_dim(q_t_value)
                 a_tm1, _ = train_utils.combine_dim(
@@ -709,19 +1117,32 @@ class MADQNRecurrentTrainer(mava.Trainer):
                 discount = tf.cast(self._discount, dtype=discounts[agent].dtype)
 
                 # Value loss
-                value_loss, _ = trfl.double_qlearning(
+                value_loss, extra = trfl.double_qlearning(
                     q_tm1, a_tm1, r_t, discount * d_t, q_t_value, q_t_selector
                 )
 
                 # Zero-padding mask
-                zero_padding_mask, _ = train_utils.combine_dim(
-                    tf.cast(extras["zero_padding_mask"], dtype=value_loss.dtype)[:-1]
+                zero_padding_mask = tf.cast(
+                    extras["zero_padding_mask"], dtype=value_loss.dtype
+                )[:-1]
+                priorities.append(
+                    train_utils.sequence_priorities(
+                        tf.reshape(extra.td_error, dims), zero_padding_mask
+                    )
                 )
-                masked_loss = value_loss * zero_padding_mask
+                zero_padding_mask, _ = train_utils.combine_dim(zero_padding_mask)
+
+                # Importance sampling weights of every step.
+                step_weights, _ = train_utils.combine_dim(
+                    tf.broadcast_to(importance_weights, dims)
+                )
+                masked_loss = value_loss * zero_padding_mask * step_weights
                 self.value_losses[agent] = tf.reduce_sum(masked_loss) / tf.reduce_sum(
                     zero_padding_mask
                 )
 
+        # The priority of a sequence is the largest priority of the agents.
+        self.priorities = tf.reduce_max(tf.stack(priorities), axis=0)
         self.tape = tape
 
     def _backward(self) -> None:
@@ -742,6 +1163,9 @@ class MADQNRecurrentTrainer(mava.Trainer):
             # Compute gradients.
             gradients = tape.gradient(value_losses[agent], variables)
 
+            # Average the gradients over the trainer replicas.
+            gradients = train_utils.all_reduce_gradients(gradients)
+
             # Maybe clip gradients.
             gradients = tf.clip_by_global_norm(gradients, self._max_gradient_norm)[0]
 
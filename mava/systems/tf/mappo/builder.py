@@ -17,11 +17,12 @@
 
 import copy
 import dataclasses
-from typing import Any, Dict, Iterator, List, Optional, Type, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
 
 import reverb
 import sonnet as snt
 import tensorflow as tf
+from absl import logging
 
 # from acme.adders.reverb.sequence import EndBehavior
 from acme.specs import EnvironmentSpec
@@ -29,9 +30,12 @@ from acme.tf import utils as tf2_utils
 
 from mava import adders, core, specs, types
 from mava.adders import reverb as reverb_adders
+from mava.adders.reverb import utils as reverb_utils
 from mava.systems.tf import variable_utils
 from mava.systems.tf.mappo import execution, training
+from mava.systems.tf.shared_memory import make_shared_memory_prefix
 from mava.systems.tf.variable_sources import VariableSource as MavaVariableSource
+from mava.utils import builder_utils, profiling_utils
 from mava.utils.sort_utils import sort_str_num
 from mava.wrappers import NetworkStatisticsActorCritic, ScaledDetailedTrainerStatistics
 
@@ -91,6 +95,45 @@ class MAPPOConfig:
         evaluator_interval: intervals that evaluator are run at.
         learning_rate_scheduler_fn: function/class that takes in a trainer step t
                 and returns the current learning rate.
+        shared_memory_variables: whether the variable source also publishes its
+            variables into shared memory, so that executors and trainers on the same
+            host read them without an RPC. Nodes on other hosts fall back to RPC.
+            Requires Python 3.8+.
+        adder_flush_policy: determines how often the adders wait for their items to be
+            written to the replay tables, e.g. every K items, after a byte budget or
+            after a time interval. Defaults to flushing after every item.
+        extras_storage_policies: how each extras field (e.g. core_states,
+            network_int_keys) is stored in the replay items, see ExtrasStoragePolicy.
+            Fields that are not listed are stored for every step. Defaults to None,
+            which stores every field for every step. DEFAULT_EXTRAS_STORAGE_POLICIES
+            stores the recurrent states only at the start of each sequence and the
+            network keys once per item.
+        max_replay_bytes: optional memory budget of the replay tables in bytes. The size
+            of an item is estimated from the table signature and the budget is shared
+            equally by the tables, so each table holds at most max_queue_size items and
+            at most as many as fit in its share of the budget. Defaults to None, which
+            only limits the number of items.
+        column_compression: how each column of the adders, e.g. observations, is stored
+            in replay, see ColumnCompression. This sets the chunk length of each column
+            and can store image observations as uint8, they are cast back to float32
+            when sampled. Defaults to None.
+        stacked_agents: the stacked agent layout, see MADQNConfig, is not supported by
+            MAPPO yet, so this must be False. It is only implemented by
+            MADQNStackedTrainer.
+        steps_per_call: number of trainer steps run inside a single compiled call. The
+            losses are averaged over these steps, and the counts and variables are
+            synced with the variable source once per call. Defaults to 1.
+        mixed_precision: if True, the trainer computes the online observation networks
+            that have variables in bfloat16, while the variables, the other networks
+            and the target networks stay in float32. It has no effect with
+            observation networks without variables, e.g. batch_concat. Defaults to
+            False.
+        replay_dataset: parallel readers, in-flight samples, interleave cycle and
+            autotuning of the pipeline that samples the trainer batches, see
+            ReverbDatasetConfig. Defaults to None, which uses a single reader.
+        profiling: trace windows and signal file that capture `tf.profiler` traces of
+            the trainers, see ProfilingConfig. The time per step of the trainer phases
+            is logged with the losses. Defaults to None, which does not profile.
     """
 
     environment_spec: specs.EnvironmentSpec
@@ -124,6 +167,18 @@ class MAPPOConfig:
     learning_rate_scheduler_fn: Optional[Any] = None
     evaluator_interval: Optional[dict] = None
     normalize_advantage: bool = False
+    shared_memory_variables: bool = False
+    adder_flush_policy: Optional[reverb_adders.FlushPolicy] = None
+    extras_storage_policies: Optional[
+        Dict[str, reverb_adders.ExtrasStoragePolicy]
+    ] = None
+    max_replay_bytes: Optional[int] = None
+    column_compression: Optional[Dict[str, reverb_adders.ColumnCompression]] = None
+    stacked_agents: bool = False
+    steps_per_call: int = 1
+    mixed_precision: bool = False
+    replay_dataset: Optional[reverb_adders.ReverbDatasetConfig] = None
+    profiling: Optional[profiling_utils.ProfilingConfig] = None
 
 
 class MAPPOBuilder:
@@ -155,6 +210,22 @@ class MAPPOBuilder:
         self._executor_fn = executor_fn
         self._extra_specs = extra_specs
 
+        # The builder is shared by all nodes of the program, so the shared-memory
+        # segments of the variable source can be found under the same prefix.
+        self._shared_memory_prefix = (
+            make_shared_memory_prefix()
+            if self._config.shared_memory_variables
+            else None
+        )
+
+        self._extras_storage_policies = self._config.extras_storage_policies or {}
+
+        if self._config.stacked_agents:
+            raise ValueError(
+                "The stacked agent layout is only supported by MADQN, see "
+                "MADQNStackedTrainer."
+            )
+
     def add_log_prob_to_spec(
         self, environment_spec: specs.MAEnvironmentSpec
     ) -> specs.MAEnvironmentSpec:
@@ -233,6 +304,7 @@ class MAPPOBuilder:
         adder_env_spec = self.add_log_prob_to_spec(environment_spec)
 
         replay_tables = []
+        table_sizes: Dict[str, Tuple[int, int]] = {}
         for table_key in self._config.table_network_config.keys():
             # TODO (dries): Clean the below converter code up.
             # Convert a Mava spec
@@ -256,15 +328,30 @@ class MAPPOBuilder:
                 env_spec,
                 sequence_length=self._config.sequence_length,
                 extras_spec=extra_specs,
+                extras_storage_policies=self._extras_storage_policies,
+            )
+            signature = reverb_utils.uint8_signature(
+                signature, self._config.column_compression
+            )
+            max_size = builder_utils.replay_table_max_size(
+                signature,
+                self._config.max_queue_size,  # type: ignore
+                self._config.max_replay_bytes,
+                num_tables=len(self._config.table_network_config),
+            )
+            table_sizes[table_key] = (
+                builder_utils.estimate_item_nbytes(signature),
+                max_size,
             )
 
             replay_tables.append(
                 reverb.Table.queue(
                     name=table_key,
-                    max_size=self._config.max_queue_size,
+                    max_size=max_size,
                     signature=signature,
                 )
             )
+        logging.info(builder_utils.replay_memory_report(table_sizes))
 
         return replay_tables
 
@@ -287,17 +374,29 @@ class MAPPOBuilder:
         """
 
         # NOTE: From https://github.com/deepmind/acme/blob/6bf350df1d9dd16cd85217908ec9f47553278976/acme/agents/jax/ppo/builder.py#L89  # noqa: E501
-        # We don't use datasets.make_reverb_dataset() here to avoid interleaving
-        # and prefetching, that doesn't work well with can_sample() check on update.
-
-        dataset = reverb.TrajectoryDataset.from_table_signature(
+        # We use a single reader by default and don't prefetch here to avoid
+        # interleaving and prefetching, that doesn't work well with can_sample()
+        # check on update.
+        dataset_config = (
+            self._config.replay_dataset
+            or reverb_adders.ReverbDatasetConfig(num_readers=1)
+        )
+        dataset = reverb_adders.make_reverb_dataset(
             server_address=replay_client.server_address,
             table=table_name,
-            max_in_flight_samples_per_worker=2 * self._config.batch_size,
+            batch_size=self._config.batch_size,
+            num_readers=dataset_config.num_readers,
+            max_in_flight_samples_per_worker=(
+                dataset_config.max_in_flight_samples_per_worker
+            ),
+            cycle_length=dataset_config.cycle_length,
+            column_compression=self._config.column_compression,
+            num_cast_calls=dataset_config.num_cast_calls,
+            autotune=dataset_config.autotune,
         )
-        # Add batch dimension.
-        dataset = dataset.batch(self._config.batch_size, drop_remainder=True)
-        return dataset.as_numpy_iterator()
+        # A tf.data iterator, unlike a numpy iterator, samples a new batch every
+        # step when several steps are compiled together, see steps_per_call.
+        return iter(dataset)
 
     def make_adder(
         self,
@@ -330,6 +429,9 @@ class MAPPOBuilder:
             table_network_config=self._config.table_network_config,
             period=self._config.sequence_period,
             sequence_length=self._config.sequence_length,
+            flush_policy=self._config.adder_flush_policy,
+            extras_storage_policies=self._extras_storage_policies,
+            column_compression=self._config.column_compression,
             # end_of_episode_behavior=EndBehavior.CONTINUE,
         )
         # Note (dries): Using end_of_episode_behavior=EndBehavior.CONTINUE can
@@ -384,6 +486,7 @@ class MAPPOBuilder:
             self._config.checkpoint_subpath,
             self._config.checkpoint_minute_interval,
             self._config.termination_condition,
+            shared_memory_prefix=self._shared_memory_prefix,
         )
         return variable_source
 
@@ -445,6 +548,7 @@ class MAPPOBuilder:
                 update_period=0
                 if evaluator_interval
                 else self._config.executor_variable_update_period,
+                shared_memory_prefix=self._shared_memory_prefix,
             )
 
             # Make sure not to use a random policy after checkpoint restoration by
@@ -528,6 +632,7 @@ class MAPPOBuilder:
             get_keys=get_keys,
             set_keys=set_keys,
             update_period=1,
+            shared_memory_prefix=self._shared_memory_prefix,
         )
 
         # Get all the initial variables
@@ -563,6 +668,9 @@ class MAPPOBuilder:
             "learning_rate_scheduler_fn": self._config.learning_rate_scheduler_fn,
         }
 
+        if self._config.mixed_precision:
+            trainer_config["mixed_precision"] = True
+
         # The learner updates the parameters (and initializes them).
         trainer = self._trainer_fn(**trainer_config)
 
@@ -572,7 +680,10 @@ class MAPPOBuilder:
         trainer = NetworkStatisticsActorCritic(trainer)  # type: ignore
 
         trainer = ScaledDetailedTrainerStatistics(  # type: ignore
-            trainer, metrics=["policy_loss", "critic_loss", "total_loss"]
+            trainer,
+            metrics=["policy_loss", "critic_loss", "total_loss"],
+            steps_per_call=self._config.steps_per_call,
+            profiling=self._config.profiling,
         )
 
         return trainer
@@ -30,13 +30,21 @@ from dm_env import specs
 
 import mava
 from mava import specs as mava_specs
+from mava.adders.reverb import (
+    ColumnCompression,
+    ExtrasStoragePolicy,
+    FlushPolicy,
+    ReverbDatasetConfig,
+)
 from mava.components.tf.architectures import DecentralisedValueActorCritic
 from mava.environment_loop import ParallelEnvironmentLoop
 from mava.systems.tf import executors
 from mava.systems.tf.mappo import builder, execution, training
+from mava.systems.tf.trainer_scheduling import CoHostedTrainers, share_networks
 from mava.systems.tf.variable_sources import VariableSource as MavaVariableSource
 from mava.utils import enums
 from mava.utils.loggers import MavaLogger, logger_utils
+from mava.utils.profiling_utils import ProfilingConfig
 from mava.utils.sort_utils import sample_new_agent_keys, sort_str_num
 from mava.wrappers import DetailedPerAgentStatistics
 
@@ -80,6 +88,11 @@ class MAPPO:
         entropy_cost: float = 0.01,
         baseline_cost: float = 0.5,
         max_gradient_norm: Optional[float] = 0.5,
+        steps_per_call: int = 1,
+        mixed_precision: bool = False,
+        trainers_per_node: int = 1,
+        replay_dataset: Optional[ReverbDatasetConfig] = None,
+        profiling: Optional[ProfilingConfig] = None,
         max_queue_size: Optional[int] = None,
         batch_size: int = 512,
         minibatch_size: int = None,
@@ -99,6 +112,12 @@ class MAPPO:
         evaluator_interval: Optional[dict] = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
         normalize_advantage: bool = False,
+        shared_memory_variables: bool = False,
+        adder_flush_policy: Optional[FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, ExtrasStoragePolicy]] = None,
+        max_replay_bytes: Optional[int] = None,
+        column_compression: Optional[Dict[str, ColumnCompression]] = None,
+        stacked_agents: bool = False,
     ):
         """Initialise the system
 
@@ -164,6 +183,27 @@ class MAPPO:
                 total loss. Defaults to 0.5.
             max_gradient_norm: value to specify the maximum clipping value for the
             gradient norm during optimization.
+            steps_per_call: number of trainer steps run inside a single compiled call.
+                The losses are averaged over these steps, and the counts and variables
+                are synced with the variable source once per call, which lowers the
+                overhead of every step for small networks. Defaults to 1.
+            mixed_precision: if True, the trainers compute the online observation
+                networks in bfloat16 with float32 variables, which speeds up large
+                observation networks on accelerators with bfloat16 support. Only
+                the observation networks with variables are converted, so the
+                option has no effect with observation networks such as
+                batch_concat. The policy, critic and value networks stay in
+                float32. Defaults to False.
+            trainers_per_node: number of trainers co-hosted in each trainer node. The
+                trainers of a node share one process and TensorFlow runtime, and a
+                scheduler steps the trainer whose table has the most samples
+                available. Defaults to 1, one process per trainer.
+            replay_dataset: parallel readers, in-flight samples, interleave cycle
+                and autotuning of the pipeline that samples the trainer batches,
+                see ReverbDatasetConfig. Defaults to None, which uses a single reader.
+            profiling: trace windows and signal file that capture `tf.profiler`
+                traces of the trainers, and log the time per step of their phases,
+                see ProfilingConfig. Defaults to None, which does not profile.
             max_queue_size : maximum number of items in the queue.
                 Should be larger than batch size.
             batch_size: sample batch size for updates.
@@ -210,6 +250,31 @@ class MAPPO:
                 evaluator_interval = {"executor_episodes": 100}.
             normalize_advantage: whether to normalize the advantage estimate. This can
                 hurt peformance when shared weights are used.
+            shared_memory_variables: whether the variable source also publishes its
+                variables into shared memory, so that executors and trainers on the same
+                host read them without an RPC. Nodes on other hosts fall back to RPC.
+                Requires Python 3.8+.
+            adder_flush_policy: determines how often the adders wait for their items to
+                be written to the replay tables, e.g. every K items, after a byte budget
+                or after a time interval. Defaults to flushing after every item.
+            extras_storage_policies: how each extras field (e.g. core_states,
+                network_int_keys) is stored in the replay items, see
+                ExtrasStoragePolicy. Fields that are not listed are stored for every
+                step. Defaults to None, which stores every field for every step.
+                DEFAULT_EXTRAS_STORAGE_POLICIES stores the recurrent states only at the
+                start of each sequence and the network keys once per item.
+            max_replay_bytes: optional memory budget of the replay tables in bytes. The
+                size of an item is estimated from the table signature and the budget is
+                shared equally by the tables, so each table holds at most max_queue_size
+                items and at most as many as fit in its share of the budget. Defaults to
+                None, which only limits the number of items.
+            column_compression: how each column of the adders, e.g. observations, is
+                stored in replay, see ColumnCompression. This sets the chunk length of
+                each column and can store image observations as uint8, they are cast
+                back to float32 when sampled. Defaults to None.
+            stacked_agents: the stacked agent layout, see the MADQN system, is not
+                supported by MAPPO yet, so this must be False. It is only implemented
+                by MADQNStackedTrainer.
         """
         # minibatch size defaults to train batch size
         if minibatch_size:
@@ -378,6 +443,11 @@ class MAPPO:
         self._network_factory = network_factory
         self._logger_factory = logger_factory
         self._environment_spec = environment_spec
+        if trainers_per_node < 1:
+            raise ValueError(
+                f"trainers_per_node should be positive, got {trainers_per_node}."
+            )
+        self._trainers_per_node = trainers_per_node
         self._num_exectors = num_executors
         self._checkpoint_subpath = checkpoint_subpath
         self._checkpoint = checkpoint
@@ -393,7 +463,7 @@ class MAPPO:
 
         int_spec = specs.DiscreteArray(len(unique_net_keys))
         agents = environment_spec.get_agent_ids()
-        net_spec = {"network_keys": {agent: int_spec for agent in agents}}
+        net_spec = {"network_int_keys": {agent: int_spec for agent in agents}}
         extra_specs.update(net_spec)
         self._evaluator_interval = evaluator_interval
         self._builder = builder.MAPPOBuilder(
@@ -407,6 +477,10 @@ class MAPPO:
                 entropy_cost=entropy_cost,
                 baseline_cost=baseline_cost,
                 max_gradient_norm=max_gradient_norm,
+                steps_per_call=steps_per_call,
+                mixed_precision=mixed_precision,
+                replay_dataset=replay_dataset,
+                profiling=profiling,
                 max_queue_size=self._max_queue_size,
                 batch_size=batch_size,
                 minibatch_size=self._minibatch_size,
@@ -428,6 +502,12 @@ class MAPPO:
                 termination_condition=termination_condition,
                 evaluator_interval=evaluator_interval,
                 learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+                extras_storage_policies=extras_storage_policies,
+                max_replay_bytes=max_replay_bytes,
+                column_compression=column_compression,
+                stacked_agents=stacked_agents,
+                adder_flush_policy=adder_flush_policy,
+                shared_memory_variables=shared_memory_variables,
                 normalize_advantage=normalize_advantage,
             ),
             trainer_fn=trainer_fn,
@@ -610,6 +690,7 @@ class MAPPO:
         trainer_id: str,
         replay: reverb.Client,
         variable_source: MavaVariableSource,
+        networks: Optional[Dict[str, Dict[str, snt.Module]]] = None,
     ) -> mava.core.Trainer:
         """System trainer
         Args:
@@ -617,6 +698,8 @@ class MAPPO:
             replay: replay data table to pull data from.
             variable_source: variable server for updating
                 network variables.
+            networks: networks of the trainer, see co_hosted_trainers. Defaults to
+                None, which creates the system.
         Returns:
             system trainer.
         """
@@ -630,7 +713,8 @@ class MAPPO:
         )
 
         # Create the system
-        _, networks = self.create_system()
+        if networks is None:
+            _, networks = self.create_system()
 
         dataset = self._builder.make_dataset_iterator(replay, trainer_id)
 
@@ -643,6 +727,42 @@ class MAPPO:
             variable_source=variable_source,
         )
 
+    def co_hosted_trainers(
+        self,
+        trainer_ids: List[str],
+        replay: reverb.Client,
+        variable_source: MavaVariableSource,
+    ) -> mava.core.Trainer:
+        """Several system trainers hosted in one process.
+
+        Args:
+            trainer_ids: Ids of the trainers being created.
+            replay: replay data table to pull data from.
+            variable_source: variable server for updating
+                network variables.
+
+        Returns:
+            co-hosted trainers, stepped by a scheduler.
+        """
+        # Create the networks once for the trainers of the node.
+        networks = share_networks(
+            {
+                trainer_id: [
+                    *self._trainer_networks[trainer_id],
+                    *self._table_network_config[trainer_id],
+                ]
+                for trainer_id in trainer_ids
+            },
+            lambda: self.create_system()[1],
+        )
+        trainers = {
+            trainer_id: self.trainer(
+                trainer_id, replay, variable_source, networks[trainer_id]
+            )
+            for trainer_id in trainer_ids
+        }
+        return CoHostedTrainers(trainers, replay)
+
     def build(self, name: str = "maddpg") -> Any:
         """Build the distributed system as a graph program.
         Args:
@@ -660,10 +780,25 @@ class MAPPO:
 
         with program.group("trainer"):
             # Add executors which pull round-robin from our variable sources.
-            for trainer_id in self._trainer_networks.keys():
-                program.add_node(
-                    lp.CourierNode(self.trainer, trainer_id, replay, variable_server)
-                )
+            trainer_ids = list(self._trainer_networks.keys())
+            if self._trainers_per_node == 1:
+                for trainer_id in trainer_ids:
+                    program.add_node(
+                        lp.CourierNode(
+                            self.trainer, trainer_id, replay, variable_server
+                        )
+                    )
+            else:
+                # Co-host the trainers in groups of trainers_per_node.
+                for i in range(0, len(trainer_ids), self._trainers_per_node):
+                    program.add_node(
+                        lp.CourierNode(
+                            self.co_hosted_trainers,
+                            trainer_ids[i : i + self._trainers_per_node],
+                            replay,
+                            variable_server,
+                        )
+                    )
 
         with program.group("evaluator"):
             program.add_node(lp.CourierNode(self.evaluator, variable_server))
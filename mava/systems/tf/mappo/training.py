@@ -17,7 +17,7 @@
 
 import copy
 import time
-from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import sonnet as snt
@@ -28,8 +28,10 @@ from acme.tf import utils as tf2_utils
 from acme.utils import counting, loggers
 
 import mava
+from mava.components.tf.networks import MixedPrecisionNetwork
 from mava.systems.tf.variable_utils import VariableClient
-from mava.types import OLT, NestedArray
+from mava.types import OLT
+from mava.utils import profiling_utils
 from mava.utils import training_utils as train_utils
 from mava.utils.sort_utils import sort_str_num
 
@@ -68,6 +70,7 @@ class MAPPOTrainer(mava.Trainer):
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
         normalize_advantage: bool = False,
+        mixed_precision: bool = False,
     ):
         """Initialise MAPPO trainer
 
@@ -119,6 +122,11 @@ class MAPPOTrainer(mava.Trainer):
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
             normalize_advantage: whether to normalize the advantage.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
         """
 
         # Store agents.
@@ -138,6 +146,16 @@ class MAPPOTrainer(mava.Trainer):
 
         # Store networks.
         self._observation_networks = observation_networks
+
+        # Compute the online observation networks in bfloat16. Networks without
+        # variables, e.g. batch_concat, are left as is to keep the observations
+        # in float32.
+        if mixed_precision:
+            self._observation_networks = {
+                k: MixedPrecisionNetwork(v) if v.variables else v
+                for k, v in self._observation_networks.items()
+            }
+
         self._policy_networks = policy_networks
         self._critic_networks = critic_networks
 
@@ -188,6 +206,12 @@ class MAPPOTrainer(mava.Trainer):
 
         # Dataset iterator
         self._iterator = dataset
+        # Seconds spent waiting for the dataset, see train_utils.timed_next.
+        self._input_stall_time = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+        # Phases of the steps, see profiling_utils.PhaseTimer.
+        self._phase_timer = profiling_utils.PhaseTimer(
+            ["sample", "epochs_update", "forward", "backward"]
+        )
 
         # Set up gradient clipping.
         if max_gradient_norm is not None:
@@ -228,6 +252,31 @@ class MAPPOTrainer(mava.Trainer):
 
         return observation_feed
 
+    def _get_joint_critic_feed(
+        self,
+        observations_trans: Dict[str, np.ndarray],
+        extras: Dict[str, np.ndarray],
+    ) -> Optional[tf.Tensor]:
+        """Get the critic feed shared by all the agents, if any.
+
+        Centralised and state-based critics are fed the joint observations or
+        the environment state, which are the same for every agent. The feed is
+        then built once per batch, and the agents that share a critic network
+        share its value predictions.
+
+        Args:
+            observations_trans: transformed (e.g. using
+                observation network) raw agent observation.
+            extras: Extra information. E.g. the environment state can be included
+            here.
+
+        Returns:
+            the shared critic network feed, or None if the feed depends on the
+                agent, see _get_critic_feed.
+        """
+        # Decentralised based
+        return None
+
     def _transform_observations(
         self, observations: Dict[str, OLT]
     ) -> Dict[str, np.ndarray]:
@@ -254,17 +303,89 @@ class MAPPOTrainer(mava.Trainer):
             )
         return observation_trans
 
+    def _minibatch_updates(
+        self,
+        data: Any,
+        permutation: tf.Tensor,
+        minibatch_size: int,
+        first_minibatch: int,
+        losses: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run the minibatch updates of an epoch.
+
+        Args:
+            data: batch of sequences sampled from the replay table.
+            permutation: random permutation of the batch, which is split into
+                minibatches of minibatch_size items. The last minibatch has the
+                remaining items if the batch size is not divisible by the
+                minibatch size.
+            minibatch_size: number of items of the minibatches.
+            first_minibatch: index of the first minibatch to run.
+            losses: losses per agent summed over the previous minibatches.
+
+        Returns:
+            losses per agent, summed over the previous and the new minibatches.
+        """
+        batch_size = permutation.shape[0]
+        num_minibatches, last_minibatch_size = divmod(batch_size, minibatch_size)
+
+        def update(
+            losses: Dict[str, Dict[str, Any]], indices: tf.Tensor
+        ) -> Dict[str, Dict[str, Any]]:
+            minibatch_data = tree.map_structure(lambda x: tf.gather(x, indices), data)
+            # Logging sum of losses
+            return tree.map_structure(
+                tf.add, losses, self.forward_backward(minibatch_data)
+            )
+
+        minibatch_indices = tf.reshape(
+            permutation[: num_minibatches * minibatch_size],
+            [num_minibatches, minibatch_size],
+        )
+        for minibatch in tf.range(first_minibatch, num_minibatches):
+            losses = update(losses, minibatch_indices[minibatch])
+        if last_minibatch_size:
+            losses = update(losses, permutation[num_minibatches * minibatch_size :])
+        return losses
+
     @tf.function
-    def _minibatch_update(self, minibatch_data: Any) -> Dict:
-        """Minibatch step.
+    def _epochs_update(self, data: Any) -> Dict[str, Dict[str, Any]]:
+        """Run the minibatch updates of every epoch on a batch of data.
+
+        Every epoch shuffles the batch with a random permutation and splits it
+        into minibatches that are gathered in-graph, so the epochs and
+        minibatches are loops of a single compiled function. The first
+        minibatch runs before the loops, so that the optimizers create their
+        variables, e.g. the moments of Adam, on their first update outside of
+        the in-graph loops.
 
         Args:
-            minibatch_data : minibatch of data.
+            data: batch of sequences sampled from the replay table.
 
         Returns:
-            loss per agent for minibatch.
+            losses per agent, summed over the minibatches of all the epochs.
         """
-        return self.forward_backward(minibatch_data)
+        batch_size = tree.flatten(data)[0].shape[0]
+        minibatch_size = min(self._minibatch_size or batch_size, batch_size)
+
+        permutation = tf.random.shuffle(tf.range(batch_size))
+        losses = self.forward_backward(
+            tree.map_structure(
+                lambda x: tf.gather(x, permutation[:minibatch_size]), data
+            )
+        )
+        losses = self._minibatch_updates(
+            data, permutation, minibatch_size, first_minibatch=1, losses=losses
+        )
+        for _ in tf.range(self._num_epochs - 1):
+            losses = self._minibatch_updates(
+                data,
+                tf.random.shuffle(tf.range(batch_size)),
+                minibatch_size,
+                first_minibatch=0,
+                losses=losses,
+            )
+        return losses
 
     def _step(
         self,
@@ -274,33 +395,13 @@ class MAPPOTrainer(mava.Trainer):
         Returns:
             Dict[str, Dict[str, Any]]: losses
         """
-
-        losses: Dict[str, NestedArray] = {
-            agent: {"critic_loss": tf.zeros(()), "policy_loss": tf.zeros(())}
-            for agent in self._agents
-        }
         # Get data from replay.
-        inputs = next(self._iterator)
-        batch_size = inputs.data.observations[self._agents[0]].observation.shape[0]
-        dataset = tf.data.Dataset.from_tensor_slices(inputs.data)
-        for _ in range(self._num_epochs):
-            # Split for possible minibatches
-            dataset = dataset.shuffle(batch_size)
-            minibatch_dataset = dataset.batch(self._minibatch_size)
-            for minibatch_data in minibatch_dataset:
-                loss = self._minibatch_update(minibatch_data)
-
-                # Logging sum of losses
-                for agent in self._agents:
-                    losses[agent] = {
-                        "critic_loss": losses[agent]["critic_loss"]
-                        + loss[agent]["critic_loss"],
-                        "policy_loss": losses[agent]["policy_loss"]
-                        + loss[agent]["policy_loss"],
-                    }
+        with self._phase_timer.phase("sample"):
+            inputs = train_utils.timed_next(self._iterator, self._input_stall_time)
 
         # Log losses per agent
-        return losses
+        with self._phase_timer.phase("epochs_update"):
+            return self._epochs_update(inputs.data)
 
     def forward_backward(self, inputs: Any) -> Dict[str, Dict[str, Any]]:
         """Do a single forward and backward pass
@@ -311,13 +412,54 @@ class MAPPOTrainer(mava.Trainer):
         Returns:
             Dict[str, Dict[str, Any]]: losses
         """
-        self._forward_pass(inputs)
-        self._backward_pass()
+        with self._phase_timer.phase("forward"):
+            self._forward_pass(inputs)
+        with self._phase_timer.phase("backward"):
+            self._backward_pass()
         # Log losses per agent
         return train_utils.map_losses_per_agent_ac(
             self.critic_losses, self.policy_losses
         )
 
+    def _unroll_policies(
+        self,
+        observations_trans: Dict[str, tf.Tensor],
+        actions: Dict[str, Dict[str, tf.Tensor]],
+        core_states: Dict[str, Any],
+    ) -> Dict[str, Tuple[tf.Tensor, tf.Tensor]]:
+        """Unroll the recurrent policies over the sequences of the agents.
+
+        Args:
+            observations_trans: transformed time major observations per agent.
+            actions: actions and behaviour log probabilities per agent.
+            core_states: initial policy core states per agent.
+
+        Returns:
+            log probabilities of the actions and policy entropies per agent.
+        """
+
+        def log_prob_core(policy_network: snt.RNNCore) -> Callable:
+            def core(inputs: Tuple[tf.Tensor, tf.Tensor], state: Any) -> Tuple:
+                observation, action = inputs
+                policy, state = policy_network(observation, state)
+                return (policy.log_prob(action), policy.entropy()), state
+
+            return core
+
+        policy_unrolls, _ = train_utils.unroll_agents(
+            {
+                agent_key: log_prob_core(policy_network)
+                for agent_key, policy_network in self._policy_networks.items()
+            },
+            self._agent_net_keys,
+            {
+                agent: (observations_trans[agent], actions[agent]["actions"])
+                for agent in self._agents
+            },
+            {agent: core_states[agent][0] for agent in self._agents},
+        )
+        return policy_unrolls
+
     # Forward pass that calculates loss.
     def _forward_pass(self, inputs: Any) -> None:
         """Trainer forward pass
@@ -346,6 +488,13 @@ class MAPPOTrainer(mava.Trainer):
         with tf.GradientTape(persistent=True) as tape:
             # transform observation using observation networks
             observations_trans = self._transform_observations(observations)
+            if "core_states" in extras:
+                # Unroll the current policies over the observations.
+                policy_unrolls = self._unroll_policies(
+                    observations_trans, actions, core_states
+                )
+            joint_feed = self._get_joint_critic_feed(observations_trans, extras)
+            value_preds: Dict[str, tf.Tensor] = {}
             for agent in self._agents:
                 action, reward, termination, behaviour_log_prob, actor_observation = (
                     actions[agent]["actions"],
@@ -358,9 +507,6 @@ class MAPPOTrainer(mava.Trainer):
                 loss_mask = tf.concat(
                     (tf.ones((1, termination.shape[1])), termination[:-1]), 0
                 )
-                critic_observation = self._get_critic_feed(
-                    observations_trans, extras, agent
-                )
 
                 # Get agent network
                 agent_key = self._agent_net_keys[agent]
@@ -369,22 +515,8 @@ class MAPPOTrainer(mava.Trainer):
                 dims = actor_observation.shape[:2]
 
                 # Do policy forward pass.
-                policy_entropy = []
                 if "core_states" in extras:
-                    # Unroll current policy over actor_observation.
-                    agent_core_state = core_states[agent][0]
-
-                    # Manual perform unroll
-                    action_prob = []
-                    for t in range(len(actor_observation)):
-                        outputs, agent_core_state = policy_network(
-                            actor_observation[t], agent_core_state
-                        )
-                        action_prob.append(outputs.log_prob(action[t]))
-                        policy_entropy.append(outputs.entropy())
-
-                    action_prob = tf.stack(action_prob, axis=0)
-                    policy_entropy = tf.stack(policy_entropy, axis=0)
+                    action_prob, policy_entropy = policy_unrolls[agent]
                 else:
                     # Reshape inputs.
                     actor_observation = snt.merge_leading_dims(
@@ -405,13 +537,23 @@ class MAPPOTrainer(mava.Trainer):
 
                     policy_entropy = policy.entropy()
 
-                critic_observation = snt.merge_leading_dims(
-                    critic_observation, num_dims=2
-                )
-                value_pred = critic_network(critic_observation)
-
-                # Compute importance sampling weights: current policy / behavior policy.
-                value_pred = tf.reshape(value_pred, dims, name="value")
+                # The agents that share a network and a joint feed share the
+                # value predictions.
+                value_key = agent if joint_feed is None else agent_key
+                if value_key not in value_preds:
+                    if joint_feed is None:
+                        critic_observation = self._get_critic_feed(
+                            observations_trans, extras, agent
+                        )
+                    else:
+                        critic_observation = joint_feed
+                    critic_observation = snt.merge_leading_dims(
+                        critic_observation, num_dims=2
+                    )
+                    value_preds[value_key] = tf.reshape(
+                        critic_network(critic_observation), dims, name="value"
+                    )
+                value_pred = value_preds[value_key]
 
                 # Exclude last step - it was used in bootstraping.
                 bootstrap_value = value_pred[-1]
@@ -647,6 +789,7 @@ class CentralisedMAPPOTrainer(MAPPOTrainer):
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
         normalize_advantage: bool = False,
+        mixed_precision: bool = False,
     ):
         """Centralised MAPPO trainer.
 
@@ -690,6 +833,11 @@ class CentralisedMAPPOTrainer(MAPPOTrainer):
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
             normalize_advantage: whether to normalize the advantage.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
         """
 
         super().__init__(
@@ -715,6 +863,7 @@ class CentralisedMAPPOTrainer(MAPPOTrainer):
             logger=logger,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
             normalize_advantage=normalize_advantage,
+            mixed_precision=mixed_precision,
         )
 
     def _get_critic_feed(
@@ -722,6 +871,14 @@ class CentralisedMAPPOTrainer(MAPPOTrainer):
         observations_trans: Dict[str, np.ndarray],
         extras: Dict[str, np.ndarray],
         agent: str,
+    ) -> tf.Tensor:
+        # The feed is the same for every agent.
+        return self._get_joint_critic_feed(observations_trans, extras)
+
+    def _get_joint_critic_feed(
+        self,
+        observations_trans: Dict[str, np.ndarray],
+        extras: Dict[str, np.ndarray],
     ) -> tf.Tensor:
         # Centralised based
 
@@ -759,6 +916,7 @@ class StateBasedMAPPOTrainer(MAPPOTrainer):
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
         normalize_advantage: bool = False,
+        mixed_precision: bool = False,
     ):
 
         super().__init__(
@@ -784,6 +942,7 @@ class StateBasedMAPPOTrainer(MAPPOTrainer):
             logger=logger,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
             normalize_advantage=normalize_advantage,
+            mixed_precision=mixed_precision,
         )
 
     def _get_critic_feed(
@@ -797,3 +956,14 @@ class StateBasedMAPPOTrainer(MAPPOTrainer):
             return extras["env_states"][agent]
         else:
             return extras["env_states"]
+
+    def _get_joint_critic_feed(
+        self,
+        observations_trans: Dict[str, np.ndarray],
+        extras: Dict[str, np.ndarray],
+    ) -> Optional[tf.Tensor]:
+        # State based, unless every agent has its own state.
+        if type(extras["env_states"]) == dict:  # type: ignore
+            return None
+        else:
+            return extras["env_states"]
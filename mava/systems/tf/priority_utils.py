@@ -0,0 +1,176 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prioritized experience replay utilities for TensorFlow 2."""
+
+import dataclasses
+from concurrent import futures
+from typing import Any, Dict, Optional
+
+import numpy as np
+import reverb
+import tensorflow as tf
+
+from mava.adders.reverb import PriorityFn
+
+
+@dataclasses.dataclass
+class PrioritizedReplay:
+    """Configuration of prioritized experience replay.
+
+    Items are sampled with a probability proportional to their priority to the
+    power of `priority_exponent`. The executors insert new items with an
+    initial priority computed by the adder, after which the trainers replace it
+    by the magnitude of the TD error of the item. The trainers correct for the
+    non-uniform sampling by weighting their losses with importance sampling
+    weights.
+
+    Args:
+        priority_exponent: exponent applied to the priorities when sampling.
+            Zero samples uniformly.
+        importance_sampling_exponent: exponent of the importance sampling
+            weights. Zero applies no correction, one fully corrects for the
+            prioritized sampling.
+        initial_priority: priority of new items, used when `initial_priority_fn`
+            is not set. It should be high compared to the TD errors, so that new
+            items are sampled at least once.
+        initial_priority_fn: optional function that computes the initial
+            priority of an item in the adder, from the numpy data of the item.
+        update_period: number of trainer steps whose priority updates are sent
+            to the replay table in a single call.
+        min_priority: lower bound on the priorities set by the trainers, so
+            that every item can still be sampled.
+    """
+
+    priority_exponent: float = 0.6
+    importance_sampling_exponent: float = 0.4
+    initial_priority: float = 1.0
+    initial_priority_fn: Optional[PriorityFn] = None
+    update_period: int = 10
+    min_priority: float = 1e-6
+
+
+class PriorityClient:
+    """A client that updates the priorities of the items in a replay table.
+
+    The trainers compute new priorities for every sampled batch. Sending them
+    with one `mutate_priorities` call per step would make the replay server a
+    bottleneck, so updates are buffered and sent in a single call every
+    `update_period` steps from a background thread. If the previous call has
+    not finished yet the updates keep being buffered. When an item is updated
+    more than once before its update is sent, only its latest priority is kept.
+    """
+
+    def __init__(
+        self,
+        client: reverb.Client,
+        table: str,
+        importance_sampling_exponent: float = 0.4,
+        update_period: int = 10,
+        min_priority: float = 1e-6,
+    ):
+        """Initialise the priority client.
+
+        Args:
+            client: client of the replay server, or any client which implements
+                `mutate_priorities`.
+            table: name of the table the items were sampled from.
+            importance_sampling_exponent: exponent of the importance sampling
+                weights applied by the trainer.
+            update_period: number of calls to `update` between priority updates
+                sent to the table.
+            min_priority: lower bound on the priorities sent to the table.
+        """
+        self._client = client
+        self._table = table
+        self.importance_sampling_exponent = importance_sampling_exponent
+        self._update_period = update_period
+        self._min_priority = min_priority
+
+        self._buffer: Dict[int, float] = {}
+        self._update_call_counter = 0
+
+        # Create a single background thread to send the updates without blocking
+        # the trainer.
+        self._executor = futures.ThreadPoolExecutor(max_workers=1)
+        self._future: Optional[futures.Future] = None
+
+    @classmethod
+    def from_config(
+        cls, client: reverb.Client, table: str, config: PrioritizedReplay
+    ) -> "PriorityClient":
+        """Create a priority client from a prioritized replay configuration.
+
+        Args:
+            client: client of the replay server.
+            table: name of the table the items were sampled from.
+            config: prioritized replay configuration.
+
+        Returns:
+            priority client.
+        """
+        return cls(
+            client,
+            table,
+            importance_sampling_exponent=config.importance_sampling_exponent,
+            update_period=config.update_period,
+            min_priority=config.min_priority,
+        )
+
+    def update(self, keys: tf.Tensor, priorities: tf.Tensor) -> None:
+        """Buffer new priorities of sampled items.
+
+        This can be called from inside a tf.function, the updates are handed
+        over to python without blocking on the replay server.
+
+        Args:
+            keys: keys of the sampled items, as found in `ReplaySample.info.key`.
+            priorities: new priority of each item.
+        """
+        tf.py_function(self._add, [keys, priorities], [])
+
+    def _add(self, keys: Any, priorities: Any) -> None:
+        """Add updates to the buffer and send them once the period is reached."""
+        priorities = np.maximum(np.asarray(priorities), self._min_priority)
+        self._buffer.update(zip(np.asarray(keys).tolist(), priorities.tolist()))
+        self._update_call_counter += 1
+        if self._update_call_counter >= self._update_period:
+            self._send_async()
+
+    def _send_async(self) -> None:
+        """Send the buffered updates unless a previous call is still running."""
+        if self._future is not None:
+            if not self._future.done():
+                return
+            # Raise any error of the previous call.
+            self._future.result()
+            self._future = None
+
+        if self._buffer:
+            updates, self._buffer = self._buffer, {}
+            self._future = self._executor.submit(
+                self._client.mutate_priorities, self._table, updates
+            )
+        self._update_call_counter = 0
+
+    def flush(self) -> None:
+        """Send all buffered updates and wait until they are applied."""
+        if self._future is not None:
+            self._future.result()
+            self._future = None
+        if self._buffer:
+            updates, self._buffer = self._buffer, {}
+            self._client.mutate_priorities(self._table, updates)
+        self._update_call_counter = 0
@@ -0,0 +1,258 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared-memory variable store for nodes that run on the same host."""
+
+import hashlib
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+
+    _has_shared_memory = True
+except ImportError:
+    # Shared memory is only available from Python 3.8.
+    _has_shared_memory = False
+
+# The header holds a single seqlock version counter. It is padded to 64 bytes
+# so that the variable data starts on its own cache line.
+_HEADER_BYTES = 64
+_ALIGNMENT = 8
+
+
+def make_shared_memory_prefix() -> str:
+    """Create a unique prefix for the shared-memory segments of one program.
+
+    Returns:
+        a prefix which is short enough to be used in POSIX shared-memory names.
+    """
+    return f"mava_{uuid.uuid4().hex[:8]}"
+
+
+def _segment_name(prefix: str, key: str) -> str:
+    """Shared-memory segment name used for a variable key."""
+    return f"{prefix}_{hashlib.md5(key.encode()).hexdigest()[:12]}"
+
+
+def _aligned(num_bytes: int) -> int:
+    """Round a number of bytes up to the segment alignment."""
+    return -(-num_bytes // _ALIGNMENT) * _ALIGNMENT
+
+
+class SharedMemoryVariables:
+    """Stores variables in named shared-memory segments.
+
+    Every variable key is stored in its own segment. The segment starts with a
+    version counter that is used as a seqlock: the writer makes the counter odd
+    while it copies the new values in and even again once it is done. Readers
+    retry whenever they see an odd counter or the counter changed during their
+    copy, so they never observe a half-written set of variables. The writer
+    (the variable source) creates the segments. Readers (the variable clients)
+    attach to them and fall back to RPC for any key that is not available on
+    their host.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        variables: Dict[str, Any],
+        create: bool = False,
+        max_read_retries: int = 100,
+    ) -> None:
+        """Initialise the shared-memory variables.
+
+        Args:
+            prefix: prefix shared by all segments of a program.
+            variables: variables (or nested structures of variables) whose
+                shapes and dtypes define the layout of each segment.
+            create: whether to create the segments (writer) or to attach to
+                existing segments when requested (reader).
+            max_read_retries: number of times a read is retried when it
+                overlaps with a write, before giving up.
+        """
+        if not _has_shared_memory:
+            raise ImportError(
+                "Shared-memory variables require multiprocessing.shared_memory "
+                "(Python 3.8+)."
+            )
+        self._prefix = prefix
+        self._variables = variables
+        self._max_read_retries = max_read_retries
+        self._segments: Dict[str, "shared_memory.SharedMemory"] = {}
+        self._layouts: Dict[str, List[Tuple[int, Tuple[int, ...], np.dtype]]] = {}
+        self._unavailable: Set[str] = set()
+        self._owner = create
+        self._write_lock = threading.Lock()
+
+        for key, value in variables.items():
+            layout = self._make_layout(value)
+            if layout is not None:
+                self._layouts[key] = layout
+
+        if create:
+            for key in self._layouts.keys():
+                self._create_segment(key)
+
+    @staticmethod
+    def _make_layout(
+        value: Any,
+    ) -> Optional[List[Tuple[int, Tuple[int, ...], np.dtype]]]:
+        """Compute the (offset, shape, dtype) of every leaf of a variable."""
+        leaves = tf.nest.flatten(value)
+        if not leaves:
+            # E.g. an observation network without variables.
+            return None
+        layout = []
+        offset = _HEADER_BYTES
+        for leaf in leaves:
+            dtype = np.dtype(tf.as_dtype(leaf.dtype).as_numpy_dtype)
+            shape = tuple(leaf.shape)
+            layout.append((offset, shape, dtype))
+            offset += _aligned(int(np.prod(shape, dtype=np.int64)) * dtype.itemsize)
+        return layout
+
+    def _segment_size(self, key: str) -> int:
+        """Number of bytes needed to store a variable key."""
+        offset, shape, dtype = self._layouts[key][-1]
+        return offset + _aligned(int(np.prod(shape, dtype=np.int64)) * dtype.itemsize)
+
+    def _create_segment(self, key: str) -> None:
+        """Create (or reuse, e.g. after a restart) the segment of a key."""
+        name = _segment_name(self._prefix, key)
+        size = self._segment_size(key)
+        try:
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            segment = shared_memory.SharedMemory(name=name)
+            if segment.size < size:
+                segment.close()
+                segment.unlink()
+                segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._version(segment)[0] = 0
+        self._segments[key] = segment
+
+    @staticmethod
+    def _version(segment: "shared_memory.SharedMemory") -> np.ndarray:
+        """View of the seqlock version counter of a segment."""
+        return np.ndarray((1,), dtype=np.uint64, buffer=segment.buf)
+
+    def attach(self, keys: Sequence[str]) -> None:
+        """Attach to the segments of the given keys if they exist on this host.
+
+        Keys that can not be attached are remembered and not tried again, so
+        remote nodes only pay for a single failed lookup per key.
+
+        Args:
+            keys: variable keys to attach to.
+        """
+        for key in keys:
+            if (
+                key in self._segments
+                or key in self._unavailable
+                or key not in self._layouts
+            ):
+                continue
+            try:
+                segment = shared_memory.SharedMemory(
+                    name=_segment_name(self._prefix, key)
+                )
+            except FileNotFoundError:
+                self._unavailable.add(key)
+                continue
+
+            # Attaching registers the segment with this process's resource
+            # tracker, which would unlink it when the reader exits. Only the
+            # variable source owns the segments.
+            resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore
+
+            if segment.size < self._segment_size(key):
+                segment.close()
+                self._unavailable.add(key)
+                continue
+            self._segments[key] = segment
+
+    def write(self, key: str, value: Any) -> None:
+        """Publish new values for a variable key.
+
+        Args:
+            key: variable key to write.
+            value: numpy values with the same structure as the variable.
+        """
+        if key not in self._segments:
+            return
+        segment = self._segments[key]
+        version = self._version(segment)
+        with self._write_lock:
+            version[0] += 1
+            for (offset, shape, dtype), leaf in zip(
+                self._layouts[key], tf.nest.flatten(value)
+            ):
+                np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)[
+                    ...
+                ] = leaf
+            version[0] += 1
+
+    def read(self, key: str) -> Optional[Any]:
+        """Read the latest consistent values of a variable key.
+
+        Args:
+            key: variable key to read.
+
+        Returns:
+            the values in the same structure as the variable, or None if the key
+            is not available in shared memory or no consistent copy could be
+            read.
+        """
+        if key not in self._segments:
+            return None
+        segment = self._segments[key]
+        version = self._version(segment)
+        for _ in range(self._max_read_retries):
+            start_version = int(version[0])
+            if start_version % 2 == 1:
+                continue
+            leaves = [
+                np.array(
+                    np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+                )
+                for offset, shape, dtype in self._layouts[key]
+            ]
+            if int(version[0]) == start_version:
+                # Return scalars as numpy scalars, like the variable source does.
+                values: List[Any] = [
+                    leaf[()] if leaf.ndim == 0 else leaf for leaf in leaves
+                ]
+                return tf.nest.pack_sequence_as(self._variables[key], values)
+        return None
+
+    def has_key(self, key: str) -> bool:
+        """Whether a variable key is available in shared memory."""
+        return key in self._segments
+
+    def close(self) -> None:
+        """Detach from all segments and, for the owner, remove them."""
+        for segment in self._segments.values():
+            segment.close()
+            if self._owner:
+                try:
+                    segment.unlink()
+                except FileNotFoundError:
+                    pass
+        self._segments = {}
@@ -0,0 +1,172 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Scheduling of several trainers hosted in one process."""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import reverb
+from reverb import reverb_types
+
+from mava import core
+
+
+def available_samples(table_info: reverb_types.TableInfo) -> float:
+    """Number of items the rate limiter of a table allows to sample.
+
+    Args:
+        table_info: info of the table, from `reverb.Client.server_info`.
+
+    Returns:
+        number of items that can be sampled without blocking.
+    """
+    rate_limiter_info = table_info.rate_limiter_info
+    if table_info.current_size < rate_limiter_info.min_size_to_sample:
+        return 0.0
+    diff = (
+        rate_limiter_info.insert_stats.completed * rate_limiter_info.samples_per_insert
+        - rate_limiter_info.sample_stats.completed
+    )
+    return max(diff - rate_limiter_info.min_diff, 0.0)
+
+
+def share_networks(
+    trainer_net_keys: Dict[str, Sequence[str]],
+    create_networks: Callable[[], Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """Networks of trainers hosted in one process.
+
+    The networks are created once and every trainer is given the networks of
+    its network keys. A trainer updates all the networks it is given, so two
+    trainers never share a network: if the keys of a trainer overlap with the
+    keys already given to other trainers, another set of networks is created.
+
+    Args:
+        trainer_net_keys: keys of the networks used by each trainer, keyed by
+            trainer id.
+        create_networks: function that creates the networks of the system,
+            keyed by network type and then by network key.
+
+    Returns:
+        networks of each trainer, keyed by trainer id, network type and network
+            key. The entries that are not keyed by network key are kept as is.
+    """
+    network_sets: List[Tuple[Dict[str, Any], Set[str]]] = []
+    trainer_networks: Dict[str, Dict[str, Any]] = {}
+    for trainer_id, net_keys in trainer_net_keys.items():
+        keys = set(net_keys)
+        unused = [
+            (networks, used_keys)
+            for networks, used_keys in network_sets
+            if not keys & used_keys
+        ]
+        if unused:
+            networks, used_keys = unused[0]
+        else:
+            networks, used_keys = create_networks(), set()
+            network_sets.append((networks, used_keys))
+        used_keys.update(keys)
+        trainer_networks[trainer_id] = {
+            net_type: {key: net for key, net in nets.items() if key in keys}
+            if isinstance(nets, dict)
+            else nets
+            for net_type, nets in networks.items()
+        }
+    return trainer_networks
+
+
+class CoHostedTrainers(core.Trainer):
+    """Several trainers hosted in one process.
+
+    The trainers share the process, the TensorFlow runtime and the replay
+    client, while each keeps its own optimizers and table iterator. The networks
+    are created once for the trainers whose network keys do not overlap, see
+    share_networks.
+    Every step, the scheduler steps the trainer whose table has the most
+    samples available, so trainers waiting for data do not block the others.
+    Ties are broken round robin. The tables are named after the trainer ids.
+    """
+
+    def __init__(
+        self,
+        trainers: Dict[str, core.Trainer],
+        replay_client: reverb.Client,
+        poll_period: float = 0.01,
+    ):
+        """Initialise the co-hosted trainers.
+
+        Args:
+            trainers: trainers keyed by trainer id, which is also the name of the
+                table they sample from.
+            replay_client: client of the replay server.
+            poll_period: seconds to wait before checking the tables again when
+                none of them has samples available.
+        """
+        self._trainers = trainers
+        self._trainer_ids: List[str] = list(trainers.keys())
+        self._replay_client = replay_client
+        self._poll_period = poll_period
+        self._next_trainer = 0
+        self._current_trainer: Optional[core.Trainer] = None
+
+    def _select_trainer(self) -> str:
+        """Wait until a table has samples available and select its trainer.
+
+        Returns:
+            id of the trainer to step.
+        """
+        while True:
+            table_infos = self._replay_client.server_info()
+            available = [
+                available_samples(table_infos[trainer_id])
+                for trainer_id in self._trainer_ids
+            ]
+            # Start the search after the last trainer stepped, to break ties.
+            num_trainers = len(self._trainer_ids)
+            order = [
+                (self._next_trainer + i) % num_trainers for i in range(num_trainers)
+            ]
+            index = max(order, key=lambda i: available[i])
+            if available[index] > 0:
+                self._next_trainer = (index + 1) % num_trainers
+                return self._trainer_ids[index]
+            time.sleep(self._poll_period)
+
+    def step(self) -> None:
+        """Step the trainer whose table has the most samples available."""
+        self._current_trainer = self._trainers[self._select_trainer()]
+        self._current_trainer.step()
+
+    def after_trainer_step(self) -> None:
+        """Run the after step function of the trainer that was stepped last."""
+        if self._current_trainer is not None:
+            self._current_trainer.after_trainer_step()
+
+    def get_variables(self, names: Sequence[str]) -> Dict[str, Dict[str, np.ndarray]]:
+        """Get the variables of the networks of all the trainers.
+
+        Args:
+            names: network types to get, e.g. values.
+
+        Returns:
+            variables of the networks, keyed by network type and network key.
+        """
+        variables: Dict[str, Dict[str, np.ndarray]] = {}
+        for trainer in self._trainers.values():
+            for name, values in (trainer.get_variables(names) or {}).items():
+                variables.setdefault(name, {}).update(values)
+        return variables
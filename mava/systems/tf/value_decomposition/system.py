@@ -14,7 +14,8 @@
 # limitations under the License.
 
 """Value Decomposition system implementation."""
-from typing import Callable, Dict, Mapping, Optional, Type, Union
+import copy
+from typing import Any, Callable, Dict, Mapping, Optional, Type, Union
 
 import dm_env
 import reverb
@@ -23,11 +24,18 @@ from acme import specs as acme_specs
 
 import mava
 from mava import specs as mava_specs
+from mava.adders.reverb import (
+    ColumnCompression,
+    ExtrasStoragePolicy,
+    FlushPolicy,
+    ReverbDatasetConfig,
+)
 from mava.components.tf.architectures import DecentralisedValueActor
 from mava.components.tf.modules.mixing.mixers import QMIX, VDN
 from mava.environment_loop import ParallelEnvironmentLoop
 from mava.systems.tf.madqn import MADQN
 from mava.systems.tf.madqn.execution import MADQNRecurrentExecutor
+from mava.systems.tf.priority_utils import PrioritizedReplay
 from mava.systems.tf.value_decomposition.training import (
     ValueDecompositionRecurrentTrainer,
 )
@@ -35,6 +43,7 @@ from mava.systems.tf.variable_sources import VariableSource as MavaVariableSourc
 from mava.types import EpsilonScheduler
 from mava.utils import enums
 from mava.utils.loggers import MavaLogger
+from mava.utils.profiling_utils import ProfilingConfig
 
 
 class ValueDecomposition(MADQN):
@@ -78,7 +87,15 @@ class ValueDecomposition(MADQN):
         mixer_optimizer: snt.Optimizer = snt.optimizers.Adam(learning_rate=1e-4),
         sequence_length: int = 20,
         period: int = 10,
+        burn_in_length: int = 0,
         max_gradient_norm: float = None,
+        steps_per_call: int = 1,
+        mixed_precision: bool = False,
+        num_trainer_replicas: int = 1,
+        trainers_per_node: int = 1,
+        replay_dataset: Optional[ReverbDatasetConfig] = None,
+        profiling: Optional[ProfilingConfig] = None,
+        compiled_exploration: bool = False,
         checkpoint: bool = True,
         checkpoint_subpath: str = "~/mava/",
         checkpoint_minute_interval: int = 5,
@@ -90,6 +107,14 @@ class ValueDecomposition(MADQN):
         termination_condition: Optional[Dict[str, int]] = None,
         evaluator_interval: Optional[dict] = {"executor_episodes": 2},
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        shared_memory_variables: bool = False,
+        adder_flush_policy: Optional[FlushPolicy] = None,
+        extras_storage_policies: Optional[Dict[str, ExtrasStoragePolicy]] = None,
+        max_replay_bytes: Optional[int] = None,
+        column_compression: Optional[Dict[str, ColumnCompression]] = None,
+        prioritized_replay: Optional[PrioritizedReplay] = None,
+        replay_sampler_fn: Optional[Callable[[], Any]] = None,
+        replay_remover_fn: Optional[Callable[[], Any]] = None,
     ):
         """Initialise the system.
 
@@ -135,8 +160,41 @@ class ValueDecomposition(MADQN):
             sequence_length: recurrent sequence rollout length.
             period: Consecutive starting points for overlapping
                 rollouts across a sequence.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                the recurrent trainers only use to refresh the stored core states,
+                without gradients, as in R2D2. This allows shorter sequence_length and
+                period. Defaults to 0.
             max_gradient_norm: maximum allowed norm for gradients
                 before clipping is applied.
+            steps_per_call: number of trainer steps run inside a single compiled call.
+                The losses are averaged over these steps, and the counts and variables
+                are synced with the variable source once per call, which lowers the
+                overhead of every step for small networks. Defaults to 1.
+            mixed_precision: if True, the trainers compute the online observation
+                networks in bfloat16 with float32 variables, which speeds up large
+                observation networks on accelerators with bfloat16 support. Only
+                the observation networks with variables are converted, so the
+                option has no effect with observation networks such as
+                batch_concat. The policy, critic and value networks stay in
+                float32. Defaults to False.
+            num_trainer_replicas: number of replicas of every trainer. Each replica
+                samples its own batch and the replicas apply the same averaged
+                gradients, so the trainers can use several GPUs or CPU cores.
+                Defaults to 1.
+            trainers_per_node: number of trainers co-hosted in each trainer node. The
+                trainers of a node share one process and TensorFlow runtime, and a
+                scheduler steps the trainer whose table has the most samples
+                available. Defaults to 1, one process per trainer.
+            replay_dataset: parallel readers, in-flight samples, interleave cycle
+                and autotuning of the pipeline that samples the trainer batches,
+                see ReverbDatasetConfig. Defaults to None, which uses 12 parallel
+                readers.
+            profiling: trace windows and signal file that capture `tf.profiler`
+                traces of the trainers, and log the time per step of their phases,
+                see ProfilingConfig. Defaults to None, which does not profile.
+            compiled_exploration: if True, the executors compute the epsilon of every
+                agent inside their compiled action selection, from a single step
+                count, instead of decrementing it in Python after every step.
             checkpoint: whether to checkpoint models.
             checkpoint_subpath: subdirectory specifying where to store
                 checkpoints.
@@ -170,6 +228,40 @@ class ValueDecomposition(MADQN):
                 See
                 examples/debugging/simple_spread/feedforward/decentralised/run_maddpg_lr_schedule.py
                 for an example.
+            shared_memory_variables: whether the variable source also publishes its
+                variables into shared memory, so that executors and trainers on the same
+                host read them without an RPC. Nodes on other hosts fall back to RPC.
+                Requires Python 3.8+.
+            adder_flush_policy: determines how often the adders wait for their items to
+                be written to the replay tables, e.g. every K items, after a byte budget
+                or after a time interval. Defaults to flushing after every item.
+            extras_storage_policies: how each extras field (e.g. core_states,
+                network_int_keys) is stored in the replay items, see
+                ExtrasStoragePolicy. Fields that are not listed are stored for every
+                step. Defaults to None, which stores every field for every step.
+                DEFAULT_EXTRAS_STORAGE_POLICIES stores the recurrent states only at the
+                start of each sequence and the network keys once per item.
+            max_replay_bytes: optional memory budget of the replay tables in bytes. The
+                size of an item is estimated from the table signature and the budget is
+                shared equally by the tables, so each table holds at most
+                max_replay_size items and at most as many as fit in its share of the
+                budget. Defaults to None, which only limits the number of items.
+            column_compression: how each column of the adders, e.g. observations, is
+                stored in replay, see ColumnCompression. This sets the chunk length of
+                each column and can store image observations as uint8, they are cast
+                back to float32 when sampled. Defaults to None.
+            prioritized_replay: configuration of prioritized experience replay, see
+                PrioritizedReplay. The executors insert items with an initial priority,
+                the trainers replace it by the TD errors of the sampled items and weight
+                their losses with importance sampling weights. Defaults to None, which
+                samples uniformly.
+            replay_sampler_fn: function that creates the selector used to sample items
+                from each replay table, e.g. `lambda: reverb.selectors.Lifo()`. Defaults
+                to uniform sampling, or prioritized sampling if prioritized_replay is
+                set.
+            replay_remover_fn: function that creates the selector used to remove items
+                from each replay table once it is full. Defaults to removing the oldest
+                items first.
         """
         super().__init__(
             environment_factory=environment_factory,
@@ -197,7 +289,15 @@ class ValueDecomposition(MADQN):
             optimizer=optimizer,
             sequence_length=sequence_length,
             period=period,
+            burn_in_length=burn_in_length,
             max_gradient_norm=max_gradient_norm,
+            steps_per_call=steps_per_call,
+            mixed_precision=mixed_precision,
+            num_trainer_replicas=num_trainer_replicas,
+            trainers_per_node=trainers_per_node,
+            replay_dataset=replay_dataset,
+            profiling=profiling,
+            compiled_exploration=compiled_exploration,
             checkpoint=checkpoint,
             checkpoint_subpath=checkpoint_subpath,
             checkpoint_minute_interval=checkpoint_minute_interval,
@@ -209,6 +309,14 @@ class ValueDecomposition(MADQN):
             termination_condition=termination_condition,
             evaluator_interval=evaluator_interval,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            replay_remover_fn=replay_remover_fn,
+            replay_sampler_fn=replay_sampler_fn,
+            prioritized_replay=prioritized_replay,
+            extras_storage_policies=extras_storage_policies,
+            max_replay_bytes=max_replay_bytes,
+            column_compression=column_compression,
+            adder_flush_policy=adder_flush_policy,
+            shared_memory_variables=shared_memory_variables,
         )
 
         # NOTE Users can either pass in their own mixer or
@@ -235,6 +343,7 @@ class ValueDecomposition(MADQN):
         trainer_id: str,
         replay: reverb.Client,
         variable_source: MavaVariableSource,
+        networks: Optional[Dict[str, Dict[str, snt.Module]]] = None,
     ) -> mava.core.Trainer:
         """System trainer.
 
@@ -243,6 +352,8 @@ class ValueDecomposition(MADQN):
             replay: replay data table to pull data from.
             variable_source: variable server for updating
                 network variables.
+            networks: networks of the trainer, see co_hosted_trainers. Defaults to
+                None, which creates the system.
 
         Returns:
             system trainer.
@@ -255,22 +366,28 @@ class ValueDecomposition(MADQN):
             trainer_id, **trainer_logger_config
         )
 
-        # Create the system
-        networks = self.create_system()
-
         # Create the dataset
         dataset = self._builder.make_dataset_iterator(replay, trainer_id)
+        priority_client = self._builder.make_priority_client(replay, trainer_id)
 
-        trainer = self._builder.make_trainer(
-            networks=networks,
-            trainer_networks=self._trainer_networks[trainer_id],
-            trainer_table_entry=self._table_network_config[trainer_id],
-            dataset=dataset,
-            logger=trainer_logger,
-            variable_source=variable_source,
-        )
+        # Create the system on the replicas of the trainer.
+        with self._builder.make_trainer_replicator().scope():
+            if networks is None:
+                networks = self.create_system()
+
+            trainer = self._builder.make_trainer(
+                networks=networks,
+                trainer_networks=self._trainer_networks[trainer_id],
+                trainer_table_entry=self._table_network_config[trainer_id],
+                dataset=dataset,
+                logger=trainer_logger,
+                variable_source=variable_source,
+                priority_client=priority_client,
+            )
 
-        # Setup the mixer
-        trainer.setup_mixer(self._mixer, self._mixer_optimizer)  # type: ignore
+            # Setup the mixer, each trainer trains its own copy of it.
+            trainer.setup_mixer(  # type: ignore
+                copy.deepcopy(self._mixer), copy.deepcopy(self._mixer_optimizer)
+            )
 
         return trainer
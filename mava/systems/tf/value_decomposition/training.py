@@ -15,7 +15,7 @@
 
 """Value Decomposition trainer implementation."""
 import copy
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import reverb
 import sonnet as snt
@@ -25,8 +25,11 @@ import trfl
 from acme.tf import utils as tf2_utils
 from acme.utils import loggers
 
+from mava import types as mava_types
 from mava.systems.tf.madqn.training import MADQNRecurrentTrainer
+from mava.systems.tf.priority_utils import PriorityClient
 from mava.systems.tf.variable_utils import VariableClient
+from mava.utils import stacking_utils
 from mava.utils import training_utils as train_utils
 
 train_utils.set_growing_gpu_memory()
@@ -60,6 +63,9 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
         max_gradient_norm: float = None,
         logger: loggers.Logger = None,
         learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]] = None,
+        priority_client: Optional[PriorityClient] = None,
+        burn_in_length: int = 0,
+        mixed_precision: bool = False,
     ):
         """Initialise Value Decompostion trainer.
 
@@ -91,6 +97,17 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
             learning_rate_scheduler_fn: dict with two functions (one for the policy and
                 one for the critic optimizer), that takes in a trainer step t and
                 returns the current learning rate.
+            priority_client: optional client that sends new priorities of the sampled
+                items to the replay table, for prioritized replay. The losses are then
+                weighted with importance sampling weights.
+            burn_in_length: number of steps at the start of every sampled sequence that
+                only refresh the stored core states, without gradients, as in R2D2. The
+                losses are computed over the remaining steps.
+            mixed_precision: if True, the online observation networks that have
+                variables are computed in bfloat16 with float32 variables, see
+                MixedPrecisionNetwork. Observation networks without variables, e.g.
+                batch_concat, the other networks, the target networks and the
+                published variables stay in float32.
         """
 
         super().__init__(
@@ -112,6 +129,14 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
             max_gradient_norm=max_gradient_norm,
             logger=logger,
             learning_rate_scheduler_fn=learning_rate_scheduler_fn,
+            priority_client=priority_client,
+            burn_in_length=burn_in_length,
+            mixed_precision=mixed_precision,
+        )
+
+        # The agents of the trainer grouped by the network they use.
+        self._agent_groups = stacking_utils.make_agent_groups(
+            {agent: agent_net_keys[agent] for agent in self._agents}
         )
 
         self._mixer = None
@@ -157,19 +182,113 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
             online_variables += list((*self._mixer.variables,))
             target_variables += list((*self._target_mixer.variables,))
 
-        if self._target_averaging:
-            assert 0.0 < self._target_update_rate < 1.0
-            tau = self._target_update_rate
-            for src, dest in zip(online_variables, target_variables):
-                dest.assign(dest * (1.0 - tau) + src * tau)
-        else:
-            # Make online -> target network update ops.
-            if tf.math.mod(self._num_steps, self._target_update_period) == 0:
-                for src, dest in zip(online_variables, target_variables):
-                    dest.assign(src)
-
+        train_utils.update_target_networks(
+            online_variables,
+            target_variables,
+            self._num_steps,
+            self._target_averaging,
+            self._target_update_period,
+            self._target_update_rate,
+        )
         self._num_steps.assign_add(1)
 
+    def _agent_q_values(
+        self,
+        observations: Dict[str, mava_types.OLT],
+        actions: Dict[str, tf.Tensor],
+        core_state: Dict[str, Any],
+        target_core_state: Dict[str, Any],
+    ) -> Tuple[tf.Tensor, tf.Tensor]:
+        """Q-values of the chosen actions and of the greedy next actions.
+
+        The agents that share a network are folded into the batch dimension, so
+        the observation, value and target value networks run once per network
+        key, whatever the number of agents.
+
+        Args:
+            observations: time major observations of the agents.
+            actions: time major actions taken by the agents.
+            core_state: initial core states of the value networks.
+            target_core_state: initial core states of the target value networks.
+
+        Returns:
+            the Q-values of the chosen actions and the target Q-values of the
+                greedy (double Q-learning) next actions, shape=(T, B, Num_Agents)
+                with the agents in the order of self._agents.
+        """
+        chosen_action_q_values: List[tf.Tensor] = []
+        max_action_q_values: List[tf.Tensor] = []
+        agent_order: List[str] = []
+        for net_key, agents in self._agent_groups.items():
+            # Fold the agents into the batch dimension, [T, B] -> [T, N * B].
+            agent_observations = train_utils.concat_agents(
+                [observations[agent] for agent in agents], axis=1
+            )
+            reshaped_obs, dims = train_utils.combine_dim(agent_observations.observation)
+            obs_trans = train_utils.extract_dim(
+                self._observation_networks[net_key](reshaped_obs), dims
+            )
+            # This stop_gradient prevents gradients to propagate into
+            # the target observation network.
+            target_obs_trans = tree.map_structure(
+                tf.stop_gradient,
+                train_utils.extract_dim(
+                    self._target_observation_networks[net_key](reshaped_obs), dims
+                ),
+            )
+
+            q_tm1_values, _ = snt.dynamic_unroll(
+                self._value_networks[net_key],
+                obs_trans,
+                train_utils.concat_agents([core_state[agent] for agent in agents]),
+            )
+            q_t_values, _ = snt.dynamic_unroll(
+                self._target_value_networks[net_key],
+                target_obs_trans,
+                train_utils.concat_agents(
+                    [target_core_state[agent] for agent in agents]
+                ),
+            )
+
+            # Q-value of the action taken by agent
+            chosen_action_q_value = trfl.batched_index(
+                q_tm1_values,
+                train_utils.concat_agents([actions[agent] for agent in agents], axis=1),
+            )
+
+            # Q-value of the next state
+            # Legal action masking
+            q_t_selector = tf.where(
+                tf.cast(agent_observations.legal_actions, "bool"),
+                q_tm1_values,
+                -999999999,
+            )
+            max_action = tf.argmax(q_t_selector, axis=-1)
+            max_action_q_value = trfl.batched_index(q_t_values, max_action)
+
+            # Unfold the agents into a trailing dim, [T, N * B] -> [T, B, N].
+            for values, q_values in (
+                (chosen_action_q_values, chosen_action_q_value),
+                (max_action_q_values, max_action_q_value),
+            ):
+                time_steps = tf.shape(q_values)[0]
+                values.append(
+                    tf.transpose(
+                        tf.reshape(q_values, [time_steps, len(agents), -1]), [0, 2, 1]
+                    )
+                )
+            agent_order += agents
+
+        # Put the agents back in the order of self._agents for the mixer.
+        permutation = [agent_order.index(agent) for agent in self._agents]
+        outputs: List[tf.Tensor] = []
+        for values in (chosen_action_q_values, max_action_q_values):
+            q_values = tf.concat(values, axis=-1)
+            if permutation != list(range(len(permutation))):
+                q_values = tf.gather(q_values, permutation, axis=-1)
+            outputs.append(q_values)
+        return outputs[0], outputs[1]
+
     def _forward(self, inputs: reverb.ReplaySample) -> None:
         """Trainer forward pass.
 
@@ -182,6 +301,9 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
         )
         data = tf2_utils.batch_to_sequence(data)
 
+        # Refresh the core states over the burn in steps, if any.
+        data, core_state, target_core_state = self._burn_in(data)
+
         # Note (dries): The unused variable is start_of_episodes.
         observations, actions, rewards, discounts, _, extras = (
             data.observations,
@@ -198,65 +320,31 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
         else:
             global_env_state = None
 
-        # Get initial state for the LSTM from replay and
-        # extract the first state in the sequence.
-        core_state = tree.map_structure(lambda s: s[0, :, :], extras["core_states"])
-        target_core_state = tree.map_structure(
-            lambda s: s[0, :, :], extras["core_states"]
+        # Importance sampling weights that correct for prioritized sampling.
+        importance_weights = train_utils.importance_sampling_weights(
+            inputs.info.probability,
+            inputs.info.table_size,
+            self._importance_sampling_exponent,
         )
 
         # Do forward passes through the networks and calculate the losses
         with tf.GradientTape(persistent=True) as tape:
-
-            obs_trans, target_obs_trans = self._transform_observations(observations)
-
-            # Lists for stacking tensors later
-            chosen_action_q_value_all_agents = []
-            max_action_q_value_all_agents = []
-            reward_all_agents = []
-            env_discount_all_agents = []
-            for agent in self._agents:
-                agent_key = self._agent_net_keys[agent]
-
-                # Double Q-learning
-                q_tm1_values, _ = snt.static_unroll(
-                    self._value_networks[agent_key],
-                    obs_trans[agent],
-                    core_state[agent][0],
-                )
-                # Q-value of the action taken by agent
-                chosen_action_q_value = trfl.batched_index(q_tm1_values, actions[agent])
-
-                # Q-value of the next state
-                # Legal action masking
-                q_t_selector = tf.where(
-                    tf.cast(observations[agent].legal_actions, "bool"),
-                    q_tm1_values,
-                    -999999999,
-                )
-                q_t_values, _ = snt.static_unroll(
-                    self._target_value_networks[agent_key],
-                    target_obs_trans[agent],
-                    target_core_state[agent][0],
-                )
-                max_action = tf.argmax(q_t_selector, axis=-1)
-                max_action_q_value = trfl.batched_index(q_t_values, max_action)
-
-                # Append agent values to lists
-                chosen_action_q_value_all_agents.append(chosen_action_q_value)
-                max_action_q_value_all_agents.append(max_action_q_value)
-                reward_all_agents.append(rewards[agent])
-                env_discount_all_agents.append(discounts[agent])
+            # Q-values of the chosen and the greedy next actions, with a trailing
+            # agent dim, shape=(T, B, Num_Agents).
+            (
+                chosen_action_q_value_all_agents,
+                max_action_q_value_all_agents,
+            ) = self._agent_q_values(
+                observations, actions, core_state, target_core_state
+            )
 
             # Stack list of tensors into tensor with trailing agent dim
-            chosen_action_q_value_all_agents = tf.stack(
-                chosen_action_q_value_all_agents, axis=-1
-            )  # shape=(T,B, Num_Agents)
-            max_action_q_value_all_agents = tf.stack(
-                max_action_q_value_all_agents, axis=-1
-            )  # shape=(T,B, Num_Agents)
-            reward_all_agents = tf.stack(reward_all_agents, axis=-1)
-            env_discount_all_agents = tf.stack(env_discount_all_agents, axis=-1)
+            reward_all_agents = tf.stack(
+                [rewards[agent] for agent in self._agents], axis=-1
+            )
+            env_discount_all_agents = tf.stack(
+                [discounts[agent] for agent in self._agents], axis=-1
+            )
 
             # Mixing
             if self._mixer is not None:
@@ -281,7 +369,7 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
 
             # Cast the additional discount to match
             # the environment discount dtype.
-            discount = tf.cast(self._discount, dtype=discounts[agent].dtype)
+            discount = tf.cast(self._discount, dtype=env_discount_all_agents.dtype)
             pcont = discount * env_discount_all_agents
 
             # Bellman target
@@ -299,9 +387,16 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
             zero_padding_mask = tf.cast(
                 extras["zero_padding_mask"], dtype=value_loss.dtype
             )[:-1]
-            masked_loss = value_loss * tf.expand_dims(zero_padding_mask, axis=-1)
+            masked_loss = value_loss * tf.expand_dims(
+                zero_padding_mask * importance_weights, axis=-1
+            )
             masked_loss = tf.reduce_sum(masked_loss) / tf.reduce_sum(zero_padding_mask)
 
+            # The priority of a sequence is computed from the (mixed) TD errors.
+            self.priorities = train_utils.sequence_priorities(
+                tf.reduce_max(tf.abs(td_error), axis=-1), zero_padding_mask
+            )
+
             self.value_losses = {agent: masked_loss for agent in self._agents}
             self.mixer_loss = masked_loss
 
@@ -326,6 +421,9 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
             # Compute gradients.
             gradients = tape.gradient(value_losses[agent], variables)
 
+            # Average the gradients over the trainer replicas.
+            gradients = train_utils.all_reduce_gradients(gradients)
+
             # Maybe clip gradients.
             gradients = tf.clip_by_global_norm(gradients, self._max_gradient_norm)[0]
 
@@ -337,6 +435,9 @@ class ValueDecompositionRecurrentTrainer(MADQNRecurrentTrainer):
 
         gradients = tape.gradient(mixer_loss, mixer_variables)
 
+        # Average the gradients over the trainer replicas.
+        gradients = train_utils.all_reduce_gradients(gradients)
+
         # Clip gradients.
         gradients = tf.clip_by_global_norm(gradients, self._max_gradient_norm)[0]
 
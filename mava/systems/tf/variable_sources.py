@@ -1,6 +1,7 @@
+import atexit
 import os
 import time
-from typing import Any, Dict, Sequence, Union
+from typing import Any, Dict, Optional, Sequence, Union
 
 import launchpad as lp
 import numpy as np
@@ -19,6 +20,7 @@ class VariableSource:
         checkpoint_subpath: str,
         checkpoint_minute_interval: int,
         termination_condition: Dict = None,
+        shared_memory_prefix: Optional[str] = None,
     ) -> None:
         """Initialise the variable source
         Args:
@@ -26,6 +28,9 @@ class VariableSource:
             variables which should be stored in it.
             checkpoint (bool): Indicates whether checkpointing should be performed.
             checkpoint_subpath (str): checkpoint path
+            shared_memory_prefix (Optional[str]): if set, the variables are also
+            published into shared-memory segments with this prefix, so that
+            variable clients on the same host can read them without an RPC.
         Returns:
             None
         """
@@ -40,6 +45,16 @@ class VariableSource:
             self._termination_condition
         )
 
+        self._shared_variables = None
+        if shared_memory_prefix is not None:
+            from mava.systems.tf.shared_memory import SharedMemoryVariables
+
+            self._shared_variables = SharedMemoryVariables(
+                shared_memory_prefix, self.variables, create=True
+            )
+            self._publish(list(self.variables.keys()))
+            atexit.register(self._shared_variables.close)
+
         if checkpoint:
             # Only save variables that are not empty.
             save_variables = {}
@@ -100,6 +115,7 @@ class VariableSource:
                     self.variables[var_key][var_i].assign(vars[var_key][var_i])
             else:
                 self.variables[var_key].assign(vars[var_key])
+        self._publish(names)
         return
 
     def add_to_variables(
@@ -121,8 +137,24 @@ class VariableSource:
             # Note: Can also use self.variables[var_key] = /
             # self.variables[var_key] + vars[var_key]
             self.variables[var_key].assign_add(vars[var_key])
+        self._publish(names)
         return
 
+    def _publish(self, names: Sequence[str]) -> None:
+        """Write variables to shared memory, if it is used.
+        Args:
+            names (Sequence[str]): Names of the variables to publish.
+        Returns:
+            None
+        """
+        if self._shared_variables is None:
+            return
+        for var_key in names:
+            if self._shared_variables.has_key(var_key):
+                self._shared_variables.write(
+                    var_key, tf2_utils.to_numpy(self.variables[var_key])
+                )
+
     def run(self) -> None:
         """Run the variable source. This function allows for
         checkpointing and other centralised computations to
@@ -36,8 +36,21 @@ class VariableClient:
         get_keys: List[str] = None,
         set_keys: List[str] = None,
         update_period: int = 1,
+        shared_memory_prefix: Optional[str] = None,
     ):
-        """Initialise the variable server."""
+        """Initialise the variable server.
+
+        Args:
+            client: the variable source to get variables from and set them in.
+            variables: the local variables of this client.
+            get_keys: keys of the variables to get from the source.
+            set_keys: keys of the variables to set in the source.
+            update_period: number of calls between updates.
+            shared_memory_prefix: prefix of the shared-memory segments published
+                by the variable source. If set, variables are read from shared
+                memory when the source runs on the same host, and over RPC
+                otherwise.
+        """
         self._all_keys = sort_str_num(list(variables.keys()))
         self._get_keys = get_keys if get_keys is not None else self._all_keys
         self._set_keys = set_keys if set_keys is not None else self._all_keys
@@ -47,8 +60,17 @@ class VariableClient:
         self._set_get_call_counter = 0
         self._update_period = update_period
         self._client = client
-        self._request = lambda: client.get_variables(self._get_keys)
-        self._request_all = lambda: client.get_variables(self._all_keys)
+
+        self._shared_variables = None
+        if shared_memory_prefix is not None:
+            from mava.systems.tf.shared_memory import SharedMemoryVariables
+
+            self._shared_variables = SharedMemoryVariables(
+                shared_memory_prefix, variables
+            )
+
+        self._request = lambda: self._get_variables(self._get_keys)
+        self._request_all = lambda: self._get_variables(self._all_keys)
 
         self._adjust = lambda: client.set_variables(
             self._set_keys,
@@ -77,12 +99,34 @@ class VariableClient:
         self._set_get_future: Optional[futures.Future] = None
         self._add_future: Optional[futures.Future] = None
 
+    def _get_variables(self, keys: List[str]) -> Dict[str, Any]:
+        """Gets variables from shared memory where possible and over RPC
+        otherwise."""
+        if self._shared_variables is None:
+            return self._client.get_variables(keys)
+
+        variables: Dict[str, Any] = {}
+        remote_keys = []
+        for key in keys:
+            value = self._shared_variables.read(key)
+            if value is None:
+                remote_keys.append(key)
+            else:
+                variables[key] = value
+
+        if remote_keys:
+            variables.update(self._client.get_variables(remote_keys))
+            # The source has answered, so its segments exist if it runs on
+            # this host. Keys that are not found keep using RPC.
+            self._shared_variables.attach(remote_keys)
+        return variables
+
     def _adjust_and_request(self) -> None:
         self._client.set_variables(
             self._set_keys,
             tf2_utils.to_numpy({key: self._variables[key] for key in self._set_keys}),
         )
-        self._copy(self._client.get_variables(self._get_keys))
+        self._copy(self._get_variables(self._get_keys))
 
     def get_async(self) -> None:
         """Asynchronously updates the get variables with the latest copy from source."""
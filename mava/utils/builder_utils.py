@@ -12,7 +12,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Callable, Dict, Optional, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import tensorflow as tf
+import tree
 
 from mava.components.tf.modules.exploration.exploration_scheduling import (
     BaseExplorationScheduler,
@@ -58,3 +61,96 @@ def initialize_epsilon_schedulers(
         )
 
     return action_selectors_with_scheduler
+
+
+def estimate_item_nbytes(signature: Any) -> int:
+    """Estimate the size of an item from the signature of its table.
+
+    This is the uncompressed size of the item. Reverb compresses the items in
+    chunks and items that overlap, e.g. sequences with a period shorter than
+    their length, share their chunks, so the memory used is usually lower.
+
+    Args:
+        signature: nested structure of tf.TensorSpec of the items of a table.
+
+    Raises:
+        ValueError: if the shape of a column is not fully defined.
+
+    Returns:
+        number of bytes of an item.
+    """
+    nbytes = 0
+    for spec in tree.flatten(signature):
+        shape = tf.TensorShape(spec.shape)
+        if not shape.is_fully_defined():
+            raise ValueError(
+                f"Can not estimate the size of {spec.name} with shape {shape}."
+            )
+        nbytes += shape.num_elements() * tf.as_dtype(spec.dtype).size
+    return nbytes
+
+
+def replay_table_max_size(
+    signature: Any,
+    max_replay_size: int,
+    max_replay_bytes: Optional[int] = None,
+    num_tables: int = 1,
+) -> int:
+    """Maximum number of items of a replay table.
+
+    Args:
+        signature: signature of the items of the table.
+        max_replay_size: maximum number of items of each table.
+        max_replay_bytes: optional memory budget in bytes shared equally by
+            all the replay tables.
+        num_tables: number of replay tables sharing the budget.
+
+    Raises:
+        ValueError: if a single item does not fit in the budget of a table.
+
+    Returns:
+        max_replay_size, or fewer items if they do not fit in the budget.
+    """
+    if max_replay_bytes is None:
+        return max_replay_size
+    table_budget = max_replay_bytes // num_tables
+    max_items = int(table_budget // estimate_item_nbytes(signature))
+    if max_items < 1:
+        raise ValueError(
+            f"A replay budget of {max_replay_bytes} bytes does not fit a single "
+            f"item of {estimate_item_nbytes(signature)} bytes in each of the "
+            f"{num_tables} tables."
+        )
+    return min(max_replay_size, max_items)
+
+
+def _format_bytes(nbytes: float) -> str:
+    """Format a number of bytes with a binary unit."""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if nbytes < 1024:
+            return f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} TiB"
+
+
+def replay_memory_report(table_sizes: Dict[str, Tuple[int, int]]) -> str:
+    """Report the expected memory footprint of the replay tables.
+
+    Args:
+        table_sizes: size of an item in bytes and maximum number of items of
+            each table.
+
+    Returns:
+        a report with the uncompressed footprint of each table when full.
+    """
+    lines = ["Replay memory (uncompressed upper bound when full):"]
+    total = 0
+    for table, (item_nbytes, max_size) in table_sizes.items():
+        table_nbytes = item_nbytes * max_size
+        total += table_nbytes
+        lines.append(
+            f"  {table}: {max_size} items of {_format_bytes(item_nbytes)} = "
+            f"{_format_bytes(table_nbytes)}"
+        )
+    lines.append(f"  total: {_format_bytes(total)}")
+    return "\n".join(lines)
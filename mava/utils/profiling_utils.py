@@ -0,0 +1,220 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Utilities to profile where the trainers spend their time."""
+
+import contextlib
+import dataclasses
+import os
+import time
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import tensorflow as tf
+from absl import logging
+
+
+@dataclasses.dataclass
+class ProfilingConfig:
+    """Configuration of the trainer profiler.
+
+    A `tf.profiler` trace is captured over each of the trace windows, and over
+    the next signal_steps trainer steps whenever the signal file is created,
+    e.g. with `touch`. The signal file is removed once the trace starts, so it
+    can be created again for another trace.
+
+    Args:
+        trace_windows: ranges of trainer steps [start, stop) to trace.
+        signal_file: file whose creation triggers a trace. Defaults to None,
+            which does not watch any file.
+        signal_steps: number of trainer steps traced per signal.
+        logdir: directory the traces are written to. Defaults to None, which
+            writes them to the profiles directory of the trainer logger.
+    """
+
+    trace_windows: Sequence[Tuple[int, int]] = ()
+    signal_file: Optional[str] = None
+    signal_steps: int = 10
+    logdir: Optional[str] = None
+
+
+class PhaseTimer:
+    """Timer of the phases of the trainer steps.
+
+    Every phase is a name scope, so the phases of compiled steps show up in the
+    profiler traces. The wall time of the phases that run eagerly, e.g. the
+    phases of the wrappers, is measured in Python. The compiled phases only run
+    Python while they are traced, so once time_compiled_phases is called, the
+    compiled phases given to the timer record `tf.timestamp` deltas in
+    variables instead, like train_utils.timed_next.
+    """
+
+    def __init__(self, compiled_phases: Sequence[str] = ()) -> None:
+        """Initialise the phase timer.
+
+        Args:
+            compiled_phases: names of the phases that can be timed when they
+                are compiled, see time_compiled_phases.
+        """
+        self._times: Dict[str, float] = {}
+        self._compiled_phases = list(compiled_phases)
+        self._compiled_times: Dict[str, tf.Variable] = {}
+
+    def time_compiled_phases(self) -> None:
+        """Time the compiled phases from the next trace of the steps.
+
+        The timestamps order the ops of a phase after its start, and its end
+        after all its ops, which can slow down the steps, so the compiled
+        phases are only timed when profiling. This creates the variables of the
+        phases, so it is called outside of the compiled steps, in the scope of
+        the trainer replicator if any.
+        """
+        for name in self._compiled_phases:
+            if name not in self._compiled_times:
+                # Replicas time their phases alike, the first one is kept.
+                self._compiled_times[name] = tf.Variable(
+                    0.0,
+                    dtype=tf.float64,
+                    trainable=False,
+                    aggregation=tf.VariableAggregation.ONLY_FIRST_REPLICA,
+                )
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the step.
+
+        Args:
+            name: name of the phase.
+
+        Yields:
+            nothing, the phase runs inside the context.
+        """
+        if not tf.executing_eagerly():
+            if name not in self._compiled_times:
+                with tf.name_scope(name):
+                    yield
+                return
+
+            graph = tf.compat.v1.get_default_graph()
+            start = tf.timestamp()
+            num_ops = len(graph.get_operations())
+            with tf.control_dependencies([start]), tf.name_scope(name):
+                yield
+            with tf.control_dependencies(graph.get_operations()[num_ops:]):
+                self._compiled_times[name].assign_add(tf.timestamp() - start)
+            return
+
+        start = time.perf_counter()
+        with tf.profiler.experimental.Trace(name), tf.name_scope(name):
+            yield
+        self._times[name] = self._times.get(name, 0.0) + time.perf_counter() - start
+
+    def pop(self, num_steps: int = 1) -> Dict[str, float]:
+        """Get the seconds per step spent in every phase and reset them.
+
+        Args:
+            num_steps: number of steps the phases were timed over.
+
+        Returns:
+            seconds per step of every timed phase, keyed by `<phase>_time`.
+        """
+        for name, variable in self._compiled_times.items():
+            seconds = float(variable.numpy())
+            if seconds:
+                self._times[name] = self._times.get(name, 0.0) + seconds
+                variable.assign(0.0)
+        times = {f"{name}_time": t / num_steps for name, t in self._times.items()}
+        self._times = {}
+        return times
+
+
+class TraceWindows:
+    """Capture profiler traces over windows of trainer steps."""
+
+    def __init__(self, logdir: str, config: ProfilingConfig) -> None:
+        """Initialise the trace windows.
+
+        Args:
+            logdir: directory the traces are written to.
+            config: trace windows and signal file, see ProfilingConfig.
+        """
+        for start, stop in config.trace_windows:
+            if not 0 <= start < stop:
+                raise ValueError(f"Invalid trace window [{start}, {stop}).")
+        if config.signal_steps < 1:
+            raise ValueError(
+                f"signal_steps should be positive, got {config.signal_steps}."
+            )
+        self._logdir = logdir
+        self._windows = sorted(config.trace_windows)
+        self._signal_file = config.signal_file
+        self._signal_steps = config.signal_steps
+        self._stop_step: Optional[int] = None
+
+    @property
+    def tracing(self) -> bool:
+        """Whether a trace is being captured."""
+        return self._stop_step is not None
+
+    def update(self, step: int) -> None:
+        """Start or stop the trace before a trainer step.
+
+        Args:
+            step: number of trainer steps run so far.
+        """
+        if self.tracing:
+            if step >= self._stop_step:  # type: ignore
+                self._stop()
+            return
+
+        for start, stop in self._windows:
+            if start <= step < stop:
+                self._start(stop)
+                return
+
+        if self._signal_file and os.path.exists(self._signal_file):
+            os.remove(self._signal_file)
+            self._start(step + self._signal_steps)
+
+    def close(self) -> None:
+        """Stop the trace being captured, if any."""
+        if self.tracing:
+            self._stop()
+
+    def _start(self, stop_step: int) -> None:
+        """Start a trace.
+
+        Only one trace can be captured per process, so trainers hosted in the
+        same process can not trace at the same time.
+
+        Args:
+            stop_step: trainer step the trace stops at.
+        """
+        # Drop the windows the trace covers, which are skipped if it fails.
+        self._windows = [w for w in self._windows if w[1] > stop_step]
+        try:
+            tf.profiler.experimental.start(self._logdir)
+        except (tf.errors.AlreadyExistsError, tf.errors.UnavailableError) as error:
+            logging.warning(f"Could not start the trace: {error}")
+            return
+        logging.info(f"Tracing the trainer steps to {self._logdir}.")
+        self._stop_step = stop_step
+
+    def _stop(self) -> None:
+        """Stop the trace and write it to the log directory."""
+        self._stop_step = None
+        try:
+            tf.profiler.experimental.stop()
+        except tf.errors.UnavailableError as error:
+            logging.warning(f"Could not stop the trace: {error}")
@@ -0,0 +1,237 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Utilities for the stacked agent layout.
+
+In the stacked layout the experience of the agents that use the same network
+is stored in arrays with a leading agent dimension, keyed by network instead of
+by agent, e.g. `observations[net_key]` has shape [num_agents, ...]. The agents
+of a network are stacked in sort_str_num order. Only MADQN trains on this
+layout, see MADQNStackedTrainer, the builders of the other systems reject it.
+"""
+
+from typing import Any, Callable, Dict, List
+
+import dm_env
+import numpy as np
+import tree
+from dm_env import specs
+
+from mava import specs as mava_specs
+from mava.utils.sort_utils import sort_str_num
+
+AgentGroups = Dict[str, List[str]]
+
+
+def make_agent_groups(agent_net_keys: Dict[str, str]) -> AgentGroups:
+    """Group the agents by the network they use.
+
+    Args:
+        agent_net_keys: network key of each agent.
+
+    Returns:
+        sorted list of the agents of each network key.
+    """
+    groups: AgentGroups = {
+        net_key: [] for net_key in sort_str_num(set(agent_net_keys.values()))
+    }
+    for agent in sort_str_num(agent_net_keys.keys()):
+        groups[agent_net_keys[agent]].append(agent)
+    return groups
+
+
+def _is_agent_keyed(value: Any, agent_groups: AgentGroups) -> bool:
+    """Whether a value is a dictionary with an entry per agent."""
+    first_agent = next(iter(agent_groups.values()))[0]
+    return isinstance(value, dict) and first_agent in value
+
+
+def _stack_agent_keyed(
+    values: Dict[str, Any],
+    agent_groups: AgentGroups,
+    stack_fn: Callable[..., Any],
+) -> Dict[str, Any]:
+    """Stack the leaves of the values of the agents of each group."""
+    return {
+        net_key: tree.map_structure(stack_fn, *[values[agent] for agent in agents])
+        for net_key, agents in agent_groups.items()
+    }
+
+
+def stack_agents(values: Dict[str, Any], agent_groups: AgentGroups) -> Dict[str, Any]:
+    """Stack the values of the agents of each network.
+
+    Args:
+        values: possibly nested values of each agent, e.g. OLT observations.
+        agent_groups: agents of each network key.
+
+    Returns:
+        values of each network key, with a leading agent dimension.
+    """
+    return _stack_agent_keyed(values, agent_groups, lambda *xs: np.stack(xs))
+
+
+def unstack_agents(
+    values: Dict[str, Any], agent_groups: AgentGroups, axis: int = 0
+) -> Dict[str, Any]:
+    """Split stacked values into the values of each agent.
+
+    Args:
+        values: values of each network key, numpy arrays or tensors.
+        agent_groups: agents of each network key.
+        axis: the agent dimension, e.g. 1 for batched values.
+
+    Returns:
+        values of each agent.
+    """
+    index_prefix = (slice(None),) * axis
+    unstacked = {}
+    for net_key, agents in agent_groups.items():
+        for i, agent in enumerate(agents):
+            unstacked[agent] = tree.map_structure(
+                lambda x: x[index_prefix + (i,)], values[net_key]
+            )
+    return unstacked
+
+
+def stack_extras(extras: Any, agent_groups: AgentGroups) -> Any:
+    """Stack the agent keyed entries of the extras.
+
+    Entries that are not keyed by agent, e.g. environment states, are shared
+    by all the agents and kept as they are.
+
+    Args:
+        extras: extras passed to the adder.
+        agent_groups: agents of each network key.
+
+    Returns:
+        extras with the agent keyed entries stacked.
+    """
+    if not isinstance(extras, dict):
+        return extras
+    return {
+        key: stack_agents(value, agent_groups)
+        if _is_agent_keyed(value, agent_groups)
+        else value
+        for key, value in extras.items()
+    }
+
+
+def stack_timestep(
+    timestep: dm_env.TimeStep, agent_groups: AgentGroups
+) -> dm_env.TimeStep:
+    """Stack the observations, rewards and discounts of a timestep.
+
+    Args:
+        timestep: timestep with values keyed by agent.
+        agent_groups: agents of each network key.
+
+    Returns:
+        timestep with values keyed by network key.
+    """
+
+    def maybe_stack(value: Any) -> Any:
+        if _is_agent_keyed(value, agent_groups):
+            return stack_agents(value, agent_groups)
+        return value
+
+    return timestep._replace(
+        observation=maybe_stack(timestep.observation),
+        reward=maybe_stack(timestep.reward),
+        discount=maybe_stack(timestep.discount),
+    )
+
+
+def _stack_spec(*agent_specs: specs.Array) -> specs.Array:
+    """Spec of the stacked values of agents with the same spec.
+
+    Only the shape and dtype are kept, as the stacked specs are used for the
+    replay signatures.
+    """
+    shapes = {spec.shape for spec in agent_specs}
+    dtypes = {np.dtype(spec.dtype) for spec in agent_specs}
+    if len(shapes) > 1 or len(dtypes) > 1:
+        raise ValueError(
+            "Agents that use the same network need the same specs to be stacked, "
+            f"got shapes {shapes} and dtypes {dtypes}."
+        )
+    spec = agent_specs[0]
+    return specs.Array(
+        shape=(len(agent_specs), *spec.shape), dtype=spec.dtype, name=spec.name
+    )
+
+
+def stack_agent_specs(
+    agent_specs: Dict[str, Any], agent_groups: AgentGroups
+) -> Dict[str, Any]:
+    """Stack the specs of the agents of each network.
+
+    Args:
+        agent_specs: possibly nested specs of each agent.
+        agent_groups: agents of each network key.
+
+    Raises:
+        ValueError: if agents of the same network have different specs.
+
+    Returns:
+        specs of each network key, with a leading agent dimension.
+    """
+    return _stack_agent_keyed(agent_specs, agent_groups, _stack_spec)
+
+
+def stack_extras_spec(extras_spec: Any, agent_groups: AgentGroups) -> Any:
+    """Stack the agent keyed entries of an extras spec, see `stack_extras`.
+
+    Args:
+        extras_spec: spec of the extras passed to the adder.
+        agent_groups: agents of each network key.
+
+    Returns:
+        spec of the stacked extras.
+    """
+    if not isinstance(extras_spec, dict):
+        return extras_spec
+    return {
+        key: stack_agent_specs(value, agent_groups)
+        if _is_agent_keyed(value, agent_groups)
+        else value
+        for key, value in extras_spec.items()
+    }
+
+
+def stack_environment_spec(
+    environment_spec: mava_specs.MAEnvironmentSpec, agent_groups: AgentGroups
+) -> mava_specs.MAEnvironmentSpec:
+    """Create the environment spec of the stacked layout.
+
+    The specs are keyed by network key, so it can be passed to the signature
+    functions of the adders.
+
+    Args:
+        environment_spec: spec of each agent.
+        agent_groups: agents of each network key.
+
+    Raises:
+        ValueError: if agents of the same network have different specs.
+
+    Returns:
+        spec of each network key, with a leading agent dimension.
+    """
+    stacked_specs = stack_agent_specs(environment_spec.get_agent_specs(), agent_groups)
+    return mava_specs.MAEnvironmentSpec(
+        environment=None,
+        specs=stacked_specs,
+        extra_specs=stack_extras_spec(environment_spec.get_extra_specs(), agent_groups),
+    )
@@ -1,15 +1,27 @@
 import os
 import time
 import warnings
-from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 import sonnet as snt
 import tensorflow as tf
 import tensorflow_probability as tfp
+import tree
 import trfl
 
-from mava.types import NestedArray
+from mava.types import NestedArray, Transition
 
 
 def action_mask_categorical_policies(
@@ -133,6 +145,143 @@ def _normalize_advantages(
     return normalized_advantages
 
 
+def importance_sampling_weights(
+    probabilities: tf.Tensor, table_size: tf.Tensor, exponent: float
+) -> tf.Tensor:
+    """Importance sampling weights that correct for prioritized sampling.
+
+    Args:
+        probabilities: probability with which each item of the batch was sampled.
+        table_size: number of items in the table when the batch was sampled.
+        exponent: importance sampling exponent. Zero applies no correction and
+            one fully corrects for the prioritized sampling.
+
+    Returns:
+        weights normalised so that the largest weight of the batch is one.
+    """
+    probabilities = tf.cast(probabilities, tf.float32)
+    table_size = tf.cast(table_size, tf.float32)
+    weights = tf.pow(table_size * probabilities, -exponent)
+    return tf.stop_gradient(weights / tf.reduce_max(weights))
+
+
+def sequence_priorities(
+    td_errors: tf.Tensor,
+    mask: Optional[tf.Tensor] = None,
+    time_axis: int = 0,
+    eta: float = 0.9,
+) -> tf.Tensor:
+    """Priorities of sequences, mixing the max and mean absolute TD error.
+
+    See "Recurrent Experience Replay in Distributed Reinforcement Learning"
+    by Kapturowski et al. (https://openreview.net/forum?id=r1lyTjAqYX).
+
+    Args:
+        td_errors: TD errors of every step of the sequences.
+        mask: optional mask of the steps to include, e.g. to exclude padding.
+        time_axis: axis of the time dimension.
+        eta: weight of the max absolute TD error.
+
+    Returns:
+        priority of each sequence.
+    """
+    abs_td_errors = tf.abs(td_errors)
+    if mask is None:
+        mask = tf.ones_like(abs_td_errors)
+    mask = tf.cast(mask, abs_td_errors.dtype)
+    max_td_errors = tf.reduce_max(abs_td_errors * mask, axis=time_axis)
+    mean_td_errors = tf.reduce_sum(abs_td_errors * mask, axis=time_axis) / (
+        tf.maximum(tf.reduce_sum(mask, axis=time_axis), 1.0)
+    )
+    return tf.stop_gradient(eta * max_td_errors + (1.0 - eta) * mean_td_errors)
+
+
+def n_step_transition_from_sequence(
+    trajectory: Any, n_step: int, discount: float
+) -> Transition:
+    """Compute n-step transitions from windows of single steps.
+
+    The windows are added by `ParallelNStepSequenceAdder`. The returns are
+    computed as by the n-step transition adder: the return of a window is
+    r_0 + g * d_0 * r_1 + ... + g^{m-1} * d_0 * ... * d_{m-2} * r_{m-1} and its
+    discount is g^{m-1} * d_0 * ... * d_{m-1}, where m is `n_step`, or fewer at
+    the end of the episode, and the next observation is the observation at m.
+
+    Args:
+        trajectory: batch of windows, with a batch and a time dimension. The
+            extras need a `zero_padding_mask`, one for every step of the episode
+            and zero for the padding.
+        n_step: number of steps of the returns, at most the window length minus
+            one.
+        discount: discount applied to future rewards by the agents (g above).
+
+    Returns:
+        batch of n-step transitions.
+    """
+    mask = trajectory.extras["zero_padding_mask"]
+    if n_step >= mask.shape[1]:
+        raise ValueError(
+            f"Can not compute {n_step}-step returns from windows of "
+            f"{mask.shape[1]} steps."
+        )
+
+    # Number of steps of each return, fewer at the end of the episode.
+    num_steps = tf.minimum(n_step, tf.reduce_sum(tf.cast(mask, tf.int32), axis=1) - 1)
+    step_mask = tf.sequence_mask(num_steps, n_step)
+
+    rewards = {}
+    discounts = {}
+    for agent in trajectory.rewards.keys():
+        agent_rewards = trajectory.rewards[agent][:, :n_step]
+        agent_discounts = tf.cast(
+            trajectory.discounts[agent][:, :n_step], agent_rewards.dtype
+        )
+        # Broadcast over the trailing dimensions, e.g. the agent dimension of
+        # the stacked layout.
+        agent_step_mask = step_mask
+        agent_num_steps = num_steps
+        for _ in range(agent_rewards.shape.rank - 2):
+            agent_step_mask = agent_step_mask[..., None]
+            agent_num_steps = agent_num_steps[..., None]
+
+        # g^k * d_0 * ... * d_{k-1}, the discount of the reward of step k.
+        reward_discounts = tf.math.cumprod(
+            discount * agent_discounts, axis=1, exclusive=True
+        )
+        rewards[agent] = tf.reduce_sum(
+            tf.cast(agent_step_mask, agent_rewards.dtype)
+            * reward_discounts
+            * agent_rewards,
+            axis=1,
+        )
+        discounts[agent] = tf.reduce_prod(
+            tf.where(agent_step_mask, agent_discounts, tf.ones_like(agent_discounts)),
+            axis=1,
+        ) * tf.pow(
+            tf.cast(discount, agent_rewards.dtype),
+            tf.cast(agent_num_steps - 1, agent_rewards.dtype),
+        )
+
+    def first_step(x: tf.Tensor) -> tf.Tensor:
+        return x[:, 0]
+
+    def next_step(x: tf.Tensor) -> tf.Tensor:
+        # Extras that are only stored for the first step of the window.
+        if x.shape[1] == 1:
+            return x[:, 0]
+        return tf.gather(x, num_steps, axis=1, batch_dims=1)
+
+    return Transition(
+        observations=tree.map_structure(first_step, trajectory.observations),
+        actions=tree.map_structure(first_step, trajectory.actions),
+        rewards=rewards,
+        discounts=discounts,
+        next_observations=tree.map_structure(next_step, trajectory.observations),
+        extras=tree.map_structure(first_step, trajectory.extras),
+        next_extras=tree.map_structure(next_step, trajectory.extras),
+    )
+
+
 def decay_lr_actor_critic(
     learning_rate_scheduler_fn: Optional[Dict[str, Callable[[int], None]]],
     policy_optimizers: Dict,
@@ -176,6 +325,196 @@ def decay_lr(
             optimizer.learning_rate = lr
 
 
+def update_target_networks(
+    online_variables: Sequence[tf.Variable],
+    target_variables: Sequence[tf.Variable],
+    num_steps: tf.Variable,
+    target_averaging: bool,
+    target_update_period: int,
+    target_update_rate: Optional[float] = None,
+) -> None:
+    """Update target variables from their online variables.
+
+    With target averaging every target variable is moved towards its online
+    variable. Without it, all the variables are copied after the same periodic
+    check, instead of one check per network.
+
+    Args:
+        online_variables: variables of the online networks.
+        target_variables: matching variables of the target networks.
+        num_steps: number of trainer steps, used for periodic updates.
+        target_averaging: whether to use polyak averaging instead of copying
+            the online variables every target_update_period steps.
+        target_update_period: number of steps between target updates.
+        target_update_rate: update rate when using averaging.
+
+    Raises:
+        ValueError: if the online and target variables do not match, or the
+            update rate is not between 0 and 1 when using averaging.
+    """
+    if len(online_variables) != len(target_variables):
+        raise ValueError(
+            f"Got {len(online_variables)} online variables and "
+            f"{len(target_variables)} target variables."
+        )
+
+    if target_averaging:
+        if target_update_rate is None or not 0.0 <= target_update_rate <= 1.0:
+            raise ValueError(
+                "target_update_rate should be between 0 and 1 when using target "
+                f"averaging, got {target_update_rate}."
+            )
+        tau = target_update_rate
+        for src, dest in zip(online_variables, target_variables):
+            dest.assign(dest * (1.0 - tau) + src * tau)
+    else:
+        # Make online -> target network update ops.
+        if tf.math.mod(num_steps, target_update_period) == 0:
+            for src, dest in zip(online_variables, target_variables):
+                dest.assign(src)
+
+
+def make_trainer_replicator(num_replicas: int) -> tf.distribute.Strategy:
+    """Create the distribution strategy of a trainer.
+
+    The replicas are placed on the GPUs if there are enough of them. Otherwise
+    the CPU is split into num_replicas logical devices, which is only possible
+    before TensorFlow is initialised in the trainer process.
+
+    Args:
+        num_replicas: number of replicas of the trainer.
+
+    Raises:
+        ValueError: if num_replicas is not positive or there are not enough
+            devices for the replicas.
+
+    Returns:
+        the default strategy for a single replica, otherwise a sonnet
+        Replicator over num_replicas devices.
+    """
+    if num_replicas < 1:
+        raise ValueError(f"num_replicas should be positive, got {num_replicas}.")
+    if num_replicas == 1:
+        return tf.distribute.get_strategy()
+
+    if len(tf.config.list_physical_devices("GPU")) >= num_replicas:
+        devices = [device.name for device in tf.config.list_logical_devices("GPU")]
+    else:
+        cpu = tf.config.list_physical_devices("CPU")[0]
+        try:
+            tf.config.set_logical_device_configuration(
+                cpu, [tf.config.LogicalDeviceConfiguration()] * num_replicas
+            )
+        except RuntimeError:
+            # TensorFlow is already initialised, use the existing devices.
+            pass
+        devices = [device.name for device in tf.config.list_logical_devices("CPU")]
+
+    if len(devices) < num_replicas:
+        raise ValueError(
+            f"Got {num_replicas} trainer replicas but only {len(devices)} devices."
+        )
+    return snt.distribute.Replicator(devices[:num_replicas])
+
+
+def all_reduce_gradients(gradients: Sequence[Optional[tf.Tensor]]) -> List:
+    """Average gradients over the replicas of a trainer.
+
+    Every replica then applies the same update, so the replicas of the networks
+    stay identical. Outside of a replicated trainer the gradients are returned
+    unchanged.
+
+    Args:
+        gradients: gradients of this replica, None for unconnected variables.
+
+    Returns:
+        gradients averaged over the replicas.
+    """
+    replica_context = tf.distribute.get_replica_context()
+    values = [g for g in gradients if g is not None]
+    if (
+        replica_context is None
+        or replica_context.num_replicas_in_sync == 1
+        or not values
+    ):
+        return list(gradients)
+
+    reduced = iter(replica_context.all_reduce(tf.distribute.ReduceOp.MEAN, values))
+    return [None if g is None else next(reduced) for g in gradients]
+
+
+def split_batch(batch: Any, num_splits: int) -> List[Any]:
+    """Split a batch into micro-batches along its leading dimension.
+
+    Args:
+        batch: nest of tensors with a static leading batch dimension, e.g. a
+            reverb.ReplaySample.
+        num_splits: number of micro-batches.
+
+    Raises:
+        ValueError: if the batch size is not divisible by num_splits.
+
+    Returns:
+        the micro-batches, in order.
+    """
+    if num_splits == 1:
+        return [batch]
+    batch_size = tree.flatten(batch)[0].shape[0]
+    if batch_size is None or batch_size % num_splits:
+        raise ValueError(
+            f"The batch size {batch_size} is not divisible into {num_splits} "
+            "micro-batches."
+        )
+    size = batch_size // num_splits
+    return [
+        tree.map_structure(lambda x: x[i * size : (i + 1) * size], batch)
+        for i in range(num_splits)
+    ]
+
+
+def accumulate_gradients(
+    accumulated: Optional[Sequence[Optional[tf.Tensor]]],
+    gradients: Sequence[Optional[tf.Tensor]],
+    scale: float = 1.0,
+) -> List[Optional[tf.Tensor]]:
+    """Add the scaled gradients of a micro-batch to the accumulated gradients.
+
+    Args:
+        accumulated: gradients accumulated so far, None for the first
+            micro-batch.
+        gradients: gradients of the micro-batch, None for unconnected variables.
+        scale: factor the gradients are multiplied with, e.g. one over the
+            number of micro-batches to average them.
+
+    Returns:
+        the accumulated gradients.
+    """
+    if scale != 1.0:
+        gradients = [None if g is None else g * scale for g in gradients]
+    if accumulated is None:
+        return list(gradients)
+    return [None if a is None else a + g for a, g in zip(accumulated, gradients)]
+
+
+def timed_next(iterator: Iterator, stall_time: tf.Variable) -> Any:
+    """Get the next sample of the trainer dataset and time the wait for it.
+
+    Args:
+        iterator: iterator of the trainer dataset.
+        stall_time: float64 variable the seconds spent waiting for the input
+            pipeline are added to.
+
+    Returns:
+        the next sample.
+    """
+    start = tf.timestamp()
+    with tf.control_dependencies([start]):
+        sample = next(iterator)
+    with tf.control_dependencies(tree.flatten(sample)):
+        stall_time.assign_add(tf.timestamp() - start)
+    return sample
+
+
 def non_blocking_sleep(time_in_seconds: int) -> None:
     """Function to sleep for time_in_seconds, without hanging lp program.
 
@@ -315,6 +654,170 @@ def combine_dim(inputs: Union[tf.Tensor, List, Tuple]) -> tf.Tensor:
         return return_list, dims
 
 
+def concat_agents(values: Sequence[Any], axis: int = 0) -> Any:
+    """Concatenate the values of several agents along the batch dimension.
+
+    Args:
+        values: possibly nested tensors of each agent, with the same structure
+            and batch size.
+        axis: the batch dimension, e.g. 1 for time major sequences.
+
+    Returns:
+        the concatenated values, the values of the first agent come first.
+    """
+    return tree.map_structure(lambda *xs: tf.concat(xs, axis=axis), *values)
+
+
+def split_agents(value: Any, agents: Sequence[str], axis: int = 0) -> Dict[str, Any]:
+    """Split values concatenated by `concat_agents` into the values of each agent.
+
+    Args:
+        value: possibly nested tensors, with the agents concatenated along the
+            batch dimension.
+        agents: the agents, in the order they were concatenated.
+        axis: the batch dimension, e.g. 1 for time major sequences.
+
+    Returns:
+        the values of each agent.
+    """
+    num_agents = len(agents)
+    return {
+        agent: tree.map_structure(
+            lambda x: tf.split(x, num_agents, axis=axis)[i], value
+        )
+        for i, agent in enumerate(agents)
+    }
+
+
+def replace_agent(values: tf.Tensor, value: tf.Tensor, index: int) -> tf.Tensor:
+    """Replace the value of one agent in values stacked along the agent dimension.
+
+    The values of the other agents are sliced rather than stacked again, so only
+    the value of the agent is copied into the new tensor.
+
+    Args:
+        values: values of all the agents, stacked along axis 1.
+        value: new value of the agent, without the agent dimension.
+        index: index of the agent in the stacked values.
+
+    Returns:
+        the values with the value of the agent replaced.
+    """
+    num_agents = values.shape[1]
+    before, _, after = tf.split(values, [index, 1, num_agents - index - 1], axis=1)
+    return tf.concat([before, tf.expand_dims(value, 1), after], axis=1)
+
+
+def unroll_agents(
+    networks: Dict[str, Callable],
+    agent_net_keys: Dict[str, str],
+    input_sequences: Dict[str, Any],
+    initial_states: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Unroll recurrent networks over the time major sequences of the agents.
+
+    The sequences of the agents that share a network are concatenated along the
+    batch dimension and unrolled together with `snt.dynamic_unroll`, which
+    compiles to a single while loop, so the size of the graph does not depend on
+    the sequence length.
+
+    Args:
+        networks: recurrent cores per network key, called as
+            `core(inputs, state) -> (outputs, state)`.
+        agent_net_keys: network key of each agent.
+        input_sequences: possibly nested time major inputs of the agents to
+            unroll, with shape [T, B, ...].
+        initial_states: initial core state of each of these agents.
+
+    Returns:
+        the time major output sequence and the final core state of each agent.
+    """
+    groups: Dict[str, List[str]] = {}
+    for agent in input_sequences.keys():
+        groups.setdefault(agent_net_keys[agent], []).append(agent)
+
+    outputs: Dict[str, Any] = {}
+    final_states: Dict[str, Any] = {}
+    for net_key, agents in groups.items():
+        output_sequence, final_state = snt.dynamic_unroll(
+            networks[net_key],
+            concat_agents([input_sequences[agent] for agent in agents], axis=1),
+            concat_agents([initial_states[agent] for agent in agents]),
+        )
+        outputs.update(split_agents(output_sequence, agents, axis=1))
+        final_states.update(split_agents(final_state, agents))
+    return outputs, final_states
+
+
+def split_burn_in(
+    sequences: Any, burn_in_length: int, time_axis: int = 0
+) -> Tuple[Any, Any]:
+    """Split sampled sequences into the burn in steps and the steps to train on.
+
+    Fields that are stored once per item, with a time dimension of length one
+    (see ExtrasStoragePolicy), are kept as they are in both parts.
+
+    Args:
+        sequences: possibly nested sequences, e.g. a sampled Step.
+        burn_in_length: number of steps at the start of the sequences that are
+            only used to refresh the recurrent core states.
+        time_axis: the time dimension, e.g. 1 for batch major sequences.
+
+    Raises:
+        ValueError: if the sequences are not longer than the burn in.
+
+    Returns:
+        the burn in steps and the remaining steps of the sequences.
+    """
+    sequence_length = max(x.shape[time_axis] for x in tree.flatten(sequences))
+    if sequence_length <= burn_in_length:
+        raise ValueError(
+            f"The sequences of length {sequence_length} must be longer than the "
+            f"burn in of {burn_in_length} steps."
+        )
+
+    index = [slice(None)] * time_axis
+
+    def burn_in_steps(x: tf.Tensor) -> tf.Tensor:
+        if x.shape[time_axis] == 1:
+            return x
+        return x[tuple(index + [slice(None, burn_in_length)])]
+
+    def remaining_steps(x: tf.Tensor) -> tf.Tensor:
+        if x.shape[time_axis] == 1:
+            return x
+        return x[tuple(index + [slice(burn_in_length, None)])]
+
+    return (
+        tree.map_structure(burn_in_steps, sequences),
+        tree.map_structure(remaining_steps, sequences),
+    )
+
+
+def burn_in_core_states(
+    networks: Dict[str, Callable],
+    agent_net_keys: Dict[str, str],
+    input_sequences: Dict[str, Any],
+    initial_states: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Refresh the stored core states of the agents over burn in steps.
+
+    The networks are unrolled over the burn in steps, as in R2D2, and the
+    refreshed states are excluded from the gradient computations.
+
+    Args:
+        networks: recurrent cores per network key.
+        agent_net_keys: network key of each agent.
+        input_sequences: time major inputs of the burn in steps of each agent.
+        initial_states: core states stored with the first step of the sequences.
+
+    Returns:
+        the core state of each agent after the burn in steps.
+    """
+    _, states = unroll_agents(networks, agent_net_keys, input_sequences, initial_states)
+    return tree.map_structure(tf.stop_gradient, states)
+
+
 def extract_dim(inputs: Union[tf.Tensor, List, Tuple], dims: tf.Tensor) -> tf.Tensor:
     """Reshape or extract dim of tensor.
 
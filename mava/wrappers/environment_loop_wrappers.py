@@ -157,6 +157,11 @@ class DetailedEpisodeStatistics(EnvironmentLoopStatisticsBase):
         if extra_executor_stats:
             self._running_statistics.update(self._executor.get_stats())
 
+        # Log adder stats, e.g. the time spent waiting for the replay server.
+        adder = getattr(self._executor, "_adder", None)
+        if adder is not None and callable(getattr(adder, "get_stats", None)):
+            self._running_statistics.update(adder.get_stats())
+
 
 class DetailedPerAgentStatistics(DetailedEpisodeStatistics):
     """
@@ -280,6 +285,11 @@ class DetailedPerAgentStatistics(DetailedEpisodeStatistics):
         if extra_executor_stats:
             self._running_statistics.update(self._executor.get_stats())
 
+        # Log adder stats, e.g. the time spent waiting for the replay server.
+        adder = getattr(self._executor, "_adder", None)
+        if adder is not None and callable(getattr(adder, "get_stats", None)):
+            self._running_statistics.update(adder.get_stats())
+
 
 class MonitorParallelEnvironmentLoop(ParallelEnvironmentLoop):
     """A MARL environment loop.
@@ -16,13 +16,15 @@
 """Generic environment loop wrapper to track system statistics"""
 
 import time
-from typing import Any, Dict, List, Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 import numpy as np
 import tensorflow as tf
+import tree
 from acme.utils import loggers
 
 import mava
+from mava.utils import profiling_utils
 from mava.utils import training_utils as train_utils
 from mava.utils.loggers import Logger
 from mava.utils.wrapper_utils import RunningStatistics
@@ -36,8 +38,132 @@ class TrainerWrapperBase(mava.Trainer):
     def __init__(
         self,
         trainer: mava.Trainer,
+        steps_per_call: int = 1,
+        profiling: Optional[profiling_utils.ProfilingConfig] = None,
     ) -> None:
+        if steps_per_call < 1:
+            raise ValueError(
+                f"steps_per_call should be positive, got {steps_per_call}."
+            )
         self._trainer = trainer
+        self._steps_per_call = steps_per_call
+
+        # Phases of the wrapper step, the trainer times the phases of its steps.
+        self._profiling = profiling is not None
+        self._wrapper_timer = profiling_utils.PhaseTimer()
+        self._steps_run = 0
+        self._trace_windows: Optional[profiling_utils.TraceWindows] = None
+        if profiling is not None:
+            self._trace_windows = profiling_utils.TraceWindows(
+                profiling.logdir or self._logger._path("profiles"), profiling
+            )
+            trainer_timer = getattr(trainer, "_phase_timer", None)
+            if trainer_timer is not None:
+                trainer_timer.time_compiled_phases()
+
+        # Trainers created in the scope of a replicator run every step on each of
+        # its replicas, see train_utils.make_trainer_replicator.
+        self._replicator = (
+            tf.distribute.get_strategy() if tf.distribute.has_strategy() else None
+        )
+        self._replica_variables_created = False
+
+    def _run_steps(self) -> Dict[str, Dict[str, Any]]:
+        """Run steps_per_call trainer steps.
+
+        Several steps are run inside a single compiled call, so the counts and
+        variables are only synced once per call.
+
+        Returns:
+            losses of the trainer, averaged over the steps.
+        """
+        if self._trace_windows is not None:
+            self._trace_windows.update(self._steps_run)
+        self._steps_run += self._steps_per_call
+
+        with self._wrapper_timer.phase("train_steps"):
+            if self._replicator is not None:
+                if not self._replica_variables_created:
+                    # A compiled step can not create the optimizer variables
+                    # inside the replicas, so the first step is run eagerly.
+                    self._replica_variables_created = True
+                    return self._replicated_step()
+                return self._compiled_replicated_steps()
+            if self._steps_per_call == 1:
+                return self._step()
+            return self._compiled_steps()
+
+    @tf.function
+    def _compiled_steps(self) -> Dict[str, Dict[str, Any]]:
+        """Run steps_per_call trainer steps in an in-graph loop."""
+        fetches = self._step()
+        for _ in tf.range(self._steps_per_call - 1):
+            fetches = tree.map_structure(tf.add, fetches, self._step())
+        return tree.map_structure(lambda x: x / self._steps_per_call, fetches)
+
+    def _replicated_step(self) -> Dict[str, Dict[str, Any]]:
+        """Run a trainer step on every replica.
+
+        Each replica samples its own batch and the replicas apply the same
+        averaged gradients, see train_utils.all_reduce_gradients. The
+        uncompiled step of the trainer, _step_fn, is run inside the replicas,
+        since a nested tf.function can not synchronise them.
+
+        Returns:
+            losses of the trainer, averaged over the replicas.
+        """
+        replicator = self._replicator
+        assert replicator is not None
+        fetches = replicator.run(self._step_fn)
+        return tree.map_structure(
+            lambda x: replicator.reduce(tf.distribute.ReduceOp.MEAN, x, axis=None),
+            fetches,
+        )
+
+    @tf.function
+    def _compiled_replicated_steps(self) -> Dict[str, Dict[str, Any]]:
+        """Run steps_per_call replicated trainer steps in a compiled call.
+
+        The steps are unrolled, since the replicas can not be synchronised
+        inside an in-graph loop.
+        """
+        fetches = self._replicated_step()
+        for _ in range(self._steps_per_call - 1):
+            fetches = tree.map_structure(tf.add, fetches, self._replicated_step())
+        return tree.map_structure(lambda x: x / self._steps_per_call, fetches)
+
+    def _pop_input_stall_time(self) -> Dict[str, float]:
+        """Get the seconds per step the trainer waited for its dataset.
+
+        The time accumulated by train_utils.timed_next is reset, so every call
+        reports the steps run since the previous one.
+
+        Returns:
+            the input pipeline stall time per step, empty if the trainer does
+                not record it.
+        """
+        stall_time = getattr(self._trainer, "_input_stall_time", None)
+        if stall_time is None:
+            return {}
+        seconds = float(stall_time.numpy()) / self._steps_per_call
+        stall_time.assign(0.0)
+        return {"input_stall_time": seconds}
+
+    def _pop_phase_times(self) -> Dict[str, float]:
+        """Get the seconds per step spent in the phases of the steps.
+
+        The compiled phases of the trainer are timed in-graph, see
+        profiling_utils.PhaseTimer. The times are reset, so every call reports
+        the steps run since the previous one.
+
+        Returns:
+            the time per step of every phase, empty if profiling is disabled.
+        """
+        times = self._wrapper_timer.pop(self._steps_per_call)
+        trainer_timer = getattr(self._trainer, "_phase_timer", None)
+        if trainer_timer is not None:
+            times.update(trainer_timer.pop(self._steps_per_call))
+        return times if self._profiling else {}
 
     def get_variables(self, names: Sequence[str]) -> Dict[str, Dict[str, np.ndarray]]:
         return self._trainer.get_variables(names)
@@ -54,20 +180,23 @@ class TrainerStatisticsBase(TrainerWrapperBase):
     def __init__(
         self,
         trainer: mava.Trainer,
+        steps_per_call: int = 1,
+        profiling: Optional[profiling_utils.ProfilingConfig] = None,
     ) -> None:
-        super().__init__(trainer)
+        super().__init__(trainer, steps_per_call, profiling)
         self._require_loggers = True
 
     def step(self) -> None:
-        # Run the learning step.
-        fetches = self._step()
+        # Run the learning steps.
+        fetches: Dict[str, Any] = self._run_steps()
 
         if self._require_loggers:
             self._create_loggers(list(fetches.keys()))
             self._require_loggers = False
 
         # compute statistics
-        self._compute_statistics(fetches)
+        with self._wrapper_timer.phase("statistics"):
+            self._compute_statistics(fetches)
 
         # Compute elapsed time.
         timestamp = time.time()
@@ -75,11 +204,16 @@ class TrainerStatisticsBase(TrainerWrapperBase):
         self._timestamp: float = timestamp
 
         # Update our counts and record it.
-        counts = self._counter.increment(steps=1, walltime=elapsed_time)
+        counts = self._counter.increment(
+            steps=self._steps_per_call, walltime=elapsed_time
+        )
+        fetches.update(self._pop_input_stall_time())
         fetches.update(counts)
 
         if self._system_checkpointer:
-            train_utils.checkpoint_networks(self._system_checkpointer)
+            with self._wrapper_timer.phase("checkpoint"):
+                train_utils.checkpoint_networks(self._system_checkpointer)
+        fetches.update(self._pop_phase_times())
 
         if self._logger:
             self._logger.write(fetches)
@@ -97,8 +231,10 @@ class DetailedTrainerStatistics(TrainerStatisticsBase):
         trainer: mava.Trainer,
         metrics: List[str] = ["policy_loss"],
         summary_stats: List = ["mean", "max", "min", "var", "std"],
+        steps_per_call: int = 1,
+        profiling: Optional[profiling_utils.ProfilingConfig] = None,
     ) -> None:
-        super().__init__(trainer)
+        super().__init__(trainer, steps_per_call, profiling)
 
         self._metrics = metrics
         self._summary_stats = summary_stats
@@ -158,34 +294,43 @@ class ScaledTrainerStatisticsBase(TrainerWrapperBase):
     def __init__(
         self,
         trainer: mava.Trainer,
+        steps_per_call: int = 1,
+        profiling: Optional[profiling_utils.ProfilingConfig] = None,
     ) -> None:
-        super().__init__(trainer)
+        super().__init__(trainer, steps_per_call, profiling)
         self._require_loggers = True
 
     def step(self) -> None:
-        # Run the learning step.
-        fetches = self._step()
+        # Run the learning steps.
+        fetches: Dict[str, Any] = self._run_steps()
         if self._require_loggers:
             self._create_loggers(list(fetches.keys()))
             self._require_loggers = False
 
         # compute statistics
-        self._compute_statistics(fetches)
+        with self._wrapper_timer.phase("statistics"):
+            self._compute_statistics(fetches)
 
         # Compute elapsed time.
         timestamp = time.time()
         elapsed_time = timestamp - self._timestamp if self._timestamp else 0
         self._timestamp: float = timestamp
 
-        # Update our counts and record it.
-        self._variable_client.add_async(
-            ["trainer_steps", "trainer_walltime"],
-            {"trainer_steps": 1, "trainer_walltime": elapsed_time},
-        )
+        with self._wrapper_timer.phase("variable_client"):
+            # Update our counts and record it.
+            self._variable_client.add_async(
+                ["trainer_steps", "trainer_walltime"],
+                {
+                    "trainer_steps": self._steps_per_call,
+                    "trainer_walltime": elapsed_time,
+                },
+            )
 
-        # Set and get the latest variables
-        self._variable_client.set_and_get_async()
+            # Set and get the latest variables
+            self._variable_client.set_and_get_async()
 
+        fetches.update(self._pop_input_stall_time())
+        fetches.update(self._pop_phase_times())
         fetches.update(self._counts)
 
         if self._logger:
@@ -200,8 +345,10 @@ class ScaledDetailedTrainerStatistics(ScaledTrainerStatisticsBase):
         trainer: mava.Trainer,
         metrics: List[str] = ["policy_loss"],
         summary_stats: List = ["mean", "max", "min", "var", "std"],
+        steps_per_call: int = 1,
+        profiling: Optional[profiling_utils.ProfilingConfig] = None,
     ) -> None:
-        super().__init__(trainer)
+        super().__init__(trainer, steps_per_call, profiling)
 
         self._metrics = metrics
         self._summary_stats = summary_stats
@@ -274,15 +421,16 @@ class MADQNDetailedTrainerStatistics(DetailedTrainerStatistics):
         return self._trainer.get_trainer_steps()  # type: ignore
 
     def step(self) -> None:
-        # Run the learning step.
-        fetches = self._step()
+        # Run the learning steps.
+        fetches: Dict[str, Any] = self._run_steps()
 
         if self._require_loggers:
             self._create_loggers(list(fetches.keys()))
             self._require_loggers = False
 
         # compute statistics
-        self._compute_statistics(fetches)
+        with self._wrapper_timer.phase("statistics"):
+            self._compute_statistics(fetches)
 
         timestamp = time.time()
         elapsed_time = timestamp - self._timestamp if self._timestamp else 0
@@ -290,10 +438,13 @@ class MADQNDetailedTrainerStatistics(DetailedTrainerStatistics):
 
         # Update our counts and record it.
         counts = self._counter.increment(steps=1, walltime=elapsed_time)
+        fetches.update(self._pop_input_stall_time())
         fetches.update(counts)
 
         if self._system_checkpointer:
-            train_utils.checkpoint_networks(self._system_checkpointer)
+            with self._wrapper_timer.phase("checkpoint"):
+                train_utils.checkpoint_networks(self._system_checkpointer)
+        fetches.update(self._pop_phase_times())
 
         fetches["epsilon"] = self.get_epsilon()
         self._trainer._decrement_epsilon()  # type: ignore
@@ -447,10 +598,13 @@ class NetworkStatisticsBase(TrainerWrapperBase):
 
         # Update our counts and record it.
         counts = self._counter.increment(steps=1, walltime=elapsed_time)
+        fetches.update(self._pop_input_stall_time())
         fetches.update(counts)
 
         if self._system_checkpointer:
-            train_utils.checkpoint_networks(self._system_checkpointer)
+            with self._wrapper_timer.phase("checkpoint"):
+                train_utils.checkpoint_networks(self._system_checkpointer)
+        fetches.update(self._pop_phase_times())
 
         if self._logger:
             self._logger.write(fetches)
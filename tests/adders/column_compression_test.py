@@ -0,0 +1,174 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the column compression of the reverb adders."""
+
+from typing import Any, Dict
+
+import dm_env
+import numpy as np
+import pytest
+import tensorflow as tf
+import tree
+from acme import specs as acme_specs
+from dm_env import specs as dm_specs
+
+from mava import specs
+from mava.adders import reverb as reverb_adders
+from mava.adders.numpy import NumpyReplayClient, NumpyReplayTable
+from mava.adders.reverb import utils as reverb_utils
+from mava.utils.wrapper_utils import parameterized_restart
+
+AGENTS = ["agent_0", "agent_1"]
+COLUMN_COMPRESSION = {
+    "observations": reverb_adders.ColumnCompression(max_chunk_length=4, uint8=True)
+}
+
+
+def _observation(t: int) -> Dict[str, np.ndarray]:
+    # Image like observations, converted to floats by the preprocessing.
+    return {
+        agent: np.full((3, 3), 100 + 10 * t + i, dtype=np.float32)
+        for i, agent in enumerate(AGENTS)
+    }
+
+
+def _run_episode(adder: Any, num_steps: int = 5) -> None:
+    def per_agent(value: float) -> Dict[str, np.float32]:
+        return {agent: np.float32(value) for agent in AGENTS}
+
+    extras = {"network_int_keys": {agent: np.array(0, np.int32) for agent in AGENTS}}
+    adder.add_first(
+        parameterized_restart(per_agent(0.0), per_agent(1.0), _observation(0)),
+        extras,
+    )
+    for t in range(1, num_steps + 1):
+        step_type = dm_env.StepType.LAST if t == num_steps else dm_env.StepType.MID
+        adder.add(
+            {agent: np.int64(t % 3) for agent in AGENTS},
+            dm_env.TimeStep(step_type, per_agent(t), per_agent(1.0), _observation(t)),
+            extras,
+        )
+
+
+def _environment_spec() -> specs.MAEnvironmentSpec:
+    agent_spec = acme_specs.EnvironmentSpec(
+        observations=dm_specs.Array((3, 3), np.float32),
+        actions=dm_specs.DiscreteArray(3, dtype=np.int64),
+        rewards=dm_specs.Array((), np.float32),
+        discounts=dm_specs.BoundedArray((), np.float32, 0.0, 1.0),
+    )
+    return specs.MAEnvironmentSpec(
+        environment=None,
+        specs={agent: agent_spec for agent in AGENTS},
+        extra_specs={},
+    )
+
+
+EXTRAS_SPEC = {
+    "network_int_keys": {agent: dm_specs.Array((), np.int32) for agent in AGENTS}
+}
+
+
+def _assert_matches_signature(signature: Any, data: Any) -> None:
+    for spec, value in zip(tree.flatten(signature), tree.flatten(data)):
+        assert spec.is_compatible_with(tf.convert_to_tensor(value[0]))
+
+
+# Test that the uint8 columns are stored as uint8 and restored when sampled.
+def test_transition_adder() -> None:
+    table = NumpyReplayTable.queue(reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100)
+    _run_episode(
+        reverb_adders.ParallelNStepTransitionAdder(
+            NumpyReplayClient([table]),
+            n_step=2,
+            discount=0.9,
+            column_compression=COLUMN_COMPRESSION,
+        )
+    )
+    data = table.sample(table.size()).data
+    assert data.observations["agent_0"].dtype == np.uint8
+    assert data.next_observations["agent_1"].dtype == np.uint8
+    assert data.rewards["agent_0"].dtype == np.float32
+
+    signature = reverb_utils.uint8_signature(
+        reverb_adders.ParallelNStepTransitionAdder.signature(
+            _environment_spec(),
+            EXTRAS_SPEC,
+            reverb_adders.DEFAULT_EXTRAS_STORAGE_POLICIES,
+        ),
+        COLUMN_COMPRESSION,
+    )
+    assert signature.observations["agent_0"].dtype == tf.uint8
+    assert signature.rewards["agent_0"].dtype == tf.float32
+    _assert_matches_signature(signature, data)
+
+    restored = reverb_utils.restore_uint8_columns(
+        tree.map_structure(tf.convert_to_tensor, data), COLUMN_COMPRESSION
+    )
+    assert restored.observations["agent_0"].dtype == tf.float32
+    np.testing.assert_array_equal(
+        restored.next_observations["agent_1"].numpy(),
+        data.next_observations["agent_1"].astype(np.float32),
+    )
+    np.testing.assert_array_equal(
+        restored.rewards["agent_0"].numpy(), data.rewards["agent_0"]
+    )
+
+
+# Test the column compression with sequences, which reference several steps.
+def test_sequence_adder() -> None:
+    table = NumpyReplayTable.queue(reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100)
+    _run_episode(
+        reverb_adders.ParallelSequenceAdder(
+            NumpyReplayClient([table]),
+            sequence_length=3,
+            period=2,
+            column_compression=COLUMN_COMPRESSION,
+        ),
+    )
+    data = table.sample(table.size()).data
+    assert data.observations["agent_0"].dtype == np.uint8
+    np.testing.assert_array_equal(
+        data.observations["agent_1"][0, :, 0, 0], [101, 111, 121]
+    )
+
+    signature = reverb_utils.uint8_signature(
+        reverb_adders.ParallelSequenceAdder.signature(
+            _environment_spec(),
+            3,
+            EXTRAS_SPEC,
+            reverb_adders.DEFAULT_EXTRAS_STORAGE_POLICIES,
+        ),
+        COLUMN_COMPRESSION,
+    )
+    _assert_matches_signature(signature.observations, data.observations)
+
+
+# Test that the items are unchanged without column compression.
+@pytest.mark.parametrize("column_compression", [None, {}])
+def test_no_compression(column_compression: Any) -> None:
+    table = NumpyReplayTable.queue(reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100)
+    _run_episode(
+        reverb_adders.ParallelNStepTransitionAdder(
+            NumpyReplayClient([table]),
+            n_step=1,
+            discount=0.9,
+            column_compression=column_compression,
+        )
+    )
+    data = table.sample(table.size()).data
+    assert data.observations["agent_0"].dtype == np.float32
+    assert reverb_utils.restore_uint8_columns(data, column_compression) is data
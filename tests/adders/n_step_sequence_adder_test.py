@@ -0,0 +1,185 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the n-step returns computed from windows of single steps."""
+
+from typing import Any, Dict
+
+import dm_env
+import numpy as np
+import pytest
+import tensorflow as tf
+import tree
+from acme import specs as acme_specs
+from dm_env import specs as dm_specs
+
+from mava import specs
+from mava.adders import reverb as reverb_adders
+from mava.adders.numpy import NumpyReplayClient, NumpyReplayTable
+from mava.utils.training_utils import n_step_transition_from_sequence
+from mava.utils.wrapper_utils import parameterized_restart
+
+AGENTS = ["agent_0", "agent_1"]
+DISCOUNT = 0.9
+
+
+def _run_episode(
+    adder: reverb_adders.ReverbParallelAdder, final_discount: float, num_steps: int
+) -> None:
+    def observation(t: int) -> Dict[str, np.ndarray]:
+        return {agent: np.full((2,), t, dtype=np.float32) for agent in AGENTS}
+
+    def per_agent(value: float) -> Dict[str, np.float32]:
+        return {agent: np.float32(value) for agent in AGENTS}
+
+    extras = {"network_int_keys": {agent: np.array(0, np.int32) for agent in AGENTS}}
+
+    adder.add_first(
+        parameterized_restart(per_agent(0.0), per_agent(1.0), observation(0)), extras
+    )
+    for t in range(1, num_steps + 1):
+        step_type = dm_env.StepType.LAST if t == num_steps else dm_env.StepType.MID
+        discount = final_discount if t == num_steps else 1.0
+        adder.add(
+            per_agent(t),
+            dm_env.TimeStep(
+                step_type, per_agent(t), per_agent(discount), observation(t)
+            ),
+            extras,
+        )
+
+
+def _sample_all(table: NumpyReplayTable) -> Any:
+    return table.sample(table.size()).data
+
+
+# Test that the returns match the ones of the n-step transition adder.
+@pytest.mark.parametrize("final_discount", [0.0, 1.0])
+@pytest.mark.parametrize("n_step", [1, 3])
+def test_matches_transition_adder(final_discount: float, n_step: int) -> None:
+    num_steps = 5
+
+    transition_table = NumpyReplayTable.queue(
+        reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100
+    )
+    _run_episode(
+        reverb_adders.ParallelNStepTransitionAdder(
+            NumpyReplayClient([transition_table]), n_step=n_step, discount=DISCOUNT
+        ),
+        final_discount,
+        num_steps,
+    )
+    sequence_table = NumpyReplayTable.queue(
+        reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100
+    )
+    _run_episode(
+        reverb_adders.ParallelNStepSequenceAdder(
+            NumpyReplayClient([sequence_table]), n_step=n_step
+        ),
+        final_discount,
+        num_steps,
+    )
+
+    sequences = tree.map_structure(tf.convert_to_tensor, _sample_all(sequence_table))
+    # One window per step of the episode.
+    assert sequences.observations["agent_0"].shape[:2] == (num_steps, n_step + 1)
+    transitions = n_step_transition_from_sequence(sequences, n_step, DISCOUNT)
+
+    # The transition adder also adds shorter transitions from the first step,
+    # so transitions are matched by their first and next observation.
+    expected = _sample_all(transition_table)
+    expected_index = {
+        (int(start[0]), int(end[0])): i
+        for i, (start, end) in enumerate(
+            zip(
+                expected.observations["agent_0"],
+                expected.next_observations["agent_0"],
+            )
+        )
+    }
+    for i in range(num_steps):
+        key = (
+            int(transitions.observations["agent_0"][i, 0]),
+            int(transitions.next_observations["agent_0"][i, 0]),
+        )
+        j = expected_index[key]
+        for agent in AGENTS:
+            np.testing.assert_allclose(
+                transitions.rewards[agent][i], expected.rewards[agent][j], rtol=1e-6
+            )
+            np.testing.assert_allclose(
+                transitions.discounts[agent][i],
+                expected.discounts[agent][j],
+                rtol=1e-6,
+            )
+            np.testing.assert_array_equal(
+                transitions.actions[agent][i], expected.actions[agent][j]
+            )
+
+
+# Test that shorter returns can be computed from the same windows.
+def test_shorter_returns() -> None:
+    table = NumpyReplayTable.queue(reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100)
+    _run_episode(
+        reverb_adders.ParallelNStepSequenceAdder(NumpyReplayClient([table]), n_step=3),
+        final_discount=0.0,
+        num_steps=5,
+    )
+    sequences = tree.map_structure(tf.convert_to_tensor, _sample_all(table))
+
+    transitions = n_step_transition_from_sequence(sequences, 1, DISCOUNT)
+    np.testing.assert_array_equal(transitions.rewards["agent_0"], [1, 2, 3, 4, 5])
+    np.testing.assert_array_equal(
+        transitions.next_observations["agent_0"][:, 0], [1, 2, 3, 4, 5]
+    )
+
+    with pytest.raises(ValueError):
+        n_step_transition_from_sequence(sequences, 4, DISCOUNT)
+
+
+# Test that the signature of the windows can be given the number of steps of the
+# returns or the length of the windows, and matches the stored windows.
+def test_signature() -> None:
+    agent_spec = acme_specs.EnvironmentSpec(
+        observations=dm_specs.Array((2,), np.float32),
+        actions=dm_specs.Array((), np.float32),
+        rewards=dm_specs.Array((), np.float32),
+        discounts=dm_specs.BoundedArray((), np.float32, 0.0, 1.0),
+    )
+    environment_spec = specs.MAEnvironmentSpec(
+        environment=None,
+        specs={agent: agent_spec for agent in AGENTS},
+        extra_specs={},
+    )
+    extras_spec = {
+        "network_int_keys": {agent: dm_specs.Array((), np.int32) for agent in AGENTS}
+    }
+    signature = reverb_adders.ParallelNStepSequenceAdder.signature(
+        environment_spec, extras_spec=extras_spec, n_step=3
+    )
+    assert signature == reverb_adders.ParallelNStepSequenceAdder.signature(
+        environment_spec, 4, extras_spec
+    )
+
+    table = NumpyReplayTable.queue(reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100)
+    _run_episode(
+        reverb_adders.ParallelNStepSequenceAdder(NumpyReplayClient([table]), n_step=3),
+        final_discount=0.0,
+        num_steps=5,
+    )
+    data = _sample_all(table)
+    tree.assert_same_structure(signature, data)
+    for spec, value in zip(tree.flatten(signature), tree.flatten(data)):
+        assert spec.is_compatible_with(tf.convert_to_tensor(value[0]))
@@ -0,0 +1,234 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the in-process NumPy replay backend."""
+
+from typing import Dict, Tuple, Union
+
+import dm_env
+import numpy as np
+import pytest
+import tensorflow as tf
+import tree
+from absl.testing import parameterized
+from acme.adders.reverb import test_utils
+from acme.adders.reverb.sequence import EndBehavior
+from acme.specs import EnvironmentSpec
+from acme.utils import tree_utils
+
+from mava import specs
+from mava.adders import reverb as reverb_adders
+from mava.adders.numpy import (
+    NumpyReplayClient,
+    NumpyReplayTable,
+    SampleToInsertRatio,
+)
+from mava.utils.wrapper_utils import parameterized_restart, parameterized_termination
+from tests.adders.sequence_adders_test_data import TEST_CASES
+
+
+class TestNumpyReplayTable:
+    # Test that the oldest items are overwritten once the table is full.
+    def test_ring_buffer(self) -> None:
+        table = NumpyReplayTable.queue("queue", max_size=10)
+        for i in range(3):
+            table.insert({"x": np.full((2,), i, dtype=np.float32)})
+        sample = table.sample(2)
+        np.testing.assert_array_equal(sample.data["x"][:, 0], [0, 1])
+        np.testing.assert_array_equal(sample.keys, [0, 1])
+        # Sampling from a queue removes the items.
+        assert table.size() == 1
+
+        table = NumpyReplayTable("uniform", max_size=3, seed=0)
+        for i in range(5):
+            table.insert({"x": np.int32(i)})
+        assert table.size() == 3
+        values = table.sample(100).data["x"]
+        assert set(values.tolist()) == {2, 3, 4}
+
+    # Test that the rate limiter blocks inserts and samples.
+    def test_sample_to_insert_ratio(self) -> None:
+        table = NumpyReplayTable(
+            "table",
+            max_size=100,
+            rate_limiter=SampleToInsertRatio(
+                samples_per_insert=1.0, min_size_to_sample=2, error_buffer=1.0
+            ),
+        )
+        table.insert(np.float32(0.0))
+        assert not table.can_sample()
+        table.insert(np.float32(1.0))
+        assert table.can_sample()
+        table.insert(np.float32(2.0))
+        # The executors can not get too far ahead of the trainer.
+        assert not table.can_insert()
+        with pytest.raises(TimeoutError):
+            table.insert(np.float32(3.0), timeout=0.01)
+        table.sample(1)
+        assert table.can_insert()
+
+    # Test that items whose shapes differ from the table items are rejected.
+    def test_variable_length_items(self) -> None:
+        table = NumpyReplayTable("table", max_size=10)
+        table.insert({"x": np.zeros((3, 2), dtype=np.float32)})
+        with pytest.raises(ValueError):
+            table.insert({"x": np.zeros((2, 2), dtype=np.float32)})
+        assert table.size() == 1
+
+
+# The numpy tables store fixed shape items, truncated sequences are not supported,
+# see test_variable_length_items.
+FIXED_LENGTH_TEST_CASES = [
+    case for case in TEST_CASES if case.get("end_behavior") != EndBehavior.TRUNCATE
+]
+
+
+class NumpySequenceAdderTest(parameterized.TestCase):
+    # Test that the reverb adders write the same items to the numpy tables.
+    @parameterized.named_parameters(*FIXED_LENGTH_TEST_CASES)
+    def test_adder(
+        self,
+        sequence_length: int,
+        period: int,
+        first: Union[Tuple, dm_env.TimeStep],
+        steps: Tuple,
+        expected_sequences: Tuple,
+        agents: Dict,
+        end_behavior: EndBehavior = EndBehavior.ZERO_PAD,
+        repeat_episode_times: int = 1,
+    ) -> None:
+        table = NumpyReplayTable.queue(
+            reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=1000
+        )
+        adder = reverb_adders.ParallelSequenceAdder(
+            NumpyReplayClient([table]),
+            sequence_length=sequence_length,
+            period=period,
+            end_of_episode_behavior=end_behavior,
+        )
+
+        for _ in range(repeat_episode_times):
+            if type(first) == tuple:
+                first, extras = first
+                adder.add_first(first, extras)
+            else:
+                adder.add_first(first)
+            for step in steps[:-1]:
+                action, ts = step[0], step[1]
+                extras = step[2] if len(step) >= 3 else ()
+                adder.add(action, next_timestep=ts, next_extras=extras)
+            adder.add(*steps[-1])
+
+        # The expected sequences cover all the episodes.
+        expected_items = expected_sequences
+        assert table.size() == len(expected_items)
+        observed_items = table.sample(len(expected_items)).data
+
+        for i, expected_item in enumerate(expected_items):
+            expected_item = tree_utils.stack_sequence_fields(expected_item)
+            observed_item = tree.map_structure(lambda x: x[i], observed_items)
+            tree.map_structure(
+                np.testing.assert_array_almost_equal,
+                tree.flatten(expected_item),
+                tree.flatten(observed_item),
+            )
+
+
+class TestExtrasStoragePolicies:
+    # Test that only the first step of the sparse extras is stored per item.
+    def test_sequence_adder(self) -> None:
+        agents = ["agent_0", "agent_1"]
+        sequence_length = 3
+
+        def observation(t: int) -> Dict[str, np.ndarray]:
+            return {agent: np.full((2,), t, dtype=np.float32) for agent in agents}
+
+        def extras(t: int) -> Dict[str, Dict[str, np.ndarray]]:
+            return {
+                "core_states": {
+                    agent: np.full((4,), t, dtype=np.float32) for agent in agents
+                },
+                "network_int_keys": {
+                    agent: np.array(t, dtype=np.int32) for agent in agents
+                },
+            }
+
+        actions = {agent: 0.0 for agent in agents}
+        rewards = {agent: 1.0 for agent in agents}
+        discounts = {agent: 1.0 for agent in agents}
+
+        table = NumpyReplayTable.queue(
+            reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100
+        )
+        adder = reverb_adders.ParallelSequenceAdder(
+            NumpyReplayClient([table]),
+            sequence_length=sequence_length,
+            period=1,
+            extras_storage_policies=reverb_adders.DEFAULT_EXTRAS_STORAGE_POLICIES,
+        )
+
+        adder.add_first(
+            parameterized_restart(rewards, discounts, observation(0)), extras(0)
+        )
+        for t in range(1, 5):
+            adder.add(
+                actions,
+                dm_env.transition(
+                    reward=rewards, observation=observation(t), discount=discounts
+                ),
+                extras(t),
+            )
+        adder.add(
+            actions,
+            parameterized_termination(
+                rewards, {agent: 0.0 for agent in agents}, observation(5)
+            ),
+            extras(5),
+        )
+
+        items = table.sample(table.size()).data
+        first_observations = items.observations["agent_0"][:, 0, 0]
+        for agent in agents:
+            # The recurrent state at the start of each sequence.
+            assert items.extras["core_states"][agent].shape[1:] == (1, 4)
+            np.testing.assert_array_equal(
+                items.extras["core_states"][agent][:, 0, 0], first_observations
+            )
+            # The network keys recorded at the start of the episode.
+            assert items.extras["network_int_keys"][agent].shape[1:] == (1,)
+            np.testing.assert_array_equal(items.extras["network_int_keys"][agent], 0)
+        assert items.observations["agent_0"].shape[1] == sequence_length
+
+        # The items match the signature of the table.
+        agent_specs = {
+            agent: EnvironmentSpec(
+                observations=test_utils._numeric_to_spec(observation(0)[agent]),
+                actions=test_utils._numeric_to_spec(actions[agent]),
+                rewards=test_utils._numeric_to_spec(rewards[agent]),
+                discounts=test_utils._numeric_to_spec(discounts[agent]),
+            )
+            for agent in agents
+        }
+        extras_spec = tree.map_structure(test_utils._numeric_to_spec, extras(0))
+        signature = reverb_adders.ParallelSequenceAdder.signature(
+            specs.MAEnvironmentSpec(
+                environment=None, specs=agent_specs, extra_specs=extras_spec
+            ),
+            sequence_length,
+            extras_spec,
+            reverb_adders.DEFAULT_EXTRAS_STORAGE_POLICIES,
+        )
+        for spec, value in zip(tree.flatten(signature), tree.flatten(items)):
+            assert spec.is_compatible_with(tf.convert_to_tensor(value[0]))
@@ -0,0 +1,109 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the datasets that sample from Reverb tables."""
+
+import collections
+from typing import Iterator
+
+import numpy as np
+import pytest
+import reverb
+import tensorflow as tf
+
+from mava.adders import reverb as reverb_adders
+
+TABLE = "trainer_0"
+Item = collections.namedtuple("Item", ["observations", "rewards"])
+COLUMN_COMPRESSION = {
+    "observations": reverb_adders.ColumnCompression(max_chunk_length=1, uint8=True)
+}
+
+
+@pytest.fixture
+def server() -> Iterator[reverb.Server]:
+    signature = Item(
+        observations=tf.TensorSpec([3], tf.uint8),
+        rewards=tf.TensorSpec([], tf.float32),
+    )
+    server = reverb.Server(
+        [
+            reverb.Table(
+                name=TABLE,
+                sampler=reverb.selectors.Uniform(),
+                remover=reverb.selectors.Fifo(),
+                max_size=100,
+                rate_limiter=reverb.rate_limiters.MinSize(1),
+                signature=signature,
+            )
+        ]
+    )
+    client = reverb.Client(f"localhost:{server.port}")
+    with client.trajectory_writer(num_keep_alive_refs=1) as writer:
+        for i in range(10):
+            writer.append(
+                {
+                    "observations": np.full(3, i, np.uint8),
+                    "rewards": np.float32(i),
+                }
+            )
+            writer.create_item(
+                TABLE,
+                1.0,
+                Item(
+                    observations=writer.history["observations"][-1],
+                    rewards=writer.history["rewards"][-1],
+                ),
+            )
+    yield server
+    server.stop()
+
+
+class TestMakeReverbDataset:
+    # Test that the readers batch the items and the uint8 columns are restored,
+    # with the parallelism set or tuned by tf.data.
+    @pytest.mark.parametrize("num_readers", [1, 3])
+    @pytest.mark.parametrize("autotune", [False, True])
+    def test_batches(
+        self, server: reverb.Server, num_readers: int, autotune: bool
+    ) -> None:
+        dataset = reverb_adders.make_reverb_dataset(
+            server_address=f"localhost:{server.port}",
+            table=TABLE,
+            batch_size=4,
+            num_readers=num_readers,
+            prefetch_size=2,
+            column_compression=COLUMN_COMPRESSION,
+            num_cast_calls=2,
+            autotune=autotune,
+        )
+        for sample in dataset.take(3):
+            assert sample.data.observations.dtype == tf.float32
+            assert sample.data.observations.shape == (4, 3)
+            # Every observation holds the reward of its item.
+            np.testing.assert_array_equal(
+                sample.data.observations.numpy(),
+                np.repeat(sample.data.rewards.numpy()[:, None], 3, axis=1),
+            )
+
+    # Test that the number of readers is checked.
+    def test_invalid_readers(self, server: reverb.Server) -> None:
+        with pytest.raises(ValueError):
+            reverb_adders.make_reverb_dataset(
+                server_address=f"localhost:{server.port}",
+                table=TABLE,
+                batch_size=4,
+                num_readers=0,
+            )
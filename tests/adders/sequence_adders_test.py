@@ -37,3 +37,39 @@ class SequenceAdderTest(MultiAgentAdderTestMixin, parameterized.TestCase):
             end_behavior=end_behavior,
             agents=agents,
         )
+
+    @parameterized.named_parameters(*TEST_CASES)
+    def test_adder_with_flush_policy(
+        self,
+        sequence_length: int,
+        period: int,
+        first: Union[Tuple, dm_env.TimeStep],
+        steps: Tuple,
+        expected_sequences: Tuple,
+        agents: Dict,
+        end_behavior: EndBehavior = EndBehavior.ZERO_PAD,
+        repeat_episode_times: int = 1,
+    ) -> None:
+        # Flushing less often should not change the items that are written.
+        adder = reverb_adders.ParallelSequenceAdder(
+            self.client,
+            sequence_length=sequence_length,
+            period=period,
+            end_of_episode_behavior=end_behavior,
+            flush_policy=reverb_adders.FlushPolicy(
+                every_n_items=3, max_bytes=1024, max_seconds=60.0
+            ),
+        )
+        super().run_test_adder(
+            adder=adder,
+            first=first,
+            steps=steps,
+            expected_items=expected_sequences,
+            repeat_episode_times=repeat_episode_times,
+            end_behavior=end_behavior,
+            agents=agents,
+        )
+        stats = adder.get_stats()
+        # Like `run_test_adder`, the expected sequences cover all the episodes.
+        assert stats["adder_items_created"] == len(expected_sequences)
+        assert stats["adder_flush_blocked_time"] >= 0.0
@@ -0,0 +1,241 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the stacked agent layout."""
+
+from typing import Any, Dict
+
+import dm_env
+import numpy as np
+import pytest
+import tensorflow as tf
+import tree
+from acme import specs as acme_specs
+from dm_env import specs as dm_specs
+
+from mava import specs
+from mava.adders import reverb as reverb_adders
+from mava.adders.numpy import NumpyReplayClient, NumpyReplayTable
+from mava.types import OLT
+from mava.utils import stacking_utils
+from mava.utils.training_utils import n_step_transition_from_sequence
+from mava.utils.wrapper_utils import parameterized_restart
+
+AGENT_NET_KEYS = {
+    "agent_0": "network_0",
+    "agent_1": "network_0",
+    "agent_2": "network_1",
+}
+AGENTS = list(AGENT_NET_KEYS.keys())
+AGENT_GROUPS = stacking_utils.make_agent_groups(AGENT_NET_KEYS)
+DISCOUNT = 0.9
+
+
+def _observation(t: int) -> Dict[str, OLT]:
+    return {
+        agent: OLT(
+            observation=np.full((2,), 10 * t + i, dtype=np.float32),
+            legal_actions=np.ones((3,), dtype=np.float32),
+            terminal=np.zeros((1,), dtype=np.float32),
+        )
+        for i, agent in enumerate(AGENTS)
+    }
+
+
+def _per_agent(value: float) -> Dict[str, np.float32]:
+    return {agent: np.float32(value + i) for i, agent in enumerate(AGENTS)}
+
+
+def _run_episode(adder: Any, num_steps: int = 5) -> None:
+    extras = {"network_int_keys": {agent: np.array(0, np.int32) for agent in AGENTS}}
+    adder.add_first(
+        parameterized_restart(_per_agent(0.0), _per_agent(1.0), _observation(0)),
+        extras,
+    )
+    for t in range(1, num_steps + 1):
+        step_type = dm_env.StepType.LAST if t == num_steps else dm_env.StepType.MID
+        discount = 0.0 if t == num_steps else 1.0
+        adder.add(
+            {agent: np.int64(t % 3) for agent in AGENTS},
+            dm_env.TimeStep(
+                step_type,
+                _per_agent(t),
+                {agent: np.float32(discount) for agent in AGENTS},
+                _observation(t),
+            ),
+            extras,
+        )
+
+
+def _environment_spec() -> specs.MAEnvironmentSpec:
+    agent_spec = acme_specs.EnvironmentSpec(
+        observations=OLT(
+            observation=dm_specs.Array((2,), np.float32),
+            legal_actions=dm_specs.Array((3,), np.float32),
+            terminal=dm_specs.Array((1,), np.float32),
+        ),
+        actions=dm_specs.DiscreteArray(3, dtype=np.int64),
+        rewards=dm_specs.Array((), np.float32),
+        discounts=dm_specs.BoundedArray((), np.float32, 0.0, 1.0),
+    )
+    return specs.MAEnvironmentSpec(
+        environment=None,
+        specs={agent: agent_spec for agent in AGENTS},
+        extra_specs={},
+    )
+
+
+class TestStackingUtils:
+    # Test that the agents are grouped by network and stacked in order.
+    def test_stack_and_unstack(self) -> None:
+        assert AGENT_GROUPS == {
+            "network_0": ["agent_0", "agent_1"],
+            "network_1": ["agent_2"],
+        }
+        stacked = stacking_utils.stack_agents(_observation(1), AGENT_GROUPS)
+        assert stacked["network_0"].observation.shape == (2, 2)
+        assert stacked["network_1"].legal_actions.shape == (1, 3)
+        np.testing.assert_array_equal(stacked["network_0"].observation[:, 0], [10, 11])
+
+        unstacked = stacking_utils.unstack_agents(stacked, AGENT_GROUPS)
+        tree.map_structure(np.testing.assert_array_equal, unstacked, _observation(1))
+
+    # Test that the specs get a leading agent dimension.
+    def test_stack_environment_spec(self) -> None:
+        stacked_spec = stacking_utils.stack_environment_spec(
+            _environment_spec(), AGENT_GROUPS
+        )
+        assert stacked_spec.get_agent_ids() == ["network_0", "network_1"]
+        network_spec = stacked_spec.get_agent_specs()["network_0"]
+        assert network_spec.observations.observation.shape == (2, 2)
+        assert network_spec.actions.shape == (2,)
+        assert network_spec.actions.dtype == np.int64
+
+        # Agents of the same network need the same specs.
+        agent_specs = dict(_environment_spec().get_agent_specs())
+        agent_specs["agent_1"] = agent_specs["agent_1"]._replace(
+            rewards=dm_specs.Array((2,), np.float32)
+        )
+        with pytest.raises(ValueError):
+            stacking_utils.stack_agent_specs(agent_specs, AGENT_GROUPS)
+
+
+class TestStackedAgentsAdder:
+    # Test that the stacked items hold the same experience as the per agent items.
+    def test_transition_adder(self) -> None:
+        table = NumpyReplayTable.queue(
+            reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100
+        )
+        _run_episode(
+            reverb_adders.ParallelNStepTransitionAdder(
+                NumpyReplayClient([table]), n_step=2, discount=DISCOUNT
+            )
+        )
+        stacked_table = NumpyReplayTable.queue(
+            reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100
+        )
+        _run_episode(
+            reverb_adders.StackedAgentsAdder(
+                reverb_adders.ParallelNStepTransitionAdder(
+                    NumpyReplayClient([stacked_table]), n_step=2, discount=DISCOUNT
+                ),
+                AGENT_GROUPS,
+            )
+        )
+
+        num_items = table.size()
+        assert stacked_table.size() == num_items
+        expected = table.sample(num_items).data
+        stacked = stacked_table.sample(num_items).data
+        assert set(stacked.observations.keys()) == {"network_0", "network_1"}
+        assert stacked.rewards["network_0"].shape == (num_items, 2)
+
+        for field in ["observations", "next_observations", "actions", "rewards"]:
+            unstacked = stacking_utils.unstack_agents(
+                getattr(stacked, field), AGENT_GROUPS, axis=1
+            )
+            tree.map_structure(
+                np.testing.assert_allclose, unstacked, getattr(expected, field)
+            )
+
+        # The items match the signature of the stacked table.
+        signature = reverb_adders.ParallelNStepTransitionAdder.signature(
+            stacking_utils.stack_environment_spec(_environment_spec(), AGENT_GROUPS),
+            stacking_utils.stack_extras_spec(
+                {
+                    "network_int_keys": {
+                        agent: dm_specs.Array((), np.int32) for agent in AGENTS
+                    }
+                },
+                AGENT_GROUPS,
+            ),
+            reverb_adders.DEFAULT_EXTRAS_STORAGE_POLICIES,
+        )
+        for spec, value in zip(tree.flatten(signature), tree.flatten(stacked)):
+            assert spec.is_compatible_with(tf.convert_to_tensor(value[0]))
+
+    # Test that the trainer side n-step returns work with stacked windows.
+    def test_n_step_sequence_adder(self) -> None:
+        table = NumpyReplayTable.queue(
+            reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100
+        )
+        _run_episode(
+            reverb_adders.ParallelNStepSequenceAdder(
+                NumpyReplayClient([table]), n_step=3
+            )
+        )
+        stacked_table = NumpyReplayTable.queue(
+            reverb_adders.DEFAULT_PRIORITY_TABLE, max_size=100
+        )
+        _run_episode(
+            reverb_adders.StackedAgentsAdder(
+                reverb_adders.ParallelNStepSequenceAdder(
+                    NumpyReplayClient([stacked_table]), n_step=3
+                ),
+                AGENT_GROUPS,
+            )
+        )
+
+        def transitions(sample_table: NumpyReplayTable) -> Any:
+            sequences = tree.map_structure(
+                tf.convert_to_tensor, sample_table.sample(sample_table.size()).data
+            )
+            return n_step_transition_from_sequence(sequences, 2, DISCOUNT)
+
+        expected = transitions(table)
+        stacked = transitions(stacked_table)
+        for field in ["rewards", "discounts", "next_observations"]:
+            unstacked = stacking_utils.unstack_agents(
+                getattr(stacked, field), AGENT_GROUPS, axis=1
+            )
+            tree.map_structure(
+                lambda x, y: np.testing.assert_allclose(x.numpy(), y.numpy()),
+                unstacked,
+                getattr(expected, field),
+            )
+
+    # Test that the agents can not be routed to separate tables.
+    def test_table_network_config(self) -> None:
+        adder = reverb_adders.ParallelNStepTransitionAdder(
+            NumpyReplayClient(
+                [NumpyReplayTable.queue("trainer", max_size=100)],
+            ),
+            n_step=1,
+            discount=DISCOUNT,
+            net_ids_to_keys=["network_0", "network_1"],
+            table_network_config={"trainer": ["network_0", "network_0", "network_1"]},
+        )
+        with pytest.raises(ValueError):
+            reverb_adders.StackedAgentsAdder(adder, AGENT_GROUPS)
@@ -0,0 +1,98 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the table routing of the Reverb adders."""
+
+from mava import types as mava_types
+from mava.adders.reverb.base import (
+    Step,
+    make_table_routing_plan,
+    route_trajectory,
+)
+
+
+class TestTableRouting:
+    # Test that every matching group of agents becomes an item.
+    def test_make_table_routing_plan(self) -> None:
+        trajectory_net_keys = {
+            "agent_0": "network_0",
+            "agent_1": "network_1",
+            "agent_2": "network_0",
+            "agent_3": "network_1",
+        }
+        table_network_config = {
+            "trainer_0": ["network_0", "network_1"],
+            "trainer_1": ["network_1"],
+            "trainer_2": ["network_2"],
+        }
+        plan = make_table_routing_plan(trajectory_net_keys, table_network_config)
+
+        assert plan["trainer_0"] == [
+            [("agent_0", "agent_2"), ("agent_1", "agent_3")],
+            [("agent_0", "agent_0"), ("agent_1", "agent_1")],
+        ]
+        assert plan["trainer_1"] == [
+            [("agent_0", "agent_3")],
+            [("agent_0", "agent_1")],
+        ]
+        assert plan["trainer_2"] == []
+
+    # Test that agent-keyed fields are moved to their agent slots.
+    def test_route_trajectory(self) -> None:
+        agents = ["agent_0", "agent_1"]
+        step = Step(
+            observations={agent: f"obs_{agent}" for agent in agents},
+            actions={agent: f"act_{agent}" for agent in agents},
+            rewards={agent: f"rew_{agent}" for agent in agents},
+            discounts={agent: f"disc_{agent}" for agent in agents},
+            start_of_episode=True,
+            extras={
+                "network_int_keys": {agent: f"net_{agent}" for agent in agents},
+                "env_states": "state",
+            },
+        )
+        routed = route_trajectory(step, [("agent_0", "agent_1")])
+
+        assert type(routed) == Step
+        assert routed.observations == {"agent_0": "obs_agent_1"}
+        assert routed.actions == {"agent_0": "act_agent_1"}
+        assert routed.rewards == {"agent_0": "rew_agent_1"}
+        assert routed.discounts == {"agent_0": "disc_agent_1"}
+        assert routed.start_of_episode
+        assert routed.extras == {
+            "network_int_keys": {"agent_0": "net_agent_1"},
+            "env_states": "state",
+        }
+
+        transition = mava_types.Transition(
+            observations=step.observations,
+            actions=step.actions,
+            rewards=step.rewards,
+            discounts=step.discounts,
+            next_observations={agent: f"next_{agent}" for agent in agents},
+            extras=step.extras,
+            next_extras=step.extras,
+        )
+        routed = route_trajectory(
+            transition, [("agent_0", "agent_1"), ("agent_1", "agent_0")]
+        )
+        assert routed.next_observations == {
+            "agent_0": "next_agent_1",
+            "agent_1": "next_agent_0",
+        }
+        assert routed.next_extras["network_int_keys"] == {
+            "agent_0": "net_agent_1",
+            "agent_1": "net_agent_0",
+        }
@@ -0,0 +1,91 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the in-graph exploration schedules."""
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from mava.components.tf.modules.exploration.exploration_scheduling import (
+    ConstantScheduler,
+    ExponentialExplorationScheduler,
+    ExponentialExplorationTimestepScheduler,
+    LinearExplorationScheduler,
+    LinearExplorationTimestepScheduler,
+)
+from mava.components.tf.networks.epsilon_greedy import EpsilonGreedy
+
+
+class TestEpsilonAt:
+    # Test that the step schedules match the epsilon after as many decrements.
+    @pytest.mark.parametrize(
+        "scheduler_fn", [LinearExplorationScheduler, ExponentialExplorationScheduler]
+    )
+    def test_step_schedules(self, scheduler_fn: type) -> None:
+        scheduler = scheduler_fn(epsilon_start=1.0, epsilon_min=0.05, epsilon_decay=0.1)
+        expected = [scheduler.get_epsilon()]
+        expected += [scheduler.decrement_epsilon() for _ in range(39)]
+
+        epsilons = [scheduler.epsilon_at(tf.constant(step)) for step in range(40)]
+        np.testing.assert_allclose(epsilons, expected, rtol=1e-5)
+
+    # Test that the timestep schedules match the epsilon at every timestep.
+    @pytest.mark.parametrize(
+        "scheduler_fn",
+        [LinearExplorationTimestepScheduler, ExponentialExplorationTimestepScheduler],
+    )
+    def test_timestep_schedules(self, scheduler_fn: type) -> None:
+        scheduler = scheduler_fn(
+            epsilon_decay_steps=20, epsilon_start=0.9, epsilon_min=0.05
+        )
+        expected = [scheduler.decrement_epsilon(time_t) for time_t in range(1, 40)]
+
+        epsilons = [
+            scheduler.epsilon_at(tf.constant(time_t, tf.int64))
+            for time_t in range(1, 40)
+        ]
+        np.testing.assert_allclose(epsilons, expected, rtol=1e-5)
+
+    # Test that the constant schedule ignores the step.
+    def test_constant_schedule(self) -> None:
+        scheduler = ConstantScheduler(epsilon=0.3)
+        assert scheduler.epsilon_at(tf.constant(10)).numpy() == pytest.approx(0.3)
+
+
+class TestEpsilonGreedy:
+    # Test that a compiled step count sets the epsilon of the sampled actions.
+    def test_compiled_step(self) -> None:
+        action_selector = EpsilonGreedy(
+            LinearExplorationScheduler(
+                epsilon_start=1.0, epsilon_min=0.0, epsilon_decay=0.5
+            ),
+            seed=1,
+        )
+        action_values = tf.tile([[0.0, 1.0, 0.0, 0.0]], [1000, 1])
+        legal_actions = tf.ones_like(action_values)
+
+        @tf.function
+        def select_actions(step: tf.Tensor) -> tf.Tensor:
+            return action_selector(action_values, legal_actions, step=step)
+
+        # Epsilon is 0.5 after a single decrement, and 0 after two.
+        greedy = np.mean(select_actions(tf.constant(1)).numpy() == 1)
+        assert 0.55 < greedy < 0.75
+        assert np.all(select_actions(tf.constant(2)).numpy() == 1)
+
+        # The epsilon variable is not decremented by the compiled schedule.
+        assert action_selector.get_epsilon().numpy() == 1.0
+        assert action_selector.epsilon_at(tf.constant(2)).numpy() == 0.0
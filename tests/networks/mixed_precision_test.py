@@ -0,0 +1,62 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the mixed precision networks."""
+
+import numpy as np
+import sonnet as snt
+import tensorflow as tf
+
+from mava.components.tf.networks import MixedPrecisionNetwork
+
+
+class TestMixedPrecisionNetwork:
+    # Test that the outputs match the float32 network within bfloat16 precision.
+    def test_outputs(self) -> None:
+        network = snt.nets.MLP([64, 64, 8])
+        inputs = tf.random.normal((16, 10))
+        expected = network(inputs)
+
+        outputs = MixedPrecisionNetwork(network)(inputs)
+        assert outputs.dtype == tf.float32
+        np.testing.assert_allclose(
+            outputs.numpy(), expected.numpy(), rtol=5e-2, atol=5e-2
+        )
+
+    # Test that the variables and their gradients stay in float32.
+    def test_gradients(self) -> None:
+        network = snt.nets.MLP([64, 1])
+        inputs = tf.random.normal((16, 10))
+        network(inputs)
+        mixed_precision_network = MixedPrecisionNetwork(network)
+
+        with tf.GradientTape(persistent=True) as tape:
+            loss = tf.reduce_mean(tf.square(mixed_precision_network(inputs)))
+            expected_loss = tf.reduce_mean(tf.square(network(inputs)))
+        gradients = tape.gradient(loss, mixed_precision_network.trainable_variables)
+        expected_gradients = tape.gradient(expected_loss, network.trainable_variables)
+
+        assert len(mixed_precision_network.trainable_variables) == len(
+            network.trainable_variables
+        )
+        np.testing.assert_allclose(loss.numpy(), expected_loss.numpy(), rtol=5e-2)
+        for variable, gradient, expected_gradient in zip(
+            network.trainable_variables, gradients, expected_gradients
+        ):
+            assert variable.dtype == tf.float32
+            assert gradient.dtype == tf.float32
+            np.testing.assert_allclose(
+                gradient.numpy(), expected_gradient.numpy(), rtol=1e-1, atol=5e-2
+            )
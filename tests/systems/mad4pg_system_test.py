@@ -243,3 +243,54 @@ class TestMAD4PG:
 
         for _ in range(2):
             trainer.step()
+
+    def test_vectorized_mad4pg_on_debugging_env(self) -> None:
+        """Test mad4pg with the agents of each network vectorized."""
+        # environment
+        environment_factory = functools.partial(
+            debugging_utils.make_environment,
+            env_name="simple_spread",
+            action_space="continuous",
+        )
+
+        # networks
+        network_factory = lp_utils.partial_kwargs(
+            mad4pg.make_default_networks,
+            policy_networks_layer_sizes=(32, 32),
+            vmin=-10,
+            vmax=50,
+        )
+
+        # system
+        system = mad4pg.MAD4PG(
+            environment_factory=environment_factory,
+            network_factory=network_factory,
+            num_executors=1,
+            batch_size=16,
+            min_replay_size=16,
+            max_replay_size=1000,
+            policy_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            critic_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            checkpoint=False,
+            vectorize_agents=True,
+        )
+        program = system.build()
+
+        (trainer_node,) = program.groups["trainer"]
+        trainer_node.disable_run()
+
+        # Launch gpu config - don't use gpu
+        local_resources = lp_utils.to_device(
+            program_nodes=program.groups.keys(), nodes_on_gpu=[]
+        )
+
+        lp.launch(
+            program,
+            launch_type="test_mt",
+            local_resources=local_resources,
+        )
+
+        trainer: mava.Trainer = trainer_node.create_handle().dereference()
+
+        for _ in range(2):
+            trainer.step()
@@ -18,6 +18,7 @@
 import functools
 
 import launchpad as lp
+import pytest
 import sonnet as snt
 
 import mava
@@ -288,3 +289,186 @@ class TestMADDPG:
 
         for _ in range(2):
             trainer.step()
+
+    def test_trainer_n_step_maddpg_on_debugging_env(self) -> None:
+        """Test feedforward maddpg with n-step returns computed by the trainer."""
+
+        # environment
+        environment_factory = functools.partial(
+            debugging_utils.make_environment,
+            env_name="simple_spread",
+            action_space="continuous",
+        )
+
+        # networks
+        network_factory = lp_utils.partial_kwargs(
+            maddpg.make_default_networks, policy_networks_layer_sizes=(64, 64)
+        )
+
+        # system
+        system = maddpg.MADDPG(
+            environment_factory=environment_factory,
+            network_factory=network_factory,
+            num_executors=1,
+            batch_size=32,
+            min_replay_size=32,
+            max_replay_size=1000,
+            policy_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            critic_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            checkpoint=False,
+            n_step=5,
+            trainer_n_step=3,
+        )
+        program = system.build()
+
+        (trainer_node,) = program.groups["trainer"]
+        trainer_node.disable_run()
+
+        # Launch gpu config - don't use gpu
+        local_resources = lp_utils.to_device(
+            program_nodes=program.groups.keys(), nodes_on_gpu=[]
+        )
+
+        lp.launch(
+            program,
+            launch_type="test_mt",
+            local_resources=local_resources,
+        )
+
+        trainer: mava.Trainer = trainer_node.create_handle().dereference()
+
+        for _ in range(2):
+            trainer.step()
+
+    def test_vectorized_maddpg_on_debugging_env(self) -> None:
+        """Test centralised maddpg with the agents of each network vectorized."""
+
+        # environment
+        environment_factory = functools.partial(
+            debugging_utils.make_environment,
+            env_name="simple_spread",
+            action_space="continuous",
+        )
+
+        # networks
+        network_factory = lp_utils.partial_kwargs(
+            maddpg.make_default_networks,
+            policy_networks_layer_sizes=(32, 32),
+        )
+
+        # system
+        system = maddpg.MADDPG(
+            environment_factory=environment_factory,
+            network_factory=network_factory,
+            num_executors=1,
+            batch_size=16,
+            min_replay_size=16,
+            max_replay_size=1000,
+            policy_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            critic_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            checkpoint=False,
+            architecture=architectures.CentralisedQValueCritic,
+            trainer_fn=maddpg.MADDPGCentralisedTrainer,
+            vectorize_agents=True,
+        )
+        program = system.build()
+
+        (trainer_node,) = program.groups["trainer"]
+        trainer_node.disable_run()
+
+        # Launch gpu config - don't use gpu
+        local_resources = lp_utils.to_device(
+            program_nodes=program.groups.keys(), nodes_on_gpu=[]
+        )
+
+        lp.launch(
+            program,
+            launch_type="test_mt",
+            local_resources=local_resources,
+        )
+
+        trainer: mava.Trainer = trainer_node.create_handle().dereference()
+
+        for _ in range(2):
+            trainer.step()
+
+    def test_burn_in_recurrent_maddpg_on_debugging_env(self) -> None:
+        """Test recurrent maddpg with burn in steps."""
+        # environment
+        environment_factory = functools.partial(
+            debugging_utils.make_environment,
+            env_name="simple_spread",
+            action_space="continuous",
+        )
+
+        # networks
+        network_factory = lp_utils.partial_kwargs(
+            maddpg.make_default_networks,
+            architecture_type=ArchitectureType.recurrent,
+            policy_networks_layer_sizes=(32, 32),
+        )
+
+        # system
+        system = maddpg.MADDPG(
+            environment_factory=environment_factory,
+            network_factory=network_factory,
+            num_executors=1,
+            batch_size=16,
+            min_replay_size=16,
+            max_replay_size=1000,
+            policy_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            critic_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+            checkpoint=False,
+            trainer_fn=maddpg.training.MADDPGDecentralisedRecurrentTrainer,
+            executor_fn=maddpg.execution.MADDPGRecurrentExecutor,
+            sequence_length=6,
+            period=4,
+            burn_in_length=2,
+            bootstrap_n=2,
+        )
+        program = system.build()
+
+        (trainer_node,) = program.groups["trainer"]
+        trainer_node.disable_run()
+
+        # Launch gpu config - don't use gpu
+        local_resources = lp_utils.to_device(
+            program_nodes=program.groups.keys(), nodes_on_gpu=[]
+        )
+
+        lp.launch(
+            program,
+            launch_type="test_mt",
+            local_resources=local_resources,
+        )
+
+        trainer: mava.Trainer = trainer_node.create_handle().dereference()
+
+        for _ in range(2):
+            trainer.step()
+
+    def test_stacked_agents_not_supported(self) -> None:
+        """Test that maddpg rejects the stacked agent layout."""
+        # environment
+        environment_factory = functools.partial(
+            debugging_utils.make_environment,
+            env_name="simple_spread",
+            action_space="continuous",
+        )
+
+        # networks
+        network_factory = lp_utils.partial_kwargs(
+            maddpg.make_default_networks, policy_networks_layer_sizes=(64, 64)
+        )
+
+        # system
+        with pytest.raises(ValueError):
+            maddpg.MADDPG(
+                environment_factory=environment_factory,
+                network_factory=network_factory,
+                num_executors=1,
+                policy_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+                critic_optimizer=snt.optimizers.Adam(learning_rate=1e-4),
+                checkpoint=False,
+                stacked_agents=True,
+            )
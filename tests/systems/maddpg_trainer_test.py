@@ -0,0 +1,247 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the MADDPG trainer."""
+
+import copy
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+import reverb
+import sonnet as snt
+import tensorflow as tf
+from acme.tf import networks
+from acme.utils import loggers
+
+from mava import types as mava_types
+from mava.components.tf.networks import MixedPrecisionNetwork
+from mava.systems.tf.maddpg.training import MADDPGDecentralisedTrainer
+from mava.systems.tf.priority_utils import PriorityClient
+
+# Two of the agents share a network.
+AGENT_NET_KEYS = {
+    "agent_0": "network_0",
+    "agent_1": "network_1",
+    "agent_2": "network_0",
+}
+AGENTS = list(AGENT_NET_KEYS.keys())
+NET_KEYS = ["network_0", "network_1"]
+BATCH_SIZE = 8
+OBSERVATION_SIZE = 4
+ACTION_SIZE = 2
+
+
+class PriorityRecorder:
+    """Replay client that records the priority updates of the trainer."""
+
+    def __init__(self) -> None:
+        self.priorities: Dict[int, float] = {}
+
+    def mutate_priorities(self, table: str, updates: Dict[int, float]) -> None:
+        self.priorities.update(updates)
+
+
+def _make_sample(seed: int = 0) -> reverb.ReplaySample:
+    rng = np.random.default_rng(seed)
+
+    def observations() -> Dict[str, mava_types.OLT]:
+        return {
+            agent: mava_types.OLT(
+                observation=rng.normal(size=(BATCH_SIZE, OBSERVATION_SIZE)).astype(
+                    np.float32
+                ),
+                legal_actions=np.ones((BATCH_SIZE, ACTION_SIZE), np.float32),
+                terminal=np.zeros((BATCH_SIZE, 1), np.float32),
+            )
+            for agent in AGENTS
+        }
+
+    transition = mava_types.Transition(
+        observations=observations(),
+        actions={
+            agent: rng.uniform(-1.0, 1.0, (BATCH_SIZE, ACTION_SIZE)).astype(np.float32)
+            for agent in AGENTS
+        },
+        rewards={
+            agent: rng.normal(size=BATCH_SIZE).astype(np.float32) for agent in AGENTS
+        },
+        discounts={agent: np.ones(BATCH_SIZE, np.float32) for agent in AGENTS},
+        next_observations=observations(),
+    )
+    info = reverb.SampleInfo(
+        key=np.arange(BATCH_SIZE, dtype=np.uint64),
+        probability=rng.uniform(0.05, 0.2, BATCH_SIZE),
+        table_size=np.full(BATCH_SIZE, 10, np.int64),
+        priority=np.ones(BATCH_SIZE),
+        times_sampled=np.ones(BATCH_SIZE, np.int32),
+    )
+    return reverb.ReplaySample(info=info, data=transition)
+
+
+def _make_networks() -> Dict[str, Dict[str, snt.Module]]:
+    observations = tf.zeros((1, OBSERVATION_SIZE))
+    actions = tf.zeros((1, ACTION_SIZE))
+    online: Dict[str, Dict[str, snt.Module]] = {
+        "observations": {},
+        "policies": {},
+        "critics": {},
+    }
+    for key in NET_KEYS:
+        observation_network = snt.Sequential([snt.Linear(3), tf.nn.tanh])
+        policy_network = snt.Sequential([snt.Linear(ACTION_SIZE), tf.nn.tanh])
+        critic_network = networks.CriticMultiplexer(critic_network=snt.Linear(1))
+        # Create the variables before the target networks are copied.
+        embedding = observation_network(observations)
+        policy_network(embedding)
+        critic_network(embedding, actions)
+        online["observations"][key] = observation_network
+        online["policies"][key] = policy_network
+        online["critics"][key] = critic_network
+    return {
+        **online,
+        **{f"target_{name}": copy.deepcopy(nets) for name, nets in online.items()},
+    }
+
+
+def _make_trainer(
+    networks: Dict[str, Dict[str, snt.Module]], **kwargs: Any
+) -> MADDPGDecentralisedTrainer:
+    networks = copy.deepcopy(networks)
+    return MADDPGDecentralisedTrainer(
+        agents=AGENTS,
+        policy_networks=networks["policies"],
+        critic_networks=networks["critics"],
+        target_policy_networks=networks["target_policies"],
+        target_critic_networks=networks["target_critics"],
+        policy_optimizer=snt.optimizers.SGD(learning_rate=0.1),
+        critic_optimizer=snt.optimizers.SGD(learning_rate=0.1),
+        discount=0.99,
+        target_averaging=False,
+        target_update_period=100,
+        target_update_rate=0.01,
+        dataset=tf.data.Dataset.from_tensors(_make_sample()).repeat(),
+        observation_networks=networks["observations"],
+        target_observation_networks=networks["target_observations"],
+        variable_client=None,
+        counts={},
+        agent_net_keys=AGENT_NET_KEYS,
+        logger=loggers.NoOpLogger(),
+        **kwargs,
+    )
+
+
+def _variables(trainer: MADDPGDecentralisedTrainer) -> List[np.ndarray]:
+    return [
+        variable.numpy()
+        for key in NET_KEYS
+        for network in (
+            trainer._observation_networks[key],
+            trainer._policy_networks[key],
+            trainer._critic_networks[key],
+        )
+        for variable in network.variables
+    ]
+
+
+def _assert_steps_match(
+    trainer: MADDPGDecentralisedTrainer, expected_trainer: MADDPGDecentralisedTrainer
+) -> None:
+    losses = trainer._step()
+    expected_losses = expected_trainer._step()
+    for agent in AGENTS:
+        for name in ("critic_loss", "policy_loss"):
+            np.testing.assert_allclose(
+                losses[agent][name].numpy(),
+                expected_losses[agent][name].numpy(),
+                rtol=1e-5,
+                atol=1e-6,
+            )
+    for variable, expected in zip(_variables(trainer), _variables(expected_trainer)):
+        np.testing.assert_allclose(variable, expected, rtol=1e-5, atol=1e-6)
+
+
+class TestVectorizedAgents:
+    # Test that the vectorized forward pass updates the networks like the
+    # per-agent forward pass with SGD.
+    def test_matches_per_agent_updates(self) -> None:
+        networks = _make_networks()
+        trainer = _make_trainer(networks, vectorize_agents=True)
+        expected_trainer = _make_trainer(networks)
+
+        # The variables change, and the shared network is trained by both agents.
+        initial = _variables(trainer)
+        _assert_steps_match(trainer, expected_trainer)
+        assert not all(
+            np.allclose(variable, init)
+            for variable, init in zip(_variables(trainer), initial)
+        )
+
+
+class TestGradientAccumulation:
+    # Test that accumulating the gradients of micro-batches gives the losses,
+    # priorities and updates of a single step on the whole batch.
+    @pytest.mark.parametrize("vectorize_agents", [False, True])
+    def test_matches_full_batch(self, vectorize_agents: bool) -> None:
+        networks = _make_networks()
+        recorders = [PriorityRecorder(), PriorityRecorder()]
+        priority_clients = [
+            PriorityClient(recorder, "table", importance_sampling_exponent=0.5)
+            for recorder in recorders
+        ]
+        trainer = _make_trainer(
+            networks,
+            vectorize_agents=vectorize_agents,
+            priority_client=priority_clients[0],
+            accumulation_steps=4,
+        )
+        expected_trainer = _make_trainer(
+            networks,
+            vectorize_agents=vectorize_agents,
+            priority_client=priority_clients[1],
+        )
+
+        _assert_steps_match(trainer, expected_trainer)
+        for priority_client in priority_clients:
+            priority_client.flush()
+        assert sorted(recorders[0].priorities) == list(range(BATCH_SIZE))
+        for key, priority in recorders[1].priorities.items():
+            np.testing.assert_allclose(
+                recorders[0].priorities[key], priority, rtol=1e-5
+            )
+
+
+class TestMixedPrecision:
+    # Test that computing the observation networks in bfloat16 gives losses
+    # close to the float32 trainer.
+    def test_matches_float32_losses(self) -> None:
+        networks = _make_networks()
+        trainer = _make_trainer(networks, mixed_precision=True)
+        expected_trainer = _make_trainer(networks)
+        for key in NET_KEYS:
+            assert isinstance(trainer._observation_networks[key], MixedPrecisionNetwork)
+
+        # The second step uses the variables updated by the first one.
+        for _ in range(2):
+            losses = trainer._step()
+            expected_losses = expected_trainer._step()
+            for agent in AGENTS:
+                for name in ("critic_loss", "policy_loss"):
+                    np.testing.assert_allclose(
+                        losses[agent][name].numpy(),
+                        expected_losses[agent][name].numpy(),
+                        rtol=2e-2,
+                        atol=1e-2,
+                    )
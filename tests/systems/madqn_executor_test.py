@@ -0,0 +1,102 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the MADQN executors."""
+
+import dm_env
+import numpy as np
+import pytest
+import sonnet as snt
+
+from mava import types as mava_types
+from mava.components.tf.modules.exploration.exploration_scheduling import (
+    LinearExplorationScheduler,
+    LinearExplorationTimestepScheduler,
+)
+from mava.components.tf.networks.epsilon_greedy import EpsilonGreedy
+from mava.systems.tf.madqn.execution import MADQNFeedForwardExecutor
+
+# The first agent follows a step schedule and the second a timestep schedule.
+AGENT_NET_KEYS = {"agent_0": "network_0", "agent_1": "network_0"}
+AGENTS = list(AGENT_NET_KEYS.keys())
+OBSERVATION_SIZE = 4
+NUM_ACTIONS = 3
+
+
+def _make_executor() -> MADQNFeedForwardExecutor:
+    return MADQNFeedForwardExecutor(
+        observation_networks={"network_0": snt.Linear(5)},
+        value_networks={"network_0": snt.Linear(NUM_ACTIONS)},
+        action_selectors={
+            "agent_0": EpsilonGreedy(
+                LinearExplorationScheduler(
+                    epsilon_start=1.0, epsilon_min=0.0, epsilon_decay=0.1
+                )
+            ),
+            "agent_1": EpsilonGreedy(
+                LinearExplorationTimestepScheduler(
+                    epsilon_decay_steps=100, epsilon_start=1.0, epsilon_min=0.0
+                )
+            ),
+        },
+        agent_specs={},
+        agent_net_keys=AGENT_NET_KEYS,
+        network_sampling_setup=[],
+        fix_sampler=None,
+        net_keys_to_ids={"network_0": 0},
+        counts={"executor_steps": 50},
+        compiled_exploration=True,
+    )
+
+
+def _observation() -> mava_types.OLT:
+    return mava_types.OLT(
+        observation=np.zeros(OBSERVATION_SIZE, np.float32),
+        legal_actions=np.ones(NUM_ACTIONS, np.float32),
+        terminal=np.zeros(1, np.float32),
+    )
+
+
+class TestCompiledExploration:
+    # Test that the step schedules count the steps of the executor while the
+    # timestep schedules follow the executor steps of the counts.
+    def test_step_and_timestep_schedules(self) -> None:
+        executor = _make_executor()
+        executor._sync_exploration_steps()
+        for _ in range(2):
+            executor.select_actions({agent: _observation() for agent in AGENTS})
+        stats = executor.get_stats()
+        assert stats["agent_0_epsilon"] == pytest.approx(0.8)
+        assert stats["agent_1_epsilon"] == pytest.approx(0.48)
+
+        # A new episode only resets the timestep schedules to the counts.
+        executor._sync_exploration_steps()
+        stats = executor.get_stats()
+        assert stats["agent_0_epsilon"] == pytest.approx(0.8)
+        assert stats["agent_1_epsilon"] == pytest.approx(0.5)
+
+    # Test that the actions selected per agent advance the schedules once per
+    # observed environment step.
+    def test_select_action(self) -> None:
+        executor = _make_executor()
+        observations = {agent: _observation() for agent in AGENTS}
+        actions = {
+            agent: executor.select_action(agent, observation)
+            for agent, observation in observations.items()
+        }
+        assert executor.get_stats()["agent_0_epsilon"] == pytest.approx(1.0)
+
+        executor.observe(actions, next_timestep=dm_env.transition(0.0, observations))
+        assert executor.get_stats()["agent_0_epsilon"] == pytest.approx(0.9)
@@ -0,0 +1,133 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the MADQN trainer."""
+
+import copy
+from typing import Any, Dict
+
+import numpy as np
+import reverb
+import sonnet as snt
+import tensorflow as tf
+from acme.utils import loggers
+
+from mava import types as mava_types
+from mava.components.tf.networks import MixedPrecisionNetwork
+from mava.systems.tf.madqn.training import MADQNTrainer
+
+AGENT_NET_KEYS = {
+    "agent_0": "network_0",
+    "agent_1": "network_1",
+    "agent_2": "network_0",
+}
+AGENTS = list(AGENT_NET_KEYS.keys())
+NET_KEYS = ["network_0", "network_1"]
+BATCH_SIZE = 8
+OBSERVATION_SIZE = 4
+NUM_ACTIONS = 3
+
+
+def _make_sample() -> reverb.ReplaySample:
+    rng = np.random.default_rng(0)
+
+    def observations() -> Dict[str, mava_types.OLT]:
+        return {
+            agent: mava_types.OLT(
+                observation=rng.normal(size=(BATCH_SIZE, OBSERVATION_SIZE)).astype(
+                    np.float32
+                ),
+                legal_actions=np.ones((BATCH_SIZE, NUM_ACTIONS), np.float32),
+                terminal=np.zeros((BATCH_SIZE, 1), np.float32),
+            )
+            for agent in AGENTS
+        }
+
+    transition = mava_types.Transition(
+        observations=observations(),
+        actions={
+            agent: rng.integers(0, NUM_ACTIONS, BATCH_SIZE).astype(np.int32)
+            for agent in AGENTS
+        },
+        rewards={
+            agent: rng.normal(size=BATCH_SIZE).astype(np.float32) for agent in AGENTS
+        },
+        discounts={agent: np.ones(BATCH_SIZE, np.float32) for agent in AGENTS},
+        next_observations=observations(),
+    )
+    info = reverb.SampleInfo(
+        key=np.arange(BATCH_SIZE, dtype=np.uint64),
+        probability=np.full(BATCH_SIZE, 0.1),
+        table_size=np.full(BATCH_SIZE, 10, np.int64),
+        priority=np.ones(BATCH_SIZE),
+        times_sampled=np.ones(BATCH_SIZE, np.int32),
+    )
+    return reverb.ReplaySample(info=info, data=transition)
+
+
+def _make_trainer(**kwargs: Any) -> MADQNTrainer:
+    # The same initial variables for every trainer.
+    tf.random.set_seed(0)
+    observation_networks = {}
+    value_networks = {}
+    for key in NET_KEYS:
+        observation_networks[key] = snt.Sequential([snt.Linear(8), tf.nn.tanh])
+        value_networks[key] = snt.Linear(NUM_ACTIONS)
+        value_networks[key](observation_networks[key](tf.zeros((1, OBSERVATION_SIZE))))
+    return MADQNTrainer(
+        agents=AGENTS,
+        agent_types=NET_KEYS,
+        value_networks=value_networks,
+        target_value_networks=copy.deepcopy(value_networks),
+        optimizer=snt.optimizers.SGD(learning_rate=0.1),
+        discount=0.99,
+        target_averaging=False,
+        target_update_period=100,
+        target_update_rate=0.01,
+        dataset=tf.data.Dataset.from_tensors(_make_sample()).repeat(),
+        observation_networks=observation_networks,
+        target_observation_networks=copy.deepcopy(observation_networks),
+        variable_client=None,
+        counts={},
+        agent_net_keys=AGENT_NET_KEYS,
+        logger=loggers.NoOpLogger(),
+        **kwargs,
+    )
+
+
+class TestMixedPrecision:
+    # Test that computing the observation networks in bfloat16 gives losses
+    # close to the float32 trainer.
+    def test_matches_float32_losses(self) -> None:
+        trainer = _make_trainer(mixed_precision=True)
+        expected_trainer = _make_trainer()
+        for key in NET_KEYS:
+            assert isinstance(trainer._observation_networks[key], MixedPrecisionNetwork)
+            np.testing.assert_array_equal(
+                trainer._value_networks[key].w.numpy(),
+                expected_trainer._value_networks[key].w.numpy(),
+            )
+
+        # The second step uses the variables updated by the first one.
+        for _ in range(2):
+            losses = trainer._step()
+            expected_losses = expected_trainer._step()
+            for agent in AGENTS:
+                np.testing.assert_allclose(
+                    losses[agent]["value_loss"].numpy(),
+                    expected_losses[agent]["value_loss"].numpy(),
+                    rtol=2e-2,
+                    atol=1e-2,
+                )
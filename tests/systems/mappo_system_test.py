@@ -18,6 +18,7 @@
 import functools
 
 import launchpad as lp
+import pytest
 import sonnet as snt
 
 import mava
@@ -74,3 +75,29 @@ class TestMAPPO:
 
         for _ in range(2):
             trainer.step()
+
+    def test_stacked_agents_not_supported(self) -> None:
+        """Test that mappo rejects the stacked agent layout."""
+        # environment
+        environment_factory = functools.partial(
+            debugging_utils.make_environment,
+            env_name="simple_spread",
+            action_space="discrete",
+        )
+
+        # networks
+        network_factory = lp_utils.partial_kwargs(
+            mappo.make_default_networks, policy_networks_layer_sizes=(64, 64)
+        )
+
+        # system
+        with pytest.raises(ValueError):
+            mappo.MAPPO(
+                environment_factory=environment_factory,
+                network_factory=network_factory,
+                num_executors=1,
+                policy_optimizer=snt.optimizers.Adam(learning_rate=1e-3),
+                critic_optimizer=snt.optimizers.Adam(learning_rate=1e-3),
+                checkpoint=False,
+                stacked_agents=True,
+            )
@@ -0,0 +1,170 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the MAPPO trainer."""
+
+from typing import Optional
+
+import numpy as np
+import reverb
+import sonnet as snt
+import tensorflow as tf
+import tensorflow_probability as tfp
+from acme.utils import loggers
+
+from mava import types as mava_types
+from mava.adders.reverb.base import Step
+from mava.systems.tf.mappo.training import MAPPOTrainer
+from mava.wrappers.system_trainer_statistics import TrainerStatisticsBase
+
+tfd = tfp.distributions
+
+AGENT_NET_KEYS = {
+    "agent_0": "network_0",
+    "agent_1": "network_1",
+    "agent_2": "network_0",
+}
+AGENTS = list(AGENT_NET_KEYS.keys())
+NET_KEYS = ["network_0", "network_1"]
+BATCH_SIZE = 8
+SEQUENCE_LENGTH = 4
+OBSERVATION_SIZE = 4
+NUM_ACTIONS = 3
+
+
+def _make_sample() -> reverb.ReplaySample:
+    rng = np.random.default_rng(0)
+    shape = (BATCH_SIZE, SEQUENCE_LENGTH)
+    step = Step(
+        observations={
+            agent: mava_types.OLT(
+                observation=rng.normal(size=shape + (OBSERVATION_SIZE,)).astype(
+                    np.float32
+                ),
+                legal_actions=np.ones(shape + (NUM_ACTIONS,), np.float32),
+                terminal=np.zeros(shape + (1,), np.float32),
+            )
+            for agent in AGENTS
+        },
+        actions={
+            agent: {
+                "actions": rng.integers(0, NUM_ACTIONS, shape).astype(np.int32),
+                "log_probs": np.full(shape, np.log(1.0 / NUM_ACTIONS), np.float32),
+            }
+            for agent in AGENTS
+        },
+        rewards={agent: rng.normal(size=shape).astype(np.float32) for agent in AGENTS},
+        discounts={agent: np.ones(shape, np.float32) for agent in AGENTS},
+        start_of_episode=np.zeros(shape, bool),
+        extras={},
+    )
+    info = reverb.SampleInfo(
+        key=np.arange(BATCH_SIZE, dtype=np.uint64),
+        probability=np.full(BATCH_SIZE, 0.1),
+        table_size=np.full(BATCH_SIZE, 10, np.int64),
+        priority=np.ones(BATCH_SIZE),
+        times_sampled=np.ones(BATCH_SIZE, np.int32),
+    )
+    return reverb.ReplaySample(info=info, data=step)
+
+
+def _make_dataset() -> tf.data.Dataset:
+    # The times sampled of the items is the index of the batch in the dataset.
+    sample = _make_sample()
+    return tf.data.Dataset.range(100).map(
+        lambda index: sample._replace(
+            info=sample.info._replace(
+                times_sampled=tf.fill([BATCH_SIZE], tf.cast(index, tf.int32))
+            )
+        )
+    )
+
+
+def _make_trainer(
+    num_epochs: int, minibatch_size: int, dataset: Optional[tf.data.Dataset] = None
+) -> MAPPOTrainer:
+    observation_networks = {}
+    policy_networks = {}
+    critic_networks = {}
+    for key in NET_KEYS:
+        observation_networks[key] = snt.Linear(5)
+        policy_networks[key] = snt.Sequential(
+            [snt.Linear(NUM_ACTIONS), lambda logits: tfd.Categorical(logits=logits)]
+        )
+        critic_networks[key] = snt.Linear(1)
+        # Create the variables, which the trainer expects.
+        embedding = observation_networks[key](tf.zeros((1, OBSERVATION_SIZE)))
+        policy_networks[key](embedding)
+        critic_networks[key](embedding)
+    return MAPPOTrainer(
+        agents=AGENTS,
+        observation_networks=observation_networks,
+        policy_networks=policy_networks,
+        critic_networks=critic_networks,
+        dataset=iter(dataset or tf.data.Dataset.from_tensors(_make_sample()).repeat()),
+        counts={},
+        policy_optimizer=snt.optimizers.Adam(learning_rate=1e-3),
+        critic_optimizer=snt.optimizers.Adam(learning_rate=1e-3),
+        variable_client=None,
+        agent_net_keys=AGENT_NET_KEYS,
+        minibatch_size=minibatch_size,
+        num_epochs=num_epochs,
+        logger=loggers.NoOpLogger(),
+    )
+
+
+class TestEpochsUpdate:
+    # Test that the compiled epochs create the Adam variables and run every
+    # minibatch, including a partial last minibatch.
+    def test_epochs_with_partial_minibatch(self) -> None:
+        trainer = _make_trainer(num_epochs=3, minibatch_size=3)
+        initial = [
+            variable.numpy()
+            for variable in trainer._policy_networks["network_1"].variables
+        ]
+
+        for step in range(1, 3):
+            losses = trainer._step()
+            for agent in AGENTS:
+                for loss in losses[agent].values():
+                    assert np.isfinite(loss.numpy())
+
+            # Three minibatches of 3, 3 and 2 items in each of the 3 epochs. The
+            # optimizers of network_0 are applied once for each of its two agents.
+            num_updates = 3 * 3 * step
+            for key, num_agents in (("network_0", 2), ("network_1", 1)):
+                for optimizers in (
+                    trainer._policy_optimizers,
+                    trainer._critic_optimizers,
+                ):
+                    assert optimizers[key].step.numpy() == num_updates * num_agents
+
+        assert not all(
+            np.allclose(variable.numpy(), init)
+            for variable, init in zip(
+                trainer._policy_networks["network_1"].variables, initial
+            )
+        )
+
+
+class TestStepsPerCall:
+    # Test that every compiled call of several steps samples new batches.
+    def test_compiled_steps_sample_new_batches(self) -> None:
+        trainer = _make_trainer(num_epochs=1, minibatch_size=4, dataset=_make_dataset())
+        wrapper = TrainerStatisticsBase(trainer, steps_per_call=2)  # type: ignore
+
+        for _ in range(2):
+            wrapper._run_steps()
+        assert next(trainer._iterator).info.times_sampled.numpy()[0] == 4
@@ -0,0 +1,79 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the prioritized replay utilities."""
+
+import numpy as np
+import tensorflow as tf
+
+from mava.adders.numpy import NumpyReplayClient, NumpyReplayTable
+from mava.systems.tf.priority_utils import PriorityClient
+from mava.utils.training_utils import importance_sampling_weights, sequence_priorities
+
+
+def _make_client(num_items: int) -> NumpyReplayClient:
+    table = NumpyReplayTable("table", max_size=num_items, sampler="prioritized")
+    for i in range(num_items):
+        table.insert(np.float32(i), priority=1.0)
+    return NumpyReplayClient([table])
+
+
+class TestPriorityClient:
+    # Test that the updates are buffered and sent once per update period.
+    def test_batched_updates(self) -> None:
+        client = _make_client(4)
+        table = client.tables["table"]
+        priority_client = PriorityClient(client, "table", update_period=2)
+
+        @tf.function
+        def step(keys: tf.Tensor, priorities: tf.Tensor) -> None:
+            priority_client.update(keys, priorities)
+
+        step(tf.constant([0, 1], tf.uint64), tf.constant([0.0, 2.0]))
+        np.testing.assert_array_equal(table.sample(4).priorities, 1.0)
+
+        step(tf.constant([1, 2], tf.uint64), tf.constant([3.0, 4.0]))
+        priority_client.flush()
+        # The latest update of each item is kept and priorities are clipped.
+        sample = table.sample(100)
+        priorities = dict(zip(sample.keys.tolist(), sample.priorities.tolist()))
+        assert priorities[1] == 3.0
+        assert priorities[2] == 4.0
+        assert priorities[3] == 1.0
+        assert priorities.get(0, 1e-6) == 1e-6
+
+
+class TestImportanceSamplingWeights:
+    # Test that the weights correct for the sampling probabilities.
+    def test_weights(self) -> None:
+        probabilities = tf.constant([0.5, 0.25, 0.25])
+        table_size = tf.constant([4, 4, 4], tf.int64)
+
+        weights = importance_sampling_weights(probabilities, table_size, 1.0)
+        np.testing.assert_allclose(weights.numpy(), [0.5, 1.0, 1.0])
+
+        # An exponent of zero applies no correction.
+        weights = importance_sampling_weights(probabilities, table_size, 0.0)
+        np.testing.assert_allclose(weights.numpy(), [1.0, 1.0, 1.0])
+
+    # Test that sequence priorities mix the max and mean over valid steps.
+    def test_sequence_priorities(self) -> None:
+        td_errors = tf.constant([[1.0, -2.0], [3.0, 4.0], [5.0, 0.0]])
+        mask = tf.constant([[1.0, 1.0], [1.0, 1.0], [1.0, 0.0]])
+
+        priorities = sequence_priorities(td_errors, mask, time_axis=0, eta=0.5)
+        np.testing.assert_allclose(
+            priorities.numpy(), [0.5 * 5.0 + 0.5 * 3.0, 0.5 * 4.0 + 0.5 * 3.0]
+        )
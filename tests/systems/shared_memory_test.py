@@ -0,0 +1,89 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the shared-memory variable store."""
+
+import numpy as np
+import tensorflow as tf
+
+from mava.systems.tf.shared_memory import (
+    SharedMemoryVariables,
+    make_shared_memory_prefix,
+)
+
+
+def _make_variables() -> dict:
+    return {
+        "agent_policies": (
+            tf.Variable(np.zeros((3, 2), dtype=np.float32)),
+            tf.Variable(np.zeros((2,), dtype=np.float32)),
+        ),
+        "agent_observations": (),
+        "trainer_steps": tf.Variable(0, dtype=tf.int32),
+    }
+
+
+class TestSharedMemoryVariables:
+    # Test that a reader sees what the writer published.
+    def test_write_and_read(self) -> None:
+        prefix = make_shared_memory_prefix()
+        writer = SharedMemoryVariables(prefix, _make_variables(), create=True)
+        reader = SharedMemoryVariables(prefix, _make_variables())
+        try:
+            reader.attach(["agent_policies", "agent_observations", "trainer_steps"])
+            assert reader.has_key("agent_policies")
+            assert reader.has_key("trainer_steps")
+            # Keys without variables are not stored in shared memory.
+            assert not reader.has_key("agent_observations")
+
+            weights = (
+                np.arange(6, dtype=np.float32).reshape(3, 2),
+                np.ones((2,), dtype=np.float32),
+            )
+            writer.write("agent_policies", weights)
+            writer.write("trainer_steps", np.int32(7))
+
+            read_weights = reader.read("agent_policies")
+            assert isinstance(read_weights, tuple)
+            for expected, value in zip(weights, read_weights):
+                assert np.array_equal(expected, value)
+
+            read_steps = reader.read("trainer_steps")
+            assert type(read_steps) == np.int32
+            assert read_steps == 7
+        finally:
+            reader.close()
+            writer.close()
+
+    # Test that keys without a segment fall back to None (RPC).
+    def test_missing_segment(self) -> None:
+        reader = SharedMemoryVariables(make_shared_memory_prefix(), _make_variables())
+        reader.attach(["agent_policies"])
+        assert not reader.has_key("agent_policies")
+        assert reader.read("agent_policies") is None
+
+    # Test that a read during a write is not returned.
+    def test_read_during_write(self) -> None:
+        prefix = make_shared_memory_prefix()
+        writer = SharedMemoryVariables(prefix, _make_variables(), create=True)
+        reader = SharedMemoryVariables(prefix, _make_variables(), max_read_retries=3)
+        try:
+            reader.attach(["trainer_steps"])
+            # Simulate a writer that is half way through an update.
+            writer._version(writer._segments["trainer_steps"])[0] += 1
+            assert reader.read("trainer_steps") is None
+        finally:
+            reader.close()
+            writer.close()
@@ -0,0 +1,137 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the scheduling of co-hosted trainers."""
+
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+import pytest
+import reverb
+
+from mava.systems.tf.trainer_scheduling import CoHostedTrainers, share_networks
+
+TRAINER_IDS = ["trainer_0", "trainer_1"]
+
+
+class SamplingTrainer:
+    """Trainer that samples a single item from its table every step."""
+
+    def __init__(self, client: reverb.Client, table: str, steps: List[str]) -> None:
+        self._client = client
+        self._table = table
+        self._steps = steps
+
+    def step(self) -> None:
+        list(self._client.sample(self._table, num_samples=1))
+        self._steps.append(self._table)
+
+    def after_trainer_step(self) -> None:
+        pass
+
+    def get_variables(self, names: Sequence[str]) -> Dict[str, Dict[str, np.ndarray]]:
+        return {name: {self._table: np.zeros(1)} for name in names}
+
+
+@pytest.fixture
+def server() -> Iterator[reverb.Server]:
+    server = reverb.Server(
+        [reverb.Table.queue(trainer_id, max_size=10) for trainer_id in TRAINER_IDS]
+    )
+    yield server
+    server.stop()
+
+
+class TestCoHostedTrainers:
+    # Test that the trainer whose table has the most samples is stepped first.
+    def test_schedule(self, server: reverb.Server) -> None:
+        client = reverb.Client(f"localhost:{server.port}")
+        steps: List[str] = []
+        trainers = CoHostedTrainers(
+            {
+                trainer_id: SamplingTrainer(client, trainer_id, steps)
+                for trainer_id in TRAINER_IDS
+            },
+            client,
+        )
+
+        # Only the second table has items.
+        for _ in range(2):
+            client.insert(np.float32(0.0), {"trainer_1": 1.0})
+        trainers.step()
+        assert steps == ["trainer_1"]
+
+        # The tables have 3 and 1 items, then 2 and 1, then 1 and 1, which is
+        # broken round robin, then 1 and 0.
+        for _ in range(3):
+            client.insert(np.float32(0.0), {"trainer_0": 1.0})
+        for _ in range(4):
+            trainers.step()
+            trainers.after_trainer_step()
+        assert steps == [
+            "trainer_1",
+            "trainer_0",
+            "trainer_0",
+            "trainer_1",
+            "trainer_0",
+        ]
+
+    # Test that the variables of the trainers are merged.
+    def test_get_variables(self, server: reverb.Server) -> None:
+        client = reverb.Client(f"localhost:{server.port}")
+        trainers = CoHostedTrainers(
+            {
+                trainer_id: SamplingTrainer(client, trainer_id, [])
+                for trainer_id in TRAINER_IDS
+            },
+            client,
+        )
+        variables = trainers.get_variables(["values"])
+        assert sorted(variables["values"].keys()) == TRAINER_IDS
+
+
+class TestShareNetworks:
+    # Test that trainers with disjoint network keys share the created networks,
+    # and that overlapping network keys get another set of networks.
+    def test_share_networks(self) -> None:
+        created: List[Dict[str, Any]] = []
+
+        def create_networks() -> Dict[str, Any]:
+            networks = {
+                "policies": {key: object() for key in ("network_0", "network_1")},
+                "strategy": object(),
+            }
+            created.append(networks)
+            return networks
+
+        trainer_networks = share_networks(
+            {
+                "trainer_0": ["network_0"],
+                "trainer_1": ["network_1"],
+                "trainer_2": ["network_0", "network_1"],
+            },
+            create_networks,
+        )
+
+        assert len(created) == 2
+        assert trainer_networks["trainer_0"] == {
+            "policies": {"network_0": created[0]["policies"]["network_0"]},
+            "strategy": created[0]["strategy"],
+        }
+        assert trainer_networks["trainer_1"] == {
+            "policies": {"network_1": created[0]["policies"]["network_1"]},
+            "strategy": created[0]["strategy"],
+        }
+        assert trainer_networks["trainer_2"] == created[1]
@@ -0,0 +1,172 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the value decomposition trainer."""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import sonnet as snt
+import tensorflow as tf
+import tree
+import trfl
+from acme.utils import loggers
+
+from mava import types as mava_types
+from mava.systems.tf.value_decomposition.training import (
+    ValueDecompositionRecurrentTrainer,
+)
+
+# The agents of the two networks are interleaved in the trainer order.
+AGENT_NET_KEYS = {
+    "agent_0": "network_0",
+    "agent_1": "network_1",
+    "agent_2": "network_0",
+    "agent_3": "network_1",
+}
+AGENTS = list(AGENT_NET_KEYS.keys())
+NET_KEYS = ["network_0", "network_1"]
+SEQUENCE_LENGTH = 3
+BATCH_SIZE = 2
+OBSERVATION_SIZE = 4
+NUM_ACTIONS = 3
+
+
+def _make_networks() -> Dict[str, Dict[str, snt.Module]]:
+    networks: Dict[str, Dict[str, snt.Module]] = {
+        name: {}
+        for name in ("observations", "values", "target_observations", "target_values")
+    }
+    for key in NET_KEYS:
+        for prefix in ("", "target_"):
+            observation_network = snt.Linear(5)
+            value_network = snt.DeepRNN(
+                [snt.Linear(8), tf.nn.relu, snt.GRU(8), snt.Linear(NUM_ACTIONS)]
+            )
+            # Create the variables, which the trainer expects.
+            value_network(
+                observation_network(tf.zeros((1, OBSERVATION_SIZE))),
+                value_network.initial_state(1),
+            )
+            networks[f"{prefix}observations"][key] = observation_network
+            networks[f"{prefix}values"][key] = value_network
+    return networks
+
+
+def _make_inputs(
+    networks: Dict[str, Dict[str, snt.Module]]
+) -> Tuple[Dict[str, mava_types.OLT], Dict[str, tf.Tensor], Dict[str, Any]]:
+    rng = np.random.default_rng(0)
+    shape = (SEQUENCE_LENGTH, BATCH_SIZE)
+    observations = {
+        agent: mava_types.OLT(
+            observation=tf.constant(
+                rng.normal(size=shape + (OBSERVATION_SIZE,)), tf.float32
+            ),
+            legal_actions=tf.constant(
+                rng.integers(0, 2, size=shape + (NUM_ACTIONS,)), tf.float32
+            ),
+            terminal=tf.zeros(shape + (1,)),
+        )
+        for agent in AGENTS
+    }
+    actions = {
+        agent: tf.constant(rng.integers(0, NUM_ACTIONS, size=shape), tf.int64)
+        for agent in AGENTS
+    }
+    # Random core states, so that the states of the agents differ.
+    core_state = {
+        agent: tree.map_structure(
+            lambda state: tf.constant(rng.normal(size=state.shape), tf.float32),
+            networks["values"][AGENT_NET_KEYS[agent]].initial_state(BATCH_SIZE),
+        )
+        for agent in AGENTS
+    }
+    return observations, actions, core_state
+
+
+def _per_agent_q_values(
+    networks: Dict[str, Dict[str, snt.Module]],
+    observations: Dict[str, mava_types.OLT],
+    actions: Dict[str, tf.Tensor],
+    core_state: Dict[str, Any],
+) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Q-values of the agents computed one agent at a time and stacked."""
+    chosen_action_q_values = []
+    max_action_q_values = []
+    for agent in AGENTS:
+        key = AGENT_NET_KEYS[agent]
+        observation = observations[agent].observation
+        q_tm1_values, _ = snt.static_unroll(
+            networks["values"][key],
+            snt.BatchApply(networks["observations"][key])(observation),
+            core_state[agent],
+        )
+        q_t_values, _ = snt.static_unroll(
+            networks["target_values"][key],
+            snt.BatchApply(networks["target_observations"][key])(observation),
+            core_state[agent],
+        )
+        chosen_action_q_values.append(trfl.batched_index(q_tm1_values, actions[agent]))
+        q_t_selector = tf.where(
+            tf.cast(observations[agent].legal_actions, "bool"),
+            q_tm1_values,
+            -999999999,
+        )
+        max_action_q_values.append(
+            trfl.batched_index(q_t_values, tf.argmax(q_t_selector, axis=-1))
+        )
+    return (
+        tf.stack(chosen_action_q_values, axis=-1),
+        tf.stack(max_action_q_values, axis=-1),
+    )
+
+
+class TestAgentQValues:
+    # Test that folding the agents of each network into the batch gives the
+    # per-agent Q-values, in the order of the agents expected by the mixer.
+    def test_matches_per_agent_q_values(self) -> None:
+        networks = _make_networks()
+        trainer = ValueDecompositionRecurrentTrainer(
+            agents=AGENTS,
+            agent_types=NET_KEYS,
+            value_networks=networks["values"],
+            target_value_networks=networks["target_values"],
+            optimizer=snt.optimizers.SGD(learning_rate=0.1),
+            discount=0.99,
+            target_averaging=False,
+            target_update_period=100,
+            target_update_rate=0.01,
+            dataset=tf.data.Dataset.range(1).repeat(),
+            observation_networks=networks["observations"],
+            target_observation_networks=networks["target_observations"],
+            variable_client=None,
+            counts={},
+            agent_net_keys=AGENT_NET_KEYS,
+            logger=loggers.NoOpLogger(),
+        )
+        observations, actions, core_state = _make_inputs(networks)
+
+        q_values = trainer._agent_q_values(
+            observations, actions, core_state, core_state
+        )
+        expected_q_values = _per_agent_q_values(
+            networks, observations, actions, core_state
+        )
+        for values, expected in zip(q_values, expected_q_values):
+            assert values.shape == (SEQUENCE_LENGTH, BATCH_SIZE, len(AGENTS))
+            np.testing.assert_allclose(
+                values.numpy(), expected.numpy(), rtol=1e-5, atol=1e-6
+            )
@@ -0,0 +1,70 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the replay memory budget."""
+
+import pytest
+import tensorflow as tf
+
+from mava.utils import builder_utils
+
+# An item of 2 * 84 * 84 uint8 values and 4 float32 values.
+SIGNATURE = {
+    "observations": {
+        "agent_0": tf.TensorSpec((84, 84), tf.uint8),
+        "agent_1": tf.TensorSpec((84, 84), tf.uint8),
+    },
+    "rewards": tf.TensorSpec((4,), tf.float32),
+}
+ITEM_NBYTES = 2 * 84 * 84 + 4 * 4
+
+
+class TestReplayBudget:
+    # Test that the size of an item is computed from the signature.
+    def test_estimate_item_nbytes(self) -> None:
+        assert builder_utils.estimate_item_nbytes(SIGNATURE) == ITEM_NBYTES
+
+        with pytest.raises(ValueError):
+            builder_utils.estimate_item_nbytes(tf.TensorSpec((None, 3), tf.float32))
+
+    # Test that the budget is shared by the tables.
+    def test_replay_table_max_size(self) -> None:
+        assert builder_utils.replay_table_max_size(SIGNATURE, 1000) == 1000
+        assert (
+            builder_utils.replay_table_max_size(SIGNATURE, 1000, 100 * ITEM_NBYTES)
+            == 100
+        )
+        assert (
+            builder_utils.replay_table_max_size(
+                SIGNATURE, 1000, 100 * ITEM_NBYTES, num_tables=4
+            )
+            == 25
+        )
+        # The budget only lowers max_replay_size.
+        assert (
+            builder_utils.replay_table_max_size(SIGNATURE, 10, 100 * ITEM_NBYTES) == 10
+        )
+
+        with pytest.raises(ValueError):
+            builder_utils.replay_table_max_size(SIGNATURE, 1000, ITEM_NBYTES - 1)
+
+    # Test that the report lists the footprint of each table.
+    def test_replay_memory_report(self) -> None:
+        report = builder_utils.replay_memory_report(
+            {"trainer_0": (1024, 1024), "trainer_1": (512, 2048)}
+        )
+        assert "trainer_0: 1024 items of 1.0 KiB = 1.0 MiB" in report
+        assert "trainer_1: 2048 items of 512.0 B = 1.0 MiB" in report
+        assert "total: 2.0 MiB" in report
@@ -0,0 +1,133 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the trainer profiling utils."""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+import tensorflow as tf
+
+from mava.utils import profiling_utils
+
+
+class TestPhaseTimer:
+    # Test that the eager phases are timed per step and reset when popped.
+    def test_eager_phases(self) -> None:
+        timer = profiling_utils.PhaseTimer()
+        for _ in range(2):
+            with timer.phase("sample"):
+                time.sleep(0.05)
+
+        times = timer.pop(num_steps=2)
+        assert list(times) == ["sample_time"]
+        assert 0.05 <= times["sample_time"] < 1.0
+        assert timer.pop() == {}
+
+    # Test that the compiled phases are name scopes that are not timed by default.
+    def test_compiled_phases(self) -> None:
+        timer = profiling_utils.PhaseTimer()
+
+        @tf.function
+        def step() -> tf.Tensor:
+            with timer.phase("forward"):
+                return tf.identity(tf.ones(()), name="loss")
+
+        graph = step.get_concrete_function().graph
+        assert "forward/loss" in [op.name for op in graph.get_operations()]
+        assert timer.pop() == {}
+
+    # Test that the compiled phases record their time once they are timed.
+    def test_timed_compiled_phases(self) -> None:
+        timer = profiling_utils.PhaseTimer(["forward"])
+        timer.time_compiled_phases()
+
+        def sleep() -> float:
+            time.sleep(0.05)
+            return 0.0
+
+        @tf.function
+        def step() -> tf.Tensor:
+            with timer.phase("forward"):
+                return tf.py_function(sleep, [], tf.float32)
+
+        for _ in range(2):
+            step()
+
+        times = timer.pop(num_steps=2)
+        assert list(times) == ["forward_time"]
+        assert 0.05 <= times["forward_time"] < 1.0
+        assert timer.pop() == {}
+
+
+class TestTraceWindows:
+    # Test that the traces cover the configured windows of steps.
+    def test_windows(self, tmp_path: Path) -> None:
+        config = profiling_utils.ProfilingConfig(trace_windows=[(2, 4)])
+        windows = profiling_utils.TraceWindows(str(tmp_path), config)
+
+        tracing = []
+        for step in range(6):
+            windows.update(step)
+            tracing.append(windows.tracing)
+        assert tracing == [False, False, True, True, False, False]
+        assert os.listdir(tmp_path / "plugins" / "profile")
+
+    # Test that creating the signal file traces the next signal_steps steps.
+    def test_signal_file(self, tmp_path: Path) -> None:
+        signal_file = tmp_path / "profile_now"
+        config = profiling_utils.ProfilingConfig(
+            signal_file=str(signal_file), signal_steps=2
+        )
+        windows = profiling_utils.TraceWindows(str(tmp_path), config)
+
+        windows.update(0)
+        assert not windows.tracing
+
+        signal_file.touch()
+        tracing = []
+        for step in range(1, 5):
+            windows.update(step)
+            tracing.append(windows.tracing)
+        assert tracing == [True, True, False, False]
+        assert not signal_file.exists()
+
+    # Test that a trace that can not start is skipped.
+    def test_busy_profiler(self, tmp_path: Path) -> None:
+        config = profiling_utils.ProfilingConfig(trace_windows=[(0, 2)])
+        windows = profiling_utils.TraceWindows(str(tmp_path), config)
+
+        tf.profiler.experimental.start(str(tmp_path))
+        try:
+            windows.update(0)
+            assert not windows.tracing
+        finally:
+            tf.profiler.experimental.stop()
+
+        windows.update(1)
+        assert not windows.tracing
+
+    # Test that invalid windows are rejected.
+    def test_invalid_config(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError):
+            profiling_utils.TraceWindows(
+                str(tmp_path), profiling_utils.ProfilingConfig(trace_windows=[(3, 3)])
+            )
+        with pytest.raises(ValueError):
+            profiling_utils.TraceWindows(
+                str(tmp_path), profiling_utils.ProfilingConfig(signal_steps=0)
+            )
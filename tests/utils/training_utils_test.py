@@ -0,0 +1,221 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the trainer utilities."""
+
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pytest
+import sonnet as snt
+import tensorflow as tf
+
+from mava.utils import training_utils as train_utils
+
+
+def _make_variables() -> Tuple[List[tf.Variable], List[tf.Variable]]:
+    shapes_and_dtypes = [((3, 2), tf.float32), ((2,), tf.float64), ((4,), tf.float32)]
+    online = [
+        tf.Variable(tf.random.normal(shape, dtype=dtype))
+        for shape, dtype in shapes_and_dtypes
+    ]
+    target = [
+        tf.Variable(tf.random.normal(shape, dtype=dtype))
+        for shape, dtype in shapes_and_dtypes
+    ]
+    return online, target
+
+
+class TestUpdateTargetNetworks:
+    # Test that the averaging moves every target variable towards its online one.
+    def test_target_averaging(self) -> None:
+        online, target = _make_variables()
+        expected = [
+            0.9 * dest.numpy() + 0.1 * src.numpy() for src, dest in zip(online, target)
+        ]
+
+        update = tf.function(train_utils.update_target_networks)
+        update(online, target, tf.Variable(1), True, 100, 0.1)
+
+        for dest, value in zip(target, expected):
+            np.testing.assert_allclose(dest.numpy(), value, rtol=1e-6)
+            assert dest.numpy().dtype == value.dtype
+
+    # Test that the online variables are only copied every update period.
+    def test_periodic_update(self) -> None:
+        online, target = _make_variables()
+        initial = [dest.numpy() for dest in target]
+
+        train_utils.update_target_networks(online, target, tf.Variable(3), False, 2)
+        for dest, value in zip(target, initial):
+            np.testing.assert_array_equal(dest.numpy(), value)
+
+        train_utils.update_target_networks(online, target, tf.Variable(4), False, 2)
+        for dest, src in zip(target, online):
+            np.testing.assert_array_equal(dest.numpy(), src.numpy())
+
+    # Test that an update rate of one copies the online variables.
+    def test_full_update_rate(self) -> None:
+        online, target = _make_variables()
+        train_utils.update_target_networks(
+            online, target, tf.Variable(1), True, 100, 1.0
+        )
+        for dest, src in zip(target, online):
+            np.testing.assert_array_equal(dest.numpy(), src.numpy())
+
+    # Test that invalid update rates and unmatched variables are rejected.
+    def test_invalid_arguments(self) -> None:
+        online, target = _make_variables()
+        with pytest.raises(ValueError):
+            train_utils.update_target_networks(
+                online, target, tf.Variable(0), True, 100, 1.5
+            )
+        with pytest.raises(ValueError):
+            train_utils.update_target_networks(
+                online[:2], target, tf.Variable(0), False, 100
+            )
+
+
+class TestUnrollAgents:
+    # Test that unrolling the agents together matches a per agent static unroll.
+    def test_matches_static_unroll(self) -> None:
+        networks = {"network_0": snt.GRU(4), "network_1": snt.GRU(4)}
+        agent_net_keys = {
+            "agent_0": "network_0",
+            "agent_1": "network_1",
+            "agent_2": "network_0",
+        }
+        inputs = {agent: tf.random.normal((6, 3, 2)) for agent in agent_net_keys}
+        states = {
+            agent: networks[net_key].initial_state(3) + tf.random.normal((3, 4))
+            for agent, net_key in agent_net_keys.items()
+        }
+
+        outputs, final_states = tf.function(train_utils.unroll_agents)(
+            networks, agent_net_keys, inputs, states
+        )
+        for agent, net_key in agent_net_keys.items():
+            expected, expected_state = snt.static_unroll(
+                networks[net_key], inputs[agent], states[agent]
+            )
+            assert outputs[agent].shape == (6, 3, 4)
+            np.testing.assert_allclose(
+                outputs[agent].numpy(), expected.numpy(), rtol=1e-5, atol=1e-6
+            )
+            np.testing.assert_allclose(
+                final_states[agent].numpy(),
+                expected_state.numpy(),
+                rtol=1e-5,
+                atol=1e-6,
+            )
+
+    # Test that the burn in refreshes the states over the first steps.
+    def test_burn_in(self) -> None:
+        network = snt.GRU(4)
+        sequences = {
+            "observations": tf.random.normal((3, 6, 2)),
+            "core_states": tf.zeros((3, 1, 4)),
+        }
+        initial_state = network.initial_state(3)
+
+        burn_in, remaining = train_utils.split_burn_in(sequences, 2, time_axis=1)
+        assert burn_in["observations"].shape == (3, 2, 2)
+        assert remaining["observations"].shape == (3, 4, 2)
+        assert remaining["core_states"].shape == (3, 1, 4)
+
+        burn_in_obs = tf.transpose(burn_in["observations"], [1, 0, 2])
+        states = train_utils.burn_in_core_states(
+            {"network_0": network},
+            {"agent_0": "network_0"},
+            {"agent_0": burn_in_obs},
+            {"agent_0": initial_state},
+        )
+        _, expected_state = snt.static_unroll(network, burn_in_obs, initial_state)
+        np.testing.assert_allclose(
+            states["agent_0"].numpy(), expected_state.numpy(), rtol=1e-5, atol=1e-6
+        )
+
+        with pytest.raises(ValueError):
+            train_utils.split_burn_in(sequences, 6, time_axis=1)
+
+
+class TestTimedNext:
+    # Test that the time waited for the samples accumulates in the variable.
+    def test_stall_time(self) -> None:
+        dataset = tf.data.Dataset.range(3).map(
+            lambda x: tf.py_function(lambda x: (time.sleep(0.05), x)[1], [x], tf.int64)
+        )
+        iterator = iter(dataset)
+        stall_time = tf.Variable(0.0, dtype=tf.float64)
+
+        @tf.function
+        def step() -> tf.Tensor:
+            return train_utils.timed_next(iterator, stall_time)
+
+        assert [step().numpy() for _ in range(3)] == [0, 1, 2]
+        assert 0.15 <= stall_time.numpy() < 1.0
+
+
+class TestGradientAccumulation:
+    # Test that the averaged gradients of the micro-batches match the full batch.
+    def test_matches_full_batch(self) -> None:
+        network = snt.Linear(2)
+        batch = {"x": tf.random.normal((8, 3)), "y": tf.random.normal((8, 2))}
+
+        def gradients(inputs: Dict[str, tf.Tensor]) -> List[tf.Tensor]:
+            with tf.GradientTape() as tape:
+                loss = tf.reduce_mean(tf.square(network(inputs["x"]) - inputs["y"]))
+            return tape.gradient(loss, network.trainable_variables)
+
+        expected = gradients(batch)
+        micro_batches = train_utils.split_batch(batch, 4)
+        accumulated = None
+        for micro_batch in micro_batches:
+            assert micro_batch["x"].shape == (2, 3)
+            accumulated = train_utils.accumulate_gradients(
+                accumulated, gradients(micro_batch), scale=0.25
+            )
+        for gradient, expected_gradient in zip(accumulated, expected):
+            np.testing.assert_allclose(
+                gradient.numpy(), expected_gradient.numpy(), rtol=1e-5, atol=1e-6
+            )
+
+    # Test that the batch size must be divisible by the number of micro-batches.
+    def test_invalid_split(self) -> None:
+        assert train_utils.split_batch(tf.zeros((6, 2)), 1)[0].shape == (6, 2)
+        with pytest.raises(ValueError):
+            train_utils.split_batch(tf.zeros((6, 2)), 4)
+
+
+class TestReplaceAgent:
+    # Test that replacing an agent matches stacking the values again.
+    @pytest.mark.parametrize("index", [0, 1, 2])
+    def test_matches_stack(self, index: int) -> None:
+        values = [tf.random.normal((4, 2)) for _ in range(3)]
+        value = tf.random.normal((4, 2))
+
+        with tf.GradientTape(persistent=True) as tape:
+            tape.watch(value)
+            replaced = train_utils.replace_agent(tf.stack(values, 1), value, index)
+            expected = tf.stack(values[:index] + [value] + values[index + 1 :], 1)
+            loss = tf.reduce_sum(tf.square(replaced))
+            expected_loss = tf.reduce_sum(tf.square(expected))
+
+        np.testing.assert_array_equal(replaced.numpy(), expected.numpy())
+        np.testing.assert_allclose(
+            tape.gradient(loss, value).numpy(),
+            tape.gradient(expected_loss, value).numpy(),
+        )
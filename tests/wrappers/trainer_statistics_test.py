@@ -0,0 +1,243 @@
+# python3
+# Copyright 2021 InstaDeep Ltd. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for running several trainer steps per call."""
+
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+import sonnet as snt
+import tensorflow as tf
+
+from mava.utils import profiling_utils
+from mava.utils import training_utils as train_utils
+from mava.wrappers.system_trainer_statistics import TrainerStatisticsBase
+
+# Split the CPU into two devices for the replicated trainer, which is only possible
+# before TensorFlow is initialised.
+try:
+    tf.config.set_logical_device_configuration(
+        tf.config.list_physical_devices("CPU")[0],
+        [tf.config.LogicalDeviceConfiguration()] * 2,
+    )
+except RuntimeError:
+    pass
+
+
+class CountingTrainer:
+    """Trainer whose loss is the value of the sampled item."""
+
+    def __init__(self) -> None:
+        self._iterator = iter(
+            tf.data.Dataset.range(100).map(lambda x: tf.cast(x, tf.float32))
+        )
+        self.num_steps = tf.Variable(0)
+
+    @tf.function
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        sample = next(self._iterator)
+        self.num_steps.assign_add(1)
+        return {"agent_0": {"policy_loss": sample}}
+
+
+class StallingTrainer:
+    """Trainer whose dataset takes time to produce every sample."""
+
+    def __init__(self) -> None:
+        self._iterator = iter(
+            tf.data.Dataset.range(100).map(
+                lambda x: tf.py_function(
+                    lambda x: (time.sleep(0.05), float(x))[1], [x], tf.float32
+                )
+            )
+        )
+        self._input_stall_time = tf.Variable(0.0, dtype=tf.float64)
+
+    @tf.function
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        sample = train_utils.timed_next(self._iterator, self._input_stall_time)
+        return {"agent_0": {"policy_loss": sample}}
+
+
+class ProfiledTrainer:
+    """Trainer whose steps run eagerly, so their phases are timed."""
+
+    def __init__(self) -> None:
+        self._iterator = iter(tf.data.Dataset.range(100))
+        self._phase_timer = profiling_utils.PhaseTimer()
+
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        with self._phase_timer.phase("sample"):
+            sample = next(self._iterator)
+        with self._phase_timer.phase("forward"):
+            time.sleep(0.05)
+            loss = tf.cast(sample, tf.float32)
+        return {"agent_0": {"policy_loss": loss}}
+
+
+class CompiledProfiledTrainer:
+    """Trainer whose steps are compiled, so their phases are timed in-graph."""
+
+    def __init__(self) -> None:
+        self._iterator = iter(tf.data.Dataset.range(100))
+        self._phase_timer = profiling_utils.PhaseTimer(["forward"])
+
+    @tf.function
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        def forward(x: tf.Tensor) -> float:
+            time.sleep(0.05)
+            return float(x)
+
+        sample = next(self._iterator)
+        with self._phase_timer.phase("forward"):
+            loss = tf.py_function(forward, [sample], tf.float32)
+        return {"agent_0": {"policy_loss": loss}}
+
+
+class ReplicatedTrainer:
+    """Trainer with the loss w * x, whose gradient is the sampled item x."""
+
+    def __init__(self) -> None:
+        self._iterator = iter(
+            tf.data.Dataset.range(100).map(lambda x: tf.cast(x, tf.float32))
+        )
+        self.weight = tf.Variable(1.0)
+        self._optimizer = snt.optimizers.SGD(learning_rate=1.0)
+
+    @tf.function
+    def _step(self) -> Dict[str, Dict[str, Any]]:
+        return self._step_fn()
+
+    def _step_fn(self) -> Dict[str, Dict[str, Any]]:
+        sample = next(self._iterator)
+        with tf.GradientTape() as tape:
+            loss = self.weight * sample
+        gradients = tape.gradient(loss, [self.weight])
+        gradients = train_utils.all_reduce_gradients(gradients)
+        self._optimizer.apply(gradients, [self.weight])
+        return {"agent_0": {"policy_loss": loss}}
+
+
+class TestStepsPerCall:
+    # Test that every call runs steps_per_call steps and averages their losses.
+    def test_compiled_steps(self) -> None:
+        trainer = CountingTrainer()
+        wrapper = TrainerStatisticsBase(trainer, steps_per_call=4)  # type: ignore
+
+        fetches = wrapper._run_steps()
+        assert trainer.num_steps.numpy() == 4
+        assert fetches["agent_0"]["policy_loss"].numpy() == pytest.approx(1.5)
+
+        fetches = wrapper._run_steps()
+        assert trainer.num_steps.numpy() == 8
+        assert fetches["agent_0"]["policy_loss"].numpy() == pytest.approx(5.5)
+
+    # Test that a single step per call runs the trainer step directly.
+    def test_single_step(self) -> None:
+        trainer = CountingTrainer()
+        wrapper = TrainerStatisticsBase(trainer)  # type: ignore
+
+        fetches = wrapper._run_steps()
+        assert trainer.num_steps.numpy() == 1
+        assert fetches["agent_0"]["policy_loss"].numpy() == 0.0
+
+        with pytest.raises(ValueError):
+            TrainerStatisticsBase(trainer, steps_per_call=0)  # type: ignore
+
+
+class TestInputStallTime:
+    # Test that the time waited for the dataset is reported per step and reset.
+    def test_stall_time(self) -> None:
+        trainer = StallingTrainer()
+        wrapper = TrainerStatisticsBase(trainer, steps_per_call=2)  # type: ignore
+
+        wrapper._run_steps()
+        stall_time = wrapper._pop_input_stall_time()["input_stall_time"]
+        assert 0.05 <= stall_time < 1.0
+        assert trainer._input_stall_time.numpy() == 0.0
+
+        # Trainers that do not record the stall time report nothing.
+        assert TrainerStatisticsBase(CountingTrainer())._pop_input_stall_time() == {}
+
+
+class TestProfiling:
+    # Test that the phases are reported per step and the trace windows are captured.
+    def test_phase_times(self, tmp_path: Path) -> None:
+        profiling = profiling_utils.ProfilingConfig(
+            trace_windows=[(0, 1)], logdir=str(tmp_path)
+        )
+        wrapper = TrainerStatisticsBase(
+            ProfiledTrainer(), profiling=profiling  # type: ignore
+        )
+
+        wrapper._run_steps()
+        assert wrapper._trace_windows.tracing  # type: ignore
+        wrapper._run_steps()
+        assert not wrapper._trace_windows.tracing  # type: ignore
+        assert (tmp_path / "plugins" / "profile").exists()
+
+        times = wrapper._pop_phase_times()
+        assert set(times) == {"train_steps_time", "sample_time", "forward_time"}
+        assert 0.05 <= times["forward_time"] < 1.0
+        assert times["train_steps_time"] >= times["forward_time"]
+        assert wrapper._pop_phase_times() == {}
+
+        # The phase times are only reported when profiling.
+        wrapper = TrainerStatisticsBase(ProfiledTrainer())  # type: ignore
+        wrapper._run_steps()
+        assert wrapper._pop_phase_times() == {}
+
+    # Test that the phases of compiled steps are timed when profiling.
+    def test_compiled_phase_times(self, tmp_path: Path) -> None:
+        profiling = profiling_utils.ProfilingConfig(logdir=str(tmp_path))
+        wrapper = TrainerStatisticsBase(
+            CompiledProfiledTrainer(), profiling=profiling  # type: ignore
+        )
+
+        wrapper._run_steps()
+        times = wrapper._pop_phase_times()
+        assert set(times) == {"train_steps_time", "forward_time"}
+        assert 0.05 <= times["forward_time"] < 1.0
+        assert times["train_steps_time"] >= times["forward_time"]
+
+
+class TestReplicatedSteps:
+    # Test that every replica samples its own item and applies the averaged update.
+    def test_replicated_steps(self) -> None:
+        try:
+            replicator = train_utils.make_trainer_replicator(2)
+        except ValueError:
+            pytest.skip("TensorFlow was initialised with a single device.")
+
+        with replicator.scope():
+            trainer = ReplicatedTrainer()
+            wrapper = TrainerStatisticsBase(trainer, steps_per_call=2)  # type: ignore
+
+        # The replicas sample 0 and 1 with the weight 1.
+        fetches = wrapper._run_steps()
+        assert fetches["agent_0"]["policy_loss"].numpy() == pytest.approx(0.5)
+        np.testing.assert_allclose(
+            [value.numpy() for value in trainer.weight.values], [0.5, 0.5]
+        )
+
+        # The replicas sample 2 and 3 with the weight 0.5, then 4 and 5 with -2.
+        fetches = wrapper._run_steps()
+        assert fetches["agent_0"]["policy_loss"].numpy() == pytest.approx(-3.875)
+        np.testing.assert_allclose(
+            [value.numpy() for value in trainer.weight.values], [-6.5, -6.5]
+        )